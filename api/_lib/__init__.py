@@ -0,0 +1,6 @@
+"""
+Shared helpers for the EduSense Python serverless functions.
+
+Vercel skips paths that start with an underscore, so nothing in this
+package is deployed as an endpoint of its own.
+"""
@@ -0,0 +1,415 @@
+"""
+Adaptive difficulty from Elo-style ability and question difficulty estimates
+
+Every (user, topic) pair has an ability and every question a difficulty
+on the same logit scale of the one-parameter (Rasch) IRT model: the
+chance of a correct answer is sigmoid(ability - difficulty). Quiz results
+update both with one Elo step per answer, in quiz order, whose step size
+shrinks as the estimate accumulates evidence. A recommendation is a single row lookup:
+the quiz difficulty whose expected accuracy is closest to the target.
+
+Estimates are kept as NumPy arrays in memory and as rows in SQLite, next
+to an adaptive_difficulty_history table laid out like the Supabase table
+of the same name, whose performance_data holds each quiz's answers.
+refit() re-estimates every ability and difficulty from that history with
+a few vectorised Newton passes over all answers at once.
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'edusense-ability.sqlite3')
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Starting difficulty of a question, by the quiz level it was generated for
+DIFFICULTY_PRIORS = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+
+# Quizzes are most useful when students get about this share right
+TARGET_ACCURACY = 0.7
+
+# Elo step size: K_MAX for a new estimate, shrinking towards K_MIN with evidence
+K_MAX = 0.4
+K_MIN = 0.05
+K_HALF_LIFE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS adaptive_difficulty_history (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    previous_difficulty TEXT NOT NULL,
+    recommended_difficulty TEXT NOT NULL,
+    confidence REAL DEFAULT 0.5,
+    reasoning TEXT,
+    performance_data TEXT DEFAULT '{}',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_adaptive_difficulty_user_id ON adaptive_difficulty_history(user_id);
+CREATE INDEX IF NOT EXISTS idx_adaptive_difficulty_topic ON adaptive_difficulty_history(topic);
+CREATE INDEX IF NOT EXISTS idx_adaptive_difficulty_created_at ON adaptive_difficulty_history(created_at);
+CREATE TABLE IF NOT EXISTS ability_estimates (
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    ability REAL NOT NULL,
+    responses INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, topic)
+);
+CREATE TABLE IF NOT EXISTS question_estimates (
+    question_key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    prior REAL NOT NULL,
+    difficulty REAL NOT NULL,
+    responses INTEGER NOT NULL
+);
+"""
+
+
+def sigmoid(x):
+    """Logistic function, safe for large magnitudes"""
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+def step_size(responses):
+    """Elo K for an estimate backed by this many answers"""
+    return np.maximum(K_MIN, K_MAX / (1.0 + np.asarray(responses, dtype=np.float64) / K_HALF_LIFE))
+
+
+def estimate_confidence(responses):
+    """0..1 confidence in an ability estimate backed by this many answers"""
+    return round(min(0.95, 1.0 - 1.0 / math.sqrt(1.0 + 0.25 * responses)), 2)
+
+
+def question_key(topic, question):
+    """Stable key for a question: its id, or a hash of topic and text"""
+    if isinstance(question, dict):
+        if question.get('id') not in (None, ''):
+            return str(question['id'])
+        question = question.get('question', '')
+    text = ' '.join(str(question).lower().split())
+    return hashlib.sha1(f'{str(topic).lower()}\0{text}'.encode('utf-8')).hexdigest()[:20]
+
+
+def normalize_difficulty(difficulty):
+    """easy, medium or hard (medium for anything else)"""
+    difficulty = str(difficulty or '').strip().lower()
+    return difficulty if difficulty in DIFFICULTY_PRIORS else 'medium'
+
+
+def fit_rasch(users, items, correct, num_users, num_items, item_priors=None,
+              iterations=20, ability_prior=1.0, difficulty_prior=1.0):
+    """Joint MAP estimates of abilities and difficulties from answer arrays
+
+    users, items and correct are parallel arrays, one entry per answer.
+    Each pass takes a diagonal Newton step for every ability, then for
+    every difficulty, with Gaussian priors (N(0, 1) abilities, N(prior, 1)
+    difficulties) that keep sparse rows finite and pin the scale.
+    """
+    users = np.asarray(users, dtype=np.int64)
+    items = np.asarray(items, dtype=np.int64)
+    correct = np.asarray(correct, dtype=np.float64)
+    priors = np.zeros(num_items) if item_priors is None else np.asarray(item_priors, dtype=np.float64)
+    ability = np.zeros(num_users)
+    difficulty = priors.copy()
+
+    for _ in range(iterations):
+        p = sigmoid(ability[users] - difficulty[items])
+        gradient = np.bincount(users, correct - p, num_users) - ability_prior * ability
+        curvature = np.bincount(users, p * (1 - p), num_users) + ability_prior
+        ability += gradient / curvature
+
+        p = sigmoid(ability[users] - difficulty[items])
+        gradient = np.bincount(items, p - correct, num_items) - difficulty_prior * (difficulty - priors)
+        curvature = np.bincount(items, p * (1 - p), num_items) + difficulty_prior
+        difficulty += gradient / curvature
+    return ability, difficulty
+
+
+class _Table:
+    """Growable key -> row mapping with parallel estimate and count arrays"""
+
+    def __init__(self, capacity=64):
+        self.rows = {}
+        self.keys = []
+        self.values = np.zeros(capacity)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+
+    def row(self, key, value=0.0, count=0):
+        """Row of key, appending it with value and count when new"""
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row >= len(self.values):
+                self.values = np.concatenate([self.values, np.zeros(len(self.values))])
+                self.counts = np.concatenate([self.counts, np.zeros(len(self.counts), dtype=np.int64)])
+            self.rows[key] = row
+            self.keys.append(key)
+            self.values[row] = value
+            self.counts[row] = count
+        return row
+
+
+class DifficultyEngine:
+    """Per-user, per-topic ability and per-question difficulty estimates"""
+
+    def __init__(self, path=DEFAULT_PATH, target_accuracy=TARGET_ACCURACY):
+        self.path = path
+        self.target_accuracy = target_accuracy
+        self._abilities = _Table()
+        self._questions = _Table()
+        self._priors = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.updates = 0
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _ability_row(self, conn, user_id, topic, refresh=False):
+        """Array row of a (user, topic) ability, read from SQLite when unseen or refreshed"""
+        key = (str(user_id), str(topic).lower())
+        row = self._abilities.rows.get(key)
+        if row is not None and not refresh:
+            return row
+        stored = conn.execute(
+            'SELECT ability, responses FROM ability_estimates WHERE user_id = ? AND topic = ?', key
+        ).fetchone()
+        row = self._abilities.row(key)
+        if stored is not None:
+            self._abilities.values[row], self._abilities.counts[row] = stored
+        return row
+
+    def _question_rows(self, conn, topic, keys, difficulty):
+        """Array rows of questions, reading stored estimates for all of them in one query"""
+        stored = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            stored.update((key, (prior, value, count)) for key, prior, value, count in conn.execute(
+                'SELECT question_key, prior, difficulty, responses FROM question_estimates '
+                'WHERE question_key IN (%s)' % ','.join('?' * len(chunk)), chunk
+            ))
+        rows = []
+        for key in keys:
+            prior, value, count = stored.get(key, (DIFFICULTY_PRIORS[difficulty],) * 2 + (0,))
+            row = self._questions.row(key)
+            self._questions.values[row], self._questions.counts[row] = value, count
+            self._priors[key] = (str(topic).lower(), prior)
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def record_quiz(self, user_id, topic, difficulty, answers):
+        """Update estimates from one quiz and log it; returns the new recommendation
+
+        answers: [{"question" or "id", "correct": bool, "difficulty"?}] in quiz order.
+        """
+        difficulty = normalize_difficulty(difficulty)
+        keys, correct = [], []
+        for answer in answers:
+            keys.append(question_key(topic, answer))
+            correct.append(1.0 if answer.get('correct') else 0.0)
+        if not keys:
+            raise ValueError('answers must contain at least one answered question')
+        correct = np.array(correct)
+        # Answers tagged with their own topic (mixed quizzes) keep it in the log for per-topic aggregates
+        if any(answer.get('topic') for answer in answers):
+            answer_topics = {"answer_topics": [answer.get('topic') or None for answer in answers]}
+        else:
+            answer_topics = {}
+
+        conn = self._connection()
+        with self._lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Read-modify-write inside one transaction so worker processes do not lose updates
+                user_row = self._ability_row(conn, user_id, topic, refresh=True)
+                question_rows = self._question_rows(conn, topic, keys, difficulty)
+                ability = float(self._abilities.values[user_row])
+                responses = int(self._abilities.counts[user_row])
+                expected = sigmoid(ability - self._questions.values[question_rows])
+
+                # One step per answer so K shrinks within a quiz and each surprise
+                # is measured against the ability the answers so far support.
+                # Updates go to copies and reach the arrays only after COMMIT.
+                difficulties, counts = {}, {}
+                for row, value in zip(question_rows.tolist(), correct.tolist()):
+                    question = difficulties.get(row, float(self._questions.values[row]))
+                    answered = counts.get(row, int(self._questions.counts[row]))
+                    surprise = value - 1.0 / (1.0 + math.exp(question - ability))
+                    ability += float(step_size(responses)) * surprise
+                    difficulties[row] = question - float(step_size(answered)) * surprise
+                    counts[row] = answered + 1
+                    responses += 1
+
+                now = time.time()
+                user_key = self._abilities.keys[user_row]
+                conn.execute(
+                    'INSERT OR REPLACE INTO ability_estimates (user_id, topic, ability, responses, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (*user_key, ability, responses, now)
+                )
+                conn.executemany(
+                    'INSERT OR REPLACE INTO question_estimates (question_key, topic, prior, difficulty, responses) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(key, *self._priors[key], difficulties[row], counts[row])
+                     for key, row in dict(zip(keys, question_rows.tolist())).items()]
+                )
+
+                recommendation = self._recommend_estimate(ability, responses, difficulty)
+                history_id = uuid.uuid4().hex
+                conn.execute(
+                    'INSERT INTO adaptive_difficulty_history (id, user_id, topic, previous_difficulty, '
+                    'recommended_difficulty, confidence, reasoning, performance_data, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (history_id, str(user_id), user_key[1], difficulty, recommendation['recommended_difficulty'],
+                     recommendation['confidence'], recommendation['reasoning'],
+                     json.dumps(dict({
+                         "topic": str(topic).strip(),
+                         "score": float(correct.mean()),
+                         "expected_score": float(expected.mean()),
+                         "answers": [[key, int(value)] for key, value in zip(keys, correct)]
+                     }, **answer_topics)), now)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._abilities.values[user_row], self._abilities.counts[user_row] = ability, responses
+            for row, value in difficulties.items():
+                self._questions.values[row], self._questions.counts[row] = value, counts[row]
+            self.updates += 1
+        return dict(recommendation, history_id=history_id, score=round(float(correct.mean()), 3),
+                    expected_score=round(float(expected.mean()), 3))
+
+    def recommend(self, user_id, topic, current_difficulty='medium'):
+        """Recommended quiz difficulty for a user and topic from the stored estimate"""
+        current_difficulty = normalize_difficulty(current_difficulty)
+        with self._lock:
+            row = self._ability_row(self._connection(), user_id, topic)
+            return self._recommend_row(row, current_difficulty)
+
+    def _recommend_row(self, row, current_difficulty):
+        """Pick the level whose expected accuracy is closest to the target"""
+        return self._recommend_estimate(float(self._abilities.values[row]), int(self._abilities.counts[row]),
+                                        current_difficulty)
+
+    def _recommend_estimate(self, ability, responses, current_difficulty):
+        """Recommendation for an ability backed by this many answers"""
+        if responses == 0:
+            return {
+                "ability": 0.0,
+                "responses": 0,
+                "recommended_difficulty": current_difficulty,
+                "expected_accuracy": None,
+                "confidence": 0.0,
+                "reasoning": "No quiz results for this topic yet, so the current difficulty is kept"
+            }
+
+        expected = {level: 1.0 / (1.0 + math.exp(prior - ability)) for level, prior in DIFFICULTY_PRIORS.items()}
+        level = min(DIFFICULTIES, key=lambda name: (abs(expected[name] - self.target_accuracy), name != current_difficulty))
+        return {
+            "ability": round(ability, 3),
+            "responses": responses,
+            "recommended_difficulty": level,
+            "expected_accuracy": round(expected[level], 3),
+            "confidence": estimate_confidence(responses),
+            "reasoning": (f"Estimated ability {ability:+.2f} from {responses} answers gives an expected "
+                          f"{expected[level]:.0%} at {level} difficulty (target {self.target_accuracy:.0%})")
+        }
+
+    def refit(self, iterations=20):
+        """Re-estimate every ability and difficulty from the full quiz history; returns timings"""
+        started = time.perf_counter()
+        conn = self._connection()
+        user_index, question_index = {}, {}
+        users, items, correct = [], [], []
+        for user_id, topic, payload in conn.execute(
+            'SELECT user_id, topic, performance_data FROM adaptive_difficulty_history ORDER BY created_at'
+        ):
+            try:
+                answers = json.loads(payload).get('answers', [])
+            except (ValueError, AttributeError):
+                continue
+            user_row = user_index.setdefault((user_id, topic), len(user_index))
+            for key, value in answers:
+                users.append(user_row)
+                items.append(question_index.setdefault(key, len(question_index)))
+                correct.append(value)
+        loaded = time.perf_counter()
+        if not users:
+            return {"answers": 0, "users": 0, "questions": 0, "load_seconds": round(loaded - started, 3),
+                    "fit_seconds": 0.0}
+
+        stored_priors = dict(conn.execute('SELECT question_key, prior FROM question_estimates'))
+        priors = np.array([stored_priors.get(key, 0.0) for key in question_index])
+        ability, difficulty = fit_rasch(users, items, correct, len(user_index), len(question_index),
+                                        item_priors=priors, iterations=iterations)
+        user_counts = np.bincount(users, minlength=len(user_index))
+        item_counts = np.bincount(items, minlength=len(question_index))
+        fitted = time.perf_counter()
+
+        now = time.time()
+        with self._lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO ability_estimates (user_id, topic, ability, responses, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(user_id, topic, value, count, now)
+                     for (user_id, topic), value, count in zip(user_index, ability.tolist(), user_counts.tolist())]
+                )
+                conn.executemany(
+                    'UPDATE question_estimates SET difficulty = ?, responses = ? WHERE question_key = ?',
+                    [(value, count, key) for key, value, count in zip(question_index, difficulty.tolist(), item_counts.tolist())]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            # Cached rows are reloaded from the refitted estimates on next use
+            self._abilities = _Table()
+            self._questions = _Table()
+            self._priors = {}
+
+        return {
+            "answers": len(users),
+            "users": len(user_index),
+            "questions": len(question_index),
+            "load_seconds": round(loaded - started, 3),
+            "fit_seconds": round(fitted - loaded, 3),
+            "write_seconds": round(time.perf_counter() - fitted, 3)
+        }
+
+    def stats(self):
+        """Return estimate counts and update counters"""
+        try:
+            conn = self._connection()
+            abilities = conn.execute('SELECT COUNT(*) FROM ability_estimates').fetchone()[0]
+            questions = conn.execute('SELECT COUNT(*) FROM question_estimates').fetchone()[0]
+        except sqlite3.Error:
+            abilities = questions = 0
+        return {
+            "abilities": abilities,
+            "questions": questions,
+            "cached_abilities": len(self._abilities.keys),
+            "cached_questions": len(self._questions.keys),
+            "updates": self.updates
+        }
@@ -0,0 +1,142 @@
+"""
+Persistent, content-addressed store for material analyses
+
+Entries are keyed by the SHA-256 of the prompt version and the material
+content and live in a SQLite database in WAL mode, so every worker process
+on the same machine shares them and they survive cold starts.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'edusense-analysis.sqlite3')
+
+# Skip the last-access write when the entry was touched this recently
+TOUCH_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_accessed_at ON analyses(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_prompt_version ON analyses(prompt_version);
+"""
+
+def content_key(content, prompt_version):
+    """SHA-256 key for a piece of material under a given prompt version"""
+    digest = hashlib.sha256()
+    digest.update(prompt_version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((content or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AnalysisStore:
+    """SQLite-backed analysis cache with size-based LRU eviction"""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, content, prompt_version):
+        """Return the stored analysis for this content, or None"""
+        return self.get_key(content_key(content, prompt_version))
+
+    def get_key(self, key):
+        """Return the stored analysis under a content key, or None"""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT payload, accessed_at FROM analyses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            payload, accessed_at = row
+            now = time.time()
+            if now - accessed_at > TOUCH_INTERVAL:
+                conn.execute('UPDATE analyses SET accessed_at = ? WHERE key = ?', (now, key))
+            return json.loads(payload)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Analysis store read error: {e}")
+            return None
+
+    def put(self, content, prompt_version, analysis):
+        """Store an analysis and evict old entries past the size budget"""
+        key = content_key(content, prompt_version)
+        payload = json.dumps(analysis)
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO analyses '
+                '(key, prompt_version, payload, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, prompt_version, payload, len(payload), now, now)
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"Analysis store write error: {e}")
+
+    def _evict(self, conn):
+        """Delete least recently used entries until the store fits max_bytes"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM analyses').fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM analyses ORDER BY accessed_at'):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM analyses WHERE key = ?', victims)
+
+    def invalidate(self, prompt_version=None, keep_version=None):
+        """Delete entries for one prompt version, or all versions except keep_version"""
+        try:
+            conn = self._connection()
+            if prompt_version is not None:
+                cursor = conn.execute('DELETE FROM analyses WHERE prompt_version = ?', (prompt_version,))
+            elif keep_version is not None:
+                cursor = conn.execute('DELETE FROM analyses WHERE prompt_version != ?', (keep_version,))
+            else:
+                cursor = conn.execute('DELETE FROM analyses')
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Analysis store invalidate error: {e}")
+            return 0
+
+    def stats(self):
+        """Return entry count and total payload size"""
+        try:
+            entries, size = self._connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses'
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
@@ -0,0 +1,74 @@
+"""
+Supabase access token verification for the Python functions
+
+Handlers that keep per-user state take the user from the request's
+`Authorization: Bearer <access token>` header instead of a client-supplied
+user_id. Tokens are checked against the Supabase Auth API and the
+resulting user ID is cached for a short while, so a warm instance makes
+one verification call per token rather than one per request.
+"""
+
+import os
+import json
+import time
+import threading
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+
+SUPABASE_URL = (os.environ.get('SUPABASE_URL') or os.environ.get('NEXT_PUBLIC_SUPABASE_URL') or '').rstrip('/')
+SUPABASE_ANON_KEY = os.environ.get('SUPABASE_ANON_KEY') or os.environ.get('NEXT_PUBLIC_SUPABASE_ANON_KEY') or ''
+
+# Seconds a verified token is trusted without asking Supabase again
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', '60'))
+AUTH_CACHE_SIZE = 1024
+AUTH_TIMEOUT = 5
+
+_verified = {}
+_lock = threading.Lock()
+
+
+class AuthError(Exception):
+    """The request carries no valid Supabase access token"""
+
+
+def bearer_token(authorization):
+    """The token of an `Authorization: Bearer ...` header value, or ''"""
+    scheme, _, token = str(authorization or '').strip().partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+
+def authenticated_user_id(authorization):
+    """Supabase user ID for an Authorization header value; raises AuthError when it is missing or invalid"""
+    token = bearer_token(authorization)
+    if not token or token in ('undefined', 'null'):
+        raise AuthError('Sign in required: missing bearer token')
+
+    now = time.time()
+    cached = _verified.get(token)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise AuthError('Authentication is not configured on the server')
+    request = Request(f'{SUPABASE_URL}/auth/v1/user', headers={
+        'apikey': SUPABASE_ANON_KEY,
+        'Authorization': f'Bearer {token}'
+    })
+    try:
+        with urlopen(request, timeout=AUTH_TIMEOUT) as response:
+            user = json.loads(response.read().decode('utf-8'))
+    except HTTPError as e:
+        raise AuthError('Invalid or expired access token') from e
+    except (URLError, OSError, ValueError) as e:
+        print(f"Token verification failed: {e}")
+        raise AuthError('Could not verify the access token') from e
+
+    user_id = str(user.get('id') or '') if isinstance(user, dict) else ''
+    if not user_id:
+        raise AuthError('Invalid or expired access token')
+    with _lock:
+        if len(_verified) >= AUTH_CACHE_SIZE:
+            for key in [key for key, (_, expires) in _verified.items() if expires <= now] or list(_verified)[:AUTH_CACHE_SIZE // 4]:
+                _verified.pop(key, None)
+        _verified[token] = (user_id, now + AUTH_CACHE_TTL)
+    return user_id
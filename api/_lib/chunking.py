@@ -0,0 +1,115 @@
+"""
+Map-reduce helpers for materials longer than a single prompt
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# A heading line (Markdown, numbered or ALL CAPS) always starts a new block
+_HEADING = re.compile(r'^(?:#{1,6}\s|\d+(?:\.\d+)*[.)]?\s+[A-Z]|[A-Z][A-Z0-9 ,:&-]{3,}$)')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_NORMALIZE = re.compile(r'[^a-z0-9]+')
+
+
+def split_material(content, chunk_size=2000, max_chunks=8):
+    """Split material on section and paragraph boundaries into chunks of at most chunk_size
+
+    When the material needs more than max_chunks chunks, evenly spaced chunks
+    are kept so the analysis still spans the whole document.
+    """
+    content = (content or '').strip()
+    if len(content) <= chunk_size:
+        return [content]
+
+    chunks = []
+    current = ''
+    for block in _blocks(content, chunk_size):
+        starts_section = bool(_HEADING.match(block))
+        if current and (starts_section and len(current) > chunk_size // 2 or
+                        len(current) + len(block) + 2 > chunk_size):
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        chunks.append(current)
+
+    if len(chunks) > max_chunks:
+        step = len(chunks) / max_chunks
+        chunks = [chunks[int(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def _blocks(content, chunk_size):
+    """Yield paragraphs (and headings) no longer than chunk_size"""
+    for paragraph in _PARAGRAPH_BREAK.split(content):
+        lines = [line for line in paragraph.split('\n') if line.strip()]
+        block = []
+        for line in lines:
+            if block and _HEADING.match(line.strip()):
+                yield from _fit('\n'.join(block), chunk_size)
+                block = []
+            block.append(line)
+        if block:
+            yield from _fit('\n'.join(block), chunk_size)
+
+
+def _fit(block, chunk_size):
+    """Break an oversized block on sentence boundaries, then hard-cut as a last resort"""
+    if len(block) <= chunk_size:
+        yield block
+        return
+
+    current = ''
+    for sentence in _SENTENCE_END.split(block):
+        while len(sentence) > chunk_size:
+            if current:
+                yield current
+                current = ''
+            yield sentence[:chunk_size]
+            sentence = sentence[chunk_size:]
+        if current and len(current) + len(sentence) + 1 > chunk_size:
+            yield current
+            current = ''
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        yield current
+
+
+def map_chunks(func, items, max_workers=4):
+    """Apply func to every item on a bounded thread pool, preserving order"""
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def normalize_text(value):
+    """Case- and punctuation-insensitive key used for de-duplication"""
+    return _NORMALIZE.sub(' ', str(value).lower()).strip()
+
+
+def merge_unique(lists, limit=None, key=normalize_text):
+    """Reduce per-chunk lists into one de-duplicated list
+
+    Items found in more chunks rank first; ties keep round-robin order so
+    every chunk's leading items are represented.
+    """
+    seen = {}
+    longest = max((len(items) for items in lists), default=0)
+    for rank in range(longest):
+        for items in lists:
+            if rank >= len(items):
+                continue
+            item = items[rank]
+            item_key = key(item)
+            if not item_key:
+                continue
+            if item_key in seen:
+                seen[item_key][0] += 1
+            else:
+                seen[item_key] = [1, len(seen), item]
+
+    merged = sorted(seen.values(), key=lambda entry: (-entry[0], entry[1]))
+    merged = [item for _, _, item in merged]
+    return merged[:limit] if limit is not None else merged
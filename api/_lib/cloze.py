@@ -0,0 +1,178 @@
+"""
+Deterministic cloze (fill-in-the-blank) questions built from the material
+
+Sentences are ranked by how informative their key terms are: terms that
+recur in the material but are concentrated in a few sentences. The best
+term in each chosen sentence is blanked out and the distractors are
+other key terms from the same document with a similar frequency, length
+and word shape, so the options are plausible without a model call.
+"""
+
+import re
+import math
+import zlib
+import random
+
+from .search_index import STOPWORDS
+
+MAX_CONTENT = 200000
+MIN_SENTENCE_WORDS = 8
+MAX_SENTENCE_WORDS = 45
+BLANK = '_____'
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n\s*\n|\n(?=[A-Z#\d])')
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*[A-Za-z]")
+_PLAIN_TOKEN = re.compile(r"^[(\"']?[A-Za-z][A-Za-z'-]*[.,;:!?)\"']*$")
+_MARKUP = re.compile(r'^\s*(?:#+|[-*+>]|\d+[.)])\s+|\*\*|__')
+
+# Sentences with fewer plain words than this share are code, tables or lists
+MIN_PROSE_RATIO = 0.8
+
+# Words too general to be a meaningful answer
+COMMON_WORDS = STOPWORDS | frozenset("""
+about above after again also although always among another because been before
+being below between both can could does doing done during each either every
+example first following further general given good great here however important
+including instead just large later less like made main make many more most much
+must near need never next often only other others over part particular people
+same second several shall should show shown since small some such than then
+there therefore these they thing things third those though three through thus
+time together towards under until upon used using usually very what when where
+whether which while whose within without would year years your
+""".split())
+
+
+def split_sentences(content):
+    """Candidate prose sentences of a usable length, in document order"""
+    sentences = []
+    for raw in _SENTENCE_END.split((content or '')[:MAX_CONTENT]):
+        tokens = _MARKUP.sub('', raw).split()
+        if not MIN_SENTENCE_WORDS <= len(tokens) <= MAX_SENTENCE_WORDS:
+            continue
+        plain = sum(1 for token in tokens if _PLAIN_TOKEN.match(token))
+        if plain >= MIN_PROSE_RATIO * len(tokens):
+            sentences.append(' '.join(tokens))
+    return sentences
+
+
+def _terms(sentence):
+    """Lowercased candidate answer terms in a sentence"""
+    return [word.lower() for word in _WORD.findall(sentence)
+            if len(word) >= 4 and word.lower() not in COMMON_WORDS]
+
+
+class _TermProfile:
+    """Frequency, sentence spread and most common spelling of every key term"""
+
+    def __init__(self, sentences):
+        self.counts = {}
+        self.sentence_counts = {}
+        self.spellings = {}
+        for sentence in sentences:
+            seen = set()
+            for word in _WORD.findall(sentence):
+                term = word.lower()
+                if len(term) < 4 or term in COMMON_WORDS:
+                    continue
+                self.counts[term] = self.counts.get(term, 0) + 1
+                spellings = self.spellings.setdefault(term, {})
+                spellings[word] = spellings.get(word, 0) + 1
+                if term not in seen:
+                    seen.add(term)
+                    self.sentence_counts[term] = self.sentence_counts.get(term, 0) + 1
+        self.total_sentences = max(len(sentences), 1)
+        self._display = {}
+
+    def weight(self, term):
+        """Informativeness: recurring, concentrated and reasonably long terms score highest"""
+        count = self.counts[term]
+        spread = math.log(1 + self.total_sentences / self.sentence_counts[term])
+        return (1 + math.log(count)) * spread * min(len(term), 12) / 6
+
+    def display(self, term):
+        """The spelling the material uses most for a term"""
+        display = self._display.get(term)
+        if display is None:
+            spellings = self.spellings[term]
+            display = self._display[term] = max(spellings, key=lambda word: (spellings[word], word))
+        return display
+
+
+def _distance(profile, answer, candidate):
+    """How unlike the answer a distractor looks: frequency, length and word shape"""
+    distance = abs(math.log(profile.counts[candidate]) - math.log(profile.counts[answer]))
+    distance += abs(len(candidate) - len(answer)) / len(answer)
+    if candidate[-3:] != answer[-3:]:
+        distance += 0.3
+    if profile.display(candidate)[0].isupper() != profile.display(answer)[0].isupper():
+        distance += 0.5
+    return distance
+
+
+def _distractors(profile, answer, excluded, difficulty, rng):
+    """Three distractor terms; harder quizzes get the closest look-alikes"""
+    candidates = [
+        term for term in profile.counts
+        if term not in excluded and term[:5] != answer[:5] and answer not in term and term not in answer
+    ]
+    if len(candidates) < 3:
+        return None
+    candidates.sort(key=lambda term: (_distance(profile, answer, term), term))
+
+    if difficulty == 'hard':
+        pool = candidates[:3]
+    elif difficulty == 'easy':
+        pool = candidates[len(candidates) // 3:] if len(candidates) >= 9 else candidates
+    else:
+        pool = candidates[:8]
+    return rng.sample(pool, 3)
+
+
+def _blank(sentence, term):
+    """Replace every whole-word occurrence of term with the blank"""
+    return re.sub(r'\b' + re.escape(term) + r'\b', BLANK, sentence, flags=re.IGNORECASE)
+
+
+def generate_cloze_questions(content, num_questions, difficulty='medium'):
+    """Up to num_questions multiple-choice cloze questions from the material, in document order"""
+    sentences = split_sentences(content)
+    if not sentences:
+        return []
+    profile = _TermProfile(sentences)
+    difficulty = str(difficulty or 'medium').lower()
+
+    # Rank sentences by their most informative term
+    ranked = []
+    for position, sentence in enumerate(sentences):
+        terms = set(_terms(sentence))
+        if not terms:
+            continue
+        answer = max(terms, key=lambda term: (profile.weight(term), term))
+        ranked.append((profile.weight(answer), position, answer, terms))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+
+    chosen = []
+    used_answers = set()
+    for _, position, answer, terms in ranked:
+        if len(chosen) >= num_questions:
+            break
+        if answer in used_answers:
+            continue
+        sentence = sentences[position]
+        rng = random.Random(zlib.crc32(f'{difficulty}:{sentence}'.encode('utf-8')))
+        distractors = _distractors(profile, answer, terms, difficulty, rng)
+        if distractors is None:
+            continue
+        used_answers.add(answer)
+
+        options = [profile.display(term) for term in [answer] + distractors]
+        rng.shuffle(options)
+        chosen.append((position, {
+            "question": f'Fill in the blank: "{_blank(sentence, answer)}"',
+            "options": options,
+            "correct_answer": options.index(profile.display(answer)),
+            "explanation": f'The material states: "{sentence}"'
+        }))
+
+    chosen.sort(key=lambda item: item[0])
+    return [question for _, question in chosen]
@@ -0,0 +1,115 @@
+"""
+Bitmap facet index for combining exact-match filters
+
+Every document gets a small integer slot; every facet value keeps a
+bitmap (a Python int) with the slots of the documents that have it.
+Combined filters are bitwise ANDs and facet counts are popcounts, so
+filtering never touches the documents themselves.
+"""
+
+import threading
+
+
+def popcount(bits):
+    """Number of set bits in a bitmap"""
+    return bin(bits).count('1')
+
+
+def normalize_facet_value(value):
+    """Case-insensitive facet value; booleans become 'true'/'false'"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return ' '.join(str(value).lower().split()) if value is not None else ''
+
+
+class FacetIndex:
+    """Per-value bitmaps over a fixed set of facets"""
+
+    def __init__(self, facets):
+        self.facets = tuple(facets)
+        self._bitmaps = {facet: {} for facet in self.facets}
+        self._slots = {}
+        self._doc_ids = []
+        self._doc_values = {}
+        self._free_slots = []
+        self._all = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def add(self, doc_id, values):
+        """Index (or re-index) a document given a dict of facet name to value"""
+        values = {facet: normalize_facet_value(values.get(facet)) for facet in self.facets}
+        with self._lock:
+            self._remove(doc_id)
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._doc_ids[slot] = doc_id
+            else:
+                slot = len(self._doc_ids)
+                self._doc_ids.append(doc_id)
+            bit = 1 << slot
+            self._slots[doc_id] = slot
+            self._doc_values[doc_id] = values
+            self._all |= bit
+            for facet, value in values.items():
+                if value:
+                    bitmaps = self._bitmaps[facet]
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def remove(self, doc_id):
+        """Drop a document; returns False when it was not indexed"""
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        """Clear a document's bits and free its slot; the caller holds the lock"""
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        mask = ~(1 << slot)
+        self._all &= mask
+        for facet, value in self._doc_values.pop(doc_id).items():
+            bitmaps = self._bitmaps[facet]
+            if value in bitmaps:
+                bitmaps[value] &= mask
+                if not bitmaps[value]:
+                    del bitmaps[value]
+        self._doc_ids[slot] = None
+        self._free_slots.append(slot)
+        return True
+
+    def match(self, **selected):
+        """Bitmap of documents matching every non-empty facet selection"""
+        with self._lock:
+            bits = self._all
+            for facet, value in selected.items():
+                value = normalize_facet_value(value)
+                if value:
+                    bits &= self._bitmaps[facet].get(value, 0)
+            return bits
+
+    def ids(self, bits):
+        """Document IDs whose slots are set in a bitmap, in slot order"""
+        # Scan the binary digits lowest slot first rather than shifting the int
+        binary = bin(bits)[:1:-1]
+        ids = []
+        with self._lock:
+            slot = binary.find('1')
+            while slot >= 0:
+                ids.append(self._doc_ids[slot])
+                slot = binary.find('1', slot + 1)
+        return ids
+
+    def counts(self, bits=None):
+        """Per-facet value counts within a bitmap (all documents by default)"""
+        with self._lock:
+            if bits is None:
+                bits = self._all
+            return {
+                facet: {value: count for value, count in (
+                    (value, popcount(bitmap & bits)) for value, bitmap in sorted(bitmaps.items())
+                ) if count}
+                for facet, bitmaps in self._bitmaps.items()
+            }
@@ -0,0 +1,636 @@
+"""
+Learning-pattern insights from streamed quiz and study-session events
+
+Events are plain tuples (kind, user_id, topic, at, value): a quiz with its
+score (0..1) or a study session with its length in seconds. Sources are
+generators - the quiz history log in the ability store, a study_sessions
+table, and adapters for rows shaped like the user_sessions and
+realtime_analytics tables - so any number of rows is folded in fixed-size
+batches without ever being held in memory together.
+
+Each user keeps hour-of-day and day-of-week histograms (quizzes, score
+sums, study seconds) and each (user, topic) a ring of daily score buckets
+covering the last two weeks. Insights - best time of day and day of week,
+study time versus performance, per-topic trends - are read straight off
+those aggregates.
+
+Hours and days are the user's local ones: a user's time zone (a UTC
+offset in hours or an IANA name) is stored in a user_timezones table, and
+when it changes every instance refolds that user's events in the new zone.
+Users without one fall back to the engine's deployment-wide offset.
+"""
+
+import re
+import json
+import time
+import sqlite3
+import itertools
+import threading
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+from .adaptive_difficulty import DEFAULT_PATH
+
+QUIZ = 0
+SESSION = 1
+
+HOURS = 24
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Trends compare the last TREND_DAYS days with the TREND_DAYS before them
+TREND_DAYS = 7
+RING_DAYS = 2 * TREND_DAYS
+
+# Events are folded this many at a time
+BATCH = 4096
+
+# Hour-of-day patterns look at windows this many hours wide
+WINDOW_HOURS = 2
+
+# Minimum quizzes behind a time-of-day or weekday pattern, and per trend window
+MIN_PATTERN_QUIZZES = 5
+MIN_TREND_QUIZZES = 3
+
+# Window means are shrunk towards the user's overall mean as if from this many extra quizzes
+PRIOR_QUIZZES = 3.0
+
+# A pattern or trend must move the score by at least this much to be reported
+MIN_LIFT = 0.03
+MIN_TREND_CHANGE = 0.05
+
+# Confidence reaches one half at this many supporting quizzes
+CONFIDENCE_QUIZZES = 10.0
+
+# Longer sessions are treated as a tab left open
+MAX_SESSION_SECONDS = 4 * 3600
+
+# realtime_analytics metric names carrying quiz scores and study time
+QUIZ_METRICS = ('quiz_score', 'score', 'quiz_accuracy')
+STUDY_METRICS = ('study_time', 'session_duration', 'time_spent')
+
+SYNC_INTERVAL = 30
+
+# Widest UTC offsets in use (Baker Island to Line Islands)
+MAX_UTC_OFFSET_HOURS = 14
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    session_id TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_id ON study_sessions(user_id);
+CREATE TABLE IF NOT EXISTS user_timezones (
+    user_id TEXT PRIMARY KEY,
+    time_zone TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+
+def parse_time(value):
+    """Epoch seconds from a number or an ISO 8601 string, or None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_timezone(value):
+    """Canonical time zone text for a UTC offset in hours or an IANA name; raises ValueError"""
+    text = str(value).strip()
+    if re.fullmatch(r'[+-]?\d+(\.\d+)?', text):
+        hours = float(text)
+        if abs(hours) > MAX_UTC_OFFSET_HOURS:
+            raise ValueError(f'tz_offset must be between -{MAX_UTC_OFFSET_HOURS} and {MAX_UTC_OFFSET_HOURS} hours')
+        return f'{hours:g}'
+    if _zone(text) is None:
+        raise ValueError(f'Unknown time zone: {text!r}')
+    return text
+
+
+@lru_cache(maxsize=1024)
+def _zone(text):
+    """Offset seconds for a numeric zone, a ZoneInfo for an IANA name, or None when unknown"""
+    try:
+        return float(text) * 3600
+    except ValueError:
+        pass
+    try:
+        return ZoneInfo(text)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def zone_offsets(zone, times):
+    """UTC offset in seconds of a ZoneInfo at each time, one conversion per distinct hour"""
+    hours, inverse = np.unique(np.asarray(times, dtype=np.float64) // 3600, return_inverse=True)
+    offsets = [datetime.fromtimestamp(hour * 3600, zone).utcoffset().total_seconds() for hour in hours]
+    return np.array(offsets, dtype=np.float64)[inverse.reshape(-1)]
+
+
+def history_events(rows):
+    """Quiz events from (user_id, topic, performance_data, created_at) history rows"""
+    for user_id, topic, payload, created_at in rows:
+        try:
+            score = float(json.loads(payload)["score"])
+        except (ValueError, KeyError, TypeError):
+            continue
+        yield (QUIZ, str(user_id), topic, created_at, score)
+
+
+def session_events(rows):
+    """Study-session events from user_sessions-shaped dicts (created_at to last_seen)"""
+    for row in rows:
+        started = parse_time(row.get('started_at') or row.get('created_at'))
+        ended = parse_time(row.get('ended_at') or row.get('last_seen'))
+        if row.get('user_id') is None or started is None or ended is None:
+            continue
+        seconds = min(ended - started, MAX_SESSION_SECONDS)
+        if seconds > 0:
+            yield (SESSION, str(row['user_id']), None, started, seconds)
+
+
+def analytics_events(rows):
+    """Quiz and study-time events from realtime_analytics-shaped dicts; other metrics are skipped"""
+    for row in rows:
+        name = row.get('metric_name')
+        at = parse_time(row.get('timestamp'))
+        if row.get('user_id') is None or at is None:
+            continue
+        tags = row.get('tags') or {}
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except ValueError:
+                tags = {}
+        try:
+            value = float(row.get('metric_value'))
+        except (TypeError, ValueError):
+            continue
+        if name in QUIZ_METRICS:
+            # Scores are stored either as fractions or as percentages
+            yield (QUIZ, str(row['user_id']), tags.get('topic'), at, value / 100.0 if value > 1 else value)
+        elif name in STUDY_METRICS and value > 0:
+            seconds = value * 60 if tags.get('unit') == 'minutes' else value
+            yield (SESSION, str(row['user_id']), tags.get('topic'), at, min(seconds, MAX_SESSION_SECONDS))
+
+
+def hour_label(hour):
+    """12-hour clock label for an hour of the day"""
+    hour %= 24
+    return f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}"
+
+
+def window_label(start):
+    """Label for the WINDOW_HOURS-wide window starting at an hour"""
+    return f"{hour_label(start)}-{hour_label(start + WINDOW_HOURS)}"
+
+
+def _grown(array, size, fill=0):
+    grown = np.full((size,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class InsightEngine:
+    """Per-user time-of-day, weekday and trend aggregates folded from event streams"""
+
+    def __init__(self, path=DEFAULT_PATH, utc_offset_hours=0, capacity=1024):
+        self.path = path
+        self.utc_offset = float(utc_offset_hours) * 3600
+        self._user_rows = {}
+        # Fixed offset in seconds per user row; NaN marks an IANA zone resolved per event
+        self._user_offsets = np.full(capacity, self.utc_offset, dtype=np.float64)
+        self._zones = {}
+        self._hour_quizzes = np.zeros((capacity, HOURS), dtype=np.float32)
+        self._hour_scores = np.zeros((capacity, HOURS), dtype=np.float32)
+        self._hour_study = np.zeros((capacity, HOURS), dtype=np.float32)
+        self._day_quizzes = np.zeros((capacity, len(WEEKDAYS)), dtype=np.float32)
+        self._day_scores = np.zeros((capacity, len(WEEKDAYS)), dtype=np.float32)
+        self._topic_rows = {}
+        self._topics = []
+        self._user_topics = {}
+        self._trend_day = np.full((capacity, RING_DAYS), -1, dtype=np.int32)
+        self._trend_quizzes = np.zeros((capacity, RING_DAYS), dtype=np.float32)
+        self._trend_scores = np.zeros((capacity, RING_DAYS), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._local = threading.local()
+        self._synced_at = 0.0
+        self._last_quiz = 0
+        self._last_session = 0
+        self._last_zone = 0
+        self.events = 0
+
+    def _user(self, user_id):
+        row = self._user_rows.get(user_id)
+        if row is None:
+            row = self._user_rows[user_id] = len(self._user_rows)
+            if row >= len(self._hour_quizzes):
+                size = 2 * len(self._hour_quizzes)
+                self._user_offsets = _grown(self._user_offsets, size, fill=self.utc_offset)
+                self._hour_quizzes = _grown(self._hour_quizzes, size)
+                self._hour_scores = _grown(self._hour_scores, size)
+                self._hour_study = _grown(self._hour_study, size)
+                self._day_quizzes = _grown(self._day_quizzes, size)
+                self._day_scores = _grown(self._day_scores, size)
+            self._user_offsets[row] = self._fixed_offset(user_id)
+        return row
+
+    def _fixed_offset(self, user_id):
+        """A user's constant offset in seconds, or NaN when their zone observes DST"""
+        zone = _zone(self._zones[user_id]) if user_id in self._zones else None
+        if zone is None:
+            return self.utc_offset
+        return zone if isinstance(zone, float) else np.nan
+
+    def _offset_at(self, user_id, at):
+        """A user's UTC offset in seconds at one time"""
+        offset = self._fixed_offset(user_id)
+        if np.isnan(offset):
+            offset = zone_offsets(_zone(self._zones[user_id]), [at])[0]
+        return float(offset)
+
+    def _local_times(self, users, user_ids, times):
+        """Event times shifted into each user's local time"""
+        offsets = self._user_offsets[users]
+        for row in np.unique(users[np.isnan(offsets)]):
+            mask = users == row
+            offsets[mask] = zone_offsets(_zone(self._zones[user_ids[int(np.flatnonzero(mask)[0])]]), times[mask])
+        return times + offsets
+
+    def _topic(self, user_id, topic):
+        label = ' '.join(str(topic or '').split())
+        key = (user_id, label.lower())
+        row = self._topic_rows.get(key)
+        if row is None:
+            row = self._topic_rows[key] = len(self._topics)
+            self._topics.append(label)
+            self._user_topics.setdefault(user_id, []).append(row)
+            if row >= len(self._trend_day):
+                size = 2 * len(self._trend_day)
+                self._trend_day = _grown(self._trend_day, size, fill=-1)
+                self._trend_quizzes = _grown(self._trend_quizzes, size)
+                self._trend_scores = _grown(self._trend_scores, size)
+        return row
+
+    def fold(self, events):
+        """Fold an iterable of events into the aggregates in fixed-size batches; returns how many"""
+        events = iter(events)
+        total = 0
+        while True:
+            batch = list(itertools.islice(events, BATCH))
+            if not batch:
+                return total
+            with self._lock:
+                self._fold(batch)
+                self.events += len(batch)
+            total += len(batch)
+
+    def _fold(self, batch):
+        kinds, user_ids, topics, times, values = zip(*batch)
+        # Rows are looked up once per distinct user and (user, topic) in the batch
+        user_lookup = {user_id: self._user(user_id) for user_id in dict.fromkeys(user_ids)}
+        users = np.fromiter(map(user_lookup.__getitem__, user_ids), dtype=np.intp, count=len(batch))
+        quiz = np.array(kinds) == QUIZ
+        local = self._local_times(users, user_ids, np.array(times, dtype=np.float64))
+        values = np.array(values, dtype=np.float32)
+        hours = (local // 3600 % HOURS).astype(np.intp)
+
+        session = ~quiz
+        np.add.at(self._hour_study, (users[session], hours[session]), values[session])
+        if not quiz.any():
+            return
+
+        pairs = [(user_id, topic) for kind, user_id, topic in zip(kinds, user_ids, topics) if kind == QUIZ]
+        topic_lookup = {pair: self._topic(*pair) for pair in dict.fromkeys(pairs)}
+        topics = np.fromiter(map(topic_lookup.__getitem__, pairs), dtype=np.intp, count=len(pairs))
+        users, hours, local = users[quiz], hours[quiz], local[quiz]
+        scores = np.clip(values[quiz], 0.0, 1.0)
+        days = (local // 86400).astype(np.int64)
+        # 1 January 1970 was a Thursday
+        weekdays = ((days + 3) % len(WEEKDAYS)).astype(np.intp)
+        np.add.at(self._hour_quizzes, (users, hours), 1.0)
+        np.add.at(self._hour_scores, (users, hours), scores)
+        np.add.at(self._day_quizzes, (users, weekdays), 1.0)
+        np.add.at(self._day_scores, (users, weekdays), scores)
+
+        # A ring slot holds one day; a newer day in the same slot resets it, an older one is dropped
+        slots = (days % RING_DAYS).astype(np.intp)
+        before = self._trend_day[topics, slots].copy()
+        np.maximum.at(self._trend_day, (topics, slots), days.astype(np.int32))
+        after = self._trend_day[topics, slots]
+        reset = after != before
+        self._trend_quizzes[topics[reset], slots[reset]] = 0.0
+        self._trend_scores[topics[reset], slots[reset]] = 0.0
+        keep = days == after
+        np.add.at(self._trend_quizzes, (topics[keep], slots[keep]), 1.0)
+        np.add.at(self._trend_scores, (topics[keep], slots[keep]), scores[keep])
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def record_session(self, user_id, started_at, ended_at, session_id=None):
+        """Log one study session for every instance to pick up on its next sync"""
+        started, ended = parse_time(started_at), parse_time(ended_at)
+        if started is None or ended is None or ended <= started:
+            raise ValueError('started_at and ended_at must be times with ended_at after started_at')
+        try:
+            self._connection().execute(
+                'INSERT INTO study_sessions (user_id, session_id, started_at, ended_at) VALUES (?, ?, ?, ?)',
+                (str(user_id), session_id, started, ended)
+            )
+        except sqlite3.Error as e:
+            print(f"Study session log error: {e}")
+            return False
+        return True
+
+    def set_timezone(self, user_id, value):
+        """Store a user's time zone (UTC offset hours or IANA name); False when already in effect here
+
+        Every instance picks the change up on its next sync and refolds the
+        user's events in the new zone. Without a store only later events
+        use it, since there is nothing to refold from.
+        """
+        user_id, zone = str(user_id), parse_timezone(value)
+        if self._zones.get(user_id) == zone:
+            return False
+        if not self.path:
+            with self._lock:
+                self._apply_zone(user_id, zone, clear=False)
+            return True
+        try:
+            self._connection().execute(
+                'INSERT INTO user_timezones (user_id, time_zone, version) '
+                'VALUES (?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM user_timezones)) '
+                'ON CONFLICT(user_id) DO UPDATE SET time_zone = excluded.time_zone, version = excluded.version '
+                'WHERE time_zone != excluded.time_zone',
+                (user_id, zone)
+            )
+        except sqlite3.Error as e:
+            print(f"Time zone store error: {e}")
+            return False
+        return True
+
+    def _apply_zone(self, user_id, zone, clear=True):
+        """Switch a user to a zone, clearing aggregates folded in the old one; the caller holds the lock
+
+        Returns True when the user had aggregates that must be refolded.
+        """
+        self._zones[user_id] = zone
+        row = self._user_rows.get(user_id)
+        if row is None:
+            return False
+        self._user_offsets[row] = self._fixed_offset(user_id)
+        if not clear:
+            return False
+        for array in (self._hour_quizzes, self._hour_scores, self._hour_study, self._day_quizzes, self._day_scores):
+            array[row] = 0.0
+        topics = self._user_topics.get(user_id, [])
+        self._trend_day[topics] = -1
+        self._trend_quizzes[topics] = 0.0
+        self._trend_scores[topics] = 0.0
+        return True
+
+    def _sync_zones(self):
+        """Apply time zones stored since the last sync, refolding users who already have events"""
+        changes = self._connection().execute(
+            'SELECT user_id, time_zone, version FROM user_timezones WHERE version > ? ORDER BY version',
+            (self._last_zone,)
+        ).fetchall()
+        for user_id, zone, version in changes:
+            self._last_zone = version
+            if self._zones.get(user_id) == zone:
+                continue
+            with self._lock:
+                refold = self._apply_zone(user_id, zone)
+            if refold:
+                self._refold(user_id)
+
+    def _refold(self, user_id):
+        """Fold a user's already-synced quizzes and sessions again"""
+        conn = self._connection()
+        try:
+            quizzes = conn.execute(
+                'SELECT user_id, topic, performance_data, created_at FROM adaptive_difficulty_history '
+                'WHERE user_id = ? AND rowid <= ?', (user_id, self._last_quiz)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            quizzes = []
+        sessions = conn.execute(
+            'SELECT user_id, started_at, ended_at FROM study_sessions WHERE user_id = ? AND id <= ?',
+            (user_id, self._last_session)
+        ).fetchall()
+        self.fold(history_events(quizzes))
+        self.fold(session_events({"user_id": row[0], "started_at": row[1], "ended_at": row[2]} for row in sessions))
+
+    def _rows(self, query, after):
+        """Stream (rowid, ...) rows past a cursor position in batches"""
+        cursor = self._connection().execute(query, (after,))
+        while True:
+            rows = cursor.fetchmany(BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    def _quiz_stream(self):
+        for rowid, *row in self._rows(
+                'SELECT rowid, user_id, topic, performance_data, created_at FROM adaptive_difficulty_history '
+                'WHERE rowid > ? ORDER BY rowid', self._last_quiz):
+            self._last_quiz = rowid
+            yield row
+
+    def _session_stream(self):
+        for rowid, user_id, started_at, ended_at in self._rows(
+                'SELECT id, user_id, started_at, ended_at FROM study_sessions WHERE id > ? ORDER BY id',
+                self._last_session):
+            self._last_session = rowid
+            yield {"user_id": user_id, "started_at": started_at, "ended_at": ended_at}
+
+    def sync(self, force=False):
+        """Fold quizzes and sessions logged since the last sync; returns how many events"""
+        if not self.path or (not force and time.time() - self._synced_at < SYNC_INTERVAL):
+            return 0
+        if not self._sync_lock.acquire(blocking=force):
+            return 0
+        try:
+            self._synced_at = time.time()
+            total = 0
+            try:
+                self._sync_zones()
+            except sqlite3.Error as e:
+                print(f"Time zone sync error: {e}")
+            for stream in (lambda: history_events(self._quiz_stream()),
+                           lambda: session_events(self._session_stream())):
+                try:
+                    total += self.fold(stream())
+                except sqlite3.Error as e:
+                    # The history table appears with the first recorded quiz
+                    if 'no such table' not in str(e):
+                        print(f"Insight sync error: {e}")
+            return total
+        finally:
+            self._sync_lock.release()
+
+    def insights(self, user_id, now=None, limit=5):
+        """Insights for a user, strongest first, with the aggregates behind them"""
+        now = time.time() if now is None else now
+        user_id = str(user_id)
+        with self._lock:
+            row = self._user_rows.get(user_id)
+            if row is None:
+                return {"insights": [], "overall_learning_score": None, "quizzes_analyzed": 0, "study_hours": 0.0}
+            hour_quizzes = self._hour_quizzes[row].astype(np.float64)
+            hour_scores = self._hour_scores[row].astype(np.float64)
+            hour_study = self._hour_study[row].astype(np.float64)
+            day_quizzes = self._day_quizzes[row].astype(np.float64)
+            day_scores = self._day_scores[row].astype(np.float64)
+            topic_rows = list(self._user_topics.get(user_id, ()))
+            names = [self._topics[topic] for topic in topic_rows]
+            trend_day = self._trend_day[topic_rows].astype(np.int64)
+            trend_quizzes = self._trend_quizzes[topic_rows].astype(np.float64)
+            trend_scores = self._trend_scores[topic_rows].astype(np.float64)
+
+        total = hour_quizzes.sum()
+        mean = hour_scores.sum() / total if total else 0.0
+        insights = []
+        best_window, best_lift = None, 0.0
+
+        if total:
+            window_quizzes = sum(np.roll(hour_quizzes, -offset) for offset in range(WINDOW_HOURS))
+            window_scores = sum(np.roll(hour_scores, -offset) for offset in range(WINDOW_HOURS))
+            shrunk = (window_scores + PRIOR_QUIZZES * mean) / (window_quizzes + PRIOR_QUIZZES)
+            shrunk[window_quizzes < MIN_PATTERN_QUIZZES] = -1.0
+            start = int(np.argmax(shrunk))
+            if shrunk[start] - mean >= MIN_LIFT:
+                best_window, best_lift = start, shrunk[start] - mean
+                insights.append(self._insight(
+                    "learning_pattern", "Best Time of Day",
+                    f"You score best between {window_label(start)} "
+                    f"({window_scores[start] / window_quizzes[start]:.0%} vs {mean:.0%} overall)",
+                    window_quizzes[start], shrunk[start] - mean,
+                    f"Schedule your most challenging topics between {window_label(start)}"
+                ))
+
+            shrunk = (day_scores + PRIOR_QUIZZES * mean) / (day_quizzes + PRIOR_QUIZZES)
+            shrunk[day_quizzes < MIN_PATTERN_QUIZZES] = np.nan
+            if np.isfinite(shrunk).sum() >= 2:
+                best, worst = int(np.nanargmax(shrunk)), int(np.nanargmin(shrunk))
+                if shrunk[best] - shrunk[worst] >= MIN_LIFT:
+                    insights.append(self._insight(
+                        "weekly_pattern", "Strongest Day",
+                        f"Your quiz scores are highest on {WEEKDAYS[best]}s "
+                        f"({day_scores[best] / day_quizzes[best]:.0%}) and lowest on {WEEKDAYS[worst]}s "
+                        f"({day_scores[worst] / day_quizzes[worst]:.0%})",
+                        min(day_quizzes[best], day_quizzes[worst]), shrunk[best] - shrunk[worst],
+                        f"Plan reviews and practice tests for {WEEKDAYS[best]}s"
+                    ))
+
+        if hour_study.sum() > 0:
+            window_study = sum(np.roll(hour_study, -offset) for offset in range(WINDOW_HOURS))
+            # Ties go to the window whose first hour holds more of the study time
+            start = int(np.lexsort((-hour_study, -window_study))[0])
+            share = window_study[start] / hour_study.sum()
+            apart = (start - best_window) % HOURS if best_window is not None else 0
+            if min(apart, HOURS - apart) >= WINDOW_HOURS:
+                insights.append(self._insight(
+                    "study_timing", "Study Time vs. Performance",
+                    f"{share:.0%} of your study time falls between {window_label(start)}, "
+                    f"but you score best between {window_label(best_window)}",
+                    total, best_lift * share,
+                    f"Move some study sessions to {window_label(best_window)}"
+                ))
+            else:
+                insights.append(self._insight(
+                    "study_timing", "Study Habit",
+                    f"You do {share:.0%} of your studying between {window_label(start)}",
+                    hour_study.sum() / 1800.0, MIN_LIFT * share,
+                    "Keep a regular study time; consistent sessions help retention"
+                ))
+
+        today = int((now + self._offset_at(user_id, now)) // 86400)
+        age = today - trend_day
+        current = (age >= 0) & (age < TREND_DAYS)
+        previous = (age >= TREND_DAYS) & (age < RING_DAYS)
+        recent_quizzes = (trend_quizzes * (current | previous)).sum()
+        for name, quizzes, scores, now_mask, then_mask in zip(names, trend_quizzes, trend_scores, current, previous):
+            now_count, then_count = quizzes[now_mask].sum(), quizzes[then_mask].sum()
+            if now_count < MIN_TREND_QUIZZES or then_count < MIN_TREND_QUIZZES:
+                continue
+            now_mean, then_mean = scores[now_mask].sum() / now_count, scores[then_mask].sum() / then_count
+            change = now_mean - then_mean
+            if abs(change) < MIN_TREND_CHANGE:
+                continue
+            topic = name or 'overall'
+            if change > 0:
+                insights.append(self._insight(
+                    "performance_trend", "Improvement Trend",
+                    f"Your {topic} scores have improved from {then_mean:.0%} to {now_mean:.0%} over the last week",
+                    min(now_count, then_count), change,
+                    f"Continue with your current study approach for {topic}"
+                ))
+            else:
+                insights.append(self._insight(
+                    "performance_trend", "Declining Trend",
+                    f"Your {topic} scores have dropped from {then_mean:.0%} to {now_mean:.0%} over the last week",
+                    min(now_count, then_count), -change,
+                    f"Review the {topic} questions you missed recently before moving on"
+                ))
+
+        if recent_quizzes:
+            recent_mask = current | previous
+            overall = (trend_scores * recent_mask).sum() / recent_quizzes
+        else:
+            overall = mean
+        insights.sort(key=lambda insight: -insight.pop("_strength"))
+        return {
+            "insights": insights[:limit],
+            "overall_learning_score": round(100 * float(overall)) if total else None,
+            "quizzes_analyzed": int(total),
+            "study_hours": round(float(hour_study.sum()) / 3600, 1)
+        }
+
+    @staticmethod
+    def _insight(kind, title, description, support, effect, recommendation):
+        confidence = float(support) / (float(support) + CONFIDENCE_QUIZZES)
+        return {
+            "type": kind,
+            "title": title,
+            "description": description,
+            "confidence": round(min(confidence, 0.95), 2),
+            "actionable": True,
+            "recommendation": recommendation,
+            "_strength": confidence * float(effect)
+        }
+
+    def stats(self):
+        """Return aggregate counts, memory use and the sync position"""
+        with self._lock:
+            arrays = (self._hour_quizzes, self._hour_scores, self._hour_study, self._day_quizzes,
+                      self._day_scores, self._trend_day, self._trend_quizzes, self._trend_scores)
+            return {
+                "users": len(self._user_rows),
+                "topics": len(self._topics),
+                "events": self.events,
+                "aggregate_bytes": sum(array.nbytes for array in arrays),
+                "last_quiz_rowid": self._last_quiz,
+                "last_session_id": self._last_session
+            }
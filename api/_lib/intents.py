@@ -0,0 +1,194 @@
+"""
+Keyword intent engine for the chatbot, compiled into an Aho-Corasick automaton
+
+Every keyword and phrase in the lexicon carries weights towards one or
+more intents. The lexicon is compiled once per process into a single
+automaton, so classifying a message is one pass over its characters no
+matter how many phrases the lexicon holds. A phrase counts only at word
+boundaries; a trailing "*" lets it match any word that starts with it
+("revis*" matches "revise" and "revision").
+"""
+
+import math
+
+OFF_TOPIC = 'off_topic'
+
+# intent -> {keyword or phrase: weight}
+INTENT_LEXICON = {
+    'study_help': {
+        'study': 1.0, 'studying': 1.0, 'learn*': 1.0, 'understand*': 1.2, 'explain*': 1.2,
+        'concept*': 1.0, 'topic': 0.6, 'subject': 0.6, 'homework': 1.2, 'assignment*': 1.0,
+        'notes': 0.8, 'note taking': 1.2, 'summar*': 0.8, 'memori*': 1.0, 'remember': 0.6,
+        'focus': 0.6, 'concentrat*': 0.8, 'procrastinat*': 1.2, 'flashcard*': 1.0,
+        'how do i': 0.6, 'how does': 0.6, 'what is': 0.3, 'what are': 0.3, 'why does': 0.5,
+        'i don\'t get': 1.2, 'i dont get': 1.2, 'confused': 1.0, 'stuck': 0.8, 'struggling': 0.8,
+        'difficult': 0.5, 'hard to': 0.5, 'help me': 0.6, 'help': 0.4, 'tips': 0.5,
+        'strateg*': 0.6, 'technique*': 0.5, 'material*': 0.6, 'textbook': 0.8, 'chapter': 0.6,
+        'lecture*': 0.8, 'tutor*': 0.8, 'motivat*': 0.8, 'encourag*': 0.6,
+        # Subjects say what a message is about more than what the student wants
+        'math': 0.5, 'maths': 0.5, 'mathematics': 0.5, 'algebra': 0.5, 'geometry': 0.5,
+        'calculus': 0.5, 'derivative*': 0.5, 'integral*': 0.5, 'equation*': 0.5, 'fraction*': 0.5,
+        'statistic*': 0.5, 'probability': 0.5, 'science': 0.5, 'physics': 0.5, 'chemistry': 0.5,
+        'biology': 0.5, 'photosynthesis': 0.5, 'atom*': 0.5, 'molecule*': 0.5, 'cell biology': 0.5,
+        'history': 0.5, 'geography': 0.5, 'literature': 0.5, 'essay*': 0.5, 'grammar': 0.5,
+        'vocabulary': 0.5, 'programming': 0.5, 'computer science': 0.5, 'algorithm*': 0.5,
+        'economics': 0.5, 'language': 0.5, 'formula*': 0.5, 'theorem*': 0.5, 'proof': 0.5
+    },
+    'quiz_prep': {
+        'quiz*': 1.5, 'test': 1.2, 'tests': 1.2, 'exam': 1.5, 'exams': 1.5, 'examination*': 1.5,
+        'midterm*': 1.5, 'final exam': 1.0, 'finals': 1.2, 'prepar*': 1.0, 'revis*': 1.2,
+        'review': 0.8, 'practice': 0.8, 'practise': 0.8, 'practice questions': 1.0,
+        'mock': 1.0, 'past paper*': 1.5, 'cram*': 1.2, 'multiple choice': 1.2,
+        'question*': 0.4, 'answer*': 0.3, 'sat': 0.6, 'act': 0.3, 'gcse*': 1.2, 'a-level*': 1.2,
+        'ap exam': 1.5, 'tomorrow': 0.4, 'next week': 0.3, 'nervous': 0.6, 'anxiety': 0.6,
+        'exam stress': 1.0, 'time management': 0.5, 'study for': 1.2
+    },
+    'progress': {
+        'progress': 1.5, 'performance': 1.5, 'score*': 1.0, 'grade*': 1.0, 'result*': 0.8,
+        'mark': 0.5, 'marks': 0.6, 'improv*': 0.8, 'weak*': 1.5, 'strength*': 0.8,
+        'how am i doing': 1.5, 'how well': 0.8, 'doing well': 0.8, 'track*': 0.8,
+        'statistics on my': 1.0, 'analytics': 1.0, 'report': 0.6, 'streak*': 1.0,
+        'average': 0.5, 'percent*': 0.4, 'accuracy': 0.8, 'mastery': 1.2, 'level up': 1.0,
+        'learning path': 2.0, 'study plan': 2.0, 'schedule': 0.8, 'plan': 0.5, 'goal*': 0.8,
+        'recommend*': 0.8, 'next step*': 1.0, 'what should i': 0.8, 'where should i start': 1.0
+    },
+    OFF_TOPIC: {
+        'weather': 1.5, 'movie*': 1.2, 'film*': 1.0, 'tv show*': 1.2, 'netflix': 1.5, 'music': 1.0,
+        'song*': 1.0, 'game*': 0.6, 'video game*': 1.2, 'football': 1.0, 'soccer': 1.0,
+        'basketball': 1.0, 'sport*': 0.8, 'recipe*': 1.5, 'cook*': 1.0, 'restaurant*': 1.2,
+        'pizza': 1.0, 'food': 0.8, 'joke*': 1.2, 'funny': 0.8, 'meme*': 1.2, 'celebrit*': 1.2,
+        'dating': 1.5, 'girlfriend': 1.2, 'boyfriend': 1.2, 'shopping': 1.2, 'buy': 0.6,
+        'price of': 1.0, 'stock market': 1.2, 'crypto*': 1.5, 'bitcoin': 1.5, 'travel*': 1.0,
+        'vacation': 1.2, 'holiday*': 0.6, 'politic*': 1.0, 'election*': 1.0, 'news': 0.8,
+        'fashion': 1.2, 'instagram': 1.2, 'tiktok': 1.2, 'youtube': 0.6, 'horoscope': 1.5,
+        'lottery': 1.5, 'car': 0.6, 'cars': 0.6, 'pet*': 0.5, 'hello': 0.3, 'hi': 0.3,
+        'who are you': 0.8, 'tell me about yourself': 0.8
+    }
+}
+
+# Below this total score a message is treated as off topic
+MIN_INTENT_SCORE = 0.5
+
+
+def _is_word_char(char):
+    """True for characters that continue a word"""
+    return char.isalnum() or char == "'"
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over a fixed set of lowercase patterns
+
+    matches(text) yields (start, end, pattern_id) for every occurrence of
+    every pattern at word boundaries, in a single pass over the text.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self._prefix = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pattern in patterns:
+            self._insert(pattern)
+        self._link()
+
+    def _insert(self, pattern):
+        prefix = pattern.endswith('*')
+        word = pattern.rstrip('*').lower()
+        node = 0
+        for char in word:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        pattern_id = len(self.patterns)
+        self.patterns.append(word)
+        self._prefix.append(prefix)
+        self._out[node] = self._out[node] + (pattern_id,)
+
+    def _link(self):
+        """Breadth-first failure links; outputs are merged along them"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                state = self._fail[node]
+                while state and char not in self._goto[state]:
+                    state = self._fail[state]
+                fallback = self._goto[state].get(char, 0)
+                self._fail[child] = fallback if fallback != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def matches(self, text):
+        """Yield (start, end, pattern_id) for whole-word (or prefix) occurrences"""
+        goto, fail, out = self._goto, self._fail, self._out
+        patterns, prefix = self.patterns, self._prefix
+        length = len(text)
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not out[node]:
+                continue
+            for pattern_id in out[node]:
+                start = index - len(patterns[pattern_id]) + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix[pattern_id] and index + 1 < length and _is_word_char(text[index + 1]):
+                    continue
+                yield start, index + 1, pattern_id
+
+
+class IntentEngine:
+    """Ranks intents for a message from weighted keyword and phrase matches"""
+
+    def __init__(self, lexicon=INTENT_LEXICON, min_score=MIN_INTENT_SCORE):
+        self.intents = list(lexicon)
+        self.min_score = min_score
+        weights = {}
+        for intent, phrases in lexicon.items():
+            for phrase, weight in phrases.items():
+                weights.setdefault(phrase.lower(), {})[intent] = weight
+        self._weights = [weights[phrase] for phrase in weights]
+        self._automaton = AhoCorasick(list(weights))
+
+    def classify(self, message):
+        """Return [{"intent", "score", "confidence", "matches"}] best first, always including one intent"""
+        text = ' '.join(str(message or '').lower().split())
+        scores = {}
+        matched = {}
+        hits = {}
+        for start, end, pattern_id in self._automaton.matches(text):
+            # Repeats of a phrase add less each time
+            hits[pattern_id] = hits.get(pattern_id, 0) + 1
+            damping = 1.0 / hits[pattern_id]
+            for intent, weight in self._weights[pattern_id].items():
+                scores[intent] = scores.get(intent, 0.0) + weight * damping
+                if hits[pattern_id] == 1:
+                    matched.setdefault(intent, []).append(text[start:end])
+
+        educational = sum(score for intent, score in scores.items() if intent != OFF_TOPIC)
+        if educational < self.min_score and scores.get(OFF_TOPIC, 0.0) < self.min_score:
+            # Nothing recognisable: off topic by default
+            scores[OFF_TOPIC] = self.min_score
+
+        total = sum(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.intents.index(item[0])))
+        return [
+            {
+                "intent": intent,
+                "score": round(score, 3),
+                "confidence": round(score / total * (1 - math.exp(-total)), 3),
+                "matches": matched.get(intent, [])
+            }
+            for intent, score in ranked
+        ]
+
+    def top_intent(self, message):
+        """The best intent for a message"""
+        return self.classify(message)[0]["intent"]
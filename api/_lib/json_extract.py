@@ -0,0 +1,285 @@
+"""
+Incremental, fault-tolerant JSON extraction for model output
+
+Model responses wrap JSON in code fences, lead with prose, leave trailing
+commas and get cut off at the token limit. The parser here walks the text
+once, skips anything before the first bracket, tolerates trailing commas and
+on truncation or a syntax error returns the largest valid prefix it saw:
+open arrays and objects are closed, and a half-written object inside an
+array (e.g. a truncated question) is dropped rather than returned partial.
+
+It can also be fed chunk by chunk while a response streams in, reporting
+each element of the target array as soon as the element is complete.
+"""
+
+import re
+import json
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_WHITESPACE_OR_DELIMITER = re.compile(r'[\s,\]}]')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+_MISSING = object()
+
+
+class _Frame:
+    """An open array or object on the parser stack"""
+
+    __slots__ = ('container', 'is_list', 'key', 'state', 'is_target')
+
+    def __init__(self, container, is_target=False):
+        self.container = container
+        self.is_list = isinstance(container, list)
+        self.key = None
+        # list: 'value' | 'comma'; object: 'key' | 'colon' | 'value' | 'comma'
+        self.state = 'value' if self.is_list else 'key'
+        self.is_target = is_target
+
+
+class IncrementalJSONParser:
+    """Single-pass JSON parser that survives noisy and truncated input
+
+    feed() returns the elements of the target array completed by that chunk:
+    the top-level array, or the first array stored under array_key.
+    close() finishes parsing and returns the best value recovered.
+    """
+
+    def __init__(self, array_key=None, expect=None):
+        self.array_key = array_key
+        self._starts = {'object': '{', 'array': '['}.get(expect, '{[')
+        self._buffer = ''
+        self._offset = 0
+        self._pos = 0
+        self._stack = []
+        self._root = _MISSING
+        self._root_start = None
+        self._target_found = False
+        self._pending = []
+        self._emitted = False
+        self.done = False
+        self.truncated = False
+        self.error = None
+
+    def feed(self, chunk):
+        """Parse another chunk and return newly completed target-array elements"""
+        if not self.done:
+            self._buffer += chunk
+            self._parse(final=False)
+
+            # Forget text that has been fully consumed
+            if self._pos:
+                self._offset += self._pos
+                self._buffer = self._buffer[self._pos:]
+                self._pos = 0
+
+        items, self._pending = self._pending, []
+        if items:
+            self._emitted = True
+        return items
+
+    def close(self):
+        """Finish parsing at end of input and return the recovered value"""
+        if not self.done:
+            self._parse(final=True)
+            if not self.done:
+                self._finish(truncated=bool(self._stack))
+        return self.result()
+
+    def result(self):
+        """Return the value recovered so far, or None when nothing was found"""
+        return None if self._root is _MISSING else self._root
+
+    def _parse(self, final):
+        """Consume as much of the buffer as can be parsed unambiguously"""
+        buffer = self._buffer
+        length = len(buffer)
+        pos = self._pos
+
+        while pos < length and not self.done:
+            if self._root is _MISSING:
+                # Skip code fences and leading prose up to the first bracket
+                starts = [buffer.find(char, pos) for char in self._starts]
+                starts = [start for start in starts if start >= 0]
+                if not starts:
+                    pos = length
+                    break
+                pos = min(starts)
+                self._root_start = self._offset + pos
+
+            char = buffer[pos]
+            if char in ' \t\r\n':
+                pos = _WHITESPACE.match(buffer, pos).end()
+                continue
+
+            frame = self._stack[-1] if self._stack else None
+
+            if char == '{' or char == '[':
+                if frame is not None and frame.state != 'value':
+                    pos = self._fail(pos, f"Unexpected '{char}'")
+                    continue
+                self._open({} if char == '{' else [])
+                pos += 1
+
+            elif char == '}' or char == ']':
+                if frame is None or frame.is_list != (char == ']'):
+                    pos = self._fail(pos, f"Unexpected '{char}'")
+                    continue
+                # A trailing comma or a dangling key just closes the container
+                self._close()
+                pos += 1
+
+            elif char == ',':
+                if frame.state == 'comma':
+                    frame.state = 'value' if frame.is_list else 'key'
+                elif frame.state not in ('value', 'key'):
+                    pos = self._fail(pos, "Unexpected ','")
+                    continue
+                pos += 1
+
+            elif char == ':':
+                if frame.is_list or frame.state != 'colon':
+                    pos = self._fail(pos, "Unexpected ':'")
+                    continue
+                frame.state = 'value'
+                pos += 1
+
+            elif char == '"':
+                try:
+                    text, end = scanstring(buffer, pos + 1, False)
+                except json.JSONDecodeError as e:
+                    # Wait for the rest of a string that is still streaming in
+                    if not final and (e.msg.startswith('Unterminated') or e.pos >= length - 6):
+                        break
+                    pos = self._fail(pos, e.msg)
+                    continue
+
+                if frame.state == 'key':
+                    frame.key = text
+                    frame.state = 'colon'
+                elif frame.state == 'value':
+                    self._add(text)
+                else:
+                    pos = self._fail(pos, 'Unexpected string')
+                    continue
+                pos = end
+
+            else:
+                if frame.state != 'value':
+                    pos = self._fail(pos, f"Unexpected '{char}'")
+                    continue
+
+                # A number near the end of the buffer may still have digits coming
+                if not final and length - pos < 32 and not _WHITESPACE_OR_DELIMITER.search(buffer, pos):
+                    break
+
+                match = _NUMBER.match(buffer, pos)
+                if match:
+                    number = match.group()
+                    is_float = '.' in number or 'e' in number or 'E' in number
+                    self._add(float(number) if is_float else int(number))
+                    pos = match.end()
+                    continue
+
+                for literal, value in _LITERALS.items():
+                    if buffer.startswith(literal, pos):
+                        self._add(value)
+                        pos += len(literal)
+                        break
+                else:
+                    pos = self._fail(pos, f"Unexpected '{char}'")
+
+        self._pos = pos
+
+    def _open(self, container):
+        """Push a new container, attaching it to its parent straight away"""
+        parent = self._stack[-1] if self._stack else None
+        is_target = False
+        if isinstance(container, list) and not self._target_found:
+            if parent is None or (not parent.is_list and parent.key == self.array_key and self.array_key is not None):
+                is_target = True
+                self._target_found = True
+
+        if parent is None:
+            self._root = container
+        elif parent.is_list:
+            parent.container.append(container)
+        else:
+            parent.container[parent.key] = container
+        self._stack.append(_Frame(container, is_target))
+
+    def _close(self):
+        """Pop the innermost container and report it to its parent"""
+        frame = self._stack.pop()
+        if not self._stack:
+            self._finish(truncated=False)
+            return
+        parent = self._stack[-1]
+        parent.state = 'comma'
+        if parent.is_target:
+            self._pending.append(frame.container)
+
+    def _add(self, value):
+        """Store a completed scalar in the innermost container"""
+        frame = self._stack[-1]
+        if frame.is_list:
+            frame.container.append(value)
+        else:
+            frame.container[frame.key] = value
+        frame.state = 'comma'
+        if frame.is_target:
+            self._pending.append(value)
+
+    def _fail(self, pos, message):
+        """Handle a syntax error, retrying from a later bracket if nothing was kept"""
+        if not self._emitted and not self._pending and not self._root and self._root_start >= self._offset:
+            # The first bracket belonged to prose; look for the real payload
+            self._stack = []
+            self._root = _MISSING
+            self._target_found = False
+            return self._root_start - self._offset + 1
+
+        self.error = message
+        self._finish(truncated=True)
+        return pos
+
+    def _finish(self, truncated):
+        """Stop parsing, dropping a half-written object inside an array"""
+        if truncated:
+            for depth in range(1, len(self._stack)):
+                frame, parent = self._stack[depth], self._stack[depth - 1]
+                if not frame.is_list and parent.is_list:
+                    parent.container.pop()
+                    break
+        self._stack = []
+        self.truncated = truncated
+        self.done = True
+
+
+def extract_json(text, expect=None):
+    """Return the largest valid JSON value in text, or None when there is none"""
+    text = text or ''
+    starts = {'object': '{', 'array': '['}.get(expect, '{[')
+    
+    # Well-formed output between the outermost brackets takes the C decoder
+    first = min((i for i in (text.find(char) for char in starts) if i >= 0), default=-1)
+    last = max(text.rfind('}'), text.rfind(']'))
+    if 0 <= first < last:
+        try:
+            return json.loads(text[first:last + 1], strict=False)
+        except json.JSONDecodeError:
+            pass
+    
+    parser = IncrementalJSONParser(expect=expect)
+    parser.feed(text)
+    return parser.close()
+
+
+def extract_array(text, key=None):
+    """Return a top-level array, or the array stored under key in a top-level object"""
+    value = extract_json(text)
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict) and key is not None and isinstance(value.get(key), list):
+        return value[key]
+    return None
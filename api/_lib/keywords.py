@@ -0,0 +1,323 @@
+"""
+Local keyword and keyphrase extraction: RAKE phrase scoring weighted by
+TF-IDF against a background vocabulary
+
+Candidate phrases are the runs of content words between stopwords,
+generic verbs and punctuation (RAKE); their 1-3 word n-grams compete as
+keyphrases. Each word is scored by its degree-to-frequency ratio (words
+that keep appearing inside longer phrases score higher) times its
+inverse frequency in general English, so "photosynthesis" outweighs
+"process" however often the material repeats both, and a phrase only
+scores well when its words actually occur together. Large documents are
+scanned through evenly spaced windows, which keeps extraction within a
+few milliseconds for megabyte uploads without losing the dominant terms.
+"""
+
+import re
+import math
+import heapq
+
+from .search_index import STOPWORDS
+
+# Longest span of a document read in full; larger ones are sampled in windows
+MAX_SCAN = 48 * 1024
+SCAN_WINDOWS = 16
+MAX_PHRASE_WORDS = 3
+MIN_WORD_LENGTH = 3
+
+# A phrase seen fewer times than it has words is usually an incidental word run
+RARE_PHRASE_PENALTY = 0.5
+
+# Score bonus per extra word in a phrase over the mean of its words' scores
+PHRASE_BONUS = 0.5
+
+# Function words and generic vocabulary: they end a candidate phrase
+GENERAL_WORDS = STOPWORDS | frozenset("""
+about above according across actually after again against all almost along
+already also although always am among amongst another any anyone anything
+anyway around away back because become becomes becoming been before began
+behind being below beside besides between beyond both brief briefly can
+cannot could did does doing done down due during each either else enough
+especially etc even ever every everything example examples except far few
+fig figure first following follows further furthermore get gets getting give
+given gives giving goes going gone got had hardly having he hence her here
+hers herself him himself his how however i ie if important include included
+includes including indeed instead just know known last later least less let
+like likely made mainly make makes making many may maybe me might mine more
+moreover most mostly much must my myself near nearly need needs neither never
+nevertheless new next no none nor not note noted nothing now often once one
+ones only onto other others otherwise our ours ourselves out over overall own
+page part particular particularly per perhaps please possible probably put
+quite rather really regarding said same say says second see seem seemed seems
+seen several shall she should show shown shows significant similar similarly
+simply since so some something sometimes soon still such sure take taken takes
+than thank thanks then there thereby therefore these they thing things think
+third those though three through throughout thus together too took toward
+towards two under unless unlike until up upon us use used uses using usually
+various very via want wants way ways we well went what whatever when whenever
+where whereas whether which while who whole whom whose why within without
+would yes yet you your yours yourself
+com html http https org www
+""".split())
+
+
+def _inflections(verbs):
+    """Base, third-person, past and -ing forms of regular verbs"""
+    forms = set()
+    for verb in verbs:
+        if verb.endswith('e'):
+            forms.update((verb, verb + 's', verb + 'd', verb[:-1] + 'ing'))
+        elif verb.endswith('y') and verb[-2] not in 'aeiou':
+            forms.update((verb, verb[:-1] + 'ies', verb[:-1] + 'ied', verb + 'ing'))
+        elif verb.endswith(('s', 'sh', 'ch', 'x')):
+            forms.update((verb, verb + 'es', verb + 'ed', verb + 'ing'))
+        else:
+            forms.update((verb, verb + 's', verb + 'ed', verb + 'ing'))
+    return forms
+
+
+# Verbs that link the terms of a sentence rather than name a topic
+GENERAL_VERBS = frozenset(_inflections("""
+absorb achieve affect aim allow appear apply arise assume avoid believe belong
+calculate carry cause collect combine compare compute connect consist convert
+create deliver demonstrate depend derive describe determine differentiate
+discuss enable encourage ensure establish evaluate examine explain express
+generate handle happen identify illustrate imagine improve indicate involve
+maintain obtain occur perform prevent produce propose prove provide receive
+reduce refer reflect relate rely remain remove represent require reveal seek
+select send serve solve suggest tend transform try vary
+""".split())) | frozenset("""
+arose became begun brought built chosen drawn found gave held kept led left
+lost meant met paid ran sent set spent stood taught told thought understood won
+written
+""".split())
+
+# Everyday vocabulary: a valid part of a phrase, but weak evidence of a topic
+COMMON_WORDS = frozenset("""
+ability able access account act action activity add added addition additional
+address age ago agree amount answer approach area areas argue article ask
+aspect available average base based basic basis begin beginning best better big
+bit book break bring build building call called came care case cases center
+central certain chance change changes chapter check child children choice
+choose city class clear clearly close come comes common complete consider
+considered contain contains content context continue control cost country
+course current data day days deal decide decision define defined degree design
+detail details develop developed development difference different difficult
+direct document early easy effect effective effects end entire equal event
+events evidence exactly exist expect experience fact factor factors family feel
+field final find finding fine focus follow form free full fully function future
+general generally good great group groups grow growth half hand hard head hear
+help high higher hold home human idea ideas image impact increase individual
+information interest issue issues item job keep key kind large larger lead
+learn learning leave level levels life limited line list little live local long
+look lot low lower main major man matter mean means measure meet member method
+methods mind model modern moment month move name necessary number numbers
+object offer office open order original outcome output paper pass past people
+period person place plan play point points policy position positive practice
+present pressure previous problem problems process product program public
+purpose question questions range rate reach read real reason recent record
+relationship report research result results return review right role rule rules
+run section sense series short side simple single situation size small social
+someone source special specific stage standard start state statement step steps
+structure student students study subject success support system systems table
+team term terms test text time times today topic total turn type types
+understand understanding unit value values view week word words work working
+world write year years young
+""".split())
+
+# Inverse frequency of a word in the background vocabulary
+COMMON_IDF = 1.0
+DEFAULT_IDF = 3.0
+
+# Punctuation and numbers end a candidate phrase
+_PHRASE_BREAK = re.compile(r'[.,;:!?()\[\]{}"|/\\=<>*#`~_+&%$@^\d\n]+')
+_EDGE_PUNCTUATION = '\'"‘’“”-'
+_WORD = re.compile(r'[a-z](?:[a-z-]*[a-z])?$')
+MAX_CACHED_WORDS = 100000
+
+
+def _stem(word):
+    """Fold plurals so "cities" and "city" count as one word"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def _scan_text(text, max_scan=MAX_SCAN, windows=SCAN_WINDOWS):
+    """The text itself, or evenly spaced windows of it cut at whitespace"""
+    if len(text) <= max_scan:
+        return text
+    width = max_scan // windows
+    stride = len(text) // windows
+    parts = []
+    for start in range(0, stride * windows, stride):
+        window = text[start:start + width]
+        # Drop the partial words at both edges
+        first, last = window.find(' '), window.rfind(' ')
+        parts.append(window[first + 1:last] if 0 <= first < last else window)
+    return '\n'.join(parts)
+
+
+class KeywordExtractor:
+    """Keyword and keyphrase extractor over a background vocabulary
+
+    background maps a word to its inverse document frequency; words not in
+    it are treated as rare, domain-specific vocabulary.
+    """
+
+    def __init__(self, background=None, general_words=GENERAL_WORDS | GENERAL_VERBS):
+        if background is None:
+            background = dict.fromkeys((_stem(word) for word in COMMON_WORDS), COMMON_IDF)
+        self.background = background
+        self.general_words = general_words
+        self._words = {}
+
+    def idf(self, word):
+        """Background inverse frequency of a (stemmed) word"""
+        return self.background.get(word, DEFAULT_IDF)
+
+    def _word(self, token):
+        """(stem, surface) of a whitespace token, or ('', '') when it ends a phrase"""
+        cached = self._words.get(token)
+        if cached is None:
+            surface = token.strip(_EDGE_PUNCTUATION)
+            if surface.endswith(("'s", "’s")):
+                surface = surface[:-2]
+            lower = surface.lower()
+            if len(lower) < MIN_WORD_LENGTH or lower in self.general_words or not _WORD.match(lower):
+                cached = ('', '')
+            else:
+                cached = (_stem(lower), surface)
+            if len(self._words) < MAX_CACHED_WORDS:
+                self._words[token] = cached
+        return cached
+
+    def _runs(self, text):
+        """Counts of RAKE candidate phrases (runs of content words) and their first spelling"""
+        runs = {}
+        displays = {}
+        for fragment in _PHRASE_BREAK.split(_scan_text(text)):
+            words, surface = [], []
+            for token in fragment.split():
+                stem, spelling = self._word(token)
+                if stem:
+                    words.append(stem)
+                    surface.append(spelling)
+                    continue
+                if words:
+                    run = tuple(words)
+                    if run in runs:
+                        runs[run] += 1
+                    else:
+                        runs[run] = 1
+                        displays[run] = surface
+                    words, surface = [], []
+            if words:
+                run = tuple(words)
+                if run in runs:
+                    runs[run] += 1
+                else:
+                    runs[run] = 1
+                    displays[run] = surface
+        return runs, displays
+
+    def _candidates(self, text):
+        """N-gram counts and display forms, plus word frequencies and RAKE degrees"""
+        grams = {}
+        gram_displays = {}
+        frequency = {}
+        degree = {}
+        alone = {}
+        runs, displays = self._runs(text)
+
+        # Each distinct run is expanded once, weighted by how often it occurs
+        for run, count in runs.items():
+            size = len(run)
+            surface = displays[run]
+            if size == 1:
+                alone[run[0]] = alone.get(run[0], 0) + count
+            for position, word in enumerate(run):
+                frequency[word] = frequency.get(word, 0) + count
+                degree[word] = degree.get(word, 0) + count * min(size, MAX_PHRASE_WORDS)
+                for length in range(1, min(MAX_PHRASE_WORDS, size - position) + 1):
+                    gram = run[position:position + length]
+                    if gram in grams:
+                        grams[gram] += count
+                    else:
+                        grams[gram] = count
+                        gram_displays[gram] = ' '.join(surface[position:position + length])
+        return grams, gram_displays, frequency, degree, alone
+
+    def extract(self, text, limit=10):
+        """Return (keyphrases, keywords): best-first lists of (text, score)
+
+        Keyphrases are the top n-grams of candidate phrases with overlapping
+        ones removed; keywords are single words ranked by TF-IDF.
+        """
+        if not text:
+            return [], []
+        grams, displays, frequency, degree, alone = self._candidates(text)
+        if not grams:
+            return [], []
+
+        idf = {word: self.background.get(word, DEFAULT_IDF) for word in frequency}
+        word_scores = {word: idf[word] * math.sqrt(degree[word] / frequency[word]) for word in frequency}
+        # Everyday words ("data", "rate") occur everywhere; only rarer ones must stick to a phrase
+        sticky = {word: frequency[word] if idf[word] > COMMON_IDF else 0 for word in frequency}
+        # One-off multi-word runs only compete when the text is too short for anything else
+        candidates = [(gram, count) for gram, count in grams.items() if count > 1 or len(gram) == 1]
+        if len(candidates) < 3 * limit:
+            candidates = list(grams.items())
+
+        scored = []
+        for gram, count in candidates:
+            # Cohesion: how often the words occur as exactly this phrase
+            if len(gram) == 1:
+                cohesion = (alone.get(gram[0], 0) + 1) / (count + 1)
+            else:
+                cohesion = count / max(count, *(sticky[word] for word in gram))
+            score = ((1 + math.log(count)) * cohesion * (1 + PHRASE_BONUS * (len(gram) - 1))
+                     * sum(word_scores[word] for word in gram) / len(gram))
+            if count < len(gram):
+                score *= RARE_PHRASE_PENALTY
+            scored.append((score, gram))
+        # Overlapping phrases are skipped below, so keep a generous head of the ranking
+        scored = heapq.nsmallest(10 * limit, scored, key=lambda item: (-item[0], item[1]))
+
+        keyphrases, chosen = [], []
+        for score, gram in scored:
+            if len(keyphrases) >= limit:
+                break
+            words = set(gram)
+            if any(words <= other or other <= words for other in chosen):
+                continue
+            chosen.append(words)
+            keyphrases.append((displays[gram], round(score, 3)))
+
+        keywords = heapq.nsmallest(
+            limit,
+            ((word, (1 + math.log(count)) * idf[word]) for word, count in frequency.items()),
+            key=lambda item: (-item[1], item[0])
+        )
+        keywords = [(displays[(word,)], round(score, 3)) for word, score in keywords]
+        return keyphrases, keywords
+
+
+_default_extractor = KeywordExtractor()
+
+
+def extract_keyphrases(text, limit=10):
+    """Best keyphrases of a text as (phrase, score) pairs"""
+    return _default_extractor.extract(text, limit)[0]
+
+
+def extract_keywords(text, limit=10):
+    """Best single keywords of a text as (word, score) pairs"""
+    return _default_extractor.extract(text, limit)[1]
+
+
+def display_phrase(phrase):
+    """Title-case a phrase for display, keeping acronyms and mixed case"""
+    return ' '.join(word if not word.islower() else word.capitalize() for word in phrase.split())
@@ -0,0 +1,354 @@
+"""
+Streaming per-user, per-topic mastery aggregates for weakness detection
+
+Every quiz answer updates one fixed-size record in O(1): attempts,
+correct answers, an exponentially decayed accuracy (recent answers weigh
+more) and the time of the last attempt. Records live in a NumPy
+structured array (32 bytes each) indexed by (user, topic), so weakness
+queries rank a user's topics straight from the aggregates without
+re-reading attempt history.
+
+The shared adaptive_difficulty_history log in the ability store is the
+source of truth: sync() folds the answers of quizzes logged since the last
+sync, by rowid, in one vectorised pass per batch, so every worker sees
+every answer and nothing is lost when an instance is recycled.
+snapshot() writes the array and the rowid it covers to a compressed .npz
+file atomically; a new tracker restores it and folds only the newer rows.
+A snapshot is a cache, so workers overwriting each other's is harmless.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+
+from .adaptive_difficulty import DEFAULT_PATH as HISTORY_PATH
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'edusense-mastery.npz')
+
+RECORD = np.dtype([
+    ('attempts', np.uint32),
+    ('correct', np.uint32),
+    ('decayed_correct', np.float32),
+    ('decayed_attempts', np.float32),
+    ('last_seen', np.float64),
+    ('first_seen', np.float64),
+])
+
+# Each answer multiplies the weight of older answers by this (half weight after ~7 answers)
+DECAY = 0.9
+
+# Accuracy is shrunk towards PRIOR_ACCURACY as if from PRIOR_ATTEMPTS extra answers
+PRIOR_ACCURACY = 0.7
+PRIOR_ATTEMPTS = 3.0
+
+# Topics not practised for a while are weaker than their accuracy suggests
+FORGETTING_DAYS = 30.0
+FORGETTING_WEIGHT = 0.15
+
+# Write a snapshot after this many answers or seconds, whichever comes first
+SNAPSHOT_EVERY = 500
+SNAPSHOT_INTERVAL = 300
+
+# History rows are folded this many at a time; unforced syncs are at most this often (seconds)
+SYNC_BATCH = 2048
+SYNC_INTERVAL = 30
+
+
+def normalize_topic(topic):
+    """Case- and whitespace-insensitive topic key"""
+    return ' '.join(str(topic or '').lower().split())
+
+
+class MasteryTracker:
+    """O(1) answer updates and per-user topic rankings over compact records"""
+
+    def __init__(self, path=DEFAULT_PATH, history_path=HISTORY_PATH, capacity=1024):
+        self.path = path
+        self.history_path = history_path
+        self._records = np.zeros(capacity, dtype=RECORD)
+        self._keys = []
+        self._rows = {}
+        self._user_rows = {}
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._snapshot_at = time.time()
+        self._snapshot_worker = None
+        self._sync_lock = threading.Lock()
+        self._local = threading.local()
+        self._synced_at = 0.0
+        self._last_rowid = 0
+        self.updates = 0
+        self.snapshots = 0
+        self.restored = 0
+        if path:
+            self.restore()
+
+    def _row(self, user_id, topic, label):
+        """Row of a (user, topic) record, appending an empty one when new"""
+        key = (str(user_id), normalize_topic(topic))
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row >= len(self._records):
+                grown = np.zeros(len(self._records) * 2, dtype=RECORD)
+                grown[:row] = self._records[:row]
+                self._records = grown
+            self._rows[key] = row
+            self._keys.append(key)
+            self._user_rows.setdefault(key[0], []).append(row)
+            self._topics.setdefault(key[1], str(label or topic).strip())
+        return row
+
+    def record(self, user_id, topic, correct, at=None):
+        """Fold one answer into the user's aggregate for a topic"""
+        at = time.time() if at is None else at
+        with self._lock:
+            row = self._row(user_id, topic, topic)
+            record = self._records[row]
+            record['attempts'] += 1
+            record['correct'] += 1 if correct else 0
+            record['decayed_correct'] = record['decayed_correct'] * DECAY + (1.0 if correct else 0.0)
+            record['decayed_attempts'] = record['decayed_attempts'] * DECAY + 1.0
+            if not record['first_seen']:
+                record['first_seen'] = at
+            record['last_seen'] = max(record['last_seen'], at)
+            self.updates += 1
+            self._dirty += 1
+        self._maybe_snapshot()
+
+    def record_many(self, user_ids, topics, correct, times):
+        """Fold many answers, given in the order they were made, in one vectorised pass"""
+        with self._lock:
+            self._fold(user_ids, topics, correct, times)
+        self._maybe_snapshot()
+
+    def _fold(self, user_ids, topics, correct, times):
+        """Apply a batch of answers; equivalent to calling record() on each in order"""
+        if not len(user_ids):
+            return
+        rows = np.array([self._row(user_id, topic, topic) for user_id, topic in zip(user_ids, topics)])
+        correct = np.asarray(correct, dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)
+        unique, inverse, counts = np.unique(rows, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+        # The i-th of a record's n answers in this batch is decayed n-1-i times by the later ones
+        order = np.argsort(inverse, kind='stable')
+        rank = np.empty(len(rows), dtype=np.int64)
+        rank[order] = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        weight = DECAY ** (counts[inverse] - 1 - rank)
+        carry = DECAY ** counts
+
+        records = self._records
+        records['attempts'][unique] += counts.astype(np.uint32)
+        records['correct'][unique] += np.bincount(inverse, weights=correct).astype(np.uint32)
+        records['decayed_correct'][unique] = (records['decayed_correct'][unique] * carry +
+                                              np.bincount(inverse, weights=correct * weight))
+        records['decayed_attempts'][unique] = (records['decayed_attempts'][unique] * carry +
+                                               np.bincount(inverse, weights=weight))
+        first = np.full(len(unique), np.inf)
+        last = np.zeros(len(unique))
+        np.minimum.at(first, inverse, times)
+        np.maximum.at(last, inverse, times)
+        seen = records['first_seen'][unique]
+        records['first_seen'][unique] = np.where(seen > 0, seen, first)
+        records['last_seen'][unique] = np.maximum(records['last_seen'][unique], last)
+        self.updates += len(rows)
+        self._dirty += len(rows)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.history_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def sync(self, force=False):
+        """Fold the answers of quizzes logged since the last sync; returns how many"""
+        if not self.history_path or (not force and time.time() - self._synced_at < SYNC_INTERVAL):
+            return 0
+        if not self._sync_lock.acquire(blocking=force):
+            return 0
+        try:
+            self._synced_at = time.time()
+            folded = self._sync()
+        finally:
+            self._sync_lock.release()
+        self._maybe_snapshot()
+        return folded
+
+    def _sync(self):
+        folded = 0
+        try:
+            conn = self._connection()
+            newest = conn.execute('SELECT MAX(rowid) FROM adaptive_difficulty_history').fetchone()[0] or 0
+            if newest < self._last_rowid:
+                # The history was reset under a restored snapshot; start over from it
+                self._clear()
+            cursor = conn.execute(
+                'SELECT rowid, user_id, topic, performance_data, created_at FROM adaptive_difficulty_history '
+                'WHERE rowid > ? ORDER BY rowid', (self._last_rowid,)
+            )
+            while True:
+                rows = cursor.fetchmany(SYNC_BATCH)
+                if not rows:
+                    return folded
+                user_ids, topics, correct, times = [], [], [], []
+                for rowid, user_id, topic, payload, created_at in rows:
+                    try:
+                        data = json.loads(payload)
+                        answers = data.get('answers') or []
+                    except (ValueError, AttributeError):
+                        continue
+                    label = data.get('topic') or topic
+                    answer_topics = data.get('answer_topics') or []
+                    for index, (_, value) in enumerate(answers):
+                        answer_topic = answer_topics[index] if index < len(answer_topics) else None
+                        user_ids.append(user_id)
+                        topics.append(answer_topic or label)
+                        correct.append(value)
+                        times.append(created_at)
+                with self._lock:
+                    self._fold(user_ids, topics, correct, times)
+                    self._last_rowid = rows[-1][0]
+                folded += len(user_ids)
+        except sqlite3.Error as e:
+            # The history table appears with the first recorded quiz
+            if 'no such table' not in str(e):
+                print(f"Mastery sync error: {e}")
+            return folded
+
+    def _clear(self):
+        with self._lock:
+            self._records = np.zeros(1024, dtype=RECORD)
+            self._keys = []
+            self._rows = {}
+            self._user_rows = {}
+            self._topics = {}
+            self._last_rowid = 0
+
+    def topics(self, user_id, now=None):
+        """Every topic the user has practised with its aggregates and weakness score"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = list(self._user_rows.get(str(user_id), ()))
+            records = self._records[rows].copy()
+            names = [self._topics[self._keys[row][1]] for row in rows]
+        if not rows:
+            return []
+
+        accuracy = records['correct'] / np.maximum(records['attempts'], 1)
+        recent = records['decayed_correct'] / np.maximum(records['decayed_attempts'], 1e-9)
+        shrunk = ((records['decayed_correct'] + PRIOR_ACCURACY * PRIOR_ATTEMPTS) /
+                  (records['decayed_attempts'] + PRIOR_ATTEMPTS))
+        idle_days = np.maximum(now - records['last_seen'], 0) / 86400.0
+        forgetting = 1.0 - np.exp(-idle_days / FORGETTING_DAYS)
+        weakness = np.clip(1.0 - shrunk + FORGETTING_WEIGHT * forgetting, 0.0, 1.0)
+        return [
+            {
+                "topic": name,
+                "attempts": int(record['attempts']),
+                "correct": int(record['correct']),
+                "accuracy": round(float(overall), 3),
+                "recent_accuracy": round(float(decayed), 3),
+                "days_since_practice": round(float(days), 1),
+                "weakness": round(float(score), 3)
+            }
+            for name, record, overall, decayed, days, score
+            in zip(names, records, accuracy, recent, idle_days, weakness)
+        ]
+
+    def weakest(self, user_id, limit=5, now=None):
+        """The user's topics ranked weakest first"""
+        return sorted(self.topics(user_id, now), key=lambda topic: -topic["weakness"])[:limit]
+
+    def _maybe_snapshot(self):
+        """Snapshot in the background once enough answers or time have accumulated"""
+        if not self.path:
+            return
+        if self._dirty < SNAPSHOT_EVERY and not (self._dirty and time.time() - self._snapshot_at > SNAPSHOT_INTERVAL):
+            return
+        with self._lock:
+            if self._snapshot_worker is not None and self._snapshot_worker.is_alive():
+                return
+            self._snapshot_worker = threading.Thread(target=self.snapshot, name='mastery-snapshot', daemon=True)
+            self._snapshot_worker.start()
+
+    def snapshot(self, path=None):
+        """Write all aggregates and the history rowid they cover to a .npz file atomically; returns its size"""
+        path = path or self.path
+        with self._lock:
+            count = len(self._keys)
+            records = self._records[:count].copy()
+            users = np.array([user for user, _ in self._keys], dtype=str)
+            topics = np.array([topic for _, topic in self._keys], dtype=str)
+            labels = np.array([self._topics[topic] for _, topic in self._keys], dtype=str)
+            last_rowid = np.array(self._last_rowid, dtype=np.int64)
+            self._dirty = 0
+            self._snapshot_at = time.time()
+
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(os.path.abspath(path)))
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, records=records, users=users, topics=topics, labels=labels, last_rowid=last_rowid)
+            os.replace(temp_path, path)
+            self.snapshots += 1
+            return os.path.getsize(path)
+        except OSError as e:
+            print(f"Mastery snapshot error: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return 0
+
+    def restore(self, path=None):
+        """Load aggregates from a snapshot, replacing the current ones; returns the record count"""
+        path = path or self.path
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                records = data['records']
+                users = data['users'].tolist()
+                topics = data['topics'].tolist()
+                labels = data['labels'].tolist()
+                last_rowid = int(data['last_rowid'])
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Mastery restore error: {e}")
+            return 0
+
+        with self._lock:
+            self._records = np.zeros(max(1024, len(records) * 2), dtype=RECORD)
+            self._records[:len(records)] = records.astype(RECORD)
+            self._keys = list(zip(users, topics))
+            self._rows = {key: row for row, key in enumerate(self._keys)}
+            self._user_rows = {}
+            for row, user in enumerate(users):
+                self._user_rows.setdefault(user, []).append(row)
+            self._topics = dict(zip(topics, labels))
+            self._last_rowid = last_rowid
+            self._dirty = 0
+            self.restored = len(records)
+        return len(records)
+
+    def stats(self):
+        """Return record counts, memory use and snapshot counters"""
+        with self._lock:
+            count = len(self._keys)
+            return {
+                "records": count,
+                "users": len(self._user_rows),
+                "record_bytes": count * RECORD.itemsize,
+                "updates": self.updates,
+                "pending": self._dirty,
+                "snapshots": self.snapshots,
+                "restored": self.restored,
+                "last_rowid": self._last_rowid
+            }
@@ -0,0 +1,238 @@
+"""
+Combined material analysis: topics, key concepts, learning objectives and
+study recommendations extracted together with one structured Gemini call
+per chunk of the material, then merged
+"""
+
+import os
+
+from .analysis_store import AnalysisStore, DEFAULT_PATH, content_key
+from .near_duplicates import NearDuplicateIndex
+from .json_extract import extract_json
+from .keywords import KeywordExtractor, display_phrase
+from .chunking import split_material, map_chunks, merge_unique
+from .runtime import MODEL_NAME, PromptTemplate, get_model, has_api_key
+from .single_flight import SingleFlight
+
+# Bump whenever the prompt or output format changes so stale analyses are not reused
+PROMPT_VERSION = 'material-analysis-v2'
+
+# Long materials are analyzed chunk by chunk on a bounded thread pool
+CHUNK_SIZE = int(os.environ.get('MATERIAL_CHUNK_SIZE', 2000))
+MAX_CHUNKS = int(os.environ.get('MATERIAL_MAX_CHUNKS', 8))
+MAX_WORKERS = int(os.environ.get('MODEL_MAX_WORKERS', 10))
+
+# Analyses are shared across worker processes and survive cold starts
+analysis_store = AnalysisStore(
+    path=os.environ.get('ANALYSIS_CACHE_PATH', DEFAULT_PATH),
+    max_bytes=int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+)
+
+# Re-uploads this similar to an analyzed material reuse its analysis
+near_duplicates = NearDuplicateIndex(
+    analysis_store.path,
+    threshold=float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.95))
+)
+
+# Identical materials analyzed at the same time share one set of model calls
+analysis_flight = SingleFlight('material_analysis')
+
+# Local keyphrase extraction backs up the model and fills gaps in its output
+keyword_extractor = KeywordExtractor()
+
+# Content key -> canonical content key, memoised per process
+_canonical_keys = {}
+
+# Prompt template is parsed once per process
+ANALYSIS_PROMPT = PromptTemplate("""Analyze this document for a student study guide:
+
+FILENAME: {filename}
+SECTION: part {part} of {total}
+CONTENT: {chunk}
+
+Return ONLY a JSON object with this exact structure:
+{{
+  "topics": ["Topic 1", "Topic 2", "Topic 3", "Topic 4"],
+  "concepts": ["Concept 1", "Concept 2", "Concept 3"],
+  "objectives": ["Objective 1", "Objective 2", "Objective 3"],
+  "recommendations": ["Recommendation 1", "Recommendation 2", "Recommendation 3"]
+}}
+
+Requirements:
+- topics: 4-6 specific topics that are actually discussed in the content
+- concepts: 3-5 key concepts that are central to understanding the material
+- objectives: 3-4 specific, measurable learning objectives using action verbs like "Understand", "Analyze", "Apply", "Evaluate"
+- recommendations: 3-4 specific, actionable strategies for studying this material effectively
+- Base everything on the actual content provided
+- Return only the JSON object, no additional text""")
+
+ANALYSIS_FIELDS = ('topics', 'concepts', 'objectives', 'recommendations')
+
+# How many merged items each field keeps after the reduce step
+FIELD_LIMITS = {'topics': 6, 'concepts': 5, 'objectives': 4, 'recommendations': 4}
+
+DEFAULT_OBJECTIVES = [
+    "Understand the main concepts presented in the material",
+    "Apply the knowledge to practical scenarios",
+    "Analyze the relationships between different concepts"
+]
+
+DEFAULT_RECOMMENDATIONS = [
+    "Read through the material systematically and take detailed notes",
+    "Create concept maps to visualize relationships between topics",
+    "Practice with real-world examples and case studies",
+    "Review and test your understanding with practice questions"
+]
+
+# Used when the material has too little text to extract topics from
+GENERIC_TOPICS = ["Main Concepts", "Key Ideas", "Important Points", "Core Topics"]
+GENERIC_CONCEPTS = ["Core Principles", "Fundamental Concepts", "Key Ideas", "Main Principles"]
+
+def analyze_material(content, filename):
+    """Analyze material, reusing a stored analysis of identical or near-identical content"""
+    cached = analysis_store.get(content, PROMPT_VERSION)
+    if cached is not None:
+        return dict(cached, cache='hit')
+    
+    key = content_key(content, PROMPT_VERSION)
+    signature, shingles = near_duplicates.sketch(content)
+    duplicate = _find_duplicate(signature, key, shingles)
+    if duplicate is not None:
+        duplicate_key, similarity, analysis = duplicate
+        # The original stays the cluster's only signature so quizzes keep one key
+        analysis_store.put(content, PROMPT_VERSION, analysis)
+        return dict(analysis, cache='near-duplicate', duplicate_of=duplicate_key, similarity=round(similarity, 4))
+    
+    # Concurrent uploads of the same material share one analysis
+    result, how = analysis_flight.do(key, _analyze_and_store, content, filename, key, signature, shingles)
+    return dict(result, cache='miss' if how == 'executed' else 'coalesced')
+
+def _analyze_and_store(content, filename, key, signature, shingles):
+    """Analyze material and persist the result"""
+    result = _analyze_material(content, filename)
+    
+    # Only persist real AI output so a transient failure is not replayed
+    if result.get('generated_by') != 'fallback-analysis':
+        analysis_store.put(content, PROMPT_VERSION, result)
+        near_duplicates.add(key, signature, shingles)
+    
+    return result
+
+def canonical_material_key(content):
+    """Content key of the analyzed material this content duplicates, or its own key
+
+    Quiz caches key material by this so near-identical re-uploads share quizzes.
+    """
+    key = content_key(content, PROMPT_VERSION)
+    canonical = _canonical_keys.get(key)
+    if canonical is None:
+        canonical = key
+        if not near_duplicates.contains(key):
+            signature, shingles = near_duplicates.sketch(content)
+            duplicate = _find_duplicate(signature, key, shingles)
+            if duplicate is not None:
+                canonical = duplicate[0]
+        if len(_canonical_keys) >= 1024:
+            _canonical_keys.clear()
+        _canonical_keys[key] = canonical
+    return canonical
+
+def _find_duplicate(signature, key, shingles=None):
+    """Return (key, similarity, analysis) for the closest analyzed near-duplicate, or None"""
+    for duplicate_key, similarity in near_duplicates.match(signature, exclude=key, shingles=shingles):
+        analysis = analysis_store.get_key(duplicate_key)
+        if analysis is not None:
+            return duplicate_key, similarity, analysis
+        # The analysis was evicted; its signature is no longer useful
+        near_duplicates.remove(duplicate_key)
+    return None
+
+def _analyze_material(content, filename):
+    """Analyze each chunk of the material in parallel and merge the results"""
+    try:
+        # Check if API key is available
+        if not has_api_key():
+            raise Exception("GEMINI_API_KEY not found")
+        
+        # Map: one structured call per section-aligned chunk
+        chunks = split_material(content, CHUNK_SIZE, MAX_CHUNKS)
+        jobs = [(chunk, filename, part + 1, len(chunks)) for part, chunk in enumerate(chunks)]
+        analyses = [analysis for analysis in map_chunks(_analyze_chunk, jobs, MAX_WORKERS) if analysis]
+        if not analyses:
+            raise Exception("No part of the material could be analyzed")
+        
+        # Reduce: merge and de-duplicate, filling gaps from the keyword fallback
+        fallback = fallback_analysis(content)
+        result = {"success": True}
+        for field in ANALYSIS_FIELDS:
+            values = [analysis[field] for analysis in analyses if isinstance(analysis.get(field), list)]
+            merged = merge_unique(values, FIELD_LIMITS[field])
+            result[field] = merged if len(merged) > 0 else fallback[field]
+        result["chunks_analyzed"] = len(analyses)
+        result["generated_by"] = MODEL_NAME
+        return result
+        
+    except Exception as e:
+        print(f"AI material analysis error: {e}")
+        return fallback_analysis(content)
+
+def _analyze_chunk(job):
+    """Analyze one chunk with a single Gemini call, returning None on failure"""
+    chunk, filename, part, total = job
+    try:
+        model = get_model()
+        prompt = ANALYSIS_PROMPT.render(filename=filename, part=part, total=total, chunk=chunk)
+        response = model.generate_content(prompt)
+        return parse_analysis(response.text)
+        
+    except Exception as e:
+        print(f"AI analysis error for part {part} of {total}: {e}")
+        return None
+
+def parse_analysis(text):
+    """Parse the combined analysis object out of the model response"""
+    analysis = extract_json(text, expect='object')
+    if not isinstance(analysis, dict):
+        raise Exception("Could not parse material analysis")
+    return analysis
+
+def fallback_analysis(content):
+    """Return an analysis built from locally extracted keyphrases when the model is unavailable"""
+    keyphrases, keywords = keyword_extractor.extract(content or '', limit=FIELD_LIMITS['topics'] + FIELD_LIMITS['concepts'])
+    topics = [display_phrase(phrase) for phrase, _ in keyphrases[:FIELD_LIMITS['topics']]]
+    
+    # Concepts: the next phrases, then single keywords the topics do not already cover
+    covered = {word.lower() for topic in topics for word in topic.split()}
+    concepts = [display_phrase(phrase) for phrase, _ in keyphrases[FIELD_LIMITS['topics']:]]
+    concepts += [display_phrase(word) for word, _ in keywords if word.lower() not in covered]
+    concepts = merge_unique([concepts], FIELD_LIMITS['concepts'])
+    
+    extracted = len(topics) >= 3 and len(concepts) >= 3
+    if len(topics) < 3:
+        topics = (topics + [topic for topic in GENERIC_TOPICS if topic not in topics])[:FIELD_LIMITS['topics']]
+    if len(concepts) < 3:
+        concepts = (concepts + [concept for concept in GENERIC_CONCEPTS if concept not in concepts])[:FIELD_LIMITS['concepts']]
+    
+    objectives, recommendations = list(DEFAULT_OBJECTIVES), list(DEFAULT_RECOMMENDATIONS)
+    if extracted:
+        first, second, third = topics[:3]
+        objectives = [
+            f"Understand the key ideas of {first}",
+            f"Explain how {second} relates to {third}",
+            f"Describe the role of {concepts[0]} in {first}"
+        ]
+        recommendations = [
+            f"Summarize {first} and {second} in your own words",
+            f"Create a concept map linking {', '.join(concepts[:3])}",
+            f"Write practice questions about {third} and check them against the material",
+            DEFAULT_RECOMMENDATIONS[-1]
+        ]
+    
+    return {
+        "success": True,
+        "topics": topics,
+        "concepts": concepts,
+        "objectives": objectives,
+        "recommendations": recommendations,
+        "generated_by": "fallback-analysis"
+    }
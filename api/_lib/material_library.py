@@ -0,0 +1,268 @@
+"""
+Per-user study material libraries kept warm alongside their search indexes
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import hashlib
+import threading
+
+from .facet_index import FacetIndex
+from .search_index import BM25Index
+from .semantic_index import SemanticIndex
+from .analysis_store import DEFAULT_PATH as ANALYSIS_PATH
+
+# Semantic vectors are memory-mapped here so warm restarts skip re-vectorising
+SEMANTIC_INDEX_DIR = os.environ.get('SEMANTIC_INDEX_DIR', '/tmp/edusense-semantic')
+
+# Material rows are kept in the analysis store's SQLite database so a cold
+# start can rebuild the keyword and facet indexes and resolve semantic hits
+MATERIAL_STORE_PATH = os.environ.get('ANALYSIS_CACHE_PATH') or ANALYSIS_PATH
+
+MATERIAL_FACETS = ('subject', 'difficulty', 'starred')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS library_materials (
+    user_key TEXT NOT NULL,
+    material_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_key, material_id)
+);
+"""
+
+
+def material_facets(material):
+    """Facet values for a study_materials row"""
+    analysis = material.get('ai_analysis') or {}
+    return {
+        'subject': analysis.get('subject_category'),
+        'difficulty': analysis.get('difficulty_level'),
+        'starred': bool(material.get('starred'))
+    }
+
+
+class MaterialStore:
+    """SQLite table of every user's indexed material rows"""
+
+    def __init__(self, path=MATERIAL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def load(self, user_key):
+        """Return a user's stored materials, or [] when the store is unavailable"""
+        try:
+            rows = self._connection().execute(
+                'SELECT payload FROM library_materials WHERE user_key = ? ORDER BY updated_at',
+                (user_key,)
+            ).fetchall()
+            return [json.loads(payload) for (payload,) in rows]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Material store read failed: {e}")
+            return []
+
+    def put_many(self, user_key, materials):
+        """Insert or replace material rows in one transaction"""
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('BEGIN')
+                conn.executemany(
+                    'INSERT OR REPLACE INTO library_materials (user_key, material_id, payload, updated_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    [(user_key, material['id'], json.dumps(material, default=str), now) for material in materials]
+                )
+        except sqlite3.Error as e:
+            print(f"Material store write failed: {e}")
+
+    def delete(self, user_key, material_id):
+        """Drop a material row"""
+        try:
+            self._connection().execute(
+                'DELETE FROM library_materials WHERE user_key = ? AND material_id = ?',
+                (user_key, material_id)
+            )
+        except sqlite3.Error as e:
+            print(f"Material store delete failed: {e}")
+
+
+class MaterialLibrary:
+    """One user's materials plus the indexes used to search them
+
+    With a store, materials are written through to it and reloaded on
+    creation; the semantic vectors are already on disk, so reloading only
+    rebuilds the keyword and facet indexes (and re-vectorises any material
+    the shared semantic index is missing).
+    """
+
+    def __init__(self, user_id=None, store=None):
+        self.user_key = str(user_id or '')
+        self.store = store
+        self.materials = {}
+        self.text_index = BM25Index({'filename': 2.0, 'content': 1.0})
+        self.facet_index = FacetIndex(MATERIAL_FACETS)
+        self.semantic_index = _open_semantic_index(user_id)
+        self._lock = threading.Lock()
+        if store is not None:
+            self._index_many(store.load(self.user_key))
+
+    def __len__(self):
+        return len(self.materials)
+
+    def upsert_many(self, materials):
+        """Add or replace several materials, persisting the semantic index once; returns their IDs"""
+        materials = [_with_id(material) for material in materials]
+        self._index_many(materials)
+        if self.store is not None:
+            self.store.put_many(self.user_key, materials)
+        return [material['id'] for material in materials]
+
+    def upsert(self, material):
+        """Add or replace a material (a study_materials row); returns its ID"""
+        return self.upsert_many([material])[0]
+
+    def _index_many(self, materials):
+        """Add materials with string IDs to every index, saving the semantic index once"""
+        with self._lock:
+            for material in materials:
+                material_id = material['id']
+                self.materials[material_id] = material
+                self.text_index.add(material_id, {
+                    'filename': material.get('filename', ''),
+                    'content': material.get('content', '')
+                })
+                self.facet_index.add(material_id, material_facets(material))
+            self.semantic_index.add_many([
+                (material['id'], f"{material.get('filename', '')}\n{material.get('content', '')}")
+                for material in materials
+            ])
+
+    def remove(self, material_id):
+        """Remove a material; returns False when it was not in the library"""
+        material_id = str(material_id)
+        with self._lock:
+            removed = self.materials.pop(material_id, None) is not None
+            self.text_index.remove(material_id)
+            self.facet_index.remove(material_id)
+            self.semantic_index.remove(material_id)
+        if self.store is not None:
+            self.store.delete(self.user_key, material_id)
+        return removed
+
+    def get(self, material_id):
+        """Return a material by ID, or None"""
+        return self.materials.get(str(material_id))
+
+    def all(self):
+        """Return every material, most recently created first"""
+        return self.get_many(list(self.materials))
+
+    def get_many(self, material_ids, limit=None):
+        """Return the given materials (at most limit), most recently created first"""
+        materials = [self.materials[material_id] for material_id in material_ids if material_id in self.materials]
+        key = lambda material: str(material.get('created_at') or '')
+        if limit is not None and limit < len(materials):
+            return heapq.nlargest(limit, materials, key=key)
+        materials.sort(key=key, reverse=True)
+        return materials
+
+    def stale(self, manifest):
+        """IDs from [{"id", "content_hash"}] that are missing here or indexed with another hash"""
+        stale = []
+        for entry in manifest:
+            if not isinstance(entry, dict) or entry.get('id') in (None, ''):
+                continue
+            material = self.materials.get(str(entry['id']))
+            if material is None or not entry.get('content_hash') or material.get('content_hash') != entry['content_hash']:
+                stale.append(str(entry['id']))
+        return stale
+
+    def filter(self, **selected):
+        """Return (matching material IDs, facet counts within the matches) for facet selections"""
+        bits = self.facet_index.match(**selected)
+        return self.facet_index.ids(bits), self.facet_index.counts(bits)
+
+    def search(self, query, limit=20, candidates=None):
+        """Return up to limit materials ranked by BM25 score, each with its score
+
+        candidates, when given, restricts the search to those material IDs.
+        """
+        return self._ranked(self.text_index.search(query, k=limit, candidates=candidates))
+
+    def semantic_search(self, query, limit=20, candidates=None):
+        """Return up to limit materials ranked by vector similarity, each with its score"""
+        return self._ranked(self.semantic_index.search(query, k=limit, candidates=candidates))
+
+    def _ranked(self, scored_ids):
+        """Materials for (material_id, score) pairs, skipping any no longer in the library"""
+        results = []
+        for material_id, score in scored_ids:
+            material = self.materials.get(material_id)
+            if material is not None:
+                results.append(dict(material, score=round(score, 4)))
+        return results
+
+    def stats(self):
+        """Return library and index sizes for status reporting"""
+        return {
+            "materials": len(self.materials),
+            "text_index": self.text_index.stats(),
+            "semantic_index": self.semantic_index.stats(),
+            "facets": self.facet_index.counts()
+        }
+
+
+def _with_id(material):
+    """A copy of a material row with its ID as a string; the ID is required"""
+    material_id = str(material.get('id', ''))
+    if material_id in ('', 'None'):
+        raise ValueError('material id is required')
+    return dict(material, id=material_id)
+
+
+def _open_semantic_index(user_id):
+    """A persistent semantic index for a user, or an in-memory one when disk is unavailable"""
+    if user_id and SEMANTIC_INDEX_DIR:
+        name = hashlib.sha256(str(user_id).encode('utf-8')).hexdigest()[:24]
+        try:
+            return SemanticIndex(os.path.join(SEMANTIC_INDEX_DIR, f'materials-{name}'))
+        except OSError as e:
+            print(f"Semantic index unavailable on disk, keeping it in memory: {e}")
+    return SemanticIndex()
+
+
+# Shared by every library in the process, one connection per thread
+material_store = MaterialStore()
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+
+def get_library(user_id):
+    """Return the library for a user, loading its stored materials on first use"""
+    key = str(user_id or '')
+    if not key:
+        raise ValueError('user_id is required')
+    library = _libraries.get(key)
+    if library is None:
+        with _libraries_lock:
+            library = _libraries.get(key)
+            if library is None:
+                library = _libraries[key] = MaterialLibrary(key, material_store)
+    return library
@@ -0,0 +1,289 @@
+"""
+MinHash signatures and an LSH band index for near-duplicate materials
+
+A material is reduced to the set of its word 3-gram shingles and then to
+a fixed-length MinHash signature; the fraction of equal signature slots
+estimates the Jaccard similarity of two shingle sets. Signatures are cut
+into bands and each band is hashed into a bucket, so only materials that
+share at least one bucket are compared. The band layout is chosen from
+the threshold so that pairs above it are almost always candidates.
+
+A signature only estimates the similarity, and near the threshold the
+estimate lets through many pairs below it. Each material's shingle hashes
+are stored too, and candidates are confirmed by their exact Jaccard
+similarity before they count as duplicates.
+
+Signatures and band buckets live in the same SQLite database as the
+analysis store, keyed by the analysis content key, so every worker
+process sees the same index.
+"""
+
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_PRIME = (1 << 61) - 1
+_SEED = 20240101
+
+# Candidates estimated this far below the threshold still get the exact check
+VERIFY_MARGIN = 0.1
+
+# Shingle hashes are hashed in blocks to bound the temporary matrix size
+_BLOCK = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash_signatures (
+    key TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    bucket BLOB NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (bucket, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_key ON minhash_bands(key);
+CREATE TABLE IF NOT EXISTS minhash_shingles (
+    key TEXT PRIMARY KEY,
+    shingles BLOB NOT NULL
+);
+"""
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """32-bit hashes of the distinct word n-grams in text"""
+    words = _TOKEN.findall((text or '').lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) < size:
+        grams = {' '.join(words)}
+    else:
+        grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def _permutations(num_perm):
+    """Coefficients (a, b) of the universal hash family (a*x + b) mod p"""
+    rng = np.random.RandomState(_SEED)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+_PERMUTATIONS = {}
+
+
+def minhash_signature(text, num_perm=NUM_PERM, hashes=None):
+    """MinHash signature of a text's shingles (or of precomputed shingle hashes), or None when it has no words"""
+    if hashes is None:
+        hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    if num_perm not in _PERMUTATIONS:
+        _PERMUTATIONS[num_perm] = _permutations(num_perm)
+    a, b = _PERMUTATIONS[num_perm]
+
+    # a < 2^31 and x < 2^32 keep a*x + b inside uint64 before the modulus
+    signature = np.full(num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        block = hashes[start:start + _BLOCK, None]
+        np.minimum(signature, ((block * a + b) % _PRIME).min(axis=0), out=signature)
+    return signature
+
+
+def estimate_similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+def exact_similarity(first, second):
+    """Exact Jaccard similarity of two sorted arrays of distinct shingle hashes"""
+    if not len(first) and not len(second):
+        return 1.0
+    shared = len(np.intersect1d(first, second, assume_unique=True))
+    return shared / (len(first) + len(second) - shared)
+
+
+def candidate_probability(similarity, bands, rows):
+    """Chance that a pair with this similarity shares at least one band"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def choose_bands(threshold, num_perm=NUM_PERM, recall=0.99):
+    """Pick (bands, rows) with the longest bands that still catch pairs at threshold with this recall
+
+    Longer bands mean fewer dissimilar candidates to compare; every
+    candidate is verified against the full signature anyway.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0 and candidate_probability(threshold, num_perm // rows, rows) >= recall:
+            best = (num_perm // rows, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """Persistent LSH index over MinHash signatures
+
+    match() returns indexed keys whose similarity to a signature is at
+    least threshold, best first; the similarity is exact when both sides
+    have shingles from sketch().
+    """
+
+    def __init__(self, path, threshold=0.95, num_perm=NUM_PERM):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        self._local = threading.local()
+        self.lookups = 0
+        self.matches = 0
+        self.verified = 0
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def signature(self, text):
+        """MinHash signature sized for this index"""
+        return minhash_signature(text, self.num_perm)
+
+    def sketch(self, text):
+        """(signature, sorted distinct shingle hashes) of a text, for add() and match()"""
+        shingles = np.unique(shingle_hashes(text)).astype(np.uint32)
+        return minhash_signature(text, self.num_perm, shingles.astype(np.uint64)), shingles
+
+    def _buckets(self, signature):
+        """One bucket hash per band; the band layout is part of the hash"""
+        buckets = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(digest_size=8, person=b'%d/%d' % (band, self.rows))
+            digest.update(signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            buckets.append(digest.digest())
+        return buckets
+
+    def add(self, key, signature, shingles=None):
+        """Index a signature (and the shingles it came from) under key, replacing any earlier one"""
+        if signature is None:
+            return
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN')
+            try:
+                conn.execute('DELETE FROM minhash_bands WHERE key = ?', (key,))
+                conn.execute(
+                    'INSERT OR REPLACE INTO minhash_signatures (key, signature, created_at) VALUES (?, ?, ?)',
+                    (key, signature.tobytes(), time.time())
+                )
+                conn.executemany(
+                    'INSERT OR IGNORE INTO minhash_bands (bucket, key) VALUES (?, ?)',
+                    [(bucket, key) for bucket in self._buckets(signature)]
+                )
+                if shingles is not None:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO minhash_shingles (key, shingles) VALUES (?, ?)',
+                        (key, np.asarray(shingles, dtype=np.uint32).tobytes())
+                    )
+                else:
+                    conn.execute('DELETE FROM minhash_shingles WHERE key = ?', (key,))
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"Near-duplicate index write error: {e}")
+
+    def remove(self, key):
+        """Drop a key, e.g. when the analysis it points to is gone"""
+        try:
+            conn = self._connection()
+            conn.execute('DELETE FROM minhash_bands WHERE key = ?', (key,))
+            conn.execute('DELETE FROM minhash_signatures WHERE key = ?', (key,))
+            conn.execute('DELETE FROM minhash_shingles WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            print(f"Near-duplicate index write error: {e}")
+
+    def contains(self, key):
+        """True when key has an indexed signature"""
+        try:
+            row = self._connection().execute(
+                'SELECT 1 FROM minhash_signatures WHERE key = ?', (key,)
+            ).fetchone()
+            return row is not None
+        except sqlite3.Error:
+            return False
+
+    def match(self, signature, exclude=None, shingles=None):
+        """Return [(key, similarity)] at or above the threshold, most similar first
+
+        With shingles, candidates whose signature estimate clears the
+        threshold are kept only if their exact Jaccard similarity does too.
+        """
+        if signature is None:
+            return []
+        self.lookups += 1
+        buckets = self._buckets(signature)
+        try:
+            rows = self._connection().execute(
+                'SELECT s.key, s.signature, h.shingles FROM minhash_signatures s '
+                'LEFT JOIN minhash_shingles h ON h.key = s.key WHERE s.key IN ('
+                'SELECT DISTINCT key FROM minhash_bands WHERE bucket IN (%s))' % ','.join('?' * len(buckets)),
+                buckets
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Near-duplicate index read error: {e}")
+            return []
+
+        matches = []
+        for key, blob, stored_shingles in rows:
+            if key == exclude:
+                continue
+            candidate = np.frombuffer(blob, dtype=np.uint64)
+            if len(candidate) != len(signature):
+                continue
+            # The estimate has a few points of error, so it only screens candidates for the exact check
+            similarity = estimate_similarity(signature, candidate)
+            if shingles is not None and stored_shingles is not None:
+                if similarity < self.threshold - VERIFY_MARGIN:
+                    continue
+                self.verified += 1
+                similarity = exact_similarity(shingles, np.frombuffer(stored_shingles, dtype=np.uint32))
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        matches.sort(key=lambda item: -item[1])
+        if matches:
+            self.matches += 1
+        return matches
+
+    def stats(self):
+        """Return index size, LSH layout and lookup counters"""
+        try:
+            signatures = self._connection().execute('SELECT COUNT(*) FROM minhash_signatures').fetchone()[0]
+        except sqlite3.Error:
+            signatures = 0
+        return {
+            "signatures": signatures,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+            "lookups": self.lookups,
+            "verified": self.verified,
+            "matches": self.matches
+        }
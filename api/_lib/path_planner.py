@@ -0,0 +1,423 @@
+"""
+Learning path planning over a topic prerequisite graph
+
+Topics form a DAG of prerequisites (the built-in CURRICULUM plus any
+topics a request brings along). A plan takes the requested topics and
+every prerequisite not yet mastered, orders them topologically, always
+picking next the available topic with the highest priority (its own
+weakness plus half the weakness it unblocks downstream), sizes each
+topic's study time by weakness, and packs the sequence into sessions of
+the student's daily time budget. Plans are computed locally in a few
+milliseconds; only the narrative text may come from the model.
+"""
+
+import heapq
+import math
+
+# topic -> (subject, level 1-3, base minutes, prerequisites)
+CURRICULUM = {
+    # Mathematics
+    'Arithmetic': ('Mathematics', 1, 45, []),
+    'Fractions and Decimals': ('Mathematics', 1, 60, ['Arithmetic']),
+    'Percentages and Ratios': ('Mathematics', 1, 45, ['Fractions and Decimals']),
+    'Algebra Basics': ('Mathematics', 1, 60, ['Arithmetic']),
+    'Linear Equations': ('Mathematics', 2, 60, ['Algebra Basics', 'Fractions and Decimals']),
+    'Quadratic Equations': ('Mathematics', 2, 75, ['Linear Equations']),
+    'Functions and Graphs': ('Mathematics', 2, 60, ['Linear Equations']),
+    'Geometry': ('Mathematics', 1, 60, ['Arithmetic']),
+    'Trigonometry': ('Mathematics', 2, 75, ['Geometry', 'Algebra Basics']),
+    'Statistics': ('Mathematics', 2, 60, ['Percentages and Ratios']),
+    'Probability': ('Mathematics', 2, 60, ['Fractions and Decimals', 'Statistics']),
+    'Exponentials and Logarithms': ('Mathematics', 3, 60, ['Functions and Graphs']),
+    'Calculus': ('Mathematics', 3, 90, ['Functions and Graphs', 'Trigonometry']),
+    # Science
+    'Scientific Method': ('Science', 1, 30, []),
+    'Cell Biology': ('Science', 1, 60, ['Scientific Method']),
+    'Genetics': ('Science', 2, 60, ['Cell Biology']),
+    'Evolution': ('Science', 2, 45, ['Genetics']),
+    'Photosynthesis': ('Science', 2, 45, ['Cell Biology', 'Chemical Reactions']),
+    'Human Body Systems': ('Science', 2, 60, ['Cell Biology']),
+    'Ecology': ('Science', 2, 45, ['Evolution']),
+    'Atomic Structure': ('Science', 1, 45, ['Scientific Method']),
+    'Periodic Table': ('Science', 1, 45, ['Atomic Structure']),
+    'Chemical Bonding': ('Science', 2, 60, ['Periodic Table']),
+    'Chemical Reactions': ('Science', 2, 60, ['Chemical Bonding']),
+    'Acids and Bases': ('Science', 2, 45, ['Chemical Reactions']),
+    'Forces and Motion': ('Science', 2, 60, ['Scientific Method', 'Algebra Basics']),
+    'Energy': ('Science', 2, 45, ['Forces and Motion']),
+    'Waves and Light': ('Science', 2, 45, ['Energy']),
+    'Electricity': ('Science', 2, 60, ['Energy']),
+    # History
+    'Historical Sources': ('History', 1, 30, []),
+    'Ancient Civilizations': ('History', 1, 60, ['Historical Sources']),
+    'Medieval Period': ('History', 2, 60, ['Ancient Civilizations']),
+    'Renaissance and Reformation': ('History', 2, 45, ['Medieval Period']),
+    'Industrial Revolution': ('History', 2, 45, ['Renaissance and Reformation']),
+    'World War I': ('History', 2, 45, ['Industrial Revolution']),
+    'World War II': ('History', 2, 60, ['World War I']),
+    'Cold War': ('History', 3, 45, ['World War II']),
+    # English
+    'Grammar': ('English', 1, 45, []),
+    'Vocabulary': ('English', 1, 30, []),
+    'Reading Comprehension': ('English', 1, 45, ['Vocabulary']),
+    'Literary Devices': ('English', 2, 45, ['Reading Comprehension']),
+    'Essay Writing': ('English', 2, 60, ['Grammar', 'Reading Comprehension']),
+    # Computer Science
+    'Programming Basics': ('Computer Science', 1, 60, []),
+    'Control Flow': ('Computer Science', 1, 45, ['Programming Basics']),
+    'Data Structures': ('Computer Science', 2, 75, ['Control Flow']),
+    'Algorithms': ('Computer Science', 2, 75, ['Data Structures']),
+    'Recursion': ('Computer Science', 2, 45, ['Control Flow', 'Functions and Graphs']),
+    'Databases': ('Computer Science', 2, 60, ['Data Structures']),
+}
+
+# Names students and other services use for curriculum topics
+ALIASES = {
+    'numbers': 'Arithmetic',
+    'fractions': 'Fractions and Decimals', 'decimals': 'Fractions and Decimals',
+    'percentages': 'Percentages and Ratios', 'ratios': 'Percentages and Ratios',
+    'algebra': 'Algebra Basics', 'algebraic equations': 'Linear Equations', 'equations': 'Linear Equations',
+    'quadratics': 'Quadratic Equations', 'functions': 'Functions and Graphs', 'graphs': 'Functions and Graphs',
+    'trig': 'Trigonometry', 'stats': 'Statistics', 'logarithms': 'Exponentials and Logarithms',
+    'derivatives': 'Calculus', 'integrals': 'Calculus', 'differentiation': 'Calculus',
+    'biology': 'Cell Biology', 'cells': 'Cell Biology', 'dna': 'Genetics',
+    'chemistry': 'Atomic Structure', 'atoms': 'Atomic Structure', 'elements': 'Periodic Table',
+    'bonding': 'Chemical Bonding', 'reactions': 'Chemical Reactions', 'physics': 'Forces and Motion',
+    'motion': 'Forces and Motion', 'mechanics': 'Forces and Motion', 'light': 'Waves and Light',
+    'waves': 'Waves and Light', 'circuits': 'Electricity',
+    'ww1': 'World War I', 'ww2': 'World War II', 'writing': 'Essay Writing',
+    'essays': 'Essay Writing', 'reading': 'Reading Comprehension', 'literature': 'Literary Devices',
+    'programming': 'Programming Basics', 'coding': 'Programming Basics',
+    'loops': 'Control Flow', 'data structures': 'Data Structures', 'sql': 'Databases',
+}
+
+# Names that stand for a whole subject rather than one of its topics
+SUBJECT_ALIASES = {
+    'math': 'Mathematics', 'maths': 'Mathematics', 'mathematics': 'Mathematics',
+    'science': 'Science', 'history': 'History', 'english': 'English',
+    'computer science': 'Computer Science', 'cs': 'Computer Science',
+}
+
+SEVERITY_WEIGHTS = {'high': 1.0, 'medium': 0.6, 'low': 0.3}
+
+# A topic practised at least this well (and this often) counts as mastered
+MASTERY_ACCURACY = 0.85
+MASTERY_ATTEMPTS = 5
+
+# Share of a topic's weakness credited to each prerequisite that unblocks it
+UNBLOCK_SHARE = 0.5
+
+DEFAULT_DAILY_MINUTES = 30
+DEFAULT_WEEKLY_SESSIONS = 5
+
+LEVEL_NAMES = {1: 'beginner', 2: 'intermediate', 3: 'advanced'}
+
+# Words that do not count towards how much of a name a topic match covers
+FILLER_WORDS = {'a', 'an', 'the', 'to', 'of', 'in', 'on', 'and', 'for', 'with', 'intro', 'introduction',
+                'basic', 'basics', 'advanced', 'fundamentals', 'review', 'practice'}
+
+
+def _normalize(name):
+    return ' '.join(str(name or '').lower().replace('-', ' ').replace('_', ' ').split())
+
+
+_INDEX = {_normalize(name): name for name in CURRICULUM}
+_INDEX.update({alias: name for alias, name in ALIASES.items()})
+
+
+def resolve_topic(name):
+    """Curriculum topic for a free-form name, or None"""
+    key = _normalize(name)
+    if not key:
+        return None
+    if key in _INDEX:
+        return _INDEX[key]
+    if key.endswith('s') and key[:-1] in _INDEX:
+        return _INDEX[key[:-1]]
+    # Longest curriculum name or alias making up most of the text ("chemical bonding basics"),
+    # so "organic chemistry" stays a topic of its own
+    words = f' {key} '
+    length = len([word for word in key.split() if word not in FILLER_WORDS and not word.isdigit()])
+    best = None
+    for candidate, topic in _INDEX.items():
+        if 2 * len(candidate.split()) <= length or f' {candidate} ' not in words:
+            continue
+        if best is None or len(candidate) > len(best[0]):
+            best = (candidate, topic)
+    return best[1] if best else None
+
+
+def resolve_subject(name):
+    """Curriculum subject for a free-form name, or None"""
+    key = _normalize(name)
+    if key in SUBJECT_ALIASES:
+        return SUBJECT_ALIASES[key]
+    return next((subject for subject, _, _, _ in CURRICULUM.values() if subject.lower() == key), None)
+
+
+def resolve_topics(name):
+    """Curriculum topics a free-form name stands for: a whole subject, one topic or none"""
+    subject = resolve_subject(name)
+    if subject:
+        return [topic for topic, entry in CURRICULUM.items() if entry[0] == subject]
+    topic = resolve_topic(name)
+    return [topic] if topic else []
+
+
+def _label(value):
+    """Topic name from a string or a {"name"/"topic"/"title"/...} dict"""
+    if isinstance(value, dict):
+        for field in ('topic_name', 'name', 'topic', 'title', 'weakness', 'subject'):
+            if value.get(field):
+                return str(value[field])
+        return ''
+    return str(value or '')
+
+
+def _weakness(entry):
+    """0..1 weakness of a weaknesses entry (severity, weakness score or accuracy)"""
+    if not isinstance(entry, dict):
+        return SEVERITY_WEIGHTS['medium']
+    for field in ('weakness', 'score'):
+        if isinstance(entry.get(field), (int, float)):
+            return min(1.0, max(0.0, float(entry[field])))
+    if isinstance(entry.get('accuracy'), (int, float)):
+        return min(1.0, max(0.0, 1.0 - float(entry['accuracy'])))
+    return SEVERITY_WEIGHTS.get(str(entry.get('severity', 'medium')).lower(), SEVERITY_WEIGHTS['medium'])
+
+
+class PathPlanner:
+    """Weakness-weighted topological ordering and time-budgeted scheduling"""
+
+    def __init__(self, curriculum=CURRICULUM):
+        self.curriculum = curriculum
+
+    def _graph(self, available_topics):
+        """Topic -> (subject, level, minutes, prerequisites) including request-defined topics"""
+        graph = dict(self.curriculum)
+        requested = []
+        for entry in available_topics or []:
+            label = _label(entry)
+            topic = resolve_topic(label)
+            if topic is None and label.strip():
+                topic = label.strip()
+                extra = entry if isinstance(entry, dict) else {}
+                prerequisites = [resolve_topic(name) or str(name) for name in extra.get('prerequisites', [])]
+                graph[topic] = (
+                    str(extra.get('subject', 'General')),
+                    int(extra.get('level', 2)),
+                    int(extra.get('estimated_time', 45)),
+                    [name for name in prerequisites if name != topic]
+                )
+            if topic and topic not in requested:
+                requested.append(topic)
+        return graph, requested
+
+    def plan(self, weaknesses=None, available_topics=None, user_profile=None, mastery=None):
+        """Ordered, scheduled learning path as a plain dict
+
+        weaknesses: names or {"topic"/"weakness"/"subject", "severity"|"weakness"|"accuracy"}
+        available_topics: names or {"name", "prerequisites", "estimated_time", "subject", "level"}
+        user_profile: {"daily_time", "weekly_sessions", "known_topics", "level"}
+        mastery: [{"topic", "accuracy", "attempts"}] as reported by the mastery tracker
+        """
+        profile = user_profile or {}
+        graph, requested = self._graph(available_topics)
+
+        weakness = {}
+        for entry in weaknesses or []:
+            label = _label(entry).strip()
+            topics = resolve_topics(label)
+            if not topics and label:
+                # Weaknesses outside the curriculum are goals of their own, like request-defined topics
+                subject = resolve_subject(entry.get('subject')) if isinstance(entry, dict) else None
+                graph.setdefault(label, (subject or 'General', 2, 45, []))
+                topics = [label]
+            for topic in topics:
+                weakness[topic] = max(weakness.get(topic, 0.0), _weakness(entry))
+
+        mastered = {resolve_topic(name) for name in profile.get('known_topics', []) or []}
+        for record in mastery or []:
+            topic = resolve_topic(record.get('topic'))
+            if not topic:
+                continue
+            if record.get('attempts', 0) >= MASTERY_ATTEMPTS and record.get('accuracy', 0) >= MASTERY_ACCURACY:
+                mastered.add(topic)
+            else:
+                weakness.setdefault(topic, min(1.0, max(0.0, 1.0 - float(record.get('accuracy', 0.5)))))
+        mastered -= set(weakness)
+        mastered.discard(None)
+
+        goals = list(dict.fromkeys(requested + sorted(weakness, key=lambda topic: -weakness[topic])))
+        if not goals:
+            goals = [topic for topic, (_, level, _, prerequisites) in graph.items() if not prerequisites][:4]
+
+        # Goals plus every prerequisite that is not mastered yet
+        included, stack = set(), list(goals)
+        while stack:
+            topic = stack.pop()
+            if topic in included or topic not in graph:
+                continue
+            if topic in mastered and topic not in goals:
+                continue
+            included.add(topic)
+            stack.extend(graph[topic][3])
+
+        dependents = {topic: [] for topic in included}
+        indegree = {topic: 0 for topic in included}
+        for topic in included:
+            for prerequisite in graph[topic][3]:
+                if prerequisite in included:
+                    dependents[prerequisite].append(topic)
+                    indegree[topic] += 1
+
+        # Priority: own weakness plus a share of everything the topic unblocks
+        priority = {}
+        for topic in self._reverse_order(included, dependents):
+            # Children missing from priority close a cycle; they get no credit
+            downstream = sum(priority.get(child, 0.0) for child in dependents[topic])
+            priority[topic] = weakness.get(topic, 0.0) + (0.25 if topic in goals else 0.0) + UNBLOCK_SHARE * downstream
+
+        heap = [(-priority[topic], graph[topic][1], topic) for topic in included if indegree[topic] == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, _, topic = heapq.heappop(heap)
+            order.append(topic)
+            for child in dependents[topic]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    heapq.heappush(heap, (-priority[child], graph[child][1], child))
+        cyclic = sorted(included - set(order), key=lambda topic: -priority[topic])
+        order += cyclic
+
+        daily = max(10, int(profile.get('daily_time') or DEFAULT_DAILY_MINUTES))
+        weekly = min(7, max(1, int(profile.get('weekly_sessions') or DEFAULT_WEEKLY_SESSIONS)))
+        steps = []
+        for position, topic in enumerate(order, 1):
+            subject, level, minutes, prerequisites = graph[topic]
+            weak = weakness.get(topic, 0.0)
+            steps.append({
+                "topic_name": topic,
+                "subject": subject,
+                "order": position,
+                "level": level,
+                "difficulty": 'easy' if weak >= 0.6 or level == 1 else 'hard' if level == 3 and weak < 0.3 else 'medium',
+                "weakness": round(weak, 3),
+                "estimated_time": int(5 * math.ceil(minutes * (1.0 + weak) / 5)),
+                "prerequisites": [name for name in prerequisites if name in included],
+                "is_goal": topic in goals
+            })
+
+        sessions = self._schedule(steps, daily)
+        total = sum(step["estimated_time"] for step in steps)
+        weeks = max(1, math.ceil(len(sessions) / weekly))
+        levels = [step["level"] for step in steps]
+        return {
+            "steps": steps,
+            "sessions": sessions,
+            "estimated_duration": total,
+            "difficulty_progression": (f"{LEVEL_NAMES[min(levels)]} to {LEVEL_NAMES[max(levels)]}"
+                                       if levels else LEVEL_NAMES[1]),
+            "recommended_schedule": {
+                "daily_time": daily,
+                "weekly_sessions": weekly,
+                "estimated_completion": f"{weeks} week{'s' if weeks != 1 else ''}"
+            },
+            "goals": goals,
+            "mastered": sorted(mastered),
+            "cyclic_topics": cyclic
+        }
+
+    @staticmethod
+    def _reverse_order(included, dependents):
+        """Topics with every dependent before its prerequisites (iterative DFS post-order)"""
+        done, order = set(), []
+        for root in sorted(included):
+            if root in done:
+                continue
+            stack = [(root, iter(dependents[root]))]
+            done.add(root)
+            while stack:
+                topic, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    order.append(topic)
+                elif child not in done:
+                    done.add(child)
+                    stack.append((child, iter(dependents[child])))
+        return order
+
+    @staticmethod
+    def _schedule(steps, daily):
+        """Pack steps into sessions of at most `daily` minutes, splitting long topics"""
+        sessions, current, left = [], [], daily
+        for step in steps:
+            remaining = step["estimated_time"]
+            while remaining > 0:
+                minutes = min(remaining, left)
+                current.append({"topic": step["topic_name"], "minutes": minutes})
+                remaining -= minutes
+                left -= minutes
+                if left == 0:
+                    sessions.append({"session": len(sessions) + 1, "minutes": daily, "topics": current})
+                    current, left = [], daily
+        if current:
+            sessions.append({"session": len(sessions) + 1, "minutes": daily - left, "topics": current})
+        return sessions
+
+
+def describe_path(plan):
+    """Templated title and description for a plan"""
+    steps = plan["steps"]
+    if not steps:
+        return "Learning Path", "No topics to study right now; everything requested is already mastered."
+    subjects = list(dict.fromkeys(step["subject"] for step in steps))
+    weakest = sorted((step for step in steps if step["weakness"] > 0), key=lambda step: -step["weakness"])
+    title = f"{' & '.join(subjects[:2])} Learning Path"
+    description = (f"{len(steps)} topics in prerequisite order over "
+                   f"{plan['recommended_schedule']['estimated_completion']}, starting with {steps[0]['topic_name']}")
+    if weakest:
+        description += f" and giving extra time to {', '.join(step['topic_name'] for step in weakest[:3])}"
+    return title, description + '.'
+
+
+def path_document(plan):
+    """The plan in the learning path JSON shape the frontend stores"""
+    title, description = describe_path(plan)
+    sequence = []
+    for step in plan["steps"]:
+        topic = step["topic_name"]
+        activities = [f"Read a short overview of {topic}", f"Take a {step['difficulty']} practice quiz on {topic}"]
+        if step["weakness"] >= 0.3:
+            activities.insert(1, f"Work through the questions you missed on {topic}")
+        sequence.append({
+            "topic_id": step["order"],
+            "topic_name": topic,
+            "order": step["order"],
+            "estimated_time": step["estimated_time"],
+            "subject": step["subject"],
+            "difficulty": step["difficulty"],
+            "prerequisites": step["prerequisites"],
+            "focus_areas": [topic] + step["prerequisites"][:2],
+            "activities": activities,
+            "resources": [f"{step['subject']} notes on {topic}", f"{topic} practice quizzes"],
+            "learning_objectives": [f"Explain the key ideas of {topic}", f"Score at least 80% on a {topic} quiz"],
+            "assessment_method": "quiz"
+        })
+    goals = plan["goals"]
+    return {
+        "title": title,
+        "description": description,
+        "estimated_duration": plan["estimated_duration"],
+        "difficulty_progression": plan["difficulty_progression"],
+        "topics_sequence": sequence,
+        "overall_learning_objectives": [f"Reach confident mastery of {goal}" for goal in goals[:4]],
+        "success_metrics": [
+            "Score 80% or more on each topic's quiz",
+            "Complete the scheduled sessions each week"
+        ],
+        "recommended_schedule": plan["recommended_schedule"],
+        "sessions": plan["sessions"]
+    }
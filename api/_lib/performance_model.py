@@ -0,0 +1,400 @@
+"""
+Quiz score prediction from each user's quiz history
+
+A ridge regression over a handful of history features (earlier and recent
+scores, trend, experience, pace, gaps, difficulty taken) is trained on
+"predict the next quiz from the ones before it" examples drawn from every
+user's history in adaptive_difficulty_history. refresh() is the bulk job:
+it builds all features with cumulative sums in one vectorised pass, fits
+the model, scores every user at once and writes the results to a
+performance_predictions table. A request is then a single-row lookup; the
+stored per-feature contributions are the prediction's factors. A user the
+table does not cover yet, or who has taken a quiz since it was written, is
+scored on demand from their own history with the stored weights.
+"""
+
+import time
+import json
+import math
+import sqlite3
+import threading
+
+import numpy as np
+
+from .adaptive_difficulty import DEFAULT_PATH, DIFFICULTY_PRIORS
+
+# (feature, factor label, advice when it pulls the prediction down)
+FEATURES = (
+    ('prior_mean', 'Overall quiz average', 'Revisit the topics behind your lowest quiz scores'),
+    ('recent_mean', 'Recent quiz performance', 'Review the questions you missed in your last few quizzes'),
+    ('trend', 'Score trend', 'Slow down and consolidate before moving to new material'),
+    ('experience', 'Number of quizzes taken', 'Take more practice quizzes to build familiarity'),
+    ('pace', 'Study consistency', 'Study a little every few days instead of in bursts'),
+    ('gap', 'Time since last quiz', 'Do a short refresher quiz before your next test'),
+    ('level', 'Difficulty of quizzes taken', 'Step up the difficulty once medium quizzes feel easy'),
+)
+
+# Recent performance is the mean of this many latest quizzes
+RECENT_WINDOW = 3
+
+# A user needs this many earlier quizzes for a row to become a training example
+MIN_HISTORY = 2
+
+RIDGE_PENALTY = 1.0
+
+SECONDS_PER_DAY = 86400.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS performance_predictions (
+    user_id TEXT PRIMARY KEY,
+    predicted_score REAL NOT NULL,
+    confidence REAL NOT NULL,
+    quizzes INTEGER NOT NULL,
+    contributions TEXT NOT NULL,
+    computed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS performance_model (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    payload TEXT NOT NULL,
+    trained_at REAL NOT NULL
+);
+"""
+
+
+def history_features(users, times, scores, levels):
+    """Feature matrix for every row from the rows before it of the same user
+
+    users, times (seconds), scores (0..1) and levels (-1..1) are parallel
+    arrays sorted by user then time. Returns (features, history) where
+    history is how many earlier quizzes each row's features are built from.
+    """
+    users = np.asarray(users)
+    count = len(users)
+    index = np.arange(count)
+    starts = np.ones(count, dtype=bool)
+    starts[1:] = users[1:] != users[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, index, 0))
+    history = index - group_start
+
+    score_sums = np.concatenate([[0.0], np.cumsum(np.nan_to_num(scores))])
+    level_sums = np.concatenate([[0.0], np.cumsum(levels)])
+    seen = np.maximum(history, 1)
+    recent = np.maximum(np.minimum(history, RECENT_WINDOW), 1)
+
+    prior_mean = (score_sums[index] - score_sums[group_start]) / seen
+    recent_mean = (score_sums[index] - score_sums[index - np.minimum(history, RECENT_WINDOW)]) / recent
+    previous = np.where(history > 0, index - 1, index)
+    span_days = (times[previous] - times[group_start]) / SECONDS_PER_DAY
+    gap_days = np.maximum(times - times[previous], 0) / SECONDS_PER_DAY
+
+    features = np.column_stack([
+        prior_mean,
+        recent_mean,
+        recent_mean - prior_mean,
+        np.log1p(history),
+        np.minimum(history / (span_days / 7.0 + 1.0), 14.0),
+        np.log1p(gap_days),
+        (level_sums[index] - level_sums[group_start]) / seen,
+    ])
+    return features, history
+
+
+class RidgeModel:
+    """Linear regression with an L2 penalty on standardised features"""
+
+    def __init__(self, penalty=RIDGE_PENALTY):
+        self.penalty = penalty
+        self.mean = None
+        self.scale = None
+        self.intercept = 0.0
+        self.weights = None
+        self.rmse = None
+        self.samples = 0
+
+    def fit(self, features, targets):
+        """Fit in closed form; returns self"""
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        standardised = (features - self.mean) / self.scale
+        self.intercept = float(targets.mean())
+        gram = standardised.T @ standardised + self.penalty * np.eye(features.shape[1])
+        self.weights = np.linalg.solve(gram, standardised.T @ (targets - self.intercept))
+        self.rmse = float(np.sqrt(np.mean((self.predict(features) - targets) ** 2)))
+        self.samples = len(targets)
+        return self
+
+    def contributions(self, features):
+        """Per-feature additive contributions relative to the average user"""
+        return (features - self.mean) / self.scale * self.weights
+
+    def predict(self, features):
+        return self.intercept + self.contributions(features).sum(axis=1)
+
+    @classmethod
+    def from_dict(cls, payload):
+        """A fitted model from to_dict() output, or None when no model was stored"""
+        if not payload or payload.get("weights") is None:
+            return None
+        model = cls(payload.get("penalty", RIDGE_PENALTY))
+        model.mean = np.asarray(payload["mean"])
+        model.scale = np.asarray(payload["scale"])
+        model.intercept = float(payload["intercept"])
+        model.weights = np.asarray(payload["weights"])
+        model.rmse = payload.get("rmse") or 0.0
+        model.samples = payload.get("samples", 0)
+        return model
+
+    def to_dict(self):
+        return {
+            "penalty": self.penalty,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "intercept": self.intercept,
+            "weights": self.weights.tolist(),
+            "rmse": self.rmse,
+            "samples": self.samples
+        }
+
+
+class PerformancePredictor:
+    """Serves precomputed score predictions and refreshes them in bulk
+
+    Reads quiz history from the adaptive difficulty store. Lookups older
+    than max_age schedule one background refresh and are served meanwhile;
+    users missing from the table or behind their own history are scored
+    on demand.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_age=6 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh = None
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _load_history(self, conn, user_id=None):
+        """Parallel arrays of every logged quiz (or one user's), sorted by user then time"""
+        user_ids, times, scores, levels = [], [], [], []
+        try:
+            if user_id is None:
+                rows = conn.execute(
+                    'SELECT user_id, created_at, previous_difficulty, performance_data '
+                    'FROM adaptive_difficulty_history ORDER BY user_id, created_at'
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT user_id, created_at, previous_difficulty, performance_data '
+                    'FROM adaptive_difficulty_history WHERE user_id = ? ORDER BY created_at', (user_id,)
+                ).fetchall()
+        except sqlite3.OperationalError:
+            # No quiz has been recorded in this store yet
+            rows = []
+        for user_id, created_at, difficulty, payload in rows:
+            try:
+                score = float(json.loads(payload)["score"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            user_ids.append(user_id)
+            times.append(created_at)
+            scores.append(score)
+            levels.append(DIFFICULTY_PRIORS.get(difficulty, 0.0))
+        return user_ids, np.array(times, dtype=np.float64), np.array(scores), np.array(levels)
+
+    def refresh(self, now=None):
+        """Retrain on all history and rewrite every user's prediction; returns a report"""
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        conn = self._connection()
+        user_ids, times, scores, levels = self._load_history(conn)
+        if not user_ids:
+            return {"users": 0, "quizzes": 0, "samples": 0}
+
+        # Append one "next quiz, taken now" row per user, scored by the model
+        users = np.array(user_ids, dtype=object)
+        last = np.ones(len(users), dtype=bool)
+        last[:-1] = users[1:] != users[:-1]
+        insert_at = np.flatnonzero(last) + 1
+        users = np.insert(users, insert_at, users[last])
+        times = np.insert(times, insert_at, now)
+        scores = np.insert(scores, insert_at, np.nan)
+        levels = np.insert(levels, insert_at, 0.0)
+        upcoming = np.zeros(len(users), dtype=bool)
+        upcoming[insert_at + np.arange(len(insert_at))] = True
+        loaded = time.perf_counter()
+
+        features, history = history_features(users, times, scores, levels)
+        training = ~upcoming & (history >= MIN_HISTORY)
+        if training.sum() <= len(FEATURES):
+            # Too little history for a model yet: predict each user's own average
+            model = None
+            predicted = features[upcoming, 0] * 100
+            contributions = np.zeros((int(upcoming.sum()), len(FEATURES)))
+        else:
+            model = RidgeModel().fit(features[training], scores[training] * 100)
+            contributions = model.contributions(features[upcoming])
+            predicted = model.intercept + contributions.sum(axis=1)
+        predicted = np.clip(predicted, 0, 100)
+        quizzes = history[upcoming]
+        fitted = time.perf_counter()
+
+        rows = [
+            (user_id,) + self._row(score, count, contribution, model, now)
+            for user_id, score, count, contribution
+            in zip(users[upcoming].tolist(), predicted.tolist(), quizzes.tolist(), contributions.tolist())
+        ]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM performance_predictions')
+            conn.executemany(
+                'INSERT INTO performance_predictions (user_id, predicted_score, confidence, quizzes, '
+                'contributions, computed_at) VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO performance_model (id, payload, trained_at) VALUES (1, ?, ?)',
+                (json.dumps(model.to_dict() if model else {}), now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self.refreshes += 1
+        self.last_refresh = now
+        return {
+            "users": len(rows),
+            "quizzes": len(user_ids),
+            "samples": int(training.sum()),
+            "rmse": round(model.rmse, 2) if model else None,
+            "load_seconds": round(loaded - started, 3),
+            "fit_seconds": round(fitted - loaded, 3),
+            "write_seconds": round(time.perf_counter() - fitted, 3)
+        }
+
+    @classmethod
+    def _row(cls, score, quizzes, contribution, model, now):
+        """(predicted_score, confidence, quizzes, contributions, computed_at) as stored"""
+        return (round(float(score), 1), cls._confidence(int(quizzes), model), int(quizzes),
+                json.dumps([round(value, 2) + 0.0 for value in contribution]), now)
+
+    def _score_user(self, conn, user_id, payload, now):
+        """Score one user's next quiz with the stored weights and store it; None without history"""
+        user_ids, times, scores, levels = self._load_history(conn, user_id)
+        if not user_ids:
+            return None
+        users = np.array(user_ids + [user_id], dtype=object)
+        features, history = history_features(users, np.append(times, now), np.append(scores, np.nan),
+                                             np.append(levels, 0.0))
+        model = RidgeModel.from_dict(payload)
+        if model is None:
+            # Same fallback as refresh() before there is enough history for a model
+            contribution = np.zeros(len(FEATURES))
+            predicted = features[-1, 0] * 100
+        else:
+            contribution = model.contributions(features[-1:])[0]
+            predicted = model.intercept + contribution.sum()
+        row = self._row(np.clip(predicted, 0, 100), history[-1], contribution.tolist(), model, now)
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO performance_predictions (user_id, predicted_score, confidence, quizzes, '
+                'contributions, computed_at) VALUES (?, ?, ?, ?, ?, ?)', (user_id,) + row
+            )
+        except sqlite3.Error as e:
+            print(f"Performance prediction write error: {e}")
+        return row
+
+    @staticmethod
+    def _confidence(quizzes, model):
+        """0..1 confidence from the user's history length and the model's error"""
+        if model is None:
+            return round(min(0.5, 0.1 * quizzes), 2)
+        history = 1.0 - 1.0 / math.sqrt(1.0 + 0.5 * quizzes)
+        accuracy = max(0.0, 1.0 - model.rmse / 50.0)
+        return round(min(0.95, history * accuracy), 2)
+
+    def predict(self, user_id, now=None):
+        """Prediction for a user, or None when they have no quiz history yet"""
+        now = time.time() if now is None else now
+        user_id = str(user_id)
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT predicted_score, confidence, quizzes, contributions, computed_at '
+                'FROM performance_predictions WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            trained = conn.execute('SELECT payload, trained_at FROM performance_model WHERE id = 1').fetchone()
+            try:
+                quizzes = conn.execute(
+                    'SELECT COUNT(*) FROM adaptive_difficulty_history WHERE user_id = ?', (user_id,)
+                ).fetchone()[0]
+            except sqlite3.OperationalError:
+                quizzes = 0
+
+            if trained is None or now - trained[1] > self.max_age:
+                self.request_refresh()
+            # Missing, behind the user's own history or past max_age: score this user now
+            if quizzes and (row is None or row[2] != quizzes or now - row[4] > self.max_age):
+                row = self._score_user(conn, user_id, json.loads(trained[0]) if trained else {}, now) or row
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Performance prediction lookup error: {e}")
+            return None
+        if row is None:
+            return None
+
+        score, confidence, quizzes, contributions, computed_at = row
+        factors = []
+        for (name, label, advice), value in zip(FEATURES, json.loads(contributions)):
+            factors.append({"feature": name, "factor": label, "impact": value, "advice": advice})
+        factors.sort(key=lambda factor: -abs(factor["impact"]))
+        return {
+            "predicted_score": score,
+            "confidence": confidence,
+            "quizzes": quizzes,
+            "factors": factors,
+            "computed_at": computed_at
+        }
+
+    def request_refresh(self):
+        """Start a background refresh unless one is already running"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run_refresh, name='performance-refresh', daemon=True)
+            self._worker.start()
+
+    def _run_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            print(f"Performance prediction refresh error: {e}")
+
+    def stats(self):
+        """Return prediction table size, model freshness and refresh counters"""
+        try:
+            conn = self._connection()
+            users = conn.execute('SELECT COUNT(*) FROM performance_predictions').fetchone()[0]
+            trained = conn.execute('SELECT trained_at FROM performance_model WHERE id = 1').fetchone()
+        except sqlite3.Error:
+            users, trained = 0, None
+        return {
+            "users": users,
+            "trained_at": trained[0] if trained else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures
+        }
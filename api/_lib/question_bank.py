@@ -0,0 +1,216 @@
+"""
+Indexed fallback question bank with fuzzy topic resolution
+
+The bank is a gzip-compressed JSON file built by
+scripts/build_question_bank.py: a list of topics, tags and aliases plus
+one compact row per question. It is loaded on first use and indexed by
+topic, difficulty and tag. Free-form topics ("Maths", "algebra 1",
+"bio") resolve through the alias table, tag names and a character
+trigram index; topics that resolve to nothing get no bank questions, so
+the caller serves its generic fallback instead of an unrelated quiz. Questions are dealt from shuffled decks, so a quiz never
+repeats a question and consecutive quizzes rotate through the bank.
+"""
+
+import os
+import re
+import gzip
+import json
+import random
+import threading
+from collections import deque
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'question_bank.json.gz')
+
+DIFFICULTY_ALIASES = {
+    'beginner': 'easy', 'basic': 'easy', 'simple': 'easy',
+    'intermediate': 'medium', 'normal': 'medium', 'moderate': 'medium',
+    'advanced': 'hard', 'expert': 'hard', 'difficult': 'hard'
+}
+
+# Trigram similarity a fuzzy topic needs before it is trusted; one typo in a
+# short word ("biolgy") scores about 0.5, unrelated words ("cooking" vs "coding") under 0.4
+MIN_TOPIC_SIMILARITY = 0.5
+
+# Names too generic to decide a topic from one word of a longer one
+# ("Modern Art", "People Management", "Business Logic", "Dates and Figs");
+# they still match when they are the whole topic
+GENERIC_NAMES = frozenset({
+    'people', 'modern', 'ancient', 'physical', 'dates', 'logic', 'it', 'web', 'units', 'space',
+    'energy', 'motion', 'forces', 'powers', 'division', 'elements', 'cells', 'hardware',
+    'circles', 'numbers', 'shapes', 'wars', 'countries'
+})
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_topic(topic):
+    """Lowercase, punctuation-free topic text"""
+    return ' '.join(_NON_ALNUM.sub(' ', str(topic or '').lower()).split())
+
+
+def normalize_difficulty(difficulty):
+    """easy, medium or hard"""
+    difficulty = str(difficulty or 'medium').strip().lower()
+    return DIFFICULTY_ALIASES.get(difficulty, difficulty)
+
+
+def _trigrams(text):
+    """Character trigrams of a padded string"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class QuestionBank:
+    """Read-only question bank loaded lazily from disk"""
+
+    def __init__(self, path=DEFAULT_PATH, seed=None):
+        self.path = path
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._items = []
+        self._by_topic = {}
+        self._by_tag = {}
+        self._names = {}
+        self._gram_index = {}
+        self._decks = {}
+        self.served = 0
+
+    def _load(self):
+        """Read and index the bank once; a missing file leaves it empty"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Question bank unavailable: {e}")
+                data = {}
+
+            topics = data.get('topics', [])
+            difficulties = data.get('difficulties', [])
+            tags = data.get('tags', [])
+            for topic_index, difficulty_index, tag_indexes, question, options, correct, explanation in data.get('items', []):
+                item_id = len(self._items)
+                topic = topics[topic_index]
+                item_tags = [tags[index] for index in tag_indexes]
+                self._items.append((topic, difficulties[difficulty_index], item_tags, {
+                    "question": question,
+                    "options": options,
+                    "correct_answer": correct,
+                    "explanation": explanation
+                }))
+                self._by_topic.setdefault(topic, []).append(item_id)
+                for tag in item_tags:
+                    self._by_tag.setdefault(tag, []).append(item_id)
+
+            # Every name a topic can be asked for: topic, alias or tag -> (topic, tag)
+            for topic in topics:
+                self._names[topic] = (topic, None)
+            for tag, item_ids in self._by_tag.items():
+                if tag not in self._names:
+                    self._names[tag] = (self._items[item_ids[0]][0], tag)
+            for alias, target in data.get('aliases', {}).items():
+                topic, _, tag = target.partition('/')
+                self._names.setdefault(alias, (topic, tag or None))
+            # Generic names only match exactly, never as a near-miss of something else
+            for name in self._names:
+                if name in GENERIC_NAMES:
+                    continue
+                for gram in _trigrams(name):
+                    self._gram_index.setdefault(gram, []).append(name)
+            self._loaded = True
+
+    def __len__(self):
+        self._load()
+        return len(self._items)
+
+    def resolve_topic(self, topic):
+        """Map a free-form topic to (bank topic, tag or None), or (None, None)"""
+        self._load()
+        text = normalize_topic(topic)
+        if not text:
+            return None, None
+        if text in self._names:
+            return self._names[text]
+
+        # "algebra 1", "intro to biology": a known word pair or specific word decides
+        words = [word for word in text.split() if not word.isdigit()]
+        for size in (2, 1):
+            for start in range(len(words) - size + 1):
+                phrase = ' '.join(words[start:start + size])
+                if phrase in self._names and phrase not in GENERIC_NAMES:
+                    return self._names[phrase]
+
+        # Misspellings and variants: best trigram Jaccard similarity
+        grams = _trigrams(text)
+        overlaps = {}
+        for gram in grams:
+            for name in self._gram_index.get(gram, ()):
+                overlaps[name] = overlaps.get(name, 0) + 1
+        best, best_score = None, 0.0
+        for name, overlap in overlaps.items():
+            score = overlap / (len(grams) + len(_trigrams(name)) - overlap)
+            if score > best_score or (score == best_score and best is not None and name < best):
+                best, best_score = name, score
+        if best is not None and best_score >= MIN_TOPIC_SIMILARITY:
+            return self._names[best]
+        return None, None
+
+    def sample(self, topic, difficulty, count):
+        """Up to count distinct questions for a topic, closest difficulty and tag first"""
+        bank_topic, tag = self.resolve_topic(topic)
+        if bank_topic is None or count <= 0:
+            return []
+        difficulty = normalize_difficulty(difficulty)
+
+        def matches(item_id, want_tag, want_difficulty):
+            _, item_difficulty, item_tags, _ = self._items[item_id]
+            return ((want_tag is None or want_tag in item_tags) and
+                    (want_difficulty is None or item_difficulty == want_difficulty))
+
+        # Widen the pool step by step until the quiz is full
+        tiers = [(tag, difficulty), (tag, None)] if tag else []
+        tiers += [(None, difficulty), (None, None)]
+
+        chosen, seen = [], set()
+        with self._lock:
+            for want_tag, want_difficulty in tiers:
+                key = (bank_topic, want_tag, want_difficulty)
+                deck = self._decks.get(key)
+                if deck is None:
+                    pool = [item_id for item_id in self._by_topic.get(bank_topic, ())
+                            if matches(item_id, want_tag, want_difficulty)]
+                    self._rng.shuffle(pool)
+                    deck = self._decks[key] = deque(pool)
+                for _ in range(len(deck)):
+                    if len(chosen) >= count:
+                        break
+                    item_id = deck.popleft()
+                    deck.append(item_id)
+                    if item_id not in seen:
+                        seen.add(item_id)
+                        chosen.append(item_id)
+                if len(chosen) >= count:
+                    break
+            self.served += len(chosen)
+
+        return [self._copy(item_id) for item_id in chosen]
+
+    def _copy(self, item_id):
+        """A question dict the caller is free to modify"""
+        question = self._items[item_id][3]
+        return dict(question, options=list(question['options']))
+
+    def stats(self):
+        """Return bank size and serving counters"""
+        self._load()
+        return {
+            "questions": len(self._items),
+            "topics": {topic: len(item_ids) for topic, item_ids in self._by_topic.items()},
+            "tags": len(self._by_tag),
+            "served": self.served
+        }
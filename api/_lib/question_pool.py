@@ -0,0 +1,190 @@
+"""
+Pre-generated question pools per (topic, difficulty) with background refill
+
+Only standard topics are pooled: the configured ones, plus free-form topics
+once they have been requested promote_after times, up to max_topics. Other
+topics never start a refill, so one-off requests cost no extra model calls.
+"""
+
+import time
+import queue
+import threading
+from collections import deque
+
+from .chunking import normalize_text
+
+POOL_DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Request counts are kept for at most this many unpooled topics before being reset
+MAX_TRACKED_TOPICS = 1024
+
+
+def pool_key(topic, difficulty):
+    """Normalized pool key for a topic and difficulty"""
+    return (' '.join(str(topic or '').lower().split()), str(difficulty or '').strip().lower())
+
+
+class QuestionPool:
+    """Stock of validated questions served in O(1) per question
+
+    refill_func(topic, difficulty, count) must return a list of validated
+    questions (possibly empty). Pools that fall below low_watermark are
+    topped back up to target_size by a single background worker, which
+    starts with the first draw rather than at import.
+    """
+
+    def __init__(self, refill_func, topics=(), target_size=40, low_watermark=15, batch_size=10,
+                 promote_after=25, max_topics=16):
+        self.refill_func = refill_func
+        self.topics = [topic.strip() for topic in topics if topic and topic.strip()]
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.batch_size = batch_size
+        self.promote_after = promote_after
+        self.max_topics = max(max_topics, len(self.topics))
+        self._pooled_topics = {pool_key(topic, '')[0] for topic in self.topics}
+        self._requests = {}
+        self._warmed = False
+        self._pools = {}
+        self._stocked = {}
+        self._lock = threading.Lock()
+        self._refill_queue = queue.Queue()
+        self._refilling = set()
+        self._worker = None
+        self.served = 0
+        self.shortfalls = 0
+        self.unpooled = 0
+        self.refill_batches = 0
+        self.refill_failures = 0
+
+    def warm(self):
+        """Start stocking the configured topics; runs once, on the first draw"""
+        with self._lock:
+            if self._warmed:
+                return
+            self._warmed = True
+        for topic in self.topics:
+            for difficulty in POOL_DIFFICULTIES:
+                self.request_refill(topic, difficulty)
+
+    def _is_pooled(self, key):
+        """Whether a pool key is stocked, counting requests towards promoting its topic"""
+        topic, difficulty = key
+        if difficulty not in POOL_DIFFICULTIES:
+            return False
+        if topic in self._pooled_topics:
+            return True
+        if not self.promote_after or len(self._pooled_topics) >= self.max_topics:
+            return False
+        if topic not in self._requests and len(self._requests) >= MAX_TRACKED_TOPICS:
+            self._requests.clear()
+        self._requests[topic] = self._requests.get(topic, 0) + 1
+        if self._requests[topic] < self.promote_after:
+            return False
+        del self._requests[topic]
+        self._pooled_topics.add(topic)
+        return True
+
+    def draw(self, topic, difficulty, count):
+        """Take count questions from the pool as (questions, oldest generation time), or None
+
+        Returns None when the topic is not pooled or its pool is short.
+        """
+        if not self._warmed:
+            self.warm()
+        key = pool_key(topic, difficulty)
+        questions = None
+        with self._lock:
+            if not self._is_pooled(key):
+                self.unpooled += 1
+                return None
+            pool = self._pools.get(key)
+            if pool is not None and len(pool) >= count:
+                stocked = self._stocked[key]
+                questions = []
+                generated_at = None
+                for _ in range(count):
+                    question, created = pool.popleft()
+                    stocked.discard(normalize_text(question.get('question', '')))
+                    questions.append(question)
+                    generated_at = created if generated_at is None else min(generated_at, created)
+                self.served += count
+            else:
+                self.shortfalls += 1
+
+        self.request_refill(topic, difficulty)
+        return (questions, generated_at) if questions is not None else None
+
+    def add(self, topic, difficulty, questions, generated_at=None):
+        """Stock questions, skipping any already in the pool; returns how many were added"""
+        key = pool_key(topic, difficulty)
+        generated_at = time.time() if generated_at is None else generated_at
+        added = 0
+        with self._lock:
+            pool = self._pools.setdefault(key, deque())
+            stocked = self._stocked.setdefault(key, set())
+            for question in questions:
+                question_key = normalize_text(question.get('question', ''))
+                if not question_key or question_key in stocked:
+                    continue
+                stocked.add(question_key)
+                pool.append((question, generated_at))
+                added += 1
+        return added
+
+    def size(self, topic, difficulty):
+        """Number of questions currently stocked for a topic and difficulty"""
+        with self._lock:
+            return len(self._pools.get(pool_key(topic, difficulty), ()))
+
+    def request_refill(self, topic, difficulty):
+        """Schedule a background refill when a pooled topic's pool is below its low watermark"""
+        key = pool_key(topic, difficulty)
+        with self._lock:
+            if key[0] not in self._pooled_topics or key[1] not in POOL_DIFFICULTIES:
+                return
+            if key in self._refilling or len(self._pools.get(key, ())) >= self.low_watermark:
+                return
+            self._refilling.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='question-pool-refill', daemon=True)
+                self._worker.start()
+        self._refill_queue.put((key, topic, difficulty))
+
+    def _run(self):
+        """Refill queued pools one batch at a time"""
+        while True:
+            key, topic, difficulty = self._refill_queue.get()
+            try:
+                while self.size(topic, difficulty) < self.target_size:
+                    batch = self.refill_func(topic, difficulty, self.batch_size)
+                    self.refill_batches += 1
+                    if not batch or self.add(topic, difficulty, batch) == 0:
+                        self.refill_failures += 1
+                        break
+            except Exception as e:
+                self.refill_failures += 1
+                print(f"Question pool refill error for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+    def stats(self):
+        """Return pool sizes and serving counters for status reporting"""
+        with self._lock:
+            pools = {f"{topic}/{difficulty}": len(pool) for (topic, difficulty), pool in self._pools.items()}
+            refilling = len(self._refilling)
+            pooled_topics = len(self._pooled_topics)
+        return {
+            "pools": pools,
+            "pooled_topics": pooled_topics,
+            "max_topics": self.max_topics,
+            "target_size": self.target_size,
+            "low_watermark": self.low_watermark,
+            "served": self.served,
+            "shortfalls": self.shortfalls,
+            "unpooled": self.unpooled,
+            "refill_batches": self.refill_batches,
+            "refill_failures": self.refill_failures,
+            "refilling": refilling
+        }
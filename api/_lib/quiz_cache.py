@@ -0,0 +1,98 @@
+"""
+In-process LRU/TTL cache for generated quizzes
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def _digest(value):
+    """Stable SHA-256 digest of a string or JSON-serialisable value"""
+    if value is None or value == '':
+        return ''
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+# Response bookkeeping that does not change what the analysis says
+ANALYSIS_BOOKKEEPING = ('cache', 'duplicate_of', 'similarity')
+
+
+def make_quiz_key(topic, difficulty, num_questions, material_content='', ai_analysis=None):
+    """Build a normalized cache key for a quiz request"""
+    if isinstance(ai_analysis, dict):
+        ai_analysis = {k: v for k, v in ai_analysis.items() if k not in ANALYSIS_BOOKKEEPING}
+    return (
+        ' '.join(str(topic or '').lower().split()),
+        str(difficulty or '').strip().lower(),
+        int(num_questions),
+        _digest(material_content),
+        _digest(ai_analysis or {}),
+    )
+
+
+class QuizCache:
+    """Bounded LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_entries=256, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry but keep the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters for status reporting"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,557 @@
+"""
+Item-item collaborative filtering over content interactions
+
+Interactions are logged to a content_interactions table laid out like the
+Supabase one and turned into an implicit rating per (user, item): the
+strongest interaction wins (complete > bookmark > start > view, ratings
+by their value). Item similarity is the cosine of the items' rating
+columns.
+
+rebuild() computes the whole sparse co-occurrence matrix from the log,
+as CSR arrays, and precomputes the top neighbours of every item. Users are
+paired in batches of bounded size whose partial sums are merged, so peak
+memory tracks the distinct pairs rather than the sum of squared user
+histories. The first build runs in a background thread; until it lands,
+recommendations are the most popular items counted straight from the log. record() keeps it current in between: it adds the change in
+the user's rating times their other ratings to a sparse delta and marks
+the touched items dirty, and refresh_dirty() recomputes just those items'
+neighbour lists in a batch. A recommendation sums the neighbour lists of
+the user's items and takes the top k with argpartition, falling back to
+the most popular items for new users.
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'edusense-content.sqlite3')
+
+INTERACTION_WEIGHTS = {
+    'view': 1.0,
+    'start': 2.0,
+    'abandon': 0.5,
+    'bookmark': 3.0,
+    'complete': 4.0,
+}
+
+# Neighbours kept per item
+NEIGHBORS = 50
+
+# Only a user's strongest ratings take part in co-occurrence counting
+MAX_USER_ITEMS = 200
+
+# Similarities from few co-raters are shrunk: sim * n / (n + SHRINKAGE)
+SHRINKAGE = 2.0
+
+# Dirty neighbour lists are recomputed at most this often (seconds)
+REFRESH_INTERVAL = 30
+
+# Item pairs enumerated at once while building the co-occurrence matrix
+PAIR_BATCH = 4000000
+
+# Items counted for the popularity fallback served before the first build
+COLD_POPULAR = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_interactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    interaction_type TEXT NOT NULL CHECK (interaction_type IN ('view', 'start', 'complete', 'abandon', 'rate', 'bookmark')),
+    interaction_data TEXT DEFAULT '{}',
+    time_spent INTEGER DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_interactions_user_id ON content_interactions(user_id);
+CREATE INDEX IF NOT EXISTS idx_content_interactions_content_id ON content_interactions(content_id);
+CREATE TABLE IF NOT EXISTS content_items (
+    content_id TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    metadata TEXT DEFAULT '{}'
+);
+"""
+
+
+def interaction_weight(interaction_type, interaction_data=None):
+    """Implicit rating of one interaction (ratings map 1..5 stars to 0.5..5)"""
+    if interaction_type == 'rate':
+        try:
+            rating = float((interaction_data or {}).get('rating', 3))
+        except (TypeError, ValueError, AttributeError):
+            rating = 3.0
+        return min(5.0, max(0.5, rating if rating > 1 else 0.5))
+    return INTERACTION_WEIGHTS.get(interaction_type, 0.0)
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first"""
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def _user_pairs(users, items, weights, num_items):
+    """Summed (pair key, rating product, co-rater count) over every ordered item pair within each user"""
+    count = len(users)
+    starts = np.ones(count, dtype=bool)
+    starts[1:] = users[1:] != users[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(count), 0))
+    sizes = np.bincount(np.cumsum(starts) - 1)[np.cumsum(starts) - 1]
+
+    left = np.repeat(np.arange(count), sizes)
+    block_start = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    right = np.repeat(group_start, sizes) + (np.arange(len(left)) - block_start)
+    distinct = left != right
+    left, right = left[distinct], right[distinct]
+
+    return _merge_pairs(items[left] * num_items + items[right], weights[left] * weights[right],
+                        np.ones(len(left)))
+
+
+def _merge_pairs(keys, dots, co_raters):
+    """Sum the values of repeated pair keys; keys come back sorted"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, dots, len(unique)), np.bincount(inverse, co_raters, len(unique))
+
+
+class ContentRecommender:
+    """Precomputed item neighbour lists with incremental co-occurrence updates"""
+
+    def __init__(self, path=DEFAULT_PATH, max_age=3600):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._built_at = None
+        self._cold_popular = None
+        self._refreshed_at = 0.0
+        self._reset()
+        self.rebuilds = 0
+        self.dirty_refreshes = 0
+        self.served = 0
+        self.fallbacks = 0
+
+    def _reset(self):
+        self._item_ids = []
+        self._item_index = {}
+        self._item_types = []
+        self._metadata = {}
+        self._user_items = {}
+        self._norms = np.zeros(0)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._dots = np.zeros(0)
+        self._co_raters = np.zeros(0)
+        self._delta = {}
+        self._dirty = set()
+        self._neighbors = {}
+        self._popular = np.zeros(0, dtype=np.int64)
+        self._popularity = np.zeros(0)
+        self._minutes = {}
+
+    def _connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _item(self, content_id, content_type='content'):
+        """Index of an item, registering it when new"""
+        index = self._item_index.get(content_id)
+        if index is None:
+            index = len(self._item_ids)
+            self._item_index[content_id] = index
+            self._item_ids.append(content_id)
+            self._item_types.append(content_type)
+            self._norms = np.append(self._norms, 0.0)
+            self._popularity = np.append(self._popularity, 0.0)
+        return index
+
+    def rebuild(self):
+        """Recompute ratings, the co-occurrence matrix and all neighbour lists from the log"""
+        started = time.perf_counter()
+        conn = self._connection()
+        rows = conn.execute(
+            'SELECT rowid, user_id, content_id, content_type, interaction_type, interaction_data, time_spent '
+            'FROM content_interactions'
+        ).fetchall()
+        last_rowid = max((row[0] for row in rows), default=0)
+        metadata = {content_id: json.loads(payload or '{}') for content_id, payload in conn.execute(
+            'SELECT content_id, metadata FROM content_items'
+        )}
+
+        user_index, item_index, item_ids, item_types = {}, {}, [], []
+        users, items, weights, minutes = [], [], [], {}
+        for _, user_id, content_id, content_type, interaction_type, data, time_spent in rows:
+            try:
+                data = json.loads(data or '{}')
+            except ValueError:
+                data = {}
+            weight = interaction_weight(interaction_type, data)
+            if content_id not in item_index:
+                item_index[content_id] = len(item_ids)
+                item_ids.append(content_id)
+                item_types.append(content_type)
+            if interaction_type == 'complete' and time_spent:
+                minutes.setdefault(item_index[content_id], []).append(time_spent / 60.0)
+            if weight > 0:
+                users.append(user_index.setdefault(user_id, len(user_index)))
+                items.append(item_index[content_id])
+                weights.append(weight)
+        loaded = time.perf_counter()
+
+        num_items = len(item_ids)
+        users = np.array(users, dtype=np.int64)
+        items = np.array(items, dtype=np.int64)
+        weights = np.array(weights)
+
+        # Strongest interaction per (user, item)
+        order = np.lexsort((-weights, items, users))
+        users, items, weights = users[order], items[order], weights[order]
+        first = np.ones(len(users), dtype=bool)
+        first[1:] = (users[1:] != users[:-1]) | (items[1:] != items[:-1])
+        users, items, weights = users[first], items[first], weights[first]
+
+        user_items = {}
+        user_ids = list(user_index)
+        if len(users):
+            bounds = np.flatnonzero(np.diff(users)) + 1
+            heads = users[np.concatenate([[0], bounds])]
+            for user, rated, rating in zip(heads.tolist(), np.split(items, bounds), np.split(weights, bounds)):
+                user_items[user_ids[user]] = dict(zip(rated.tolist(), rating.tolist()))
+
+        norms = np.sqrt(np.bincount(items, weights * weights, num_items))
+        popularity = np.bincount(items, np.minimum(weights, 1.0) + weights / 4.0, num_items)
+
+        # Cap each user's items, then enumerate every ordered pair within a user
+        order = np.lexsort((-weights, users))
+        users, items, weights = users[order], items[order], weights[order]
+        starts = np.ones(len(users), dtype=bool)
+        starts[1:] = users[1:] != users[:-1]
+        position = np.arange(len(users)) - np.maximum.accumulate(np.where(starts, np.arange(len(users)), 0))
+        keep = position < MAX_USER_ITEMS
+        users, items, weights = users[keep], items[keep], weights[keep]
+        indptr, indices, dots, co_raters = self._pairs(users, items, weights, num_items)
+        fitted = time.perf_counter()
+
+        with self._lock:
+            self._reset()
+            self._item_ids = item_ids
+            self._item_index = item_index
+            self._item_types = item_types
+            self._metadata = metadata
+            self._user_items = user_items
+            self._norms = norms
+            self._popularity = popularity
+            self._popular = _top_k(popularity, min(200, num_items)) if num_items else self._popular
+            self._indptr, self._indices, self._dots, self._co_raters = indptr, indices, dots, co_raters
+            self._minutes = {item: float(np.median(values)) for item, values in minutes.items()}
+            self._dirty = set(range(num_items))
+            self._built_at = time.time()
+        self._catch_up(last_rowid)
+        self.refresh_dirty(force=True)
+        self.rebuilds += 1
+        return {
+            "interactions": len(rows),
+            "users": len(user_items),
+            "items": num_items,
+            "pairs": int(len(indices)),
+            "load_seconds": round(loaded - started, 3),
+            "matrix_seconds": round(fitted - loaded, 3),
+            "neighbor_seconds": round(time.perf_counter() - fitted, 3)
+        }
+
+    @staticmethod
+    def _pairs(users, items, weights, num_items):
+        """CSR co-occurrence (sum of rating products and co-rater counts) from per-user ratings
+
+        Users are paired in batches of about PAIR_BATCH pairs and the partial
+        sums merged, so one heavy history cannot blow up the pair arrays.
+        """
+        count = len(users)
+        if not count:
+            return np.zeros(num_items + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        bounds = np.concatenate([[0], np.flatnonzero(users[1:] != users[:-1]) + 1, [count]])
+        cost = np.cumsum(np.diff(bounds) ** 2)
+        cuts = np.searchsorted(cost, np.arange(PAIR_BATCH, cost[-1], PAIR_BATCH), side='right')
+        batches = np.unique(np.concatenate([[0], cuts, [len(cost)]]))
+
+        keys, dots, co_raters = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        for first, last in zip(batches[:-1].tolist(), batches[1:].tolist()):
+            lo, hi = bounds[first], bounds[last]
+            batch = _user_pairs(users[lo:hi], items[lo:hi], weights[lo:hi], num_items)
+            keys, dots, co_raters = _merge_pairs(
+                np.concatenate([keys, batch[0]]), np.concatenate([dots, batch[1]]),
+                np.concatenate([co_raters, batch[2]])
+            )
+        rows = keys // num_items
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=num_items))])
+        return indptr, keys % num_items, dots, co_raters
+
+    def _row(self, item):
+        """Neighbour ids and similarities of an item from the CSR base plus recent deltas"""
+        base = slice(self._indptr[item], self._indptr[item + 1]) if item + 1 < len(self._indptr) else slice(0, 0)
+        indices = self._indices[base]
+        dots = self._dots[base]
+        co_raters = self._co_raters[base]
+        delta = self._delta.get(item)
+        if delta:
+            extra = np.fromiter(delta, dtype=np.int64, count=len(delta))
+            values = np.array([delta[key] for key in extra.tolist()])
+            indices, inverse = np.unique(np.concatenate([indices, extra]), return_inverse=True)
+            dots = np.bincount(inverse, np.concatenate([dots, values[:, 0]]), len(indices))
+            co_raters = np.bincount(inverse, np.concatenate([co_raters, values[:, 1]]), len(indices))
+        norms = self._norms[item] * self._norms[indices]
+        similarity = np.where(norms > 0, dots / np.maximum(norms, 1e-12), 0.0)
+        return indices, similarity * co_raters / (co_raters + SHRINKAGE)
+
+    def refresh_dirty(self, force=False):
+        """Recompute neighbour lists of items touched since the last refresh; returns how many"""
+        with self._lock:
+            if not force and time.time() - self._refreshed_at < REFRESH_INTERVAL:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            for item in dirty:
+                indices, similarity = self._row(item)
+                positive = similarity > 0
+                indices, similarity = indices[positive], similarity[positive]
+                top = _top_k(similarity, NEIGHBORS)
+                self._neighbors[item] = (indices[top], similarity[top])
+            self._refreshed_at = time.time()
+        self.dirty_refreshes += 1
+        return len(dirty)
+
+    def _ensure_built(self):
+        """Start the first build in the background; rebuild there too once older than max_age"""
+        built = self._built_at is not None
+        if not built or time.time() - self._built_at > self.max_age or (
+                self._dirty and time.time() - self._refreshed_at > REFRESH_INTERVAL):
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    stale = not built or time.time() - self._built_at > self.max_age
+                    self._worker = threading.Thread(target=self._run_refresh, args=(stale,),
+                                                    name='recommender-refresh', daemon=True)
+                    self._worker.start()
+
+    def _run_refresh(self, full):
+        try:
+            self.rebuild() if full else self.refresh_dirty()
+        except Exception as e:
+            print(f"Recommender refresh error: {e}")
+
+    def _catch_up(self, last_rowid):
+        """Fold interactions logged while a rebuild was reading the log
+
+        Folding is idempotent (the strongest rating wins), so rows record()
+        already folded are skipped.
+        """
+        rows = self._connection().execute(
+            'SELECT user_id, content_id, content_type, interaction_type, interaction_data '
+            'FROM content_interactions WHERE rowid > ? ORDER BY rowid', (last_rowid,)
+        ).fetchall()
+        for user_id, content_id, content_type, interaction_type, data in rows:
+            try:
+                data = json.loads(data or '{}')
+            except ValueError:
+                data = {}
+            self._fold(user_id, content_id, content_type, interaction_weight(interaction_type, data))
+        return len(rows)
+
+    def _popular_from_log(self):
+        """(content_id, content_type, interactions) of the most popular items, counted in SQLite
+
+        The count reads only the content_id index; types are looked up for the shortlist.
+        """
+        if self._cold_popular is None:
+            conn = self._connection()
+            counts = conn.execute(
+                'SELECT content_id, COUNT(*) AS interactions FROM content_interactions '
+                'GROUP BY content_id ORDER BY interactions DESC LIMIT ?', (COLD_POPULAR,)
+            ).fetchall()
+            types = dict(conn.execute(
+                'SELECT content_id, MIN(content_type) FROM content_interactions WHERE content_id IN '
+                f'({", ".join("?" * len(counts))}) GROUP BY content_id', [content_id for content_id, _ in counts]
+            ).fetchall()) if counts else {}
+            self._cold_popular = [(content_id, types.get(content_id, 'content'), interactions)
+                                  for content_id, interactions in counts]
+            metadata = {content_id: json.loads(payload or '{}') for content_id, payload in conn.execute(
+                'SELECT content_id, metadata FROM content_items'
+            )}
+            with self._lock:
+                for content_id, payload in metadata.items():
+                    self._metadata.setdefault(content_id, payload)
+        return self._cold_popular
+
+    def _recommend_cold(self, user_id, limit, content_type):
+        """Most popular items the user has not touched, served until the first build lands"""
+        seen = {content_id for (content_id,) in self._connection().execute(
+            'SELECT DISTINCT content_id FROM content_interactions WHERE user_id = ?', (str(user_id),)
+        )}
+        popular = self._popular_from_log()
+        peak = float(popular[0][2]) if popular else 1.0
+        results = []
+        for content_id, item_type, interactions in popular:
+            if len(results) >= limit:
+                break
+            if content_id in seen or (content_type is not None and item_type != content_type):
+                continue
+            results.append((content_id, 0.5 * interactions / peak, None))
+        self.fallbacks += 1
+        self.served += 1
+        return results
+
+    def record(self, user_id, content_id, content_type, interaction_type, interaction_data=None,
+               time_spent=0, metadata=None):
+        """Log an interaction and fold it into the co-occurrence counts"""
+        if interaction_type not in INTERACTION_WEIGHTS and interaction_type != 'rate':
+            raise ValueError(f'interaction_type must be one of: {", ".join(list(INTERACTION_WEIGHTS) + ["rate"])}')
+        user_id, content_id = str(user_id), str(content_id)
+        conn = self._connection()
+        conn.execute(
+            'INSERT INTO content_interactions (id, user_id, content_id, content_type, interaction_type, '
+            'interaction_data, time_spent, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (uuid.uuid4().hex, user_id, content_id, content_type, interaction_type,
+             json.dumps(interaction_data or {}), int(time_spent or 0), time.time())
+        )
+        if metadata:
+            conn.execute(
+                'INSERT OR REPLACE INTO content_items (content_id, content_type, metadata) VALUES (?, ?, ?)',
+                (content_id, content_type, json.dumps(metadata))
+            )
+        if self._built_at is None:
+            return
+
+        if metadata:
+            with self._lock:
+                self._metadata[content_id] = metadata
+        self._fold(user_id, content_id, content_type, interaction_weight(interaction_type, interaction_data))
+
+    def _fold(self, user_id, content_id, content_type, weight):
+        """Raise a user's rating of an item and add the change to the co-occurrence deltas"""
+        with self._lock:
+            item = self._item(content_id, content_type)
+            ratings = self._user_items.setdefault(user_id, {})
+            old = ratings.get(item, 0.0)
+            if weight <= old:
+                return
+            ratings[item] = weight
+            change = weight - old
+            self._norms[item] = math.sqrt(self._norms[item] ** 2 + weight * weight - old * old)
+            self._popularity[item] += (1.0 if not old else 0.0) + change / 4.0
+            for other, other_weight in ratings.items():
+                if other == item:
+                    continue
+                for a, b in ((item, other), (other, item)):
+                    entry = self._delta.setdefault(a, {}).setdefault(b, [0.0, 0.0])
+                    entry[0] += change * other_weight
+                    entry[1] += 0.0 if old else 1.0
+                self._dirty.add(other)
+            self._dirty.add(item)
+
+    def recommend(self, user_id, limit=5, content_type=None):
+        """Top items for a user as (content_id, score, because_of) tuples, best first"""
+        if self._built_at is None:
+            # Answer from the log before the build starts competing for the interpreter
+            results = self._recommend_cold(user_id, limit, content_type)
+            self._ensure_built()
+            return results
+        self._ensure_built()
+        with self._lock:
+            ratings = dict(self._user_items.get(str(user_id), {}))
+            neighbor_lists = [(item, weight, self._neighbors.get(item)) for item, weight in ratings.items()]
+            popular = self._popular
+            popularity = self._popularity
+            item_types = self._item_types
+            item_ids = self._item_ids
+
+        candidates, scores, sources = [], [], []
+        for item, weight, neighbors in neighbor_lists:
+            if neighbors is None or not len(neighbors[0]):
+                continue
+            candidates.append(neighbors[0])
+            scores.append(weight * neighbors[1])
+            sources.append(np.full(len(neighbors[0]), item))
+
+        results = []
+        if candidates:
+            candidates = np.concatenate(candidates)
+            scores = np.concatenate(scores)
+            sources = np.concatenate(sources)
+            unique, inverse = np.unique(candidates, return_inverse=True)
+            totals = np.bincount(inverse, scores)
+            # The rated item that contributed most explains each candidate
+            best = np.lexsort((-scores, inverse))
+            first = np.ones(len(best), dtype=bool)
+            first[1:] = inverse[best][1:] != inverse[best][:-1]
+            because = sources[best][first]
+            keep = np.array([item not in ratings and (content_type is None or item_types[item] == content_type)
+                             for item in unique.tolist()], dtype=bool)
+            unique, totals, because = unique[keep], totals[keep], because[keep]
+            if len(unique):
+                top = _top_k(totals, limit)
+                peak = totals[top[0]] if totals[top[0]] > 0 else 1.0
+                results = [(item_ids[item], float(totals[i] / peak), item_ids[because[i]])
+                           for i, item in zip(top.tolist(), unique[top].tolist())]
+
+        if len(results) < limit:
+            # New users (and short lists) are filled with the most popular items
+            self.fallbacks += 1
+            seen = {content_id for content_id, _, _ in results}
+            # The shortlist comes from the last rebuild; order it by current popularity
+            popular = popular[np.argsort(-popularity[popular], kind='stable')]
+            peak = float(popularity[popular[0]]) if len(popular) else 1.0
+            for item in popular.tolist():
+                if len(results) >= limit:
+                    break
+                if item in ratings or item_ids[item] in seen:
+                    continue
+                if content_type is not None and item_types[item] != content_type:
+                    continue
+                results.append((item_ids[item], 0.5 * float(popularity[item]) / max(peak, 1e-12), None))
+        self.served += 1
+        return results
+
+    def describe(self, content_id):
+        """Stored metadata for an item plus its content type and typical completion time"""
+        with self._lock:
+            item = self._item_index.get(content_id)
+            metadata = dict(self._metadata.get(content_id, {}))
+            content_type = self._item_types[item] if item is not None else 'content'
+            minutes = self._minutes.get(item)
+        metadata.setdefault('type', content_type)
+        if minutes:
+            metadata.setdefault('estimated_time', f"{max(1, round(minutes))} min")
+        return metadata
+
+    def stats(self):
+        """Return matrix sizes, freshness and serving counters"""
+        with self._lock:
+            return {
+                "items": len(self._item_ids),
+                "users": len(self._user_items),
+                "pairs": int(len(self._indices)),
+                "delta_items": len(self._delta),
+                "dirty_items": len(self._dirty),
+                "built_at": self._built_at,
+                "rebuilds": self.rebuilds,
+                "dirty_refreshes": self.dirty_refreshes,
+                "served": self.served,
+                "fallbacks": self.fallbacks
+            }
@@ -0,0 +1,368 @@
+"""
+Spaced-repetition review scheduling (SM-2) over compact arrays and heaps
+
+Each (user, item) review card - an item is a quiz topic - is one 28-byte
+record in a NumPy structured array: ease, interval, repetitions, lapses,
+and due and last review times in epoch seconds. Every user has a binary min-heap of packed
+integers (due second << 32 | card row), and a global heap holds each
+user's earliest due time the same way (due << 32 | user row). "What is
+due for this user" and "which users have reviews due within the hour"
+are answered by popping valid entries off those heaps in O(log n) each;
+entries made stale by a reschedule are discarded when they surface.
+
+Quiz results reach the scheduler through the adaptive_difficulty_history
+log written by the difficulty engine: sync() ingests the rows added since
+the last sync in one vectorised SM-2 pass per review round.
+"""
+
+import json
+import time
+import heapq
+import sqlite3
+import threading
+
+import numpy as np
+
+from .adaptive_difficulty import DEFAULT_PATH
+
+CARD = np.dtype([
+    ('user', np.uint32),
+    ('item', np.uint32),
+    ('ease', np.float32),
+    ('interval', np.float32),
+    ('repetitions', np.uint16),
+    ('lapses', np.uint16),
+    ('due', np.uint32),
+    ('last_review', np.uint32),
+])
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+
+# SM-2 intervals (days) after the first and second successful review
+FIRST_INTERVAL = 1.0
+SECOND_INTERVAL = 6.0
+MAX_INTERVAL = 365.0
+
+# Answers at or above this SM-2 quality (0-5) count as recalled
+PASSING_QUALITY = 3
+
+# Read new quiz results from the history log at most this often (seconds)
+SYNC_INTERVAL = 30
+
+SECONDS_PER_DAY = 86400
+
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+_ITEM_BITS = 24
+
+
+def quality_from_score(score):
+    """SM-2 quality 0-5 from a 0..1 quiz score"""
+    return int(np.clip(np.rint(np.asarray(score, dtype=np.float64) * 5), 0, 5))
+
+
+def sm2(ease, interval, repetitions, lapses, quality):
+    """Vectorised SM-2 step; returns new (ease, interval days, repetitions, lapses)"""
+    quality = np.asarray(quality, dtype=np.float64)
+    passed = quality >= PASSING_QUALITY
+    miss = 5.0 - quality
+    ease = np.maximum(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+    interval = np.where(
+        ~passed, FIRST_INTERVAL,
+        np.where(repetitions == 0, FIRST_INTERVAL,
+                 np.where(repetitions == 1, SECOND_INTERVAL, np.minimum(MAX_INTERVAL, interval * ease)))
+    )
+    repetitions = np.where(passed, repetitions + 1, 0)
+    lapses = np.where(passed, lapses, lapses + 1)
+    return ease, interval, repetitions, lapses
+
+
+def _pack(due, row):
+    return (int(due) << _ROW_BITS) | row
+
+
+def normalize_item(item):
+    """Case- and whitespace-insensitive item key"""
+    return ' '.join(str(item or '').lower().split())
+
+
+class ReviewScheduler:
+    """Per-user review heaps with a global earliest-due heap across users"""
+
+    def __init__(self, path=DEFAULT_PATH, capacity=1024):
+        self.path = path
+        self._cards = np.zeros(capacity, dtype=CARD)
+        self._count = 0
+        self._card_rows = {}
+        self._items = []
+        self._item_rows = {}
+        self._user_rows = {}
+        self._user_ids = []
+        self._heaps = []
+        self._user_cards = []
+        self._user_due = []
+        self._global = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._local = threading.local()
+        self._last_rowid = 0
+        self._synced_at = 0.0
+        self.reviews = 0
+
+    def _user(self, user_id):
+        row = self._user_rows.get(user_id)
+        if row is None:
+            row = len(self._user_ids)
+            self._user_rows[user_id] = row
+            self._user_ids.append(user_id)
+            self._heaps.append([])
+            self._user_cards.append(0)
+            self._user_due.append(None)
+        return row
+
+    def _item(self, item):
+        row = self._item_rows.get(item)
+        if row is None:
+            row = self._item_rows[item] = len(self._items)
+            self._items.append(item)
+        return row
+
+    def _card(self, user_row, item_row):
+        key = (user_row << _ITEM_BITS) | item_row
+        row = self._card_rows.get(key)
+        if row is None:
+            row = self._count
+            if row >= len(self._cards):
+                grown = np.zeros(len(self._cards) * 2, dtype=CARD)
+                grown[:row] = self._cards[:row]
+                self._cards = grown
+            self._cards[row] = (user_row, item_row, INITIAL_EASE, 0.0, 0, 0, 0, 0)
+            self._card_rows[key] = row
+            self._user_cards[user_row] += 1
+            self._count += 1
+        return row
+
+    def _push(self, row):
+        """Queue a card at its due time and refresh its user's entry in the global heap"""
+        card = self._cards[row]
+        user_row = int(card['user'])
+        heap = self._heaps[user_row]
+        heapq.heappush(heap, _pack(card['due'], row))
+        if len(heap) > 64 and len(heap) > 4 * self._user_cards[user_row]:
+            self._compact(user_row)
+        earliest = self._earliest(user_row)
+        if earliest is not None and earliest != self._user_due[user_row]:
+            self._user_due[user_row] = earliest
+            heapq.heappush(self._global, _pack(earliest, user_row))
+
+    def _valid(self, entry):
+        return int(self._cards['due'][entry & _ROW_MASK]) == entry >> _ROW_BITS
+
+    def _earliest(self, user_row):
+        """Earliest due second of a user's cards, dropping stale heap entries on the way"""
+        heap = self._heaps[user_row]
+        while heap and not self._valid(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] >> _ROW_BITS if heap else None
+
+    def _compact(self, user_row):
+        heap = [entry for entry in self._heaps[user_row] if self._valid(entry)]
+        heapq.heapify(heap)
+        self._heaps[user_row] = heap
+
+    def review(self, user_id, item, quality, at=None):
+        """Grade one review (SM-2 quality 0-5) and reschedule the card; returns its state"""
+        at = time.time() if at is None else at
+        with self._lock:
+            row = self._card(self._user(str(user_id)), self._item(normalize_item(item)))
+            self._apply(np.array([row]), np.array([quality]), np.array([at], dtype=np.float64))
+            self._push(row)
+            return self._describe(row, at)
+
+    def _apply(self, rows, qualities, times):
+        """SM-2 update for distinct card rows (callers requeue them)"""
+        cards = self._cards[rows]
+        ease, interval, repetitions, lapses = sm2(
+            cards['ease'].astype(np.float64), cards['interval'].astype(np.float64),
+            cards['repetitions'], cards['lapses'], qualities
+        )
+        self._cards['ease'][rows] = ease
+        self._cards['interval'][rows] = interval
+        self._cards['repetitions'][rows] = repetitions
+        self._cards['lapses'][rows] = lapses
+        self._cards['last_review'][rows] = times
+        self._cards['due'][rows] = np.floor(times + interval * SECONDS_PER_DAY)
+        self.reviews += len(rows)
+
+    def ingest(self, user_ids, items, qualities, times):
+        """Bulk-apply reviews given as parallel sequences, in time order per card
+
+        Reviews are grouped by card; round k applies every card's k-th review
+        in one vectorised SM-2 step.
+        """
+        if not len(user_ids):
+            return 0
+        times = np.asarray(times, dtype=np.float64)
+        qualities = np.asarray(qualities, dtype=np.float64)
+        with self._lock:
+            # Map each distinct user, item and card once, then expand with array indexing
+            user_lookup = {user_id: self._user(user_id) for user_id in dict.fromkeys(map(str, user_ids))}
+            item_lookup = {item: self._item(normalize_item(item)) for item in dict.fromkeys(items)}
+            user_rows = np.fromiter(map(user_lookup.__getitem__, map(str, user_ids)), dtype=np.int64, count=len(times))
+            item_rows = np.fromiter(map(item_lookup.__getitem__, items), dtype=np.int64, count=len(times))
+            keys, inverse = np.unique((user_rows << _ITEM_BITS) | item_rows, return_inverse=True)
+            card_rows = np.array([self._card(key >> _ITEM_BITS, key & ((1 << _ITEM_BITS) - 1))
+                                  for key in keys.tolist()], dtype=np.int64)
+            rows = card_rows[inverse.reshape(-1)]
+
+            order = np.lexsort((times, rows))
+            rows, qualities, times = rows[order], qualities[order], times[order]
+            starts = np.ones(len(rows), dtype=bool)
+            starts[1:] = rows[1:] != rows[:-1]
+            rank = np.arange(len(rows)) - np.maximum.accumulate(np.where(starts, np.arange(len(rows)), 0))
+            for round_ in range(int(rank.max()) + 1):
+                selected = rank == round_
+                self._apply(rows[selected], qualities[selected], times[selected])
+            self._requeue(card_rows)
+        return len(rows)
+
+    def _requeue(self, rows):
+        """Queue many cards at their final due times, rebuilding each touched user's heap once"""
+        users = self._cards['user'][rows].astype(np.int64)
+        entries = (self._cards['due'][rows].astype(np.int64) << _ROW_BITS) | rows
+        order = np.argsort(users, kind='stable')
+        users, entries = users[order], entries[order]
+        bounds = np.flatnonzero(np.diff(users)) + 1
+        for user_row, group in zip(users[np.concatenate([[0], bounds])].tolist(), np.split(entries, bounds)):
+            heap = self._heaps[user_row]
+            heap.extend(group.tolist())
+            if len(heap) > 4 * self._user_cards[user_row]:
+                heap[:] = [entry for entry in heap if self._valid(entry)]
+            heapq.heapify(heap)
+            earliest = self._earliest(user_row)
+            if earliest is not None and earliest != self._user_due[user_row]:
+                self._user_due[user_row] = earliest
+                self._global.append(_pack(earliest, user_row))
+        heapq.heapify(self._global)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def sync(self, force=False):
+        """Ingest quiz results logged since the last sync; returns how many"""
+        if not self.path or (not force and time.time() - self._synced_at < SYNC_INTERVAL):
+            return 0
+        if not self._sync_lock.acquire(blocking=force):
+            return 0
+        try:
+            self._synced_at = time.time()
+            return self._sync()
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self):
+        try:
+            rows = self._connection().execute(
+                'SELECT rowid, user_id, topic, performance_data, created_at FROM adaptive_difficulty_history '
+                'WHERE rowid > ? ORDER BY rowid', (self._last_rowid,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            # The history table appears with the first recorded quiz
+            if 'no such table' not in str(e):
+                print(f"Review scheduler sync error: {e}")
+            return 0
+        if not rows:
+            return 0
+
+        user_ids, items, qualities, times = [], [], [], []
+        for rowid, user_id, topic, payload, created_at in rows:
+            try:
+                score = float(json.loads(payload)["score"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            user_ids.append(user_id)
+            items.append(topic)
+            qualities.append(quality_from_score(score))
+            times.append(created_at)
+        self._last_rowid = rows[-1][0]
+        return self.ingest(user_ids, items, qualities, times)
+
+    def due(self, user_id, now=None, limit=20):
+        """Cards due by now for a user, most overdue first"""
+        now = time.time() if now is None else now
+        self.sync()
+        with self._lock:
+            user_row = self._user_rows.get(str(user_id))
+            if user_row is None:
+                return []
+            heap = self._heaps[user_row]
+            taken = []
+            while heap and len(taken) < limit and heap[0] >> _ROW_BITS <= now:
+                entry = heapq.heappop(heap)
+                if self._valid(entry):
+                    taken.append(entry)
+            for entry in taken:
+                heapq.heappush(heap, entry)
+            return [self._describe(entry & _ROW_MASK, now) for entry in taken]
+
+    def next_review(self, user_id, item=None):
+        """Due time (epoch seconds) of a user's card for item, or of their earliest card; None if unknown"""
+        self.sync()
+        with self._lock:
+            user_row = self._user_rows.get(str(user_id))
+            if user_row is None:
+                return None
+            if item is None:
+                return self._earliest(user_row)
+            item_row = self._item_rows.get(normalize_item(item))
+            row = self._card_rows.get((user_row << _ITEM_BITS) | item_row) if item_row is not None else None
+            return int(self._cards[row]['due']) if row is not None else None
+
+    def users_due(self, within=3600, now=None, limit=1000):
+        """[(user_id, earliest due)] for users with a card due within `within` seconds, earliest first"""
+        now = time.time() if now is None else now
+        self.sync()
+        horizon = now + within
+        with self._lock:
+            taken, seen = [], set()
+            while self._global and len(taken) < limit and self._global[0] >> _ROW_BITS <= horizon:
+                entry = heapq.heappop(self._global)
+                user_row = entry & _ROW_MASK
+                # Stale once the user's earliest card has moved; an earlier due time can
+                # also come back, so duplicates of a valid entry are dropped as well
+                if self._user_due[user_row] == entry >> _ROW_BITS and user_row not in seen:
+                    seen.add(user_row)
+                    taken.append(entry)
+            for entry in taken:
+                heapq.heappush(self._global, entry)
+            return [(self._user_ids[entry & _ROW_MASK], entry >> _ROW_BITS) for entry in taken]
+
+    def _describe(self, row, now):
+        card = self._cards[row]
+        return {
+            "item": self._items[card['item']],
+            "due": int(card['due']),
+            "overdue_seconds": max(0, int(now - int(card['due']))),
+            "interval_days": round(float(card['interval']), 2),
+            "ease": round(float(card['ease']), 2),
+            "repetitions": int(card['repetitions']),
+            "lapses": int(card['lapses'])
+        }
+
+    def stats(self):
+        """Return card and user counts, memory use and review counters"""
+        with self._lock:
+            return {
+                "cards": self._count,
+                "users": len(self._user_ids),
+                "card_bytes": self._count * CARD.itemsize,
+                "heap_entries": sum(len(heap) for heap in self._heaps) + len(self._global),
+                "reviews": self.reviews,
+                "synced_rowid": self._last_rowid
+            }
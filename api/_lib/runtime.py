@@ -0,0 +1,197 @@
+"""
+Shared runtime for the Python serverless functions
+
+- Imports and configures the Gemini SDK lazily, on first use
+- Reuses one GenerativeModel client per configuration
+- Parses prompt templates once at import time
+- Provides the JSON and CORS plumbing every handler needs
+- Records import, first-request and warm-request timings so cold-start
+  cost can be measured per function
+"""
+
+import os
+import json
+import time
+import threading
+from string import Formatter
+from http.server import BaseHTTPRequestHandler
+
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+# Process start is approximated by the first import of this module
+PROCESS_STARTED = time.perf_counter()
+
+_sdk = None
+_models = {}
+_lock = threading.Lock()
+
+_timings = {
+    "sdk_import_ms": None,
+    "handler_import_ms": None,
+    "first_request_ms": None,
+    "first_request_after_start_ms": None,
+    "warm_requests": 0,
+    "warm_request_total_ms": 0.0,
+    "warm_request_max_ms": 0.0
+}
+
+
+def _elapsed_ms(start):
+    """Milliseconds since a perf_counter() timestamp"""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def has_api_key():
+    """True when a Gemini API key is configured"""
+    return bool(os.environ.get('GEMINI_API_KEY'))
+
+
+def get_genai():
+    """Import and configure google.generativeai the first time it is needed"""
+    global _sdk
+    if _sdk is None:
+        with _lock:
+            if _sdk is None:
+                start = time.perf_counter()
+                import google.generativeai as genai
+                genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+                _timings["sdk_import_ms"] = _elapsed_ms(start)
+                _sdk = genai
+    return _sdk
+
+
+def get_model(temperature=None, max_output_tokens=None, model_name=MODEL_NAME):
+    """Return a reusable GenerativeModel for this generation configuration"""
+    key = (model_name, temperature, max_output_tokens)
+    model = _models.get(key)
+    if model is None:
+        genai = get_genai()
+        config = {}
+        if temperature is not None:
+            config['temperature'] = temperature
+        if max_output_tokens is not None:
+            config['max_output_tokens'] = max_output_tokens
+        generation_config = genai.types.GenerationConfig(**config) if config else None
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                _models[key] = model
+    return model
+
+
+class PromptTemplate:
+    """A str.format-style prompt parsed once and rendered by joining its parts"""
+
+    def __init__(self, template):
+        self._parts = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            self._parts.append((literal, field, spec or '', conversion))
+
+    def render(self, **values):
+        """Fill in the named fields"""
+        pieces = []
+        for literal, field, spec, conversion in self._parts:
+            pieces.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == 'r':
+                value = repr(value)
+            pieces.append(format(value, spec) if spec else str(value))
+        return ''.join(pieces)
+
+
+def mark_handler_ready():
+    """Record how long the handler module took to import"""
+    if _timings["handler_import_ms"] is None:
+        _timings["handler_import_ms"] = _elapsed_ms(PROCESS_STARTED)
+
+
+def record_request(start):
+    """Record one request's duration, separating the cold first request; returns (ms, phase)"""
+    duration = _elapsed_ms(start)
+    with _lock:
+        if _timings["first_request_ms"] is None:
+            _timings["first_request_ms"] = duration
+            _timings["first_request_after_start_ms"] = _elapsed_ms(PROCESS_STARTED)
+            phase = 'cold'
+        else:
+            _timings["warm_requests"] += 1
+            _timings["warm_request_total_ms"] += duration
+            _timings["warm_request_max_ms"] = max(_timings["warm_request_max_ms"], duration)
+            phase = 'warm'
+    if phase == 'cold':
+        print(f"Cold start: handler import {_timings['handler_import_ms']} ms, "
+              f"SDK import {_timings['sdk_import_ms']} ms, first request {duration} ms")
+    return duration, phase
+
+
+def runtime_stats():
+    """Return the cold-start and warm-request timings for status reporting"""
+    with _lock:
+        stats = dict(_timings)
+        warm = stats.pop("warm_request_total_ms")
+        stats["warm_request_avg_ms"] = round(warm / stats["warm_requests"], 3) if stats["warm_requests"] else None
+        stats["model_clients"] = len(_models)
+        stats["uptime_s"] = round(time.perf_counter() - PROCESS_STARTED, 1)
+    return stats
+
+
+class JSONRequestHandler(BaseHTTPRequestHandler):
+    """BaseHTTPRequestHandler with the CORS, JSON and timing plumbing shared by all endpoints"""
+
+    allowed_methods = 'POST, OPTIONS'
+    allowed_headers = 'Content-Type'
+
+    def handle_one_request(self):
+        """Time every request, marking the first one as the cold start"""
+        self.request_started = time.perf_counter()
+        self.command = None
+        super().handle_one_request()
+        if getattr(self, 'command', None):
+            record_request(self.request_started)
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', self.allowed_methods)
+        self.send_header('Access-Control-Allow-Headers', self.allowed_headers)
+        self.end_headers()
+
+    def read_json(self):
+        """Read the request body as a JSON object, returning {} when absent or invalid"""
+        content_length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(content_length)
+        try:
+            data = json.loads(post_data.decode('utf-8')) if post_data else {}
+        except (ValueError, UnicodeDecodeError):
+            data = {}
+        return data if isinstance(data, dict) else {}
+
+    def send_json(self, payload, status=200):
+        """Write a JSON response with CORS and Server-Timing headers"""
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        started = getattr(self, 'request_started', None)
+        if started is not None:
+            phase = 'warm' if _timings["first_request_ms"] is not None else 'cold'
+            self.send_header('Server-Timing', f'app;dur={_elapsed_ms(started)};desc="{phase}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def json_response(payload, status=200, methods='POST, OPTIONS'):
+    """Build a response dict for the function-style handlers"""
+    return {
+        'statusCode': status,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': methods,
+            'Content-Type': 'application/json'
+        },
+        'body': json.dumps(payload)
+    }
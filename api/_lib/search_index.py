@@ -0,0 +1,129 @@
+"""
+Incrementally maintained inverted index with BM25 ranking
+
+Documents are indexed field by field (e.g. filename and content) with a
+per-field weight folded into the term frequency, so a match in the
+filename counts for more than one in the body. A query only touches the
+postings of its own terms, so search cost follows the number of matching
+documents rather than the size of the library.
+"""
+
+import re
+import math
+import heapq
+import threading
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or
+that the their this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords dropped and plurals folded"""
+    tokens = []
+    for token in _TOKEN.findall(str(text or '').lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith('ies'):
+            token = token[:-3] + 'y'
+        elif len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index over weighted fields, scored with Okapi BM25
+
+    add() replaces any earlier version of the same document, so uploads
+    and edits both go through it; remove() drops a document's postings.
+    """
+
+    def __init__(self, field_weights=None, k1=1.2, b=0.75):
+        self.field_weights = field_weights or {'filename': 2.0, 'content': 1.0}
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) a document given a dict of field name to text"""
+        terms = {}
+        length = 0.0
+        for field, weight in self.field_weights.items():
+            for token in tokenize(fields.get(field, '')):
+                terms[token] = terms.get(token, 0.0) + weight
+                length += weight
+
+        with self._lock:
+            self._remove(doc_id)
+            for token, frequency in terms.items():
+                self._postings.setdefault(token, {})[doc_id] = frequency
+            self._doc_terms[doc_id] = tuple(terms)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id):
+        """Drop a document from the index; returns False when it was not indexed"""
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        """Drop a document's postings; the caller holds the lock"""
+        if doc_id not in self._doc_lengths:
+            return False
+        for token in self._doc_terms.pop(doc_id):
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def search(self, query, k=10, candidates=None):
+        """Return up to k (doc_id, score) pairs, best first
+
+        candidates, when given, restricts scoring to those document IDs.
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._doc_lengths)
+            if not query_terms or not count:
+                return []
+            average_length = self._total_length / count or 1.0
+            k1, b = self.k1, self.b
+
+            scores = {}
+            for token in query_terms:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    norm = k1 * (1 - b + b * self._doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def stats(self):
+        """Return index size counters for status reporting"""
+        with self._lock:
+            return {
+                "documents": len(self._doc_lengths),
+                "terms": len(self._postings),
+                "postings": sum(len(postings) for postings in self._postings.values())
+            }
@@ -0,0 +1,352 @@
+"""
+Offline semantic search over hashed TF-IDF vectors
+
+Texts become fixed-width vectors by hashing word stems, character
+n-grams (so "derivative" still meets "derivatives" and "differentiate")
+and shared concept features for common study-topic paraphrases (so
+"derivatives" meets "rate of change"). Rows are L2-normalised and kept
+in a float32 NumPy matrix; a query is weighted by the current inverse
+document frequencies and scored against every row with one
+matrix-vector product, with the top k picked by argpartition.
+
+With a path the matrix lives in a memory-mapped .npy file, so a cold
+start maps the existing index instead of re-vectorising every material.
+Every process sharing the path takes an flock on a .lock file beside it
+and reloads the slot table whenever another process has saved one, so
+slot allocation and growth never hand the same row to two documents.
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+from .search_index import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process owns the index
+    fcntl = None
+
+DEFAULT_DIM = 2048
+
+# Paraphrases students use for the same idea; any phrase adds the group's feature.
+# Everyday words (mean, product, current, code, function) are left out so they
+# do not pull unrelated materials into a group
+CONCEPT_GROUPS = (
+    ('derivative', 'rate of change', 'differentiation', 'differentiate', 'slope of tangent', 'instantaneous rate'),
+    ('integral', 'integration', 'antiderivative', 'area under the curve', 'accumulation'),
+    ('limit', 'tends to', 'continuity'),
+    ('probability', 'chance', 'likelihood', 'odds'),
+    ('statistics', 'arithmetic mean', 'median', 'standard deviation', 'variance', 'distribution'),
+    ('equation', 'solve for', 'algebra'),
+    ('photosynthesis', 'chlorophyll', 'light energy', 'glucose production'),
+    ('cell', 'organelle', 'nucleus', 'mitochondria', 'membrane'),
+    ('genetics', 'dna', 'gene', 'heredity', 'inheritance', 'chromosome'),
+    ('evolution', 'natural selection', 'adaptation', 'species'),
+    ('force', 'newton', 'acceleration', 'momentum', 'motion'),
+    ('energy', 'kinetic', 'potential energy', 'work done'),
+    ('electricity', 'electric current', 'voltage', 'resistance', 'circuit'),
+    ('chemical reaction', 'reactant', 'catalyst', 'equilibrium'),
+    ('renewable energy', 'solar', 'wind power', 'sustainability', 'clean energy'),
+    ('smart city', 'urban technology', 'iot', 'sensors', 'smart infrastructure'),
+    ('war', 'conflict', 'battle', 'military'),
+    ('revolution', 'uprising', 'revolt', 'overthrow'),
+    ('government', 'democracy', 'parliament', 'constitution', 'election'),
+    ('algorithm', 'step by step', 'pseudocode'),
+    ('programming', 'source code', 'programming language', 'for loop', 'while loop')
+)
+
+_CONCEPT_PATTERNS = [
+    (index, re.compile(r'\b(?:' + '|'.join(re.escape(phrase) for phrase in group) + r')(?:s|es)?\b', re.IGNORECASE))
+    for index, group in enumerate(CONCEPT_GROUPS)
+]
+
+WORD_WEIGHT = 1.0
+NGRAM_WEIGHT = 0.4
+CONCEPT_WEIGHT = 2.0
+
+
+def _bucket(feature, dim):
+    """Stable hash bucket for a feature string"""
+    return zlib.crc32(feature.encode('utf-8')) % dim
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word, dim):
+    """Hash buckets and weights for a word stem and its character 3- and 4-grams"""
+    features = [(_bucket('w:' + word, dim), WORD_WEIGHT)]
+    padded = f'<{word}>'
+    for size in (3, 4):
+        for start in range(len(padded) - size + 1):
+            features.append((_bucket('c:' + padded[start:start + size], dim), NGRAM_WEIGHT))
+    return tuple(features)
+
+
+def vectorize(text, dim=DEFAULT_DIM):
+    """Sublinear term-frequency vector of hashed features (not normalised)"""
+    counts = {}
+    for word in tokenize(text):
+        for bucket, weight in _word_features(word, dim):
+            counts[bucket] = counts.get(bucket, 0.0) + weight
+    for index, pattern in _CONCEPT_PATTERNS:
+        matches = len(pattern.findall(text or ''))
+        if matches:
+            bucket = _bucket(f'k:{index}', dim)
+            counts[bucket] = counts.get(bucket, 0.0) + CONCEPT_WEIGHT * matches
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if counts:
+        buckets = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        vector[buckets] = np.log1p(values)
+    return vector
+
+
+def _normalize(matrix):
+    """L2-normalise rows (or a single vector) in place, leaving zero rows alone"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class SemanticIndex:
+    """Incrementally updated matrix of normalised document vectors
+
+    add() replaces any earlier version of a document; re-adding unchanged
+    text is a no-op, so re-syncing a library after a cold start is cheap.
+    """
+
+    def __init__(self, path=None, dim=DEFAULT_DIM, initial_capacity=64):
+        self.path = path
+        self.dim = dim
+        self._ids = []
+        self._slots = {}
+        self._hashes = {}
+        self._free = []
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._stamp = None
+        if not path:
+            self._create(initial_capacity)
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._file_lock():
+            if not self._load():
+                self._create(initial_capacity)
+                self._save_meta()
+
+    def __len__(self):
+        return len(self._slots)
+
+    @contextmanager
+    def _file_lock(self, exclusive=True):
+        """Hold the cross-process lock on a persistent index (a no-op in memory)"""
+        if not self.path or fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _create(self, capacity):
+        """Start an empty index, memory-mapped when it has a path; the caller holds the file lock"""
+        if self.path:
+            self._matrix = np.lib.format.open_memmap(self.path + '.npy', mode='w+', dtype=np.float32,
+                                                     shape=(capacity, self.dim))
+        else:
+            self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._ids = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def _load(self):
+        """Map a saved index; returns False when there is none or it does not fit"""
+        try:
+            stamp = self._meta_stamp()
+            with open(self.path + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('dim') != self.dim:
+                return False
+            matrix = np.load(self.path + '.npy', mmap_mode='r+')
+        except (OSError, ValueError):
+            return False
+
+        self._matrix = matrix
+        self._ids = meta['ids'] + [None] * (matrix.shape[0] - len(meta['ids']))
+        self._hashes = meta.get('hashes', {})
+        self._slots, self._free = {}, []
+        for slot, doc_id in enumerate(self._ids):
+            if doc_id is None:
+                self._free.append(slot)
+            else:
+                self._slots[doc_id] = slot
+        self._free.reverse()
+        self._df = np.asarray(meta.get('df') or np.zeros(self.dim), dtype=np.float32)
+        self._stamp = stamp
+        return True
+
+    def _meta_stamp(self):
+        """Identity of the saved slot table; it changes whenever any process saves"""
+        stat = os.stat(self.path + '.json')
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Pick up slots another process has saved (and its grown matrix); the caller holds both locks"""
+        if not self.path:
+            return
+        try:
+            stale = self._meta_stamp() != self._stamp
+        except OSError:
+            stale = False
+        if stale:
+            self._load()
+
+    def _save_meta(self):
+        """Write slot assignments and document frequencies beside the matrix; the caller holds both locks"""
+        if not self.path:
+            return
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        last = max(self._slots.values(), default=-1) + 1
+        temp_path = f'{self.path}.json.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'dim': self.dim,
+                'ids': self._ids[:last],
+                'hashes': self._hashes,
+                'df': self._df.astype(int).tolist()
+            }, f)
+        os.replace(temp_path, self.path + '.json')
+        self._stamp = self._meta_stamp()
+
+    def _grow(self):
+        """Double the matrix capacity; the caller holds both locks"""
+        old = self._matrix
+        capacity = old.shape[0] * 2
+        if self.path:
+            # Map a new file of twice the size, then swap it in
+            temp_path = f'{self.path}.{os.getpid()}.grow'
+            matrix = np.lib.format.open_memmap(temp_path + '.npy', mode='w+', dtype=np.float32,
+                                               shape=(capacity, self.dim))
+            matrix[:old.shape[0]] = old
+            matrix.flush()
+            del old, self._matrix
+            os.replace(temp_path + '.npy', self.path + '.npy')
+            matrix = np.load(self.path + '.npy', mmap_mode='r+')
+        else:
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:old.shape[0]] = old
+        self._free.extend(range(capacity - 1, len(self._ids) - 1, -1))
+        self._ids.extend([None] * (capacity - len(self._ids)))
+        self._matrix = matrix
+
+    def add(self, doc_id, text):
+        """Index (or re-index) a document's text"""
+        self.add_many([(doc_id, text)])
+
+    def add_many(self, documents):
+        """Index (or re-index) (doc_id, text) pairs, saving the slot table once"""
+        # Vectorise outside the locks; documents another process has just indexed are skipped below
+        rows = []
+        for doc_id, text in documents:
+            digest = hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+            if not (self._hashes.get(doc_id) == digest and doc_id in self._slots):
+                rows.append((doc_id, digest, _normalize(vectorize(text, self.dim))))
+        if not rows:
+            return
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            changed = [(doc_id, digest, row) for doc_id, digest, row in rows
+                       if not (self._hashes.get(doc_id) == digest and doc_id in self._slots)]
+            for doc_id, digest, row in changed:
+                self._remove(doc_id)
+                if not self._free:
+                    self._grow()
+                slot = self._free.pop()
+                self._matrix[slot] = row
+                self._ids[slot] = doc_id
+                self._slots[doc_id] = slot
+                self._hashes[doc_id] = digest
+                self._df += row > 0
+            if changed:
+                self._save_meta()
+
+    def remove(self, doc_id):
+        """Drop a document; returns False when it was not indexed"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            removed = self._remove(doc_id)
+            if removed:
+                self._save_meta()
+            return removed
+
+    def _remove(self, doc_id):
+        """Zero a document's row and free its slot; the caller holds both locks"""
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        self._df -= self._matrix[slot] > 0
+        self._matrix[slot] = 0
+        self._ids[slot] = None
+        self._hashes.pop(doc_id, None)
+        self._free.append(slot)
+        return True
+
+    def search(self, query, k=10, candidates=None, min_score=0.05):
+        """Return up to k (doc_id, cosine score) pairs, best first"""
+        return self.search_many([query], k, candidates, min_score)[0]
+
+    def search_many(self, queries, k=10, candidates=None, min_score=0.05):
+        """Score a batch of queries with one matrix product; returns one result list per query
+
+        candidates, when given, restricts results to those document IDs.
+        """
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            count = len(self._slots)
+            if not count or not queries:
+                return [[] for _ in queries]
+            used = max(self._slots.values()) + 1
+            idf = np.log((1 + count) / (1 + self._df)) + 1
+            query_matrix = _normalize(np.stack([vectorize(query, self.dim) for query in queries]) * idf)
+            scores = self._matrix[:used] @ query_matrix.T
+
+            # Free slots and filtered-out documents can never be returned
+            allowed = np.zeros(used, dtype=bool)
+            if candidates is None:
+                allowed[list(self._slots.values())] = True
+            else:
+                allowed[[self._slots[doc_id] for doc_id in candidates if doc_id in self._slots]] = True
+            scores[~allowed] = -np.inf
+
+            k = min(k, used)
+            results = []
+            for column in scores.T:
+                if k < used:
+                    top = np.argpartition(-column, k - 1)[:k]
+                else:
+                    top = np.arange(used)
+                top = top[np.argsort(-column[top], kind='stable')]
+                results.append([(self._ids[slot], float(column[slot])) for slot in top if column[slot] >= min_score])
+        return results
+
+    def stats(self):
+        """Return index size counters for status reporting"""
+        with self._lock:
+            return {
+                "documents": len(self._slots),
+                "capacity": int(self._matrix.shape[0]),
+                "dim": self.dim,
+                "persistent": bool(self.path)
+            }
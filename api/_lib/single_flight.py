@@ -0,0 +1,181 @@
+"""
+Single-flight coalescing of identical model calls, with idempotency keys
+
+Requests that would run the same model call (same fingerprint) while one
+is already in flight wait on that call's future instead of starting their
+own. A request carrying an Idempotency-Key header also joins the call made
+under that key, and once the call completes its result is replayed to
+later requests with the key until it expires, so client retries and
+double submits cost one model call. Failed calls are never replayed.
+A key is bound to the fingerprint it was first used with; reusing it for
+a different request raises IdempotencyConflict instead of returning the
+other request's result.
+
+Coalescing is per process: it covers concurrent and retried requests that
+reach the same warm instance.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Completed results are replayed to the same idempotency key for this long
+IDEMPOTENCY_TTL = 600
+
+# Waiters give up on a call that has not finished after this many seconds
+WAIT_TIMEOUT = 120
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Every SingleFlight in the process, for status reporting
+_flights = []
+
+
+class IdempotencyConflict(ValueError):
+    """An idempotency key was reused for a request with a different fingerprint"""
+
+
+def idempotency_key(headers, data=None):
+    """The request's Idempotency-Key header, or an idempotency_key body field, or None"""
+    key = None
+    if headers is not None:
+        # Plain header dicts may carry the name lower-cased
+        key = headers.get(IDEMPOTENCY_HEADER) or headers.get(IDEMPOTENCY_HEADER.lower())
+    if not key and isinstance(data, dict):
+        key = data.get('idempotency_key')
+    key = str(key).strip() if key else ''
+    return key[:200] or None
+
+
+def coalescing_stats():
+    """Stats of every SingleFlight created in this process"""
+    return {flight.name: flight.stats() for flight in _flights}
+
+
+class SingleFlight:
+    """One in-flight call per fingerprint; idempotency keys share and replay results"""
+
+    def __init__(self, name, ttl_seconds=IDEMPOTENCY_TTL, max_keys=1024, timeout=WAIT_TIMEOUT):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self.timeout = timeout
+        self._in_flight = {}
+        self._idempotent = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.replayed = 0
+        self.failures = 0
+        self.conflicts = 0
+        _flights.append(self)
+
+    def do(self, fingerprint, fn, *args, idempotency_key=None, replayable=None, **kwargs):
+        """Run fn(*args, **kwargs) once per in-flight fingerprint or idempotency key
+
+        Returns (result, how) where how is 'executed', 'coalesced' (waited on
+        an identical in-flight call) or 'replayed' (a completed result stored
+        under the idempotency key). replayable(result) decides whether a
+        result may be replayed later; by default every result is. Raises
+        IdempotencyConflict when the key is held by a different fingerprint.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            future, how = None, 'coalesced'
+            if idempotency_key:
+                entry = self._idempotent.get(idempotency_key)
+                if entry is not None:
+                    expires_at, key_fingerprint, future = entry
+                    if expires_at is not None and expires_at <= now:
+                        del self._idempotent[idempotency_key]
+                        future = None
+                    elif key_fingerprint != fingerprint:
+                        self.conflicts += 1
+                        raise IdempotencyConflict('Idempotency-Key was already used for a different request')
+                    elif future.done():
+                        how = 'replayed'
+            joined = False
+            if future is None:
+                future = self._in_flight.get(fingerprint)
+                if future is not None and idempotency_key:
+                    self._remember(idempotency_key, fingerprint, future, None)
+                    joined = True
+            if future is not None:
+                if how == 'replayed':
+                    self.replayed += 1
+                else:
+                    self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[fingerprint] = future
+                if idempotency_key:
+                    self._remember(idempotency_key, fingerprint, future, None)
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            try:
+                return future.result(timeout=self.timeout), how
+            finally:
+                if joined and future.done():
+                    with self._lock:
+                        self._settle(idempotency_key, future, replayable)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+                self._forget(fingerprint, future)
+                self._settle(idempotency_key, future, replayable, failed=True)
+            future.set_exception(e)
+            raise
+
+        future.set_result(result)
+        with self._lock:
+            self._forget(fingerprint, future)
+            self._settle(idempotency_key, future, replayable)
+        return result, 'executed'
+
+    def _remember(self, idempotency_key, fingerprint, future, expires_at):
+        """Store a fingerprint's future under an idempotency key; in-flight entries never expire"""
+        self._idempotent[idempotency_key] = (expires_at, fingerprint, future)
+        self._idempotent.move_to_end(idempotency_key)
+        while len(self._idempotent) > self.max_keys:
+            self._idempotent.popitem(last=False)
+
+    def _forget(self, fingerprint, future):
+        """Drop the in-flight entry of a finished call"""
+        if self._in_flight.get(fingerprint) is future:
+            del self._in_flight[fingerprint]
+
+    def _settle(self, idempotency_key, future, replayable, failed=False):
+        """Start the replay window for a finished call's key, or drop the key if it cannot be replayed"""
+        entry = self._idempotent.get(idempotency_key) if idempotency_key else None
+        if entry is None or entry[2] is not future or entry[0] is not None:
+            return
+        if failed or future.exception() is not None or (replayable is not None and not replayable(future.result())):
+            del self._idempotent[idempotency_key]
+        else:
+            self._idempotent[idempotency_key] = (time.monotonic() + self.ttl_seconds, entry[1], future)
+
+    def stats(self):
+        """Return call counts, the share of calls that did not reach the model, and open entries"""
+        with self._lock:
+            saved = self.coalesced + self.replayed
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "replayed": self.replayed,
+                "failures": self.failures,
+                "conflicts": self.conflicts,
+                "saved_ratio": round(saved / self.calls, 4) if self.calls else 0.0,
+                "in_flight": len(self._in_flight),
+                "idempotency_keys": len(self._idempotent)
+            }
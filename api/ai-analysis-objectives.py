@@ -3,34 +3,19 @@ Vercel serverless function to analyze learning objectives from material content
 """
 
 import os
-import json
-import google.generativeai as genai
-from http.server import BaseHTTPRequestHandler
+import sys
 
-# Configure Gemini
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+from _lib.material_analysis import analyze_material
+from _lib.runtime import JSONRequestHandler, mark_handler_ready
 
+class handler(JSONRequestHandler):
     def do_POST(self):
         """Handle POST requests for learning objectives analysis"""
         try:
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            
-            # Parse JSON data
-            try:
-                data = json.loads(post_data.decode('utf-8')) if post_data else {}
-            except:
-                data = {}
+            data = self.read_json()
             
             # Extract parameters
             content = data.get('content', '')
@@ -40,13 +25,7 @@ class handler(BaseHTTPRequestHandler):
             
             # Analyze learning objectives
             result = analyze_learning_objectives(content, filename)
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+            self.send_json(result)
             
         except Exception as e:
             print(f"Learning objectives analysis error: {e}")
@@ -60,98 +39,16 @@ class handler(BaseHTTPRequestHandler):
                 ],
                 "generated_by": "fallback-system"
             }
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(fallback_result).encode('utf-8'))
+            self.send_json(fallback_result)
 
 def analyze_learning_objectives(content, filename):
-    """Analyze learning objectives using Gemini AI"""
-    try:
-        # Check if API key is available
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            raise Exception("GEMINI_API_KEY not found")
-        
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        prompt = f"""Analyze this document and create specific learning objectives:
-
-FILENAME: {filename}
-CONTENT: {content[:2000]}...
+    """Analyze learning objectives from the combined material analysis"""
+    analysis = analyze_material(content, filename)
+    return {
+        "success": True,
+        "objectives": analysis["objectives"],
+        "generated_by": analysis["generated_by"]
+    }
 
-Return ONLY a JSON array of 3-4 specific, measurable learning objectives:
 
-["Objective 1", "Objective 2", "Objective 3", "Objective 4"]
-
-Requirements:
-- Create objectives based on the actual content
-- Make them specific and measurable
-- Use action verbs like "Understand", "Analyze", "Apply", "Evaluate"
-- Return only the JSON array, no additional text
-- Focus on what students should learn from this material"""
-
-        response = model.generate_content(prompt)
-        
-        # Parse the response
-        try:
-            objectives = json.loads(response.text.strip())
-            if isinstance(objectives, list) and len(objectives) > 0:
-                return {
-                    "success": True,
-                    "objectives": objectives,
-                    "generated_by": "gemini-2.0-flash-exp"
-                }
-            else:
-                raise Exception("Invalid objectives format")
-        except json.JSONDecodeError:
-            # Try to extract array from response
-            import re
-            array_match = re.search(r'\[.*?\]', response.text, re.DOTALL)
-            if array_match:
-                objectives = json.loads(array_match.group())
-                return {
-                    "success": True,
-                    "objectives": objectives,
-                    "generated_by": "gemini-2.0-flash-exp"
-                }
-            else:
-                raise Exception("Could not parse objectives")
-                
-    except Exception as e:
-        print(f"AI learning objectives analysis error: {e}")
-        # Return fallback objectives based on content analysis
-        content_lower = content.lower()
-        
-        if 'smart' in content_lower and 'city' in content_lower:
-            objectives = [
-                "Understand the key concepts of smart city development",
-                "Analyze the role of technology in urban planning",
-                "Evaluate the benefits and challenges of smart city implementation"
-            ]
-        elif 'energy' in content_lower:
-            objectives = [
-                "Understand different types of energy systems",
-                "Analyze the efficiency of renewable energy sources",
-                "Evaluate the environmental impact of energy choices"
-            ]
-        elif 'calculus' in content_lower or 'derivative' in content_lower:
-            objectives = [
-                "Understand the fundamental concepts of calculus",
-                "Apply derivative rules to solve mathematical problems",
-                "Analyze the relationship between derivatives and rates of change"
-            ]
-        else:
-            objectives = [
-                "Understand the main concepts presented in the material",
-                "Apply the knowledge to practical scenarios",
-                "Analyze the relationships between different concepts"
-            ]
-        
-        return {
-            "success": True,
-            "objectives": objectives,
-            "generated_by": "fallback-analysis"
-        }
+mark_handler_ready()
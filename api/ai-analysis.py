@@ -0,0 +1,39 @@
+"""
+Vercel serverless function to analyze topics, key concepts, learning objectives
+and study recommendations from material content in a single pass
+"""
+
+import os
+import sys
+
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _lib.material_analysis import analyze_material, fallback_analysis
+from _lib.runtime import JSONRequestHandler, mark_handler_ready
+
+class handler(JSONRequestHandler):
+    def do_POST(self):
+        """Handle POST requests for combined material analysis"""
+        content = ''
+        try:
+            data = self.read_json()
+            
+            # Extract parameters
+            content = data.get('content', '')
+            filename = data.get('filename', 'document')
+            
+            print(f"Analyzing material for: {filename}")
+            
+            # Analyze topics, concepts, objectives and recommendations together
+            result = analyze_material(content, filename)
+            self.send_json(result)
+            
+        except Exception as e:
+            print(f"Material analysis error: {e}")
+            # Return fallback analysis
+            fallback_result = fallback_analysis(content)
+            self.send_json(fallback_result)
+
+
+mark_handler_ready()
@@ -1,22 +1,42 @@
 """
 Consolidated AI services API
 Combines: adaptive-difficulty, ai-insights, content-recommendation, 
-performance-prediction, personalized-learning-path, weakness-detection
+performance-prediction, personalized-learning-path, weakness-detection, due-reviews
 """
 
 import os
-import json
-from http.server import BaseHTTPRequestHandler
+import sys
+import time
 from urllib.parse import urlparse, parse_qs
 
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _lib.adaptive_difficulty import DifficultyEngine, DEFAULT_PATH as ABILITY_STORE_DEFAULT_PATH
+from _lib.insights import InsightEngine
+from _lib.intents import IntentEngine, OFF_TOPIC
+from _lib.mastery import MasteryTracker, DEFAULT_PATH as MASTERY_SNAPSHOT_DEFAULT_PATH
+from _lib.path_planner import PathPlanner, describe_path, resolve_topic
+from _lib.performance_model import PerformancePredictor
+from _lib.recommender import ContentRecommender, DEFAULT_PATH as CONTENT_STORE_DEFAULT_PATH
+from _lib.review_scheduler import ReviewScheduler
+from _lib.runtime import JSONRequestHandler, mark_handler_ready
+
+def iso_time(timestamp):
+    """ISO 8601 UTC string for an epoch timestamp, or None"""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp)) if timestamp is not None else None
+
+def int_param(params, name, default, low, high):
+    """An integer query parameter clamped to [low, high]; raises ValueError when it is not a number"""
+    value = params.get(name, [str(default)])[0]
+    try:
+        return max(low, min(high, int(value)))
+    except ValueError:
+        raise ValueError(f'{name} must be an integer') from None
+
+class handler(JSONRequestHandler):
+    allowed_methods = 'GET, POST, OPTIONS'
+    allowed_headers = 'Content-Type, Authorization'
 
     def do_GET(self):
         """Handle GET requests for AI services"""
@@ -45,16 +65,15 @@ class handler(BaseHTTPRequestHandler):
                 response_data = self.get_weakness_detection(user_id, query_params)
             elif service == 'chatbot':
                 response_data = self.get_chatbot_response(user_id, query_params)
+            elif service == 'due-reviews':
+                response_data = self.get_due_reviews(user_id, query_params)
             else:
-                raise ValueError('Invalid service. Use: adaptive-difficulty, ai-insights, content-recommendation, performance-prediction, personalized-learning-path, weakness-detection, chatbot')
+                raise ValueError('Invalid service. Use: adaptive-difficulty, ai-insights, content-recommendation, performance-prediction, personalized-learning-path, weakness-detection, chatbot, due-reviews')
             
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode('utf-8'))
+            self.send_json(response_data)
             
+        except ValueError as e:
+            self.send_json({"success": False, "error": str(e)}, 400)
         except Exception as e:
             print(f"AI services error: {e}")
             error_result = {
@@ -62,191 +81,322 @@ class handler(BaseHTTPRequestHandler):
                 "error": str(e),
                 "message": "AI service failed"
             }
-            
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(error_result).encode('utf-8'))
+            self.send_json(error_result, 500)
+
+    def do_POST(self):
+        """Handle POST requests that record results for AI services"""
+        try:
+            data = self.read_json()
+            service = data.get('service', '')
+            user_id = data.get('user_id', '')
+
+            if not user_id:
+                raise ValueError('user_id is required')
+
+            if service == 'record-quiz':
+                response_data = self.record_quiz_result(user_id, data)
+            elif service == 'record-interaction':
+                response_data = self.record_content_interaction(user_id, data)
+            elif service == 'record-session':
+                response_data = self.record_study_session(user_id, data)
+            else:
+                raise ValueError('Invalid service. Use: record-quiz, record-interaction, record-session')
+
+            self.send_json(response_data)
+
+        except ValueError as e:
+            self.send_json({"success": False, "error": str(e)}, 400)
+        except Exception as e:
+            print(f"AI services error: {e}")
+            error_result = {
+                "success": False,
+                "error": str(e),
+                "message": "AI service failed"
+            }
+            self.send_json(error_result, 500)
 
     def get_adaptive_difficulty(self, user_id, params):
-        """Adaptive difficulty adjustment"""
+        """Adaptive difficulty adjustment from the user's ability estimate for the topic"""
         topic = params.get('topic', [''])[0]
         current_difficulty = params.get('difficulty', ['medium'])[0]
+        recommendation = difficulty_engine.recommend(user_id, topic, current_difficulty)
         
         return {
             "user_id": user_id,
             "topic": topic,
             "current_difficulty": current_difficulty,
-            "recommended_difficulty": "medium",
-            "confidence": 0.85,
-            "reasoning": "Based on your recent performance, medium difficulty is optimal",
-            "next_review": "2024-01-15T00:00:00Z"
+            "recommended_difficulty": recommendation["recommended_difficulty"],
+            "confidence": recommendation["confidence"],
+            "reasoning": recommendation["reasoning"],
+            "ability": recommendation["ability"],
+            "expected_accuracy": recommendation["expected_accuracy"],
+            "responses": recommendation["responses"],
+            "next_review": iso_time(review_scheduler.next_review(user_id, topic))
         }
 
+    def record_quiz_result(self, user_id, data):
+        """Update ability and question difficulty estimates from a finished quiz"""
+        topic = data.get('topic', '')
+        answers = data.get('answers') or []
+        if not topic:
+            raise ValueError('topic is required')
+        if not isinstance(answers, list) or not all(isinstance(answer, dict) for answer in answers):
+            raise ValueError('answers must be a list of {question, correct} objects')
+        if data.get('tz_offset') not in (None, ''):
+            insight_engine.set_timezone(user_id, data['tz_offset'])
+
+        recommendation = difficulty_engine.record_quiz(user_id, topic, data.get('difficulty', 'medium'), answers)
+        review_scheduler.sync(force=True)
+        insight_engine.sync(force=True)
+        mastery_tracker.sync(force=True)
+        score = sum(1 for answer in answers if answer.get('correct')) / len(answers) if answers else 0
+        content_recommender.record(
+            user_id, 'quiz:' + ' '.join(topic.lower().split()), 'quiz', 'complete',
+            {"score": score}, data.get('time_spent', 0),
+            metadata={"title": f"{topic} Practice Quiz", "subject": topic, "difficulty": data.get('difficulty', 'medium')}
+        )
+        return dict(recommendation, success=True, user_id=user_id, topic=topic,
+                    next_review=iso_time(review_scheduler.next_review(user_id, topic)))
+
     def get_ai_insights(self, user_id, params):
-        """AI insights and recommendations"""
+        """Learning-pattern insights from the user's streamed quiz and session aggregates"""
+        tz_offset = params.get('tz_offset', [''])[0]
+        # A new time zone refolds the user's events before they are read
+        insight_engine.sync(force=bool(tz_offset) and insight_engine.set_timezone(user_id, tz_offset))
+        summary = insight_engine.insights(user_id)
+        insights = summary["insights"]
+        if not insights:
+            insights = [{
+                "type": "getting_started",
+                "title": "Building Your Profile",
+                "description": f"{summary['quizzes_analyzed']} quizzes analysed so far; patterns appear after a few more",
+                "confidence": 0.0,
+                "actionable": True,
+                "recommendation": "Take quizzes at different times of day to find when you learn best"
+            }]
         return {
             "user_id": user_id,
-            "insights": [
-                {
-                    "type": "learning_pattern",
-                    "title": "Study Pattern Detected",
-                    "description": "You perform best in the morning hours (9-11 AM)",
-                    "confidence": 0.85,
-                    "actionable": True,
-                    "recommendation": "Schedule your most challenging topics during morning hours"
-                },
-                {
-                    "type": "performance_trend",
-                    "title": "Improvement Trend",
-                    "description": "Your math scores have improved by 15% over the last week",
-                    "confidence": 0.92,
-                    "actionable": True,
-                    "recommendation": "Continue with your current study approach for math"
-                }
-            ],
-            "overall_learning_score": 78,
-            "next_review_date": "2024-01-15T00:00:00Z"
+            "insights": insights,
+            "overall_learning_score": summary["overall_learning_score"],
+            "quizzes_analyzed": summary["quizzes_analyzed"],
+            "study_hours": summary["study_hours"],
+            "next_review_date": iso_time(review_scheduler.next_review(user_id))
+        }
+
+    def get_due_reviews(self, user_id, params):
+        """Topics due for spaced-repetition review now, most overdue first"""
+        limit = int_param(params, 'limit', 20, 1, 50)
+        due = review_scheduler.due(user_id, limit=limit)
+        for item in due:
+            item["due"] = iso_time(item["due"])
+        return {
+            "user_id": user_id,
+            "due": due,
+            "total": len(due),
+            "next_review": iso_time(review_scheduler.next_review(user_id))
         }
 
     def get_content_recommendations(self, user_id, params):
-        """Content recommendations"""
-        limit = int(params.get('limit', ['5'])[0])
-        
+        """Content recommendations from item-item collaborative filtering"""
+        limit = int_param(params, 'limit', 5, 1, 50)
+        content_type = params.get('content_type', [None])[0]
+
+        recommendations = []
+        for content_id, score, because_of in content_recommender.recommend(user_id, limit, content_type):
+            item = content_recommender.describe(content_id)
+            if because_of:
+                source = content_recommender.describe(because_of)
+                why = f"Learners who engaged with {source.get('title', because_of)} also chose this"
+            else:
+                why = "Popular with other learners"
+            recommendations.append({
+                "id": content_id,
+                "type": item.get('type'),
+                "title": item.get('title', content_id),
+                "description": item.get('description', ''),
+                "subject": item.get('subject', ''),
+                "difficulty": item.get('difficulty', 'medium'),
+                "estimated_time": item.get('estimated_time', ''),
+                "relevance_score": round(score, 3),
+                "why_recommended": why
+            })
+
         return {
             "user_id": user_id,
-            "recommendations": [
-                {
-                    "id": "rec-1",
-                    "type": "quiz",
-                    "title": "Advanced Calculus Practice",
-                    "description": "Challenging calculus problems to test your skills",
-                    "subject": "mathematics",
-                    "difficulty": "hard",
-                    "relevance_score": 0.9
-                },
-                {
-                    "id": "rec-2",
-                    "type": "material",
-                    "title": "Physics Fundamentals",
-                    "description": "Essential physics concepts and formulas",
-                    "subject": "science",
-                    "difficulty": "medium",
-                    "relevance_score": 0.8
-                }
-            ],
-            "total": limit
+            "recommendations": recommendations,
+            "total": len(recommendations)
         }
 
+    def record_content_interaction(self, user_id, data):
+        """Log a content interaction for the recommender"""
+        content_id = data.get('content_id', '')
+        if not content_id:
+            raise ValueError('content_id is required')
+
+        content_recommender.record(
+            user_id, content_id, data.get('content_type', 'content'), data.get('interaction_type', 'view'),
+            data.get('interaction_data') or {}, data.get('time_spent', 0), data.get('metadata')
+        )
+        return {"success": True, "user_id": user_id, "content_id": content_id}
+
+    def record_study_session(self, user_id, data):
+        """Log a study session (user_sessions shape: created_at to last_seen) for the insights"""
+        if data.get('tz_offset') not in (None, ''):
+            insight_engine.set_timezone(user_id, data['tz_offset'])
+        logged = insight_engine.record_session(
+            user_id, data.get('started_at') or data.get('created_at'), data.get('ended_at') or data.get('last_seen'),
+            data.get('session_id')
+        )
+        if logged:
+            insight_engine.sync(force=True)
+        return {"success": logged, "user_id": user_id}
+
     def get_performance_prediction(self, user_id, params):
-        """Performance prediction"""
+        """Performance prediction from the precomputed table, or scored on demand when it is behind"""
         prediction_type = params.get('type', ['overall'])[0]
-        
+        prediction = performance_predictor.predict(user_id)
+
+        if prediction is None:
+            return {
+                "user_id": user_id,
+                "prediction_type": prediction_type,
+                "predicted_score": None,
+                "confidence": 0.0,
+                "time_horizon": 30,
+                "factors": [],
+                "recommendations": [
+                    "Take a few quizzes so your progress can be predicted",
+                    "Practice regularly"
+                ],
+                "computed_at": None
+            }
+
+        factors = [factor for factor in prediction["factors"] if factor["impact"]][:3]
+        recommendations = [factor["advice"] for factor in factors if factor["impact"] < 0]
+        if not recommendations:
+            recommendations = ["Maintain current study pace", "Practice regularly"]
+
         return {
             "user_id": user_id,
             "prediction_type": prediction_type,
-            "predicted_score": 85,
-            "confidence": 0.88,
+            "predicted_score": prediction["predicted_score"],
+            "confidence": prediction["confidence"],
             "time_horizon": 30,
-            "factors": [
-                "Recent quiz performance",
-                "Study consistency",
-                "Topic mastery levels"
+            "factors": [factor["factor"] for factor in factors],
+            "factor_contributions": [
+                {"factor": factor["factor"], "impact": factor["impact"]} for factor in prediction["factors"]
             ],
-            "recommendations": [
-                "Focus on weak areas",
-                "Maintain current study pace",
-                "Practice regularly"
-            ]
+            "recommendations": recommendations,
+            "quizzes": prediction["quizzes"],
+            "computed_at": iso_time(prediction["computed_at"])
         }
 
     def get_personalized_learning_path(self, user_id, params):
-        """Personalized learning path"""
+        """Personalized learning path planned over the topic prerequisite graph"""
+        topics = [topic for topic in params.get('topics', [''])[0].split(',') if topic.strip()]
+        profile = {
+            "daily_time": int_param(params, 'daily_time', 30, 10, 480),
+            "weekly_sessions": int_param(params, 'weekly_sessions', 5, 1, 7)
+        }
+        mastery_tracker.sync()
+        mastery = mastery_tracker.topics(user_id)
+        plan = path_planner.plan(available_topics=topics, user_profile=profile, mastery=mastery)
+        title, description = describe_path(plan)
+
+        accuracy = {resolve_topic(record["topic"]): record["accuracy"] for record in mastery}
+        steps = []
+        for step in plan["steps"]:
+            minutes = step["estimated_time"]
+            steps.append({
+                "id": step["order"],
+                "title": step["topic_name"],
+                "description": (f"Build on {', '.join(step['prerequisites'])}" if step["prerequisites"]
+                                else f"Start with the foundations of {step['topic_name']}"),
+                "estimated_time": f"{minutes} min" if minutes < 60 else f"{minutes / 60:.1f} hours",
+                "estimated_minutes": minutes,
+                "difficulty": step["difficulty"],
+                "subject": step["subject"],
+                "prerequisites": step["prerequisites"],
+                "completed": accuracy.get(step["topic_name"], 0) >= 0.85
+            })
+
+        total = plan["estimated_duration"]
         return {
             "user_id": user_id,
             "learning_path": {
                 "id": f"path-{user_id}",
-                "title": "Personalized Learning Journey",
-                "description": "Customized learning path based on your preferences",
-                "steps": [
-                    {
-                        "id": 1,
-                        "title": "Foundation Review",
-                        "description": "Review basic concepts",
-                        "estimated_time": "2 hours",
-                        "difficulty": "easy"
-                    },
-                    {
-                        "id": 2,
-                        "title": "Practice Problems",
-                        "description": "Solve practice problems",
-                        "estimated_time": "3 hours",
-                        "difficulty": "medium"
-                    }
-                ],
-                "total_estimated_time": "5 hours",
-                "progress": 0
-            }
+                "title": title,
+                "description": description,
+                "steps": steps,
+                "total_estimated_time": f"{total / 60:.1f} hours",
+                "progress": round(100 * sum(step["completed"] for step in steps) / len(steps)) if steps else 0,
+                "difficulty_progression": plan["difficulty_progression"],
+                "recommended_schedule": plan["recommended_schedule"],
+                "sessions": plan["sessions"]
+            },
+            "generated_by": "path-planner"
         }
 
     def get_weakness_detection(self, user_id, params):
-        """Weakness detection and analysis"""
+        """Weakness detection ranked from the user's per-topic mastery aggregates"""
         analysis_type = params.get('type', ['comprehensive'])[0]
-        
+        limit = int_param(params, 'limit', 5, 1, 50)
+        mastery_tracker.sync()
+        topics = mastery_tracker.topics(user_id)
+        weakest = sorted(topics, key=lambda topic: -topic["weakness"])[:limit]
+
+        weakness_areas = []
+        for topic in weakest:
+            severity = 'high' if topic["weakness"] >= 0.5 else 'medium' if topic["weakness"] >= 0.3 else 'low'
+            recommendations = [f"Practice more {topic['topic']} questions"]
+            if topic["recent_accuracy"] < topic["accuracy"] - 0.1:
+                recommendations.append(f"Your recent {topic['topic']} answers are slipping; review your notes first")
+            if topic["days_since_practice"] >= 14:
+                recommendations.append(f"Take a short {topic['topic']} refresher quiz")
+            weakness_areas.append({
+                "subject": topic["topic"],
+                "weakness": topic["topic"],
+                "severity": severity,
+                "accuracy": topic["accuracy"],
+                "recent_accuracy": topic["recent_accuracy"],
+                "attempts": topic["attempts"],
+                "days_since_practice": topic["days_since_practice"],
+                "recommendations": recommendations
+            })
+
+        attempts = sum(topic["attempts"] for topic in topics)
+        overall = sum(topic["weakness"] * topic["attempts"] for topic in topics) / attempts if attempts else 0
+        focus = [area["subject"] for area in weakness_areas if area["severity"] != 'low']
+        if not topics:
+            suggestions = ["Take a few quizzes so your weak areas can be detected"]
+        else:
+            suggestions = [f"Focus on {', '.join(focus[:3])}"] if focus else []
+            suggestions += ["Review the explanations for questions you missed", "Practice a little every few days"]
+
         return {
             "user_id": user_id,
             "analysis_type": analysis_type,
-            "weakness_areas": [
-                {
-                    "subject": "Mathematics",
-                    "weakness": "Algebraic equations",
-                    "severity": "medium",
-                    "recommendations": ["Practice solving linear equations", "Review quadratic formulas"]
-                },
-                {
-                    "subject": "Science",
-                    "weakness": "Chemical bonding",
-                    "severity": "high",
-                    "recommendations": ["Study ionic and covalent bonds", "Practice Lewis structures"]
-                }
-            ],
-            "overall_weakness_score": 65,
-            "improvement_suggestions": [
-                "Focus on algebraic problem-solving",
-                "Review chemical bonding concepts",
-                "Practice with interactive simulations"
-            ],
-            "confidence": 0.85
+            "weakness_areas": weakness_areas,
+            "overall_weakness_score": round(overall * 100),
+            "improvement_suggestions": suggestions,
+            "confidence": round(min(0.95, 1 - 1 / (1 + 0.05 * attempts) ** 0.5), 2)
         }
 
     def get_chatbot_response(self, user_id, query_params):
-        """Generate intelligent chatbot responses for non-educational queries"""
+        """Route a chatbot message by its ranked intents, without a model call"""
         user_message = query_params.get('message', [''])[0]
+        intents = intent_engine.classify(user_message)
+        intent = intents[0]["intent"]
         
-        # Educational scope keywords
-        educational_keywords = [
-            'study', 'learn', 'prepare', 'quiz', 'test', 'exam', 'performance', 'score', 'progress',
-            'path', 'plan', 'schedule', 'help', 'math', 'mathematics', 'calculus', 'science', 'physics',
-            'chemistry', 'motivation', 'encourage', 'difficult', 'homework', 'assignment', 'grade',
-            'subject', 'topic', 'concept', 'understand', 'explain', 'practice', 'review', 'notes'
-        ]
-        
-        # Check if the message is educational
-        is_educational = any(keyword in user_message.lower() for keyword in educational_keywords)
-        
-        if is_educational:
+        if intent != OFF_TOPIC:
+            reply = CHATBOT_REPLIES[intent]
             return {
                 "success": True,
-                "response": "I can help you with that! As your EduSense AI assistant, I specialize in educational support.",
+                "response": reply["response"],
                 "is_educational": True,
-                "suggestions": [
-                    "Study strategies and tips",
-                    "Quiz preparation",
-                    "Learning path guidance",
-                    "Performance analysis",
-                    "Subject-specific help"
-                ]
+                "intent": intent,
+                "intents": intents,
+                "suggestions": reply["suggestions"]
             }
         else:
             # For non-educational queries, provide helpful guidance
@@ -254,6 +404,8 @@ class handler(BaseHTTPRequestHandler):
                 "success": True,
                 "response": f"I understand you're asking about '{user_message}', but as your EduSense AI assistant, I'm specialized in helping with your studies. I can assist you with:",
                 "is_educational": False,
+                "intent": intent,
+                "intents": intents,
                 "educational_scope": [
                     "📚 Study Strategies: Tips for effective learning",
                     "🎯 Quiz Preparation: Help you prepare for tests", 
@@ -263,3 +415,70 @@ class handler(BaseHTTPRequestHandler):
                 ],
                 "redirect_message": "Is there anything about your studies I can help you with instead?"
             }
+
+# Ability and question difficulty estimates (SQLite, shared by worker processes)
+difficulty_engine = DifficultyEngine(os.environ.get('ABILITY_STORE_PATH') or ABILITY_STORE_DEFAULT_PATH)
+
+# Score predictions are recomputed in bulk and looked up per request; users the
+# table misses or who have quizzed since are scored on demand with the stored weights
+performance_predictor = PerformancePredictor(
+    os.environ.get('ABILITY_STORE_PATH') or ABILITY_STORE_DEFAULT_PATH,
+    max_age=int(os.environ.get('PERFORMANCE_PREDICTION_MAX_AGE', 21600))
+)
+
+# Spaced-repetition review queues, fed from the quiz history in the ability store
+review_scheduler = ReviewScheduler(os.environ.get('ABILITY_STORE_PATH') or ABILITY_STORE_DEFAULT_PATH)
+
+# Time-of-day, weekday and trend aggregates streamed from the quiz and study-session logs,
+# in each user's own time zone once a request has sent one (INSIGHTS_UTC_OFFSET until then)
+insight_engine = InsightEngine(os.environ.get('ABILITY_STORE_PATH') or ABILITY_STORE_DEFAULT_PATH,
+                               float(os.environ.get('INSIGHTS_UTC_OFFSET', '0')))
+
+# Per-topic mastery counters folded from the quiz history, with a local snapshot for warm starts
+mastery_tracker = MasteryTracker(os.environ.get('MASTERY_SNAPSHOT_PATH') or MASTERY_SNAPSHOT_DEFAULT_PATH,
+                                 os.environ.get('ABILITY_STORE_PATH') or ABILITY_STORE_DEFAULT_PATH)
+
+# Content interactions and item-item neighbour lists for recommendations
+content_recommender = ContentRecommender(os.environ.get('CONTENT_STORE_PATH') or CONTENT_STORE_DEFAULT_PATH)
+
+# Learning paths are planned locally over the topic prerequisite graph
+path_planner = PathPlanner()
+
+# Chatbot messages are classified by a keyword automaton compiled once per process
+intent_engine = IntentEngine()
+
+CHATBOT_REPLIES = {
+    'study_help': {
+        "response": "I can help you with that! Let's work through it together with a study approach that fits the topic.",
+        "suggestions": [
+            "Break the topic into smaller concepts",
+            "Simplify a difficult passage from your materials",
+            "Explain a concept in your own words, then check it",
+            "Make flashcards for key terms and definitions",
+            "Subject-specific help"
+        ]
+    },
+    'quiz_prep': {
+        "response": "Let's get you ready! A few focused practice rounds work better than one long cram session.",
+        "suggestions": [
+            "Generate a practice quiz on the topic",
+            "Review the questions you missed last time",
+            "Start with medium difficulty and adjust",
+            "Space your revision over several days",
+            "Quiz preparation"
+        ]
+    },
+    'progress': {
+        "response": "Here's how I can help you track and plan your learning.",
+        "suggestions": [
+            "Performance analysis by topic",
+            "Find your weakest topics",
+            "Predict your next quiz score",
+            "Build a personalized learning path",
+            "Set a weekly study goal"
+        ]
+    }
+}
+
+
+mark_handler_ready()
@@ -3,115 +3,60 @@ Vercel serverless function to generate AI-powered quizzes using Gemini 2.0 Flash
 """
 
 import os
+import sys
 import json
-import google.generativeai as genai
-from http.server import BaseHTTPRequestHandler
+import math
+import time
+import queue
 from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
 
-# Configure Gemini
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+from _lib.quiz_cache import QuizCache, make_quiz_key
+from _lib.json_extract import IncrementalJSONParser, extract_json
+from _lib.chunking import split_material, map_chunks, merge_unique, normalize_text
+from _lib.question_pool import QuestionPool
+from _lib.material_analysis import canonical_material_key
+from _lib.cloze import generate_cloze_questions
+from _lib.question_bank import QuestionBank, DEFAULT_PATH as QUESTION_BANK_DEFAULT_PATH
+from _lib.single_flight import IDEMPOTENCY_HEADER, IdempotencyConflict, SingleFlight, coalescing_stats, idempotency_key
+from _lib.runtime import (
+    MODEL_NAME, JSONRequestHandler, PromptTemplate, get_model, has_api_key, mark_handler_ready, runtime_stats
+)
 
-    def do_POST(self):
-        """Handle POST requests for quiz generation"""
-        try:
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            
-            # Parse JSON data
-            try:
-                data = json.loads(post_data.decode('utf-8')) if post_data else {}
-            except:
-                data = {}
-            
-            # Extract parameters with defaults
-            topic = data.get('topic', 'Mathematics')
-            difficulty = data.get('difficulty', 'medium')
-            num_questions = int(data.get('num_questions', 5))
-            material_content = data.get('material_content', '')
-            ai_analysis = data.get('ai_analysis', {})
-            
-            print(f"Generating quiz: topic={topic}, difficulty={difficulty}, num_questions={num_questions}")
-            print(f"Material content length: {len(material_content) if material_content else 0}")
-            
-            # Generate quiz (with material content if available)
-            result = generate_quiz(topic, difficulty, num_questions, material_content, ai_analysis)
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode('utf-8'))
-            
-        except Exception as e:
-            print(f"Quiz generation error: {e}")
-            # Return fallback quiz on any error
-            fallback_result = get_fallback_quiz(
-                data.get('topic', 'Mathematics'), 
-                data.get('difficulty', 'medium'), 
-                int(data.get('num_questions', 5))
-            )
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(fallback_result).encode('utf-8'))
+# Long materials are split into chunks that are quizzed in parallel
+MATERIAL_CHUNK_SIZE = int(os.environ.get('MATERIAL_CHUNK_SIZE', 2000))
+MATERIAL_MAX_CHUNKS = int(os.environ.get('MATERIAL_MAX_CHUNKS', 8))
+MODEL_MAX_WORKERS = int(os.environ.get('MODEL_MAX_WORKERS', 10))
 
-    def do_GET(self):
-        """Handle GET requests - return API status"""
-        try:
-            # Test if API is working
-            test_result = get_fallback_quiz('Mathematics', 'medium', 2)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({
-                'status': 'API is working',
-                'test_quiz': test_result,
-                'message': 'Use POST method for quiz generation'
-            }).encode('utf-8'))
-        except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': f'API error: {str(e)}'}).encode('utf-8'))
-
-def generate_quiz(topic, difficulty, num_questions, material_content='', ai_analysis=None):
-    """Generate a quiz using Gemini AI"""
-    try:
-        # Check if API key is available
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            raise Exception("GEMINI_API_KEY not found in environment variables")
-        
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        # Create prompt based on whether we have material content
-        if material_content and ai_analysis:
-            # Generate quiz based on actual material content
-            prompt = f"""Create a {difficulty} level quiz based on this study material:
+# Large quizzes are generated as parallel shards of a few questions each
+QUIZ_SHARD_SIZE = int(os.environ.get('QUIZ_SHARD_SIZE', 5))
+
+# Every QUIZ_SHARD_SIZE questions is one model call, so requests are capped
+MAX_QUIZ_QUESTIONS = int(os.environ.get('MAX_QUIZ_QUESTIONS', 50))
+QUIZ_SHARD_ASPECTS = [
+    "core definitions and terminology",
+    "key principles and rules",
+    "worked examples and calculations",
+    "common misconceptions",
+    "real-world applications",
+    "problem solving and reasoning",
+    "history and context",
+    "comparisons and relationships"
+]
+
+# Prompt templates are parsed once per process
+MATERIAL_QUIZ_PROMPT = PromptTemplate("""Create a {difficulty} level quiz based on this study material:
 
 TOPIC: {topic}
-MATERIAL CONTENT: {material_content[:2000]}...
+MATERIAL CONTENT: {material_content}...
 
 AI ANALYSIS:
-- Key Topics: {ai_analysis.get('key_topics', [])}
-- Learning Objectives: {ai_analysis.get('learning_objectives', [])}
-- Key Concepts: {ai_analysis.get('key_concepts', [])}
+- Key Topics: {key_topics}
+- Learning Objectives: {learning_objectives}
+- Key Concepts: {key_concepts}
 
 Create {num_questions} multiple choice questions that test understanding of the actual content.
 
@@ -132,11 +77,10 @@ Requirements:
 - correct_answer must be 0, 1, 2, or 3 (index of correct option)
 - Base questions on the actual material content provided
 - Test understanding of key concepts from the material
-- Make questions appropriate for {difficulty} difficulty
-- Return only valid JSON, no additional text"""
-        else:
-            # Standard quiz generation
-            prompt = f"""Create a {difficulty} level quiz about {topic} with {num_questions} multiple choice questions.
+- Make questions appropriate for {difficulty} difficulty{focus_requirement}
+- Return only valid JSON, no additional text""")
+
+TOPIC_QUIZ_PROMPT = PromptTemplate("""Create a {difficulty} level quiz about {topic} with {num_questions} multiple choice questions.
 
 Return ONLY a valid JSON object with this exact structure:
 {{
@@ -154,132 +98,492 @@ Requirements:
 - Each question must have exactly 4 options
 - correct_answer must be 0, 1, 2, or 3 (index of correct option)
 - Make questions appropriate for {difficulty} difficulty
-- Focus on {topic} subject matter
-- Return only valid JSON, no additional text"""
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=2000
+- Focus on {topic} subject matter{focus_requirement}
+- Return only valid JSON, no additional text""")
+
+# Identical quiz requests within the TTL are served from memory
+quiz_cache = QuizCache(
+    max_entries=int(os.environ.get('QUIZ_CACHE_SIZE', 256)),
+    ttl_seconds=int(os.environ.get('QUIZ_CACHE_TTL', 600))
+)
+
+# Identical in-flight quiz requests, and retries with the same Idempotency-Key, share one generation
+quiz_flight = SingleFlight('generate_quiz', ttl_seconds=int(os.environ.get('IDEMPOTENCY_TTL', 600)))
+
+# Offline questions for when the model is unavailable, loaded on first use
+question_bank = QuestionBank(os.environ.get('QUESTION_BANK_PATH') or QUESTION_BANK_DEFAULT_PATH)
+
+class handler(JSONRequestHandler):
+    allowed_headers = f'Content-Type, Cache-Control, {IDEMPOTENCY_HEADER}'
+
+    def do_POST(self):
+        """Handle POST requests for quiz generation"""
+        data = {}
+        num_questions = 5
+        try:
+            data = self.read_json()
+            
+            # Bound the question count before it reaches the cache key or the shard plan
+            try:
+                num_questions = parse_num_questions(data.get('num_questions'))
+            except ValueError as e:
+                self.send_json({'success': False, 'error': str(e)}, 400)
+                return
+            
+            # Extract parameters with defaults
+            topic = data.get('topic', 'Mathematics')
+            difficulty = data.get('difficulty', 'medium')
+            material_content = data.get('material_content', '')
+            ai_analysis = data.get('ai_analysis', {})
+            use_cache = not (
+                data.get('skip_cache') or
+                'no-cache' in self.headers.get('Cache-Control', '')
             )
-        )
-        
-        # Clean the response text
-        response_text = response.text.strip()
+            
+            print(f"Generating quiz: topic={topic}, difficulty={difficulty}, num_questions={num_questions}")
+            print(f"Material content length: {len(material_content) if material_content else 0}")
+            
+            # Stream questions as they are generated when the client asks for it
+            stream_format = get_stream_format(data, self.headers)
+            if stream_format:
+                self.send_quiz_stream(stream_format, topic, difficulty, num_questions, material_content, ai_analysis, use_cache)
+                return
+            
+            # Cloze questions straight from the material, no model call
+            if data.get('engine') == 'local' and material_content:
+                self.send_json(generate_local_quiz(topic, difficulty, num_questions, material_content))
+                return
+            
+            # Generate quiz (with material content if available), joining an identical request in flight
+            result, how = quiz_flight.do(
+                (quiz_cache_key(topic, difficulty, num_questions, material_content, ai_analysis), use_cache),
+                generate_quiz, topic, difficulty, num_questions, material_content, ai_analysis, use_cache,
+                idempotency_key=idempotency_key(self.headers, data),
+                replayable=lambda result: result.get('generated_by') == MODEL_NAME
+            )
+            self.send_json(result if how == 'executed' else dict(result, coalesced=how))
+            
+        except IdempotencyConflict as e:
+            self.send_json({'success': False, 'error': str(e)}, 422)
+        except Exception as e:
+            print(f"Quiz generation error: {e}")
+            # Return fallback quiz on any error
+            fallback_result = get_fallback_quiz(
+                data.get('topic', 'Mathematics'), 
+                data.get('difficulty', 'medium'), 
+                num_questions
+            )
+            self.send_json(fallback_result)
+
+    def send_quiz_stream(self, stream_format, topic, difficulty, num_questions, material_content, ai_analysis, use_cache):
+        """Write each question to the client as soon as it is generated"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        # Remove markdown code blocks if present
-        if response_text.startswith('```json'):
-            response_text = response_text[7:-3]
-        elif response_text.startswith('```'):
-            response_text = response_text[3:-3]
+        try:
+            events = stream_quiz_events(topic, difficulty, num_questions, material_content, ai_analysis, use_cache)
+            for event, payload in events:
+                if stream_format == 'sse':
+                    message = f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    message = json.dumps(dict(payload, type=event)) + "\n"
+                self.wfile.write(message.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            print("Quiz stream closed by client")
+
+    def do_GET(self):
+        """Handle GET requests - return API status"""
+        try:
+            # Test if API is working
+            test_result = get_fallback_quiz('Mathematics', 'medium', 2)
+            
+            self.send_json({
+                'status': 'API is working',
+                'test_quiz': test_result,
+                'cache': quiz_cache.stats(),
+                'question_pool': question_pool.stats(),
+                'question_bank': question_bank.stats(),
+                'coalescing': coalescing_stats(),
+                'runtime': runtime_stats(),
+                'message': 'Use POST method for quiz generation'
+            })
+        except Exception as e:
+            self.send_json({'error': f'API error: {str(e)}'}, 500)
+
+def iso_time(timestamp):
+    """ISO 8601 UTC string for an epoch timestamp"""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+def parse_num_questions(value, default=5):
+    """Requested question count clamped to 1..MAX_QUIZ_QUESTIONS; ValueError if it is not an integer"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError('num_questions must be an integer')
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('num_questions must be an integer')
+    return max(1, min(MAX_QUIZ_QUESTIONS, count))
+
+def generate_quiz(topic, difficulty, num_questions, material_content='', ai_analysis=None, use_cache=True):
+    """Generate a quiz using Gemini AI, serving from the question pool or cache when possible"""
+    if not use_cache:
+        return dict(_generate_quiz(topic, difficulty, num_questions, material_content, ai_analysis), cache='bypass')
+    
+    # Standard topic quizzes are drawn from pre-generated stock
+    if not (material_content and ai_analysis):
+        pooled = question_pool.draw(topic, difficulty, num_questions)
+        if pooled is not None:
+            questions, generated_at = pooled
+            return {
+                "success": True,
+                "questions": questions,
+                "generated_by": MODEL_NAME,
+                "generated_at": iso_time(generated_at),
+                "cache": "pool"
+            }
+    
+    cache_key = quiz_cache_key(topic, difficulty, num_questions, material_content, ai_analysis)
+    cached = quiz_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached, cache='hit')
+    
+    result = _generate_quiz(topic, difficulty, num_questions, material_content, ai_analysis)
+    
+    # Only cache real AI output so a transient failure is not replayed
+    if result.get('generated_by') == MODEL_NAME:
+        quiz_cache.set(cache_key, result)
+    
+    return dict(result, cache='miss')
+
+def quiz_cache_key(topic, difficulty, num_questions, material_content='', ai_analysis=None):
+    """Quiz cache key under which near-identical materials share quizzes"""
+    material_key = canonical_material_key(material_content) if material_content else ''
+    return make_quiz_key(topic, difficulty, num_questions, material_key, ai_analysis)
+
+def get_stream_format(data, headers):
+    """Return 'sse' or 'ndjson' when the client asked for a streamed quiz"""
+    stream = data.get('stream')
+    if stream in ('sse', 'ndjson'):
+        return stream
+    if stream is True:
+        return 'ndjson'
+    
+    accept = headers.get('Accept', '')
+    if 'text/event-stream' in accept:
+        return 'sse'
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    return None
+
+def stream_quiz_events(topic, difficulty, num_questions, material_content='', ai_analysis=None, use_cache=True):
+    """Yield (event, payload) pairs for a streamed quiz, ending with a 'done' event"""
+    cache_key = quiz_cache_key(topic, difficulty, num_questions, material_content, ai_analysis) if use_cache else None
+    if use_cache:
+        # Standard topic quizzes are drawn from pre-generated stock
+        if not (material_content and ai_analysis):
+            pooled = question_pool.draw(topic, difficulty, num_questions)
+            if pooled is not None:
+                questions, generated_at = pooled
+                for index, question in enumerate(questions):
+                    yield 'question', {"index": index, "question": question}
+                yield 'done', {
+                    "success": True,
+                    "count": len(questions),
+                    "generated_by": MODEL_NAME,
+                    "generated_at": iso_time(generated_at),
+                    "cache": "pool"
+                }
+                return
         
-        response_text = response_text.strip()
+        cached = quiz_cache.get(cache_key)
+        if cached is not None:
+            for index, question in enumerate(cached['questions']):
+                yield 'question', {"index": index, "question": question}
+            yield 'done', {
+                "success": True,
+                "count": len(cached['questions']),
+                "generated_by": cached['generated_by'],
+                "cache": "hit"
+            }
+            return
+    
+    questions = []
+    try:
+        for question in stream_quiz(topic, difficulty, num_questions, material_content, ai_analysis):
+            yield 'question', {"index": len(questions), "question": question}
+            questions.append(question)
+    except Exception as e:
+        print(f"Quiz streaming error: {e}")
+    
+    generated_by = MODEL_NAME if questions else "fallback-system"
+    if len(questions) < num_questions:
+        # Top up with local or fallback questions so the client always gets a full quiz
+        if material_content:
+            fallback = generate_local_quiz(topic, difficulty, num_questions - len(questions), material_content)
+        else:
+            fallback = get_fallback_quiz(topic, difficulty, num_questions - len(questions))
+        if not questions:
+            generated_by = fallback['generated_by']
+        for question in fallback['questions']:
+            yield 'question', {"index": len(questions), "question": question}
+            questions.append(question)
+    elif use_cache:
+        quiz_cache.set(cache_key, {
+            "success": True,
+            "questions": questions,
+            "generated_by": generated_by
+        })
+    
+    yield 'done', {
+        "success": True,
+        "count": len(questions),
+        "generated_by": generated_by,
+        "cache": "miss" if use_cache else "bypass"
+    }
+
+def _generate_quiz(topic, difficulty, num_questions, material_content='', ai_analysis=None):
+    """Generate a quiz using Gemini AI, split into parallel shards for long materials and large quizzes"""
+    try:
+        # Check if API key is available
+        if not has_api_key():
+            raise Exception("GEMINI_API_KEY not found in environment variables")
         
-        # Parse the JSON response
-        quiz_data = json.loads(response_text)
+        # Map: shards of a few questions, each on its own chunk or sub-topic, run in parallel
+        jobs = plan_quiz_shards(topic, difficulty, num_questions, material_content, ai_analysis)
+        results = map_chunks(_request_questions, jobs, MODEL_MAX_WORKERS)
         
-        # Validate the response structure
-        if not isinstance(quiz_data, dict) or 'questions' not in quiz_data:
-            raise Exception("Invalid response structure from AI")
+        # Reduce: merge the shards' questions, dropping duplicates
+        questions = merge_unique(results, num_questions, key=question_key)
+        missing = num_questions - len(questions)
+        if len(questions) > 0 and missing > 0:
+            # One more round for questions lost to failed shards or duplicates
+            retry_jobs = plan_quiz_shards(topic, difficulty, missing, material_content, ai_analysis, offset=len(jobs))
+            results.extend(map_chunks(_request_questions, retry_jobs, MODEL_MAX_WORKERS))
+            questions = merge_unique(results, num_questions, key=question_key)
         
-        if not isinstance(quiz_data['questions'], list) or len(quiz_data['questions']) == 0:
+        if len(questions) == 0:
             raise Exception("No questions generated by AI")
         
-        # Validate each question
-        for i, question in enumerate(quiz_data['questions']):
-            required_fields = ['question', 'options', 'correct_answer']
-            if not all(field in question for field in required_fields):
-                raise Exception(f"Missing required fields in question {i+1}")
-            
-            if not isinstance(question['options'], list) or len(question['options']) != 4:
-                raise Exception(f"Question {i+1} must have exactly 4 options")
-            
-            if not isinstance(question['correct_answer'], int) or question['correct_answer'] not in [0, 1, 2, 3]:
-                raise Exception(f"Question {i+1} has invalid correct_answer")
-        
         return {
             "success": True,
-            "questions": quiz_data['questions'],
-            "generated_by": "gemini-2.0-flash-exp"
+            "questions": questions,
+            "generated_by": MODEL_NAME
         }
         
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        return get_fallback_quiz(topic, difficulty, num_questions)
-        
     except Exception as e:
         print(f"Quiz generation error: {e}")
+        if material_content:
+            return generate_local_quiz(topic, difficulty, num_questions, material_content)
         return get_fallback_quiz(topic, difficulty, num_questions)
 
-def get_fallback_quiz(topic, difficulty, num_questions):
-    """Return a fallback quiz when AI generation fails"""
-    fallback_questions = []
-    
-    # Create simple fallback questions based on topic
-    topic_questions = {
-        'mathematics': [
-            {
-                "question": "What is the result of 2 + 2?",
-                "options": ["3", "4", "5", "6"],
-                "correct_answer": 1,
-                "explanation": "2 + 2 equals 4"
-            },
-            {
-                "question": "What is 10 ÷ 2?",
-                "options": ["4", "5", "6", "7"],
-                "correct_answer": 1,
-                "explanation": "10 divided by 2 equals 5"
-            },
-            {
-                "question": "What is 3 × 4?",
-                "options": ["10", "11", "12", "13"],
-                "correct_answer": 2,
-                "explanation": "3 multiplied by 4 equals 12"
-            }
-        ],
-        'science': [
-            {
-                "question": "What is the chemical symbol for water?",
-                "options": ["H2O", "CO2", "NaCl", "O2"],
-                "correct_answer": 0,
-                "explanation": "Water is H2O - two hydrogen atoms and one oxygen atom"
-            },
-            {
-                "question": "How many planets are in our solar system?",
-                "options": ["7", "8", "9", "10"],
-                "correct_answer": 1,
-                "explanation": "There are 8 planets in our solar system"
-            },
-            {
-                "question": "What gas do plants absorb during photosynthesis?",
-                "options": ["Oxygen", "Carbon Dioxide", "Nitrogen", "Hydrogen"],
-                "correct_answer": 1,
-                "explanation": "Plants absorb carbon dioxide during photosynthesis"
-            }
-        ],
-        'history': [
-            {
-                "question": "In which year did World War II end?",
-                "options": ["1944", "1945", "1946", "1947"],
-                "correct_answer": 1,
-                "explanation": "World War II ended in 1945"
-            },
-            {
-                "question": "Who was the first President of the United States?",
-                "options": ["Thomas Jefferson", "George Washington", "John Adams", "Benjamin Franklin"],
-                "correct_answer": 1,
-                "explanation": "George Washington was the first President of the United States"
-            }
-        ]
+def generate_local_quiz(topic, difficulty, num_questions, material_content):
+    """Build a cloze quiz from the material without a model call, topped up with fallback questions"""
+    questions = generate_cloze_questions(material_content, num_questions, difficulty)
+    if not questions:
+        return get_fallback_quiz(topic, difficulty, num_questions)
+    if len(questions) < num_questions:
+        questions.extend(get_fallback_quiz(topic, difficulty, num_questions - len(questions))['questions'])
+    return {
+        "success": True,
+        "questions": questions,
+        "generated_by": "local-cloze"
     }
+
+def _request_questions(job):
+    """Ask Gemini for one batch of questions and return the valid ones"""
+    topic, difficulty, num_questions, material_content, ai_analysis, focus = job
+    try:
+        model = get_model(temperature=0.7, max_output_tokens=2000)
+        prompt = build_quiz_prompt(topic, difficulty, num_questions, material_content, ai_analysis, focus)
+        response = model.generate_content(prompt)
+        
+        # Recover the quiz even from fenced, chatty or truncated output
+        quiz_data = extract_json(response.text)
+        if isinstance(quiz_data, list):
+            quiz_data = {'questions': quiz_data}
+        
+        # Validate the response structure
+        if not isinstance(quiz_data, dict) or not isinstance(quiz_data.get('questions'), list):
+            raise Exception("Invalid response structure from AI")
+        
+        # Keep every well-formed question instead of discarding the whole batch
+        questions = []
+        for i, question in enumerate(quiz_data['questions'][:num_questions]):
+            try:
+                validate_question(question, i)
+                questions.append(question)
+            except Exception as e:
+                print(f"Skipping generated question: {e}")
+        return questions
+        
+    except Exception as e:
+        print(f"Quiz batch generation error: {e}")
+        return []
+
+def stream_quiz(topic, difficulty, num_questions, material_content='', ai_analysis=None):
+    """Yield validated questions one at a time as the Gemini shards stream them"""
+    if not has_api_key():
+        raise Exception("GEMINI_API_KEY not found in environment variables")
+    
+    jobs = plan_quiz_shards(topic, difficulty, num_questions, material_content, ai_analysis)
+    if len(jobs) == 1:
+        yield from _stream_shard(jobs[0])
+        return
+    
+    # Shards stream concurrently; questions are forwarded in arrival order
+    arrivals = queue.Queue()
+    
+    def run_shard(job):
+        try:
+            for question in _stream_shard(job):
+                arrivals.put(question)
+        except Exception as e:
+            print(f"Quiz shard streaming error: {e}")
+        finally:
+            arrivals.put(None)
+    
+    executor = ThreadPoolExecutor(max_workers=min(MODEL_MAX_WORKERS, len(jobs)))
+    try:
+        for job in jobs:
+            executor.submit(run_shard, job)
+        
+        seen = set()
+        running = len(jobs)
+        while running:
+            question = arrivals.get()
+            if question is None:
+                running -= 1
+                continue
+            
+            key = question_key(question)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield question
+            if len(seen) >= num_questions:
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _stream_shard(job):
+    """Stream one shard from Gemini, yielding each question once it is complete and valid"""
+    topic, difficulty, num_questions, material_content, ai_analysis, focus = job
+    model = get_model(temperature=0.7, max_output_tokens=2000)
+    prompt = build_quiz_prompt(topic, difficulty, num_questions, material_content, ai_analysis, focus)
+    response = model.generate_content(prompt, stream=True)
+    
+    parser = IncrementalJSONParser(array_key='questions')
+    count = 0
+    for chunk in response:
+        for question in parser.feed(chunk.text):
+            try:
+                validate_question(question, count)
+            except Exception as e:
+                print(f"Skipping streamed question: {e}")
+                continue
+            
+            yield question
+            count += 1
+            if count >= num_questions:
+                return
+
+def plan_quiz_shards(topic, difficulty, num_questions, material_content='', ai_analysis=None, offset=0):
+    """Split a quiz request into shards of at most QUIZ_SHARD_SIZE questions
+
+    Each shard gets its own chunk of the material when there is one, and a
+    distinct sub-topic whenever several shards would otherwise share a prompt.
+    Returns (topic, difficulty, count, material, ai_analysis, focus) jobs.
+    """
+    shard_count = max(1, math.ceil(num_questions / QUIZ_SHARD_SIZE))
     
-    # Get questions for the topic or use generic ones
-    topic_lower = topic.lower()
-    if topic_lower in topic_questions:
-        available_questions = topic_questions[topic_lower]
+    if material_content and ai_analysis:
+        chunks = split_material(material_content, MATERIAL_CHUNK_SIZE, max(shard_count, min(MATERIAL_MAX_CHUNKS, num_questions)))
+        shard_count = max(shard_count, len(chunks))
+        focuses = [str(item) for key in ('key_topics', 'key_concepts') for item in ai_analysis.get(key, []) or []]
     else:
-        # Generic questions
+        chunks = [material_content]
+        focuses = [f"{aspect} of {topic}" for aspect in QUIZ_SHARD_ASPECTS]
+    
+    # Sub-topics only matter when shards would otherwise repeat a prompt
+    if shard_count <= len(chunks) or not focuses:
+        focuses = [None]
+    
+    share, extra = divmod(num_questions, shard_count)
+    jobs = []
+    for i in range(shard_count):
+        count = share + (1 if i < extra else 0)
+        if count == 0:
+            continue
+        jobs.append((
+            topic,
+            difficulty,
+            count,
+            chunks[i % len(chunks)],
+            ai_analysis,
+            focuses[(i + offset) % len(focuses)]
+        ))
+    return jobs
+
+def _refill_question_pool(topic, difficulty, count):
+    """Generate a batch of standard topic questions for the question pool"""
+    if not has_api_key():
+        return []
+    jobs = plan_quiz_shards(topic, difficulty, count)
+    return merge_unique(map_chunks(_request_questions, jobs, MODEL_MAX_WORKERS), key=question_key)
+
+def question_key(question):
+    """De-duplication key for a generated question"""
+    return normalize_text(question.get('question', ''))
+
+def build_quiz_prompt(topic, difficulty, num_questions, material_content='', ai_analysis=None, focus=None):
+    """Build the quiz prompt, grounding it in the material when available"""
+    focus_requirement = f"\n- Concentrate every question on this sub-topic: {focus}" if focus else ""
+    if material_content and ai_analysis:
+        # Generate quiz based on actual material content
+        return MATERIAL_QUIZ_PROMPT.render(
+            topic=topic,
+            difficulty=difficulty,
+            num_questions=num_questions,
+            material_content=material_content[:2000],
+            key_topics=ai_analysis.get('key_topics', []),
+            learning_objectives=ai_analysis.get('learning_objectives', []),
+            key_concepts=ai_analysis.get('key_concepts', []),
+            focus_requirement=focus_requirement
+        )
+    else:
+        # Standard quiz generation
+        return TOPIC_QUIZ_PROMPT.render(
+            topic=topic,
+            difficulty=difficulty,
+            num_questions=num_questions,
+            focus_requirement=focus_requirement
+        )
+
+def validate_question(question, index):
+    """Raise if a generated question does not have the expected shape"""
+    required_fields = ['question', 'options', 'correct_answer']
+    if not isinstance(question, dict) or not all(field in question for field in required_fields):
+        raise Exception(f"Missing required fields in question {index+1}")
+    
+    if not isinstance(question['options'], list) or len(question['options']) != 4:
+        raise Exception(f"Question {index+1} must have exactly 4 options")
+    
+    if not isinstance(question['correct_answer'], int) or question['correct_answer'] not in [0, 1, 2, 3]:
+        raise Exception(f"Question {index+1} has invalid correct_answer")
+
+def get_fallback_quiz(topic, difficulty, num_questions):
+    """Return a fallback quiz from the question bank when AI generation fails"""
+    fallback_questions = question_bank.sample(topic, difficulty, num_questions)
+
+    # Topics the bank does not cover get generic study-skill questions
+    if len(fallback_questions) < num_questions:
         available_questions = [
             {
                 "question": f"What is an important concept in {topic}?",
@@ -304,18 +608,27 @@ def get_fallback_quiz(topic, difficulty, num_questions):
                 "explanation": f"Regular study and practice are essential for improving {topic} skills"
             }
         ]
-    
-    # Select questions up to the requested number
-    for i in range(min(num_questions, len(available_questions))):
-        fallback_questions.append(available_questions[i])
-    
-    # If we need more questions, repeat the available ones
-    while len(fallback_questions) < num_questions and available_questions:
-        fallback_questions.append(available_questions[len(fallback_questions) % len(available_questions)])
-    
+        while len(fallback_questions) < num_questions:
+            fallback_questions.append(dict(available_questions[len(fallback_questions) % len(available_questions)]))
+
     return {
         "success": True,
         "questions": fallback_questions,
         "generated_by": "fallback-system",
         "note": "AI generation failed, using fallback questions"
-    }
\ No newline at end of file
+    }
+
+# Standard topic quizzes are served from stock; low pools refill in the background.
+# Stocking starts with the first request, and free-form topics are only pooled once popular.
+question_pool = QuestionPool(
+    _refill_question_pool,
+    topics=os.environ.get('QUESTION_POOL_TOPICS', '').split(','),
+    target_size=int(os.environ.get('QUESTION_POOL_SIZE', 40)),
+    low_watermark=int(os.environ.get('QUESTION_POOL_LOW_WATERMARK', 15)),
+    batch_size=int(os.environ.get('QUESTION_POOL_BATCH', 10)),
+    promote_after=int(os.environ.get('QUESTION_POOL_PROMOTE_AFTER', 25)),
+    max_topics=int(os.environ.get('QUESTION_POOL_MAX_TOPICS', 16))
+)
+
+
+mark_handler_ready()
@@ -1,77 +1,52 @@
 """
-Vercel serverless function to generate personalized learning paths using Gemini 2.0 Flash
+Vercel serverless function to generate personalized learning paths
+
+Paths are planned locally over a topic prerequisite graph; Gemini 2.0
+Flash only writes the short description when an API key is configured.
 """
 
 import os
+import sys
 import json
-import google.generativeai as genai
 
-# Configure Gemini
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _lib.path_planner import PathPlanner, path_document
+from _lib.runtime import MODEL_NAME, PromptTemplate, get_model, has_api_key, json_response, mark_handler_ready
+from _lib.single_flight import SingleFlight
+
+NARRATIVE_PROMPT = PromptTemplate("""Write a short, encouraging description (2-3 sentences, under 60 words) of this study plan for a student. Do not change the order or add topics.
+
+Topics in order: {topics}
+Extra focus on: {weak_topics}
+Schedule: {schedule}
 
-def generate_learning_path(user_profile, weaknesses, available_topics):
-    """Generate personalized learning path using Gemini AI"""
+Return only the description text.""")
+
+# Plans are cheap to compute, so one planner serves every request
+path_planner = PathPlanner()
+
+# Identical plans narrated at the same time share one model call
+narrative_flight = SingleFlight('learning_path_narrative')
+
+def generate_learning_path(user_profile, weaknesses, available_topics, narrate=True):
+    """Plan a learning path locally; the model only rewrites its description"""
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        prompt = f"""
-        Create a personalized learning path for this student:
+        plan = path_planner.plan(weaknesses, available_topics, user_profile)
+        path_data = path_document(plan)
+        generated_by = 'path-planner'
         
-        User Profile:
-        {json.dumps(user_profile, indent=2)}
-        
-        Identified Weaknesses:
-        {json.dumps(weaknesses, indent=2)}
-        
-        Available Topics:
-        {json.dumps(available_topics, indent=2)}
-        
-        Create a learning path that:
-        1. Addresses identified weaknesses
-        2. Matches learning style and preferences
-        3. Provides appropriate difficulty progression
-        4. Includes estimated time for each topic
-        5. Suggests specific activities and resources
-        6. Sets clear learning objectives
-        
-        Return as JSON:
-        {{
-            "title": "Learning Path Title",
-            "description": "Path description",
-            "estimated_duration": 120,
-            "difficulty_progression": "beginner to intermediate",
-            "topics_sequence": [
-                {{
-                    "topic_id": 1,
-                    "topic_name": "Topic Name",
-                    "order": 1,
-                    "estimated_time": 30,
-                    "focus_areas": ["area1", "area2"],
-                    "activities": ["activity1", "activity2"],
-                    "resources": ["resource1", "resource2"],
-                    "learning_objectives": ["objective1", "objective2"],
-                    "assessment_method": "quiz"
-                }}
-            ],
-            "overall_learning_objectives": ["objective1", "objective2"],
-            "success_metrics": ["metric1", "metric2"],
-            "recommended_schedule": {{
-                "daily_time": 30,
-                "weekly_sessions": 5,
-                "estimated_completion": "2 weeks"
-            }}
-        }}
-        """
-        
-        response = model.generate_content(prompt)
-        
-        # Parse the JSON response
-        path_data = json.loads(response.text)
+        if narrate and has_api_key() and plan["steps"]:
+            narrative = narrate_path(plan)
+            if narrative:
+                path_data["description"] = narrative
+                generated_by = f'path-planner+{MODEL_NAME}'
         
         return {
             "success": True,
             "learning_path": path_data,
-            "generated_by": "gemini-2.0-flash-exp"
+            "generated_by": generated_by
         }
         
     except Exception as e:
@@ -81,6 +56,26 @@ def generate_learning_path(user_profile, weaknesses, available_topics):
             "learning_path": None
         }
 
+def narrate_path(plan):
+    """Short model-written description of an already computed plan, or None"""
+    try:
+        model = get_model(temperature=0.5, max_output_tokens=160)
+        weak_topics = [step["topic_name"] for step in plan["steps"] if step["weakness"] >= 0.3]
+        schedule = plan["recommended_schedule"]
+        prompt = NARRATIVE_PROMPT.render(
+            topics=', '.join(step["topic_name"] for step in plan["steps"]),
+            weak_topics=', '.join(weak_topics) or 'none',
+            schedule=f"{schedule['daily_time']} minutes, {schedule['weekly_sessions']} days a week, "
+                     f"about {schedule['estimated_completion']}"
+        )
+        text, _ = narrative_flight.do(prompt, lambda: model.generate_content(prompt).text)
+        text = ' '.join((text or '').split()).strip('"')
+        return text[:500] or None
+        
+    except Exception as e:
+        print(f"Learning path narrative error: {e}")
+        return None
+
 def handler(request):
     """Main handler function for Vercel"""
     try:
@@ -97,14 +92,7 @@ def handler(request):
             }
         
         if request.method != 'POST':
-            return {
-                'statusCode': 405,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                },
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+            return json_response({'error': 'Method not allowed'}, 405)
         
         # Parse request body
         data = json.loads(request.body)
@@ -113,28 +101,18 @@ def handler(request):
         user_profile = data.get('user_profile', {})
         weaknesses = data.get('weaknesses', [])
         available_topics = data.get('available_topics', [])
+        narrate = data.get('narrate', True)
         
         # Generate learning path
-        result = generate_learning_path(user_profile, weaknesses, available_topics)
+        result = generate_learning_path(user_profile, weaknesses, available_topics, narrate)
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps(result)
-        }
+        return json_response(result)
         
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'success': False,
-                'error': str(e)
-            })
-        }
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+mark_handler_ready()
@@ -1,21 +1,23 @@
 """
 Consolidated Materials services API
-Combines: search-materials, generate-quiz-from-material
+Combines: search-materials, generate-quiz-from-material, index-materials
 """
 
 import os
-import json
-from http.server import BaseHTTPRequestHandler
+import sys
 from urllib.parse import urlparse, parse_qs
 
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _lib.runtime import JSONRequestHandler, mark_handler_ready
+from _lib.auth import AuthError, authenticated_user_id
+from _lib.material_library import get_library
+from _lib.cloze import generate_cloze_questions
+
+class handler(JSONRequestHandler):
+    allowed_methods = 'GET, POST, OPTIONS'
+    allowed_headers = 'Content-Type, Authorization'
 
     def do_GET(self):
         """Handle GET requests for materials services"""
@@ -25,7 +27,8 @@ class handler(BaseHTTPRequestHandler):
             query_params = parse_qs(parsed_url.query)
             
             service = query_params.get('service', ['search'])[0]
-            user_id = query_params.get('user_id', [''])[0]
+            # Libraries belong to the signed-in Supabase user, never to a client-supplied ID
+            user_id = authenticated_user_id(self.headers.get('Authorization'))
             
             if service == 'search':
                 response_data = self.search_materials(user_id, query_params)
@@ -34,13 +37,10 @@ class handler(BaseHTTPRequestHandler):
             else:
                 raise ValueError('Invalid service. Use: search, generate-quiz')
             
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode('utf-8'))
+            self.send_json(response_data)
             
+        except AuthError as e:
+            self.send_json({"success": False, "error": str(e), "message": "Authentication required"}, 401)
         except Exception as e:
             print(f"Materials services error: {e}")
             error_result = {
@@ -48,12 +48,57 @@ class handler(BaseHTTPRequestHandler):
                 "error": str(e),
                 "message": "Materials service failed"
             }
+            self.send_json(error_result, 500)
+
+    def do_POST(self):
+        """Handle POST requests that keep a user's search index in sync"""
+        try:
+            data = self.read_json()
+            service = data.get('service', 'index')
+            user_id = authenticated_user_id(self.headers.get('Authorization'))
+            
+            if service == 'index':
+                response_data = self.index_materials(user_id, data)
+            else:
+                raise ValueError('Invalid service. Use: index')
+            
+            self.send_json(response_data)
             
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(error_result).encode('utf-8'))
+        except AuthError as e:
+            self.send_json({"success": False, "error": str(e), "message": "Authentication required"}, 401)
+        except Exception as e:
+            print(f"Materials services error: {e}")
+            error_result = {
+                "success": False,
+                "error": str(e),
+                "message": "Materials service failed"
+            }
+            self.send_json(error_result, 500)
+
+    def index_materials(self, user_id, data):
+        """Add, update or delete materials in the user's search index"""
+        action = data.get('action', 'upsert')
+        library = get_library(user_id)
+        
+        if action == 'diff':
+            # Clients send {id, content_hash} pairs and upload only the materials reported stale
+            manifest = data.get('materials') or []
+            return {"success": True, "stale": library.stale(manifest), "total": len(library)}
+        
+        if action == 'upsert':
+            materials = data.get('materials') or ([data['material']] if data.get('material') else [])
+            if not materials:
+                raise ValueError('material or materials is required')
+            indexed = library.upsert_many(materials)
+            return {"success": True, "indexed": indexed, "total": len(library)}
+        
+        if action == 'delete':
+            material_id = data.get('material_id')
+            if not material_id:
+                raise ValueError('material_id is required')
+            return {"success": True, "deleted": library.remove(material_id), "total": len(library)}
+        
+        raise ValueError('Invalid action. Use: diff, upsert, delete')
 
     def search_materials(self, user_id, params):
         """Search and retrieve study materials"""
@@ -61,41 +106,38 @@ class handler(BaseHTTPRequestHandler):
         subject = params.get('subject', [''])[0]
         difficulty = params.get('difficulty', [''])[0]
         starred = params.get('starred', [''])[0]
+        limit = max(1, min(100, int(params.get('limit', ['20'])[0])))
+        mode = params.get('mode', ['keyword'])[0]
+        if mode not in ('keyword', 'semantic'):
+            raise ValueError('Invalid mode. Use: keyword, semantic')
         
-        # Return empty array - materials should come from database
-        filtered_materials = []
+        # Facet filters are bitmap intersections over the user's indexed materials
+        library = get_library(user_id)
+        material_ids, facet_counts = library.filter(
+            subject=subject,
+            difficulty=difficulty,
+            starred='true' if starred == 'true' else ''
+        )
         
+        # Rank the remaining materials by BM25 keyword relevance or vector similarity
         if search:
-            filtered_materials = [
-                m for m in filtered_materials 
-                if search.lower() in m['filename'].lower() or 
-                   search.lower() in m['content'].lower()
-            ]
-        
-        if subject:
-            filtered_materials = [
-                m for m in filtered_materials 
-                if m['ai_analysis'].get('subject_category', '').lower() == subject.lower()
-            ]
-        
-        if difficulty:
-            filtered_materials = [
-                m for m in filtered_materials 
-                if m['ai_analysis'].get('difficulty_level', '').lower() == difficulty.lower()
-            ]
-        
-        if starred == 'true':
-            filtered_materials = [
-                m for m in filtered_materials 
-                if m['starred'] == True
-            ]
+            candidates = set(material_ids) if len(material_ids) < len(library) else None
+            if mode == 'semantic':
+                filtered_materials = library.semantic_search(search, limit=limit, candidates=candidates)
+            else:
+                filtered_materials = library.search(search, limit=limit, candidates=candidates)
+        else:
+            filtered_materials = library.get_many(material_ids, limit=limit)
         
         return {
             "success": True,
             "materials": filtered_materials,
             "total": len(filtered_materials),
+            "matched": len(material_ids),
+            "facets": facet_counts,
             "filters": {
                 "search": search,
+                "mode": mode,
                 "subject": subject,
                 "difficulty": difficulty,
                 "starred": starred
@@ -111,26 +153,29 @@ class handler(BaseHTTPRequestHandler):
         if not material_id:
             raise ValueError('material_id is required')
         
-        # Generate quiz based on material content
-        questions = []
-        for i in range(num_questions):
-            questions.append({
-                "question": f"Question {i+1} based on the uploaded material",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "correct_answer": i % 4,
-                "explanation": f"This question tests understanding of key concepts from the material."
-            })
+        material = get_library(user_id).get(material_id)
+        if material is None:
+            raise ValueError('Material not found. Index it first with POST service=index')
+        
+        # Cloze questions built locally from the material, no model call
+        questions = generate_cloze_questions(material.get('content', ''), num_questions, difficulty)
+        if not questions:
+            raise ValueError('Material has too little text to build a quiz from')
         
         return {
             "success": True,
             "quiz": {
                 "id": f"quiz-{material_id}-{user_id}",
-                "title": f"Quiz from Material {material_id}",
-                "description": f"Generated quiz with {num_questions} questions",
+                "title": f"Quiz from {material.get('filename') or f'Material {material_id}'}",
+                "description": f"Generated quiz with {len(questions)} questions",
                 "questions": questions,
                 "difficulty": difficulty,
-                "num_questions": num_questions,
+                "num_questions": len(questions),
                 "material_id": material_id,
                 "created_at": "2024-01-01T00:00:00Z"
-            }
+            },
+            "generated_by": "local-cloze"
         }
+
+
+mark_handler_ready()
@@ -3,54 +3,68 @@ Vercel serverless function to simplify educational content using Gemini 2.0 Flas
 """
 
 import os
+import sys
 import json
-import google.generativeai as genai
 
-# Configure Gemini
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+# Shared helpers live in api/_lib (the underscore keeps Vercel from deploying them)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _lib.json_extract import extract_json
+from _lib.runtime import MODEL_NAME, PromptTemplate, get_model, json_response, mark_handler_ready
+from _lib.single_flight import IDEMPOTENCY_HEADER, IdempotencyConflict, SingleFlight, idempotency_key
+
+SIMPLIFY_PROMPT = PromptTemplate("""Simplify the following educational content for {target_grade_level} students.
+Simplification level: {simplification_level}
+
+Original content:
+{content}
+
+Please provide:
+1. Simplified version of the content
+2. Key concepts extracted
+3. Summary (2-3 sentences)
+4. Vocabulary list with definitions
+5. Complexity reduction percentage
+6. Learning objectives
+
+Return as JSON:
+{{
+    "simplified_text": "Simplified content here",
+    "key_concepts": ["concept1", "concept2"],
+    "summary": "Brief summary",
+    "vocabulary": {{"word": "definition"}},
+    "complexity_reduction": 0.3,
+    "learning_objectives": ["objective1", "objective2"],
+    "original_length": 500,
+    "simplified_length": 350
+}}
+""")
+
+# Identical simplifications in flight, and retries with the same Idempotency-Key, share one model call
+simplify_flight = SingleFlight('simplify_text', ttl_seconds=int(os.environ.get('IDEMPOTENCY_TTL', 600)))
 
 def simplify_text(content, target_grade_level, simplification_level):
     """Simplify educational content using Gemini AI"""
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        prompt = f"""
-        Simplify the following educational content for {target_grade_level} students.
-        Simplification level: {simplification_level}
+        model = get_model()
         
-        Original content:
-        {content}
-        
-        Please provide:
-        1. Simplified version of the content
-        2. Key concepts extracted
-        3. Summary (2-3 sentences)
-        4. Vocabulary list with definitions
-        5. Complexity reduction percentage
-        6. Learning objectives
-        
-        Return as JSON:
-        {{
-            "simplified_text": "Simplified content here",
-            "key_concepts": ["concept1", "concept2"],
-            "summary": "Brief summary",
-            "vocabulary": {{"word": "definition"}},
-            "complexity_reduction": 0.3,
-            "learning_objectives": ["objective1", "objective2"],
-            "original_length": 500,
-            "simplified_length": 350
-        }}
-        """
+        prompt = SIMPLIFY_PROMPT.render(
+            content=content,
+            target_grade_level=target_grade_level,
+            simplification_level=simplification_level
+        )
         
         response = model.generate_content(prompt)
         
-        # Parse the JSON response
-        simplified_data = json.loads(response.text)
+        # Parse the JSON response, tolerating code fences and surrounding prose
+        simplified_data = extract_json(response.text, expect='object')
+        if simplified_data is None:
+            raise Exception("Could not parse JSON from AI response")
         
         return {
             "success": True,
             "data": simplified_data,
-            "generated_by": "gemini-2.0-flash-exp"
+            "generated_by": MODEL_NAME
         }
         
     except Exception as e:
@@ -70,20 +84,13 @@ def handler(request):
                 'headers': {
                     'Access-Control-Allow-Origin': '*',
                     'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Headers': f'Content-Type, {IDEMPOTENCY_HEADER}',
                 },
                 'body': ''
             }
         
         if request.method != 'POST':
-            return {
-                'statusCode': 405,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                },
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+            return json_response({'error': 'Method not allowed'}, 405)
         
         # Parse request body
         data = json.loads(request.body)
@@ -94,36 +101,27 @@ def handler(request):
         simplification_level = data.get('simplification_level', 'medium')
         
         if not content:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                },
-                'body': json.dumps({'error': 'Content is required'})
-            }
+            return json_response({'error': 'Content is required'}, 400)
         
-        # Simplify content
-        result = simplify_text(content, target_grade_level, simplification_level)
+        # Simplify content, joining an identical request in flight
+        result, how = simplify_flight.do(
+            (content, str(target_grade_level), str(simplification_level)),
+            simplify_text, content, target_grade_level, simplification_level,
+            idempotency_key=idempotency_key(getattr(request, 'headers', None), data),
+            replayable=lambda result: result.get('success')
+        )
+        if how != 'executed':
+            result = dict(result, coalesced=how)
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps(result)
-        }
+        return json_response(result)
         
+    except IdempotencyConflict as e:
+        return json_response({'success': False, 'error': str(e)}, 422)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'success': False,
-                'error': str(e)
-            })
-        }
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+mark_handler_ready()
@@ -0,0 +1,104 @@
+"""
+Benchmark: adaptive difficulty estimates on a synthetic user base
+
+Simulates students with a true ability per topic answering questions with
+a true difficulty (Rasch model), then
+  * re-estimates everything from the answer arrays with fit_rasch,
+  * replays a sample of quizzes through DifficultyEngine.record_quiz
+    (online Elo updates against a SQLite store), and
+  * times recommend() lookups.
+Reports timings and how well the estimates track the true parameters.
+
+Run from the repository root:
+    python benchmarks/ability_bench.py [users] [answers_per_user]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.adaptive_difficulty import DIFFICULTIES, DIFFICULTY_PRIORS, DifficultyEngine, fit_rasch, sigmoid
+
+TOPICS = 8
+QUESTIONS_PER_TOPIC = 2500
+QUIZ_LENGTH = 10
+
+
+def simulate(users, answers_per_user, rng):
+    """Parallel (user-topic row, question, correct) arrays plus the true parameters"""
+    true_ability = rng.normal(0, 1, users * TOPICS)
+    labels = rng.integers(0, len(DIFFICULTIES), TOPICS * QUESTIONS_PER_TOPIC)
+    priors = np.array([DIFFICULTY_PRIORS[DIFFICULTIES[label]] for label in labels])
+    true_difficulty = priors + rng.normal(0, 0.6, len(priors))
+
+    count = users * answers_per_user
+    user = rng.integers(0, users, count)
+    topic = rng.integers(0, TOPICS, count)
+    rows = user * TOPICS + topic
+    items = topic * QUESTIONS_PER_TOPIC + rng.integers(0, QUESTIONS_PER_TOPIC, count)
+    correct = (rng.random(count) < sigmoid(true_ability[rows] - true_difficulty[items])).astype(np.float64)
+    return rows, items, correct, true_ability, true_difficulty, priors, labels
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    answers_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = np.random.default_rng(7)
+    rows, items, correct, true_ability, true_difficulty, priors, labels = simulate(users, answers_per_user, rng)
+    print(f"{users} users x {TOPICS} topics, {len(priors)} questions, {len(rows)} answers")
+
+    start = time.perf_counter()
+    ability, difficulty = fit_rasch(rows, items, correct, len(true_ability), len(priors), item_priors=priors)
+    seconds = time.perf_counter() - start
+    answered = np.bincount(rows, minlength=len(true_ability)) > 0
+    print(f"  batch fit             {seconds:8.2f} s ({len(rows) / seconds / 1e6:.1f}M answers/s)")
+    print(f"  ability correlation   {np.corrcoef(ability[answered], true_ability[answered])[0, 1]:8.3f}")
+    print(f"  difficulty corr.      {np.corrcoef(difficulty, true_difficulty)[0, 1]:8.3f}")
+
+    # Online updates through the store, one quiz at a time
+    path = os.path.join(tempfile.mkdtemp(), 'ability.sqlite3')
+    engine = DifficultyEngine(path)
+    quizzes = min(2000, len(rows) // QUIZ_LENGTH)
+    sample_users = rng.integers(0, 200, quizzes)
+    sample_topic = rng.integers(0, TOPICS, quizzes)
+    start = time.perf_counter()
+    for user, topic in zip(sample_users.tolist(), sample_topic.tolist()):
+        row = user * TOPICS + topic
+        questions = topic * QUESTIONS_PER_TOPIC + rng.integers(0, QUESTIONS_PER_TOPIC, QUIZ_LENGTH)
+        outcomes = rng.random(QUIZ_LENGTH) < sigmoid(true_ability[row] - true_difficulty[questions])
+        engine.record_quiz(f'user-{user}', f'topic-{topic}', 'medium', [
+            {"id": f'q{question}', "correct": bool(outcome)} for question, outcome in zip(questions.tolist(), outcomes)
+        ])
+    seconds = time.perf_counter() - start
+    print(f"  record_quiz           {seconds / quizzes * 1000:8.2f} ms/quiz ({quizzes} quizzes of {QUIZ_LENGTH})")
+
+    keys = sorted({(user, topic) for user, topic in zip(sample_users.tolist(), sample_topic.tolist())})
+    start = time.perf_counter()
+    lookups = [engine.recommend(f'user-{user}', f'topic-{topic}') for user, topic in keys * 5]
+    seconds = time.perf_counter() - start
+    online = np.array([lookup["ability"] for lookup in lookups[:len(keys)]])
+    truth = np.array([true_ability[user * TOPICS + topic] for user, topic in keys])
+    print(f"  recommend             {seconds / len(lookups) * 1e6:8.1f} us/lookup")
+    print(f"  online ability corr.  {np.corrcoef(online, truth)[0, 1]:8.3f} "
+          f"({quizzes * QUIZ_LENGTH / len(keys):.0f} answers per user-topic)")
+
+    start = time.perf_counter()
+    report = engine.refit()
+    seconds = time.perf_counter() - start
+    refitted = np.array([engine.recommend(f'user-{user}', f'topic-{topic}')["ability"] for user, topic in keys])
+    print(f"  refit from history    {seconds:8.2f} s ({report['answers']} answers)")
+    print(f"  refit ability corr.   {np.corrcoef(refitted, truth)[0, 1]:8.3f}")
+
+    levels = {}
+    for lookup in lookups[:len(keys)]:
+        levels[lookup["recommended_difficulty"]] = levels.get(lookup["recommended_difficulty"], 0) + 1
+    print(f"  recommendations       {levels}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: single-flight coalescing under bursty class-wide traffic
+
+Simulates classes in which every student asks for the same quiz within a
+second of the teacher posting it, with a share of students double
+clicking or retrying under the same Idempotency-Key. Model calls sleep for
+a fixed latency. Reports how many model calls reach the model with and
+without coalescing, the replay of retries after completion, and the
+per-call overhead of the coalescing layer itself.
+
+Run from the repository root:
+    python benchmarks/coalescing_bench.py [classes] [students] [model_latency_ms]
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.single_flight import SingleFlight
+
+TOPICS = ['Algebra', 'Biology', 'Chemistry', 'History', 'Physics']
+
+
+def requests(classes, students, seed=3):
+    """(delay, fingerprint, idempotency key) for every request, double clicks and retries included"""
+    rng = random.Random(seed)
+    plan = []
+    for class_ in range(classes):
+        quiz = (TOPICS[class_ % len(TOPICS)], 'medium', 10 + class_ % 3)
+        start = class_ * 0.05
+        for student in range(students):
+            key = f'class-{class_}-student-{student}'
+            at = start + rng.random()
+            plan.append((at, quiz, key))
+            if rng.random() < 0.3:
+                # Double click or client retry with the same key
+                plan.append((at + rng.uniform(0.01, 2.0), quiz, key))
+    return sorted(plan)
+
+
+def run(plan, latency, coalesce):
+    calls = []
+    lock = threading.Lock()
+    flight = SingleFlight('bench')
+
+    def model(quiz):
+        with lock:
+            calls.append(quiz)
+        time.sleep(latency)
+        return {"questions": list(quiz)}
+
+    def request(item):
+        at, quiz, key = item
+        time.sleep(max(0.0, at - (time.perf_counter() - started)))
+        if coalesce:
+            return flight.do(quiz, model, quiz, idempotency_key=key)[0]
+        return model(quiz)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=256) as pool:
+        results = list(pool.map(request, plan))
+    assert all(result["questions"] == list(item[1]) for result, item in zip(results, plan))
+    return len(calls), time.perf_counter() - started, flight.stats()
+
+
+def main():
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    students = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    latency = (int(sys.argv[3]) if len(sys.argv) > 3 else 1500) / 1000.0
+    plan = requests(classes, students)
+
+    direct_calls, direct_seconds, _ = run(plan, latency, coalesce=False)
+    flight_calls, flight_seconds, stats = run(plan, latency, coalesce=True)
+
+    flight = SingleFlight('overhead')
+    count = 200000
+    start = time.perf_counter()
+    for n in range(count):
+        flight.do(n % 64, int, n)
+    overhead = (time.perf_counter() - start) / count
+
+    print(f"{classes} classes x {students} students, {len(plan)} requests, model latency {latency * 1000:.0f} ms")
+    print(f"  model calls without coalescing {direct_calls:6d} ({direct_seconds:.1f} s)")
+    print(f"  model calls with coalescing    {flight_calls:6d} ({flight_seconds:.1f} s), "
+          f"{1 - flight_calls / direct_calls:.1%} fewer")
+    print(f"  coalesced {stats['coalesced']}, replayed {stats['replayed']}, "
+          f"saved ratio {stats['saved_ratio']:.3f}")
+    print(f"  coalescing overhead            {overhead * 1e6:6.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
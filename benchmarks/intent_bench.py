@@ -0,0 +1,133 @@
+"""
+Benchmark: chatbot intent classification on a synthetic message corpus
+
+Generates labelled student messages from templates (study help, quiz
+preparation, progress, off topic) with random filler, then classifies
+them with the compiled Aho-Corasick engine and with the substring scan
+it replaced (every lexicon phrase checked with `in`). Reports throughput,
+agreement between the two and accuracy against the template labels.
+
+Run from the repository root:
+    python benchmarks/intent_bench.py [messages]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.intents import INTENT_LEXICON, OFF_TOPIC, IntentEngine
+
+SUBJECTS = ['algebra', 'calculus', 'chemistry', 'biology', 'physics', 'history', 'geometry',
+            'statistics', 'grammar', 'economics', 'photosynthesis', 'derivatives', 'essays']
+
+TEMPLATES = {
+    'study_help': [
+        "I don't get {subject} at all, can you explain it?",
+        "How do I understand {subject} better?",
+        "I'm stuck on my {subject} homework",
+        "What are good note taking strategies for {subject}?",
+        "Can you explain the main concepts in {subject}",
+        "I keep procrastinating on my {subject} assignment",
+    ],
+    'quiz_prep': [
+        "I have a {subject} exam tomorrow, how should I prepare?",
+        "Give me a practice quiz on {subject}",
+        "What's the best way to revise for my {subject} midterm",
+        "Can you make multiple choice questions about {subject} for my test",
+        "I need past papers for my {subject} exams",
+    ],
+    'progress': [
+        "How am I doing in {subject}?",
+        "Show my progress and scores this week",
+        "What are my weak areas in {subject}",
+        "Can you build a study plan for {subject}",
+        "What should I focus on next to improve my grades",
+        "Track my performance in {subject} quizzes",
+    ],
+    OFF_TOPIC: [
+        "What's the weather like today?",
+        "Recommend a good movie for tonight",
+        "Tell me a joke about cats",
+        "Who won the football game yesterday",
+        "What's the price of bitcoin right now",
+        "Give me a recipe for pizza dough",
+        "Any good songs on tiktok lately",
+    ],
+}
+
+FILLER = ("so anyway basically honestly really just like um well okay thanks please "
+          "today tonight later again maybe actually right now quickly").split()
+
+
+def make_corpus(count, seed=5):
+    """(message, label) pairs with random filler words around a template"""
+    rng = random.Random(seed)
+    intents = list(TEMPLATES)
+    corpus = []
+    for _ in range(count):
+        label = rng.choice(intents)
+        message = rng.choice(TEMPLATES[label]).format(subject=rng.choice(SUBJECTS))
+        before = ' '.join(rng.choices(FILLER, k=rng.randint(0, 6)))
+        after = ' '.join(rng.choices(FILLER, k=rng.randint(0, 6)))
+        corpus.append((f"{before} {message} {after}".strip(), label))
+    return corpus
+
+
+def naive_classify(message, lexicon=INTENT_LEXICON):
+    """Top intent by scanning every phrase with a word-boundary regex"""
+    text = ' '.join(message.lower().split())
+    scores = {}
+    for intent, phrases in lexicon.items():
+        for phrase, weight in phrases.items():
+            pattern = r"(?<![\w'])" + re.escape(phrase.rstrip('*')) + ('' if phrase.endswith('*') else r"(?![\w'])")
+            hits = len(re.findall(pattern, text))
+            # Same damping as the engine: 1 + 1/2 + ... + 1/hits
+            scores[intent] = scores.get(intent, 0.0) + weight * sum(1.0 / n for n in range(1, hits + 1))
+    best = max(scores.items(), key=lambda item: item[1])
+    return best[0] if best[1] >= 0.5 or scores.get(OFF_TOPIC, 0) >= 0.5 else OFF_TOPIC
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = make_corpus(count)
+    phrases = sum(len(phrases) for phrases in INTENT_LEXICON.values())
+
+    start = time.perf_counter()
+    engine = IntentEngine()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    predicted = [engine.classify(message)[0]["intent"] for message, _ in corpus]
+    engine_seconds = time.perf_counter() - start
+
+    sample = corpus[:min(count, 2000)]
+    start = time.perf_counter()
+    naive = [naive_classify(message) for message, _ in sample]
+    naive_seconds = (time.perf_counter() - start) * count / len(sample)
+
+    accuracy = sum(guess == label for guess, (_, label) in zip(predicted, corpus)) / count
+    agreement = sum(a == b for a, b in zip(predicted, naive)) / len(sample)
+    characters = sum(len(message) for message, _ in corpus)
+
+    print(f"{count} messages, {characters / count:.0f} chars on average, {phrases} lexicon phrases")
+    print(f"  automaton compile     {compile_ms:8.2f} ms (once per process)")
+    print(f"  automaton             {engine_seconds / count * 1e6:8.1f} us/message  "
+          f"{count / engine_seconds:10.0f} messages/s")
+    print(f"  per-phrase scan       {naive_seconds / count * 1e6:8.1f} us/message  "
+          f"{count / naive_seconds:10.0f} messages/s (extrapolated from {len(sample)})")
+    print(f"  accuracy vs labels    {accuracy:8.1%}")
+    print(f"  agreement with scan   {agreement:8.1%}")
+
+    print("  per intent:")
+    for intent in TEMPLATES:
+        rows = [(guess, label) for guess, (_, label) in zip(predicted, corpus) if label == intent]
+        correct = sum(guess == label for guess, label in rows)
+        print(f"    {intent:<12} {correct / len(rows):6.1%} of {len(rows)}")
+
+
+if __name__ == '__main__':
+    main()
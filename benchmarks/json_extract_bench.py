@@ -0,0 +1,107 @@
+"""
+Micro-benchmark: shared JSON extractor vs. the per-handler parsing it replaced
+
+Run from the repository root:
+    python benchmarks/json_extract_bench.py
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.json_extract import extract_json
+
+
+def make_quiz(rng, num_questions):
+    """Build a quiz payload shaped like the model's output"""
+    return {"questions": [
+        {
+            "question": f"Which statement about item {i} [case {rng.randint(1, 99)}] is true?",
+            "options": [f"Option {letter} {{{i}}}" for letter in "ABCD"],
+            "correct_answer": rng.randint(0, 3),
+            "explanation": "Because the \"material\" says so."
+        }
+        for i in range(num_questions)
+    ]}
+
+
+def make_corpus(size=2000, seed=7):
+    """Model-like responses: clean, fenced, chatty, trailing commas, truncated"""
+    rng = random.Random(seed)
+    corpus = []
+    for n in range(size):
+        quiz = make_quiz(rng, rng.randint(3, 10))
+        text = json.dumps(quiz, indent=2)
+        kind = n % 5
+        if kind == 1:
+            text = f"```json\n{text}\n```"
+        elif kind == 2:
+            text = f"Here is your quiz:\n\n{text}\n\nGood luck!"
+        elif kind == 3:
+            text = text.replace('}\n  ]', '},\n  ]')
+        elif kind == 4:
+            text = text[:int(len(text) * rng.uniform(0.5, 0.95))]
+        corpus.append((kind, text))
+    return corpus
+
+
+def legacy_quiz_parse(text):
+    """generate_quiz before the shared extractor"""
+    response_text = text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text[7:-3]
+    elif response_text.startswith('```'):
+        response_text = response_text[3:-3]
+    return json.loads(response_text.strip())['questions']
+
+
+def legacy_array_parse(text):
+    """ai-analysis-* modules before the shared extractor"""
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        match = re.search(r'\[.*?\]', text, re.DOTALL)
+        return json.loads(match.group())
+
+
+def shared_parse(text):
+    """The shared incremental extractor"""
+    value = extract_json(text)
+    questions = value.get('questions') if isinstance(value, dict) else value
+    if not questions:
+        raise ValueError("nothing recovered")
+    return questions
+
+
+def run(name, parse, corpus):
+    """Time one parser over the corpus and count usable results"""
+    recovered = [0] * 5
+    questions = 0
+    start = time.perf_counter()
+    for kind, text in corpus:
+        try:
+            result = parse(text)
+            if isinstance(result, list) and result and isinstance(result[0], dict):
+                recovered[kind] += 1
+                questions += len(result)
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - start
+    per_kind = len(corpus) // 5
+    print(f"{name:<22} {elapsed / len(corpus) * 1e6:8.1f} us/doc   "
+          f"usable {sum(recovered):5d}/{len(corpus)}   questions {questions:6d}   "
+          f"clean/fenced/prose/comma/truncated = "
+          + '/'.join(f"{count * 100 // per_kind}%" for count in recovered))
+
+
+if __name__ == '__main__':
+    corpus = make_corpus()
+    print(f"{len(corpus)} responses, {sum(len(text) for _, text in corpus) // len(corpus)} chars on average\n")
+    run("legacy generate_quiz", legacy_quiz_parse, corpus)
+    run("legacy regex fallback", legacy_array_parse, corpus)
+    run("shared extract_json", shared_parse, corpus)
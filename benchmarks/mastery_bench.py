@@ -0,0 +1,89 @@
+"""
+Benchmark: streaming mastery aggregates at user-base scale
+
+Feeds synthetic quiz answers for many users across a few dozen topics
+into a MasteryTracker, then times per-answer updates, batched history
+folds, weakness queries, and snapshot/restore. Checks that the topics
+ranked weakest are the ones the simulated students are actually worst at.
+
+Run from the repository root:
+    python benchmarks/mastery_bench.py [users] [answers_per_user]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.mastery import RECORD, MasteryTracker
+
+TOPICS = [f'Topic {n}' for n in range(40)]
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    answers_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(3)
+    skill = rng.uniform(0.3, 0.95, (users, len(TOPICS)))
+    count = users * answers_per_user
+    answer_users = rng.integers(0, users, count)
+    # Each student sticks to a handful of topics
+    answer_topics = (answer_users * 7 + rng.integers(0, 6, count)) % len(TOPICS)
+    correct = rng.random(count) < skill[answer_users, answer_topics]
+    now = time.time()
+    stamps = now - rng.uniform(0, 30 * 86400, count)
+
+    path = os.path.join(tempfile.mkdtemp(), 'mastery.npz')
+    tracker = MasteryTracker(None)
+    start = time.perf_counter()
+    for user, topic, outcome, at in zip(answer_users.tolist(), answer_topics.tolist(), correct.tolist(), stamps.tolist()):
+        tracker.record(f'user-{user}', TOPICS[topic], outcome, at)
+    seconds = time.perf_counter() - start
+    stats = tracker.stats()
+    print(f"{users} users, {count} answers, {stats['records']} user-topic records "
+          f"({stats['record_bytes'] / 1e6:.1f} MB at {RECORD.itemsize} bytes each)")
+    print(f"  record               {seconds / count * 1e6:8.2f} us/answer")
+
+    # Workers fold the shared quiz history in batches like this one
+    batched = MasteryTracker(None, None)
+    user_names = [f'user-{user}' for user in answer_users.tolist()]
+    topic_names = [TOPICS[topic] for topic in answer_topics.tolist()]
+    start = time.perf_counter()
+    for offset in range(0, count, 2048):
+        batched.record_many(user_names[offset:offset + 2048], topic_names[offset:offset + 2048],
+                            correct[offset:offset + 2048], stamps[offset:offset + 2048])
+    seconds = time.perf_counter() - start
+    probe = f'user-{answer_users[0]}'
+    print(f"  batched history fold {seconds / count * 1e6:8.2f} us/answer, "
+          f"matches record(): {batched.topics(probe, now) == tracker.topics(probe, now)}")
+
+    sample = rng.integers(0, users, 2000).tolist()
+    start = time.perf_counter()
+    ranked = [tracker.weakest(f'user-{user}', limit=3, now=now) for user in sample]
+    seconds = time.perf_counter() - start
+    print(f"  weakest topics       {seconds / len(sample) * 1e6:8.1f} us/query")
+
+    hits = 0
+    for user, topics in zip(sample, ranked):
+        studied = [(user * 7 + offset) % len(TOPICS) for offset in range(6)]
+        truly_weakest = min(studied, key=lambda topic: skill[user, topic])
+        hits += TOPICS[truly_weakest] in [topic["topic"] for topic in topics]
+    print(f"  true weakest in top3 {hits / len(sample):8.1%}")
+
+    start = time.perf_counter()
+    size = tracker.snapshot(path)
+    snapshot_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    restored = MasteryTracker(path)
+    restore_seconds = time.perf_counter() - start
+    same = restored.weakest(f'user-{sample[0]}', now=now) == tracker.weakest(f'user-{sample[0]}', now=now)
+    print(f"  snapshot             {snapshot_seconds:8.2f} s  {size / 1e6:.1f} MB on disk")
+    print(f"  restore              {restore_seconds:8.2f} s  {restored.stats()['records']} records, identical: {same}")
+
+
+if __name__ == '__main__':
+    main()
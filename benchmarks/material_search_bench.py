@@ -0,0 +1,99 @@
+"""
+Benchmark: material keyword search and facet filtering
+
+Builds a synthetic library of study materials and compares the old
+per-request scans with the indexes MaterialLibrary keeps: a lowercase
+substring scan against a BM25 query over the inverted index, and three
+chained list comprehensions over ai_analysis fields against the bitmap
+facet intersection (with per-facet counts).
+
+Run from the repository root:
+    python benchmarks/material_search_bench.py [search_documents] [facet_documents]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.facet_index import FacetIndex
+from _lib.search_index import BM25Index
+from _lib.material_library import MATERIAL_FACETS, material_facets
+
+SUBJECTS = ['mathematics', 'science', 'history', 'engineering', 'literature', 'economics']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+QUERY = 'photosynthesis light energy'
+
+
+def materials(count, seed=5):
+    """Synthetic study_materials rows with ~300-word bodies"""
+    rng = random.Random(seed)
+    vocabulary = [f'term{n}' for n in range(5000)] + QUERY.split()
+    return [{
+        'id': str(n),
+        'filename': f'notes-{n}.txt',
+        'content': ' '.join(rng.choice(vocabulary) for _ in range(300)),
+        'starred': rng.random() < 0.2,
+        'ai_analysis': {
+            'subject_category': rng.choice(SUBJECTS),
+            'difficulty_level': rng.choice(DIFFICULTIES)
+        }
+    } for n in range(count)]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def substring_scan(rows, search):
+    search = search.lower()
+    return [m for m in rows if search in m['filename'].lower() or search in m['content'].lower()]
+
+
+def list_filter(rows, subject, difficulty, starred):
+    rows = [m for m in rows if m['ai_analysis'].get('subject_category', '').lower() == subject]
+    rows = [m for m in rows if m['ai_analysis'].get('difficulty_level', '').lower() == difficulty]
+    if starred == 'true':
+        rows = [m for m in rows if m['starred'] == True]
+    return rows
+
+
+def main():
+    search_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    facet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    rows = materials(search_count)
+    index = BM25Index({'filename': 2.0, 'content': 1.0})
+    for material in rows:
+        index.add(material['id'], {'filename': material['filename'], 'content': material['content']})
+    scan, _ = timed(lambda: substring_scan(rows, QUERY), 20)
+    ranked, hits = timed(lambda: index.search(QUERY, k=20), 200)
+
+    rows = materials(facet_count, seed=7)
+    facets = FacetIndex(MATERIAL_FACETS)
+    for material in rows:
+        facets.add(material['id'], material_facets(material))
+    listed, expected = timed(lambda: list_filter(rows, 'science', 'advanced', 'true'), 200)
+
+    def bitmap():
+        bits = facets.match(subject='science', difficulty='advanced', starred='true')
+        return facets.ids(bits), facets.counts(bits)
+
+    bitmapped, (ids, _) = timed(bitmap, 200)
+    assert sorted(ids) == sorted(m['id'] for m in expected)
+
+    print(f"keyword search, {search_count} documents, query {QUERY!r}")
+    print(f"  substring scan     {scan * 1e3:8.2f} ms (unranked)")
+    print(f"  BM25 top 20        {ranked * 1e3:8.2f} ms ({len(hits)} ranked hits)")
+    print(f"three facet filters, {facet_count} documents, {len(ids)} matches")
+    print(f"  list comprehension {listed * 1e3:8.2f} ms")
+    print(f"  bitmap + counts    {bitmapped * 1e3:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
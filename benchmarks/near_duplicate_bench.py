@@ -0,0 +1,119 @@
+"""
+Benchmark: MinHash/LSH near-duplicate detection on synthetic re-uploads
+
+Builds base materials, then variants of each with a growing share of
+words substituted, inserted or deleted (a re-export, a fixed typo, an
+added paragraph...). Every base is indexed and every variant queried;
+detections (signature screening plus the exact check on stored shingles)
+are compared with the exact shingle Jaccard similarity.
+
+Run from the repository root:
+    python benchmarks/near_duplicate_bench.py [threshold ...]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.near_duplicates import NearDuplicateIndex, estimate_similarity, shingle_hashes
+
+EDIT_RATES = (0.0, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2)
+
+
+def make_vocabulary(rng, size=5000):
+    """Pseudo-words with Zipf-like cumulative weights"""
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10)))
+             for _ in range(size)]
+    weights, total = [], 0.0
+    for rank in range(size):
+        total += 1 / (rank + 1)
+        weights.append(total)
+    return words, weights
+
+
+def make_material(rng, words, weights, length):
+    """A material of roughly length words"""
+    return rng.choices(words, cum_weights=weights, k=length)
+
+
+def make_variant(rng, base, rate, words, weights):
+    """Apply rate * len(base) random word edits"""
+    variant = list(base)
+    for _ in range(int(len(base) * rate)):
+        position = rng.randrange(len(variant))
+        kind = rng.random()
+        if kind < 0.5:
+            variant[position] = rng.choices(words, cum_weights=weights)[0]
+        elif kind < 0.75:
+            variant.insert(position, rng.choices(words, cum_weights=weights)[0])
+        elif len(variant) > 1:
+            del variant[position]
+    return variant
+
+
+def jaccard(first, second):
+    """Exact Jaccard similarity of two texts' shingle sets"""
+    a, b = set(shingle_hashes(first).tolist()), set(shingle_hashes(second).tolist())
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def run(threshold, bases=300, seed=11):
+    """Index the bases, query their variants and report accuracy and latency"""
+    rng = random.Random(seed)
+    words, weights = make_vocabulary(rng)
+    materials = [make_material(rng, words, weights, rng.randint(400, 2000)) for _ in range(bases)]
+
+    path = os.path.join(tempfile.mkdtemp(), 'near-duplicate-bench.sqlite3')
+    index = NearDuplicateIndex(path, threshold=threshold)
+
+    start = time.perf_counter()
+    sketches = [index.sketch(' '.join(material)) for material in materials]
+    signature_ms = (time.perf_counter() - start) / bases * 1000
+    signatures = [signature for signature, _ in sketches]
+    for number, (signature, shingles) in enumerate(sketches):
+        index.add(f'base-{number}', signature, shingles)
+
+    print(f"threshold {threshold}: {index.bands} bands x {index.rows} rows, "
+          f"{bases} materials indexed, sketch {signature_ms:.2f} ms/material")
+    print(f"  {'edit rate':>9} {'jaccard':>8} {'estimate':>9} {'detected':>9} {'lookup ms':>10}")
+
+    true_positive = false_positive = false_negative = 0
+    for rate in EDIT_RATES:
+        similarities, estimates, detected, elapsed = [], [], 0, 0.0
+        for number, material in enumerate(materials):
+            variant = ' '.join(make_variant(rng, material, rate, words, weights))
+            similarity = jaccard(' '.join(material), variant)
+            signature, shingles = index.sketch(variant)
+
+            start = time.perf_counter()
+            matches = index.match(signature, shingles=shingles)
+            elapsed += time.perf_counter() - start
+
+            found = dict(matches).get(f'base-{number}')
+            wrong = [key for key, _ in matches if key != f'base-{number}']
+            similarities.append(similarity)
+            estimates.append(estimate_similarity(signature, signatures[number]))
+            detected += found is not None
+            false_positive += len(wrong)
+            if similarity >= threshold:
+                true_positive += found is not None
+                false_negative += found is None
+            elif found is not None:
+                false_positive += 1
+
+        print(f"  {rate:>9.1%} {sum(similarities) / bases:>8.3f} {sum(estimates) / bases:>9.3f} "
+              f"{detected / bases:>9.1%} {elapsed / bases * 1000:>10.2f}")
+
+    precision = true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0
+    recall = true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0
+    print(f"  precision {precision:.3f}  recall {recall:.3f}  (pairs with exact Jaccard >= {threshold})\n")
+
+
+if __name__ == '__main__':
+    thresholds = [float(arg) for arg in sys.argv[1:]] or [0.95, 0.9, 0.8]
+    for threshold in thresholds:
+        run(threshold)
@@ -0,0 +1,53 @@
+"""
+Benchmark: learning path planning over the prerequisite graph
+
+Plans paths for random students (a few requested topics, random weakness
+severities, some mastered topics) against the full curriculum and reports
+planning latency, checking that every plan respects the prerequisite order.
+
+Run from the repository root:
+    python benchmarks/path_bench.py [plans]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.path_planner import CURRICULUM, PathPlanner
+
+SEVERITIES = ['low', 'medium', 'high']
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(9)
+    topics = list(CURRICULUM)
+    planner = PathPlanner()
+
+    requests = []
+    for _ in range(count):
+        weaknesses = [{"topic": topic, "severity": rng.choice(SEVERITIES)} for topic in rng.sample(topics, 3)]
+        mastery = [{"topic": topic, "accuracy": 0.95, "attempts": 10} for topic in rng.sample(topics, 8)]
+        requests.append((weaknesses, rng.sample(topics, rng.randint(1, 4)), {"daily_time": rng.choice([20, 30, 60])},
+                         mastery))
+
+    start = time.perf_counter()
+    plans = [planner.plan(*request) for request in requests]
+    seconds = time.perf_counter() - start
+
+    violations = 0
+    for plan in plans:
+        position = {step["topic_name"]: step["order"] for step in plan["steps"]}
+        violations += sum(position[prerequisite] > step["order"]
+                          for step in plan["steps"] for prerequisite in step["prerequisites"])
+    steps = sum(len(plan["steps"]) for plan in plans) / count
+    print(f"{count} plans over {len(CURRICULUM)} curriculum topics, {steps:.1f} steps per plan on average")
+    print(f"  plan                  {seconds / count * 1000:8.3f} ms/plan")
+    print(f"  prerequisite order    {violations} violations")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: bulk performance prediction refresh on a synthetic quiz history
+
+Writes a quiz history for many simulated students (each with a skill
+level, a learning rate and a study rhythm) into a fresh ability store,
+then times PerformancePredictor.refresh() and predict() lookups and
+checks the predictions against each student's true next-quiz score.
+
+Run from the repository root:
+    python benchmarks/prediction_bench.py [users] [quizzes_per_user]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.adaptive_difficulty import DIFFICULTIES, DifficultyEngine
+from _lib.performance_model import FEATURES, PerformancePredictor
+
+DAY = 86400.0
+
+
+def simulate(users, quizzes, rng, now):
+    """History rows plus each user's true expected score on their next quiz"""
+    skill = rng.normal(0.6, 0.15, users)
+    learning = rng.normal(0.004, 0.004, users)
+    rhythm = rng.uniform(0.5, 7, users)
+    counts = rng.integers(1, 2 * quizzes, users)
+    rows, upcoming = [], np.zeros(users)
+    for user in range(users):
+        gaps = rng.exponential(rhythm[user], counts[user]) * DAY
+        times = now - gaps[::-1].cumsum()[::-1]
+        level = rng.integers(0, 3, counts[user])
+        for k in range(counts[user]):
+            mean = np.clip(skill[user] + learning[user] * k - 0.08 * (level[k] - 1), 0.05, 0.98)
+            score = rng.binomial(10, mean) / 10
+            rows.append((f'h{user}-{k}', f'user-{user}', 'topic', DIFFICULTIES[level[k]], 'medium', 0.5, '',
+                         json.dumps({"score": score}), float(times[k])))
+        upcoming[user] = np.clip(skill[user] + learning[user] * counts[user], 0.05, 0.98) * 100
+    return rows, upcoming
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    quizzes = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    rng = np.random.default_rng(11)
+    now = time.time()
+    rows, upcoming = simulate(users, quizzes, rng, now)
+
+    path = os.path.join(tempfile.mkdtemp(), 'ability.sqlite3')
+    DifficultyEngine(path).stats()
+    conn = sqlite3.connect(path)
+    conn.executemany('INSERT INTO adaptive_difficulty_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    print(f"{users} users, {len(rows)} quizzes in history")
+
+    predictor = PerformancePredictor(path)
+    report = predictor.refresh(now)
+    print(f"  refresh               load {report['load_seconds']:.2f} s  fit+score {report['fit_seconds']:.2f} s  "
+          f"write {report['write_seconds']:.2f} s")
+    print(f"  training examples     {report['samples']}  (next-quiz rmse {report['rmse']} points)")
+
+    start = time.perf_counter()
+    predictions = [predictor.predict(f'user-{user}') for user in range(users)]
+    seconds = time.perf_counter() - start
+    print(f"  predict lookup        {seconds / users * 1e6:8.1f} us/user")
+
+    predicted = np.array([prediction["predicted_score"] for prediction in predictions])
+    totals, counts = np.zeros(users), np.zeros(users)
+    for row in rows:
+        user = int(row[1].split('-')[1])
+        totals[user] += json.loads(row[7])["score"] * 100
+        counts[user] += 1
+    print(f"  error vs true score   {np.mean(np.abs(predicted - upcoming)):8.2f} points "
+          f"(own average: {np.mean(np.abs(totals / counts - upcoming)):.2f})")
+
+    top = {}
+    for prediction in predictions:
+        name = prediction["factors"][0]["factor"]
+        top[name] = top.get(name, 0) + 1
+    print(f"  leading factor        {top}")
+    print(f"  features              {[name for name, _, _ in FEATURES]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: spaced-repetition scheduling for a large user base
+
+Bulk-ingests a synthetic quiz history (users reviewing a handful of
+topics each over a few months) into a ReviewScheduler, then times
+single reviews, "what is due for this user" and "which users have
+reviews due within the hour", and reports memory per card.
+
+Run from the repository root:
+    python benchmarks/review_bench.py [users] [reviews_per_user]
+"""
+
+import os
+import sys
+import time
+import resource
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.review_scheduler import CARD, ReviewScheduler
+
+TOPICS = [f'topic {n}' for n in range(30)]
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    reviews_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = np.random.default_rng(5)
+    count = users * reviews_per_user
+    now = time.time()
+    user_rows = rng.integers(0, users, count)
+    topic_rows = (user_rows * 3 + rng.integers(0, 6, count)) % len(TOPICS)
+    user_ids = [f'user-{user}' for user in user_rows.tolist()]
+    items = [TOPICS[topic] for topic in topic_rows.tolist()]
+    qualities = rng.integers(0, 6, count)
+    times = now - rng.uniform(0, 90 * 86400, count)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    scheduler = ReviewScheduler(None)
+    start = time.perf_counter()
+    scheduler.ingest(user_ids, items, qualities, times)
+    seconds = time.perf_counter() - start
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline
+    stats = scheduler.stats()
+    print(f"{users} users, {count} reviews, {stats['cards']} cards ({CARD.itemsize} bytes each in the array)")
+    print(f"  bulk ingest           {seconds:8.2f} s ({count / seconds / 1e6:.2f}M reviews/s)")
+    print(f"  peak memory growth    {memory / 1e6:8.1f} MB ({memory / stats['cards']:.0f} bytes/card, "
+          f"including ingest temporaries)")
+
+    sample = [f'user-{user}' for user in rng.integers(0, users, 5000).tolist()]
+    start = time.perf_counter()
+    due = [scheduler.due(user, now=now, limit=10) for user in sample]
+    seconds = time.perf_counter() - start
+    print(f"  due for user          {seconds / len(sample) * 1e6:8.1f} us/query "
+          f"({sum(map(len, due)) / len(sample):.1f} due per user)")
+
+    start = time.perf_counter()
+    for user in sample:
+        scheduler.review(user, TOPICS[int(rng.integers(0, len(TOPICS)))], int(rng.integers(0, 6)), now)
+    seconds = time.perf_counter() - start
+    print(f"  single review         {seconds / len(sample) * 1e6:8.1f} us/review")
+
+    start = time.perf_counter()
+    upcoming = scheduler.users_due(within=3600, now=now + 86400, limit=1000)
+    seconds = time.perf_counter() - start
+    print(f"  users due next hour   {seconds * 1000:8.2f} ms for the first {len(upcoming)}")
+
+
+if __name__ == '__main__':
+    main()
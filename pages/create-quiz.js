@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useRef, useState } from 'react'
 import { useAuth } from '../contexts/AuthContext'
 import { useRouter } from 'next/router'
 import { Brain, Plus, X, Save, Play } from 'lucide-react'
@@ -25,6 +25,8 @@ export default function CreateQuiz() {
   })
   
   const [generating, setGenerating] = useState(false)
+  // Retries and double clicks for the same settings reuse one key so the server generates once
+  const generationRequest = useRef({ settings: null, key: null })
 
   if (loading) {
     return (
@@ -89,15 +91,21 @@ export default function CreateQuiz() {
       return
     }
 
+    const settings = JSON.stringify([quizData.topic.trim(), quizData.difficulty, quizData.numQuestions])
+    if (generationRequest.current.settings !== settings) {
+      generationRequest.current = { settings, key: crypto.randomUUID() }
+    }
+
     setGenerating(true)
     try {
       const response = await fetch('/api/generate_quiz', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': generationRequest.current.key,
         },
         body: JSON.stringify({
-          topic: quizData.topic,
+          topic: quizData.topic.trim(),
           difficulty: quizData.difficulty,
           num_questions: quizData.numQuestions,
           time_limit: quizData.timeLimit
@@ -128,6 +136,8 @@ export default function CreateQuiz() {
             explanation: q.explanation || ''
           }))
         }))
+        // A new request with the same settings should generate a fresh quiz
+        generationRequest.current = { settings: null, key: null }
         toast.success('Quiz generated successfully!')
       } else {
         throw new Error('No questions generated')
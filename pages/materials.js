@@ -18,7 +18,7 @@ import MaterialAnalysis from '../components/MaterialAnalysis'
 import toast from 'react-hot-toast'
 
 export default function Materials() {
-  const { user, loading } = useAuth()
+  const { user, loading, supabase } = useAuth()
   const router = useRouter()
   
   const [materials, setMaterials] = useState([])
@@ -32,6 +32,58 @@ export default function Materials() {
     }
   }, [user])
 
+  // Materials endpoints scope the library to the signed-in user's access token
+  const authHeaders = async () => {
+    const { data } = supabase ? await supabase.auth.getSession() : { data: null }
+    const token = data?.session?.access_token
+    return {
+      'Content-Type': 'application/json',
+      ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+    }
+  }
+
+  const contentHash = async (material) => {
+    const bytes = new TextEncoder().encode(JSON.stringify({ ...material, content_hash: undefined }))
+    const digest = await crypto.subtle.digest('SHA-256', bytes)
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('')
+  }
+
+  // Upload only materials the index lacks or holds an older version of, in bodies well under the 4.5 MB limit
+  const syncMaterials = async (localMaterials, headers) => {
+    const hashed = await Promise.all(localMaterials.map(async m => ({ ...m, content_hash: await contentHash(m) })))
+    const diffResponse = await fetch('/api/materials-services', {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({
+        service: 'index',
+        action: 'diff',
+        materials: hashed.map(m => ({ id: m.id, content_hash: m.content_hash }))
+      })
+    })
+    const diff = await diffResponse.json()
+    if (!diff.success) return
+    const stale = new Set(diff.stale.map(String))
+    let batch = []
+    let batchBytes = 0
+    const flush = async () => {
+      if (batch.length === 0) return
+      await fetch('/api/materials-services', {
+        method: 'POST',
+        headers,
+        body: JSON.stringify({ service: 'index', action: 'upsert', materials: batch })
+      })
+      batch = []
+      batchBytes = 0
+    }
+    for (const material of hashed.filter(m => stale.has(String(m.id)))) {
+      const size = JSON.stringify(material).length
+      if (batchBytes + size > 3000000) await flush()
+      batch.push(material)
+      batchBytes += size
+    }
+    await flush()
+  }
+
   const loadMaterials = async () => {
     try {
       setLoadingMaterials(true)
@@ -43,14 +95,20 @@ export default function Materials() {
         localMaterials = JSON.parse(storedMaterials)
       }
       
-      // Then try to get materials from API
+      // Then sync them into the user's search index and read the library back from the API
       try {
-        const response = await fetch('/api/materials-services?service=search')
+        const headers = await authHeaders()
+        if (localMaterials.length > 0) {
+          await syncMaterials(localMaterials, headers)
+        }
+        
+        const response = await fetch('/api/materials-services?service=search&limit=100', { headers })
         const data = await response.json()
         
         if (data.success && data.materials) {
-          // Combine local and API materials
-          const allMaterials = [...localMaterials, ...data.materials]
+          // Combine local and API materials, keeping one copy of each indexed material
+          const indexedIds = new Set(data.materials.map(m => String(m.id)))
+          const allMaterials = [...localMaterials.filter(m => !indexedIds.has(String(m.id))), ...data.materials]
           setMaterials(allMaterials)
         } else {
           // Use local materials if API fails
@@ -83,6 +141,24 @@ export default function Materials() {
 
   const handleMaterialSelect = (material) => {
     setSelectedMaterial(material)
+    
+    // Opening a material counts as a view for content recommendations
+    fetch('/api/ai-services', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        service: 'record-interaction',
+        user_id: user.id,
+        content_id: `material:${material.id}`,
+        content_type: 'material',
+        interaction_type: 'view',
+        metadata: {
+          title: material.filename,
+          subject: material.ai_analysis?.subject_category || '',
+          difficulty: material.ai_analysis?.difficulty_level || 'medium'
+        }
+      })
+    }).catch(error => console.error('Error recording material view:', error))
   }
 
   const handleGenerateQuiz = async (material, quizSettings) => {
@@ -129,6 +205,13 @@ export default function Materials() {
         localStorage.setItem('uploadedMaterials', JSON.stringify(updatedMaterials))
       }
       
+      // Remove from the search index
+      authHeaders().then(headers => fetch('/api/materials-services', {
+        method: 'POST',
+        headers,
+        body: JSON.stringify({ service: 'index', action: 'delete', material_id: material.id })
+      })).catch(error => console.error('Error removing material from search index:', error))
+      
       // Clear selection if deleted material was selected
       if (selectedMaterial?.id === material.id) {
         setSelectedMaterial(null)
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useAuth } from '../contexts/AuthContext'
 import { useRouter } from 'next/router'
 import { 
@@ -34,6 +34,7 @@ export default function Quiz() {
   const [quizCompleted, setQuizCompleted] = useState(false)
   const [quizResults, setQuizResults] = useState(null)
   const [reviewMode, setReviewMode] = useState(false)
+  const quizStartedAt = useRef(null)
 
   useEffect(() => {
     if (!user) {
@@ -339,6 +340,8 @@ export default function Quiz() {
         id: Date.now(),
         title: `${router.query.topic || 'Mathematics'} Quiz`,
         description: `Test your knowledge in ${router.query.topic || 'Mathematics'}`,
+        topic: router.query.topic || 'Mathematics',
+        difficulty: router.query.difficulty || 'medium',
         time_limit: 5, // 5 minutes
         questions: questions.map((q, index) => ({
           id: index + 1,
@@ -389,6 +392,7 @@ export default function Quiz() {
   }
 
   const startQuiz = () => {
+    quizStartedAt.current = new Date()
     setQuizStarted(true)
     if (quiz.timeLimit) {
       setTimeRemaining(quiz.timeLimit * 60) // Convert minutes to seconds
@@ -406,6 +410,37 @@ export default function Quiz() {
     setReviewMode(true)
   }
 
+  // Feed the finished quiz to the adaptive services (ability, reviews, mastery, insights, recommendations)
+  const recordQuizResult = (detailedResults) => {
+    if (!user || reviewMode || !detailedResults?.length) return
+    const endedAt = new Date()
+    const startedAt = quizStartedAt.current || endedAt
+    // Insights bin quiz and study times by the learner's local hour and weekday
+    const tzOffset = -endedAt.getTimezoneOffset() / 60
+    const post = (body) => fetch('/api/ai-services', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ user_id: user.id, tz_offset: tzOffset, ...body })
+    }).catch(error => console.error(`Error recording ${body.service}:`, error))
+
+    post({
+      service: 'record-quiz',
+      topic: quiz.topic || quiz.title || 'General',
+      difficulty: quiz.difficulty || 'medium',
+      time_spent: Math.round((endedAt - startedAt) / 1000),
+      answers: detailedResults.map(result => ({
+        question: result.question.question_text || result.question.question,
+        topic: result.question.topic,
+        correct: result.isCorrect
+      }))
+    })
+    post({
+      service: 'record-session',
+      started_at: startedAt.toISOString(),
+      ended_at: endedAt.toISOString()
+    })
+  }
+
   const handleSubmitQuiz = async () => {
     setSubmitting(true)
     try {
@@ -414,6 +449,21 @@ export default function Quiz() {
         answer: answer
       }))
       
+      // Calculate detailed results
+      const detailedResults = quiz?.questions?.map((question, index) => {
+        const userAnswer = responses[question.id]
+        const isCorrect = userAnswer === question.correct_answer
+        return {
+          question: question,
+          userAnswer: userAnswer,
+          correctAnswer: question.correct_answer,
+          isCorrect: isCorrect,
+          explanation: question.explanation
+        }
+      })
+      
+      recordQuizResult(detailedResults)
+      
       const response = await fetch('/api/performance', {
         method: 'POST',
         headers: {
@@ -428,19 +478,6 @@ export default function Quiz() {
       
       const result = await response.json()
       
-      // Calculate detailed results
-      const detailedResults = quiz?.questions?.map((question, index) => {
-        const userAnswer = responses[question.id]
-        const isCorrect = userAnswer === question.correct_answer
-        return {
-          question: question,
-          userAnswer: userAnswer,
-          correctAnswer: question.correct_answer,
-          isCorrect: isCorrect,
-          explanation: question.explanation
-        }
-      })
-      
       // Calculate score manually if API doesn't provide it
       const correctCount = detailedResults.filter(r => r.isCorrect).length
       const calculatedScore = Math.round((correctCount / (quiz?.questions?.length || 1)) * 100)
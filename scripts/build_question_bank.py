@@ -0,0 +1,704 @@
+"""
+Build the fallback question bank used when quiz generation is unavailable
+
+Combines curated fact tables with parametric question families (arithmetic,
+algebra, physics formulas, number bases...) and writes them to
+api/_lib/data/question_bank.json.gz in the compact row format read by
+api/_lib/question_bank.py. The build is deterministic for a given seed.
+
+Run from the repository root:
+    python scripts/build_question_bank.py [--extra questions.json ...] [--seed N]
+
+Extra files hold a JSON list of questions in the quiz format with
+"topic", "difficulty" and optional "tags" fields, e.g. exported from
+reviewed AI-generated quizzes.
+"""
+
+import os
+import sys
+import gzip
+import json
+import random
+import argparse
+from fractions import Fraction
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+OUTPUT = os.path.join(ROOT, 'api', '_lib', 'data', 'question_bank.json.gz')
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+# Free-form names students type, mapped to topic or topic/tag
+ALIASES = {
+    'math': 'mathematics', 'maths': 'mathematics', 'mathematic': 'mathematics',
+    'arithmetics': 'mathematics/arithmetic', 'numbers': 'mathematics/arithmetic',
+    'algebra 1': 'mathematics/algebra', 'algebra 2': 'mathematics/algebra', 'equations': 'mathematics/algebra',
+    'trigonometry': 'mathematics/geometry', 'shapes': 'mathematics/geometry',
+    'differentiation': 'mathematics/calculus', 'derivatives': 'mathematics/calculus',
+    'stats': 'mathematics/statistics', 'probability': 'mathematics/statistics',
+    'percent': 'mathematics/percentages', 'percentage': 'mathematics/percentages',
+    'general science': 'science', 'natural science': 'science', 'sciences': 'science',
+    'bio': 'science/biology', 'life science': 'science/biology', 'anatomy': 'science/biology',
+    'chem': 'science/chemistry', 'chemicals': 'science/chemistry', 'elements': 'science/chemistry',
+    'physical science': 'science/physics', 'mechanics': 'science/physics', 'electricity': 'science/physics',
+    'space': 'science/astronomy', 'solar system': 'science/astronomy', 'planets': 'science/astronomy',
+    'world history': 'history', 'social studies': 'history', 'modern history': 'history/modern',
+    'wars': 'history/modern', 'ancient history': 'history/people',
+    'world geography': 'geography', 'capitals': 'geography/capitals', 'countries': 'geography/capitals',
+    'continents': 'geography/continents',
+    'cs': 'computer science', 'computing': 'computer science', 'programming': 'computer science',
+    'coding': 'computer science', 'computers': 'computer science', 'it': 'computer science',
+    'algorithms': 'computer science/algorithms', 'binary': 'computer science/number systems',
+    'english language': 'english', 'language arts': 'english', 'literature': 'english/literature',
+    'grammar': 'english/grammar', 'vocabulary': 'english/vocabulary', 'ela': 'english'
+}
+
+ELEMENTS = [
+    ('Hydrogen', 'H', 1), ('Helium', 'He', 2), ('Lithium', 'Li', 3), ('Beryllium', 'Be', 4),
+    ('Boron', 'B', 5), ('Carbon', 'C', 6), ('Nitrogen', 'N', 7), ('Oxygen', 'O', 8),
+    ('Fluorine', 'F', 9), ('Neon', 'Ne', 10), ('Sodium', 'Na', 11), ('Magnesium', 'Mg', 12),
+    ('Aluminium', 'Al', 13), ('Silicon', 'Si', 14), ('Phosphorus', 'P', 15), ('Sulfur', 'S', 16),
+    ('Chlorine', 'Cl', 17), ('Argon', 'Ar', 18), ('Potassium', 'K', 19), ('Calcium', 'Ca', 20),
+    ('Iron', 'Fe', 26), ('Copper', 'Cu', 29), ('Zinc', 'Zn', 30), ('Silver', 'Ag', 47),
+    ('Tin', 'Sn', 50), ('Iodine', 'I', 53), ('Gold', 'Au', 79), ('Mercury', 'Hg', 80),
+    ('Lead', 'Pb', 82), ('Uranium', 'U', 92)
+]
+EASY_ELEMENTS = {'Hydrogen', 'Helium', 'Carbon', 'Nitrogen', 'Oxygen'}
+HARD_SYMBOLS = {'Na', 'K', 'Fe', 'Cu', 'Ag', 'Sn', 'Au', 'Hg', 'Pb'}
+
+# (country, capital, continent, capital difficulty)
+COUNTRIES = [
+    ('France', 'Paris', 'Europe', 'easy'), ('Germany', 'Berlin', 'Europe', 'easy'),
+    ('Italy', 'Rome', 'Europe', 'easy'), ('Spain', 'Madrid', 'Europe', 'easy'),
+    ('United Kingdom', 'London', 'Europe', 'easy'), ('Japan', 'Tokyo', 'Asia', 'easy'),
+    ('China', 'Beijing', 'Asia', 'easy'), ('Russia', 'Moscow', 'Europe', 'easy'),
+    ('Egypt', 'Cairo', 'Africa', 'easy'), ('Greece', 'Athens', 'Europe', 'easy'),
+    ('Portugal', 'Lisbon', 'Europe', 'medium'), ('Ireland', 'Dublin', 'Europe', 'medium'),
+    ('Netherlands', 'Amsterdam', 'Europe', 'medium'), ('Belgium', 'Brussels', 'Europe', 'medium'),
+    ('Austria', 'Vienna', 'Europe', 'medium'), ('Poland', 'Warsaw', 'Europe', 'medium'),
+    ('Sweden', 'Stockholm', 'Europe', 'medium'), ('Norway', 'Oslo', 'Europe', 'medium'),
+    ('Finland', 'Helsinki', 'Europe', 'medium'), ('Denmark', 'Copenhagen', 'Europe', 'medium'),
+    ('Ukraine', 'Kyiv', 'Europe', 'medium'), ('Hungary', 'Budapest', 'Europe', 'medium'),
+    ('Czech Republic', 'Prague', 'Europe', 'medium'), ('Kenya', 'Nairobi', 'Africa', 'medium'),
+    ('Ethiopia', 'Addis Ababa', 'Africa', 'medium'), ('Ghana', 'Accra', 'Africa', 'medium'),
+    ('India', 'New Delhi', 'Asia', 'medium'), ('South Korea', 'Seoul', 'Asia', 'medium'),
+    ('Thailand', 'Bangkok', 'Asia', 'medium'), ('Vietnam', 'Hanoi', 'Asia', 'medium'),
+    ('Philippines', 'Manila', 'Asia', 'medium'), ('Saudi Arabia', 'Riyadh', 'Asia', 'medium'),
+    ('Iran', 'Tehran', 'Asia', 'medium'), ('Iraq', 'Baghdad', 'Asia', 'medium'),
+    ('Mexico', 'Mexico City', 'North America', 'medium'), ('Argentina', 'Buenos Aires', 'South America', 'medium'),
+    ('Peru', 'Lima', 'South America', 'medium'), ('Chile', 'Santiago', 'South America', 'medium'),
+    ('Cuba', 'Havana', 'North America', 'medium'), ('United States', 'Washington, D.C.', 'North America', 'medium'),
+    ('Australia', 'Canberra', 'Oceania', 'hard'), ('Canada', 'Ottawa', 'North America', 'hard'),
+    ('Brazil', 'Brasília', 'South America', 'hard'), ('Turkey', 'Ankara', 'Asia', 'hard'),
+    ('Switzerland', 'Bern', 'Europe', 'hard'), ('Pakistan', 'Islamabad', 'Asia', 'hard'),
+    ('Nigeria', 'Abuja', 'Africa', 'hard'), ('New Zealand', 'Wellington', 'Oceania', 'hard'),
+    ('Morocco', 'Rabat', 'Africa', 'hard'), ('Colombia', 'Bogotá', 'South America', 'hard'),
+    ('Venezuela', 'Caracas', 'South America', 'hard'), ('Malaysia', 'Kuala Lumpur', 'Asia', 'hard'),
+    ('Bangladesh', 'Dhaka', 'Asia', 'hard'), ('Nepal', 'Kathmandu', 'Asia', 'hard'),
+    ('Romania', 'Bucharest', 'Europe', 'hard'), ('Bulgaria', 'Sofia', 'Europe', 'hard'),
+    ('Serbia', 'Belgrade', 'Europe', 'hard'), ('Croatia', 'Zagreb', 'Europe', 'hard'),
+    ('Iceland', 'Reykjavík', 'Europe', 'hard'), ('Jamaica', 'Kingston', 'North America', 'hard')
+]
+
+# Countries whose names take "the" mid-sentence
+COUNTRIES_WITH_ARTICLE = {'United Kingdom', 'United States', 'Czech Republic', 'Netherlands', 'Philippines'}
+
+# (event phrased to follow "In which year", year, difficulty)
+EVENTS = [
+    ('did World War I begin', 1914, 'easy'), ('did World War I end', 1918, 'medium'),
+    ('did World War II begin', 1939, 'easy'), ('did World War II end', 1945, 'easy'),
+    ('did the United States declare independence', 1776, 'easy'), ('did Columbus first reach the Americas', 1492, 'easy'),
+    ('did humans first land on the Moon', 1969, 'easy'), ('did the Berlin Wall fall', 1989, 'medium'),
+    ('did the French Revolution begin with the storming of the Bastille', 1789, 'medium'),
+    ('did the Battle of Hastings take place', 1066, 'medium'), ('did the Russian Revolution take place', 1917, 'medium'),
+    ('did the Soviet Union dissolve', 1991, 'medium'), ('did the American Civil War begin', 1861, 'medium'),
+    ('did the American Civil War end', 1865, 'medium'), ('did the Titanic sink', 1912, 'medium'),
+    ('did India gain independence', 1947, 'medium'), ('did the United Nations come into existence', 1945, 'medium'),
+    ('did the Wall Street Crash happen', 1929, 'medium'), ('did Japan attack Pearl Harbor', 1941, 'medium'),
+    ('did the D-Day landings in Normandy take place', 1944, 'medium'), ('did the Berlin Wall go up', 1961, 'medium'),
+    ('did the Cuban Missile Crisis take place', 1962, 'medium'), ('did the Chernobyl disaster happen', 1986, 'medium'),
+    ('did the Wright brothers make the first powered flight', 1903, 'medium'), ('did the Korean War begin', 1950, 'medium'),
+    ('was the Treaty of Versailles signed', 1919, 'medium'), ('did the Soviet Union launch Sputnik', 1957, 'medium'),
+    ('was Nelson Mandela released from prison', 1990, 'medium'), ('did the September 11 attacks happen', 2001, 'easy'),
+    ('was the People\'s Republic of China proclaimed', 1949, 'hard'),
+    ('did the UN General Assembly adopt the Universal Declaration of Human Rights', 1948, 'hard'),
+    ('did South Africa hold its first fully democratic election', 1994, 'hard'),
+    ('did King John seal the Magna Carta', 1215, 'hard'), ('did Martin Luther publish his Ninety-five Theses', 1517, 'hard'),
+    ('did Constantinople fall to the Ottoman Empire', 1453, 'hard'), ('did Napoleon lose the Battle of Waterloo', 1815, 'hard'),
+    ('was the Spanish Armada defeated', 1588, 'hard'), ('did the Great Fire of London happen', 1666, 'hard'),
+    ('did the British Parliament pass the Slavery Abolition Act', 1833, 'hard')
+]
+
+# (question, answer, distractors, explanation, topic, tags, difficulty)
+CURATED = [
+    ("What is the result of 2 + 2?", "4", ["3", "5", "6"], "2 + 2 equals 4", 'mathematics', ['arithmetic'], 'easy'),
+    ("What is 10 ÷ 2?", "5", ["4", "6", "7"], "10 divided by 2 equals 5", 'mathematics', ['arithmetic'], 'easy'),
+    ("What is 3 × 4?", "12", ["10", "11", "13"], "3 multiplied by 4 equals 12", 'mathematics', ['arithmetic'], 'easy'),
+    ("What is the chemical formula for water?", "H2O", ["CO2", "NaCl", "O2"],
+     "Water is H2O - two hydrogen atoms and one oxygen atom", 'science', ['chemistry'], 'easy'),
+    ("How many planets are in our solar system?", "8", ["7", "9", "10"],
+     "There are 8 planets in our solar system", 'science', ['astronomy'], 'easy'),
+    ("What gas do plants absorb during photosynthesis?", "Carbon Dioxide", ["Oxygen", "Nitrogen", "Hydrogen"],
+     "Plants absorb carbon dioxide during photosynthesis", 'science', ['biology'], 'easy'),
+    ("What gas do plants release during photosynthesis?", "Oxygen", ["Carbon Dioxide", "Nitrogen", "Methane"],
+     "Oxygen is released when water is split in the light-dependent reactions", 'science', ['biology'], 'easy'),
+    ("Which planet is known as the Red Planet?", "Mars", ["Venus", "Jupiter", "Mercury"],
+     "Iron oxide on its surface gives Mars its red colour", 'science', ['astronomy'], 'easy'),
+    ("Which is the largest planet in our solar system?", "Jupiter", ["Saturn", "Neptune", "Earth"],
+     "Jupiter is more massive than all the other planets combined", 'science', ['astronomy'], 'easy'),
+    ("What is the boiling point of water at sea level in degrees Celsius?", "100", ["90", "110", "212"],
+     "At standard atmospheric pressure water boils at 100 °C", 'science', ['physics'], 'easy'),
+    ("What is the approximate speed of light in a vacuum?", "300,000 km/s", ["3,000 km/s", "30,000 km/s", "3,000,000 km/s"],
+     "Light travels at about 299,792 km/s in a vacuum", 'science', ['physics'], 'medium'),
+    ("Which particle carries a negative charge?", "Electron", ["Proton", "Neutron", "Photon"],
+     "Electrons are negatively charged; protons are positive and neutrons neutral", 'science', ['physics', 'chemistry'], 'easy'),
+    ("What is the most abundant gas in Earth's atmosphere?", "Nitrogen", ["Oxygen", "Carbon Dioxide", "Argon"],
+     "Nitrogen makes up about 78% of the atmosphere", 'science', ['chemistry'], 'medium'),
+    ("What type of bond involves the sharing of electron pairs between atoms?", "Covalent bond", ["Ionic bond", "Metallic bond", "Hydrogen bond"],
+     "Covalent bonds form when atoms share pairs of electrons", 'science', ['chemistry'], 'medium'),
+    ("What is the powerhouse of the cell?", "Mitochondria", ["Nucleus", "Ribosome", "Golgi apparatus"],
+     "Mitochondria release energy through cellular respiration", 'science', ['biology'], 'easy'),
+    ("What molecule carries genetic information in most living organisms?", "DNA", ["ATP", "Glucose", "Cellulose"],
+     "DNA stores the genetic instructions of the cell", 'science', ['biology'], 'easy'),
+    ("Who proposed the theory of evolution by natural selection?", "Charles Darwin", ["Gregor Mendel", "Louis Pasteur", "Isaac Newton"],
+     "Darwin set out natural selection in On the Origin of Species (1859)", 'science', ['biology'], 'medium'),
+    ("Who developed the theory of general relativity?", "Albert Einstein", ["Isaac Newton", "Niels Bohr", "Galileo Galilei"],
+     "Einstein published general relativity in 1915", 'science', ['physics'], 'medium'),
+    ("Who formulated the three laws of motion?", "Isaac Newton", ["Albert Einstein", "Galileo Galilei", "Johannes Kepler"],
+     "Newton published his laws of motion in the Principia (1687)", 'science', ['physics'], 'medium'),
+    ("Who discovered penicillin?", "Alexander Fleming", ["Louis Pasteur", "Marie Curie", "Edward Jenner"],
+     "Fleming discovered penicillin in 1928", 'science', ['biology'], 'medium'),
+    ("Who was the first woman to win a Nobel Prize?", "Marie Curie", ["Rosalind Franklin", "Ada Lovelace", "Florence Nightingale"],
+     "Marie Curie shared the 1903 Nobel Prize in Physics", 'science', ['chemistry', 'physics'], 'hard'),
+    ("In which year did World War II end?", "1945", ["1944", "1946", "1947"],
+     "World War II ended in 1945", 'history', ['modern'], 'easy'),
+    ("Who was the first President of the United States?", "George Washington", ["Thomas Jefferson", "John Adams", "Benjamin Franklin"],
+     "George Washington was the first President of the United States", 'history', ['people'], 'easy'),
+    ("Who was the first person to walk on the Moon?", "Neil Armstrong", ["Buzz Aldrin", "Yuri Gagarin", "John Glenn"],
+     "Neil Armstrong stepped onto the Moon on 20 July 1969", 'history', ['people', 'modern'], 'easy'),
+    ("Who was the first human to travel into space?", "Yuri Gagarin", ["Neil Armstrong", "Alan Shepard", "John Glenn"],
+     "Yuri Gagarin orbited the Earth in 1961", 'history', ['people', 'modern'], 'medium'),
+    ("Who was the British Prime Minister for most of World War II?", "Winston Churchill", ["Neville Chamberlain", "Clement Attlee", "David Lloyd George"],
+     "Churchill led the British government from 1940 to 1945", 'history', ['people', 'modern'], 'medium'),
+    ("Who led India's independence movement through nonviolent resistance?", "Mahatma Gandhi", ["Jawaharlal Nehru", "Subhas Chandra Bose", "B. R. Ambedkar"],
+     "Gandhi's campaigns of civil disobedience were central to Indian independence", 'history', ['people'], 'medium'),
+    ("Who was the first Roman emperor?", "Augustus", ["Julius Caesar", "Nero", "Constantine"],
+     "Octavian became Augustus, the first emperor, in 27 BC", 'history', ['people', 'ancient'], 'hard'),
+    ("Who painted the Mona Lisa?", "Leonardo da Vinci", ["Michelangelo", "Raphael", "Vincent van Gogh"],
+     "Leonardo da Vinci painted the Mona Lisa in the early 1500s", 'history', ['people'], 'easy'),
+    ("Who delivered the \"I Have a Dream\" speech?", "Martin Luther King Jr.", ["Malcolm X", "Rosa Parks", "Barack Obama"],
+     "King delivered the speech at the 1963 March on Washington", 'history', ['people', 'modern'], 'easy'),
+    ("Who was the first female Prime Minister of the United Kingdom?", "Margaret Thatcher", ["Theresa May", "Queen Victoria", "Liz Truss"],
+     "Margaret Thatcher became Prime Minister in 1979", 'history', ['people', 'modern'], 'medium'),
+    ("Which ancient civilisation built the pyramids of Giza?", "The Egyptians", ["The Romans", "The Greeks", "The Aztecs"],
+     "The pyramids of Giza were built by ancient Egyptians around 2500 BC", 'history', ['ancient'], 'easy'),
+    ("Which empire was ruled by Genghis Khan?", "The Mongol Empire", ["The Ottoman Empire", "The Roman Empire", "The Persian Empire"],
+     "Genghis Khan founded the Mongol Empire in 1206", 'history', ['people'], 'medium'),
+    ("What is the longest river in Africa?", "The Nile", ["The Congo", "The Niger", "The Zambezi"],
+     "The Nile flows about 6,650 km to the Mediterranean", 'geography', ['physical'], 'easy'),
+    ("What is the largest ocean on Earth?", "The Pacific Ocean", ["The Atlantic Ocean", "The Indian Ocean", "The Arctic Ocean"],
+     "The Pacific covers about a third of Earth's surface", 'geography', ['physical'], 'easy'),
+    ("What is the highest mountain above sea level?", "Mount Everest", ["K2", "Kangchenjunga", "Mont Blanc"],
+     "Mount Everest rises about 8,849 m above sea level", 'geography', ['physical'], 'easy'),
+    ("What is the largest hot desert in the world?", "The Sahara", ["The Gobi", "The Kalahari", "The Arabian Desert"],
+     "The Sahara covers most of North Africa", 'geography', ['physical'], 'medium'),
+    ("Which is the smallest continent by land area?", "Australia", ["Europe", "Antarctica", "South America"],
+     "Australia (Oceania's mainland) is the smallest continent", 'geography', ['continents'], 'medium'),
+    ("How many continents are there in the most common model?", "7", ["5", "6", "8"],
+     "Africa, Antarctica, Asia, Australia, Europe, North America and South America", 'geography', ['continents'], 'easy'),
+    ("How many bits are in a byte?", "8", ["4", "16", "32"],
+     "A byte is made up of 8 bits", 'computer science', ['number systems'], 'easy'),
+    ("What is the time complexity of binary search on a sorted array?", "O(log n)", ["O(n)", "O(n log n)", "O(1)"],
+     "Binary search halves the search range at each step", 'computer science', ['algorithms'], 'medium'),
+    ("What is the time complexity of linear search?", "O(n)", ["O(log n)", "O(1)", "O(n²)"],
+     "Linear search may have to check every element", 'computer science', ['algorithms'], 'easy'),
+    ("What is the worst-case time complexity of bubble sort?", "O(n²)", ["O(n)", "O(n log n)", "O(log n)"],
+     "Bubble sort compares every pair of neighbours in up to n passes", 'computer science', ['algorithms'], 'medium'),
+    ("What is the time complexity of merge sort?", "O(n log n)", ["O(n²)", "O(n)", "O(log n)"],
+     "Merge sort splits the input log n times and merges each level in O(n)", 'computer science', ['algorithms'], 'hard'),
+    ("What is the average time complexity of looking up a key in a hash table?", "O(1)", ["O(n)", "O(log n)", "O(n log n)"],
+     "Hashing takes a key straight to its bucket on average", 'computer science', ['algorithms', 'data structures'], 'medium'),
+    ("Which data structure works on a last-in, first-out (LIFO) basis?", "Stack", ["Queue", "Linked list", "Hash table"],
+     "The most recently pushed item is the first popped from a stack", 'computer science', ['data structures'], 'easy'),
+    ("Which data structure works on a first-in, first-out (FIFO) basis?", "Queue", ["Stack", "Binary tree", "Heap"],
+     "Items leave a queue in the order they arrived", 'computer science', ['data structures'], 'easy'),
+    ("What does CPU stand for?", "Central Processing Unit", ["Computer Personal Unit", "Central Program Utility", "Core Processing Utility"],
+     "The CPU executes the instructions of a program", 'computer science', ['hardware'], 'easy'),
+    ("What does RAM stand for?", "Random Access Memory", ["Read Access Memory", "Rapid Action Memory", "Run Anywhere Module"],
+     "RAM is the computer's short-term working memory", 'computer science', ['hardware'], 'easy'),
+    ("What does HTML stand for?", "HyperText Markup Language", ["High Transfer Machine Language", "HyperText Machine Logic", "Home Tool Markup Language"],
+     "HTML describes the structure of web pages", 'computer science', ['web'], 'easy'),
+    ("Who wrote \"Romeo and Juliet\"?", "William Shakespeare", ["Charles Dickens", "Jane Austen", "Christopher Marlowe"],
+     "Shakespeare wrote the play in the 1590s", 'english', ['literature'], 'easy'),
+    ("Who wrote \"Pride and Prejudice\"?", "Jane Austen", ["Charlotte Brontë", "Mary Shelley", "George Eliot"],
+     "Jane Austen published Pride and Prejudice in 1813", 'english', ['literature'], 'medium'),
+    ("Who wrote \"Nineteen Eighty-Four\"?", "George Orwell", ["Aldous Huxley", "H. G. Wells", "Ray Bradbury"],
+     "George Orwell published the novel in 1949", 'english', ['literature'], 'medium'),
+    ("Who wrote \"A Christmas Carol\"?", "Charles Dickens", ["Thomas Hardy", "Mark Twain", "Oscar Wilde"],
+     "Charles Dickens published A Christmas Carol in 1843", 'english', ['literature'], 'medium'),
+    ("Who wrote \"Frankenstein\"?", "Mary Shelley", ["Bram Stoker", "Emily Brontë", "Edgar Allan Poe"],
+     "Mary Shelley published Frankenstein in 1818", 'english', ['literature'], 'hard'),
+    ("Which word is a noun in \"The happy child ran quickly\"?", "child", ["happy", "ran", "quickly"],
+     "A noun names a person, place or thing", 'english', ['grammar'], 'easy'),
+    ("Which word is an adjective in \"The happy child ran quickly\"?", "happy", ["child", "ran", "quickly"],
+     "An adjective describes a noun", 'english', ['grammar'], 'easy'),
+    ("Which word is an adverb in \"The happy child ran quickly\"?", "quickly", ["happy", "child", "ran"],
+     "An adverb describes how an action is done", 'english', ['grammar'], 'easy'),
+    ("Which word is a verb in \"The happy child ran quickly\"?", "ran", ["happy", "child", "quickly"],
+     "A verb expresses an action or state", 'english', ['grammar'], 'easy'),
+    ("Which sentence is written in the passive voice?", "The letter was written by Sam.", ["Sam wrote the letter.", "Sam is writing a letter.", "Sam will write the letter."],
+     "In the passive voice the subject receives the action", 'english', ['grammar'], 'medium'),
+    ("Which word correctly completes: \"Their/There/They're going to the park\"?", "They're", ["Their", "There", "Theirs"],
+     "\"They're\" is the contraction of \"they are\"", 'english', ['grammar'], 'easy'),
+    ("What is a comparison using \"like\" or \"as\" called?", "Simile", ["Metaphor", "Alliteration", "Hyperbole"],
+     "A simile compares two things using \"like\" or \"as\"", 'english', ['literature'], 'medium'),
+    ("What is the repetition of initial consonant sounds called?", "Alliteration", ["Assonance", "Onomatopoeia", "Rhyme"],
+     "\"Peter Piper picked\" is an example of alliteration", 'english', ['literature'], 'medium'),
+    ("What is an exaggeration used for emphasis called?", "Hyperbole", ["Irony", "Simile", "Personification"],
+     "\"I've told you a million times\" is a hyperbole", 'english', ['literature'], 'medium'),
+]
+
+SI_UNITS = [
+    ('force', 'Newton'), ('energy', 'Joule'), ('power', 'Watt'), ('pressure', 'Pascal'),
+    ('electric current', 'Ampere'), ('electric potential difference', 'Volt'), ('electrical resistance', 'Ohm'),
+    ('frequency', 'Hertz'), ('electric charge', 'Coulomb'), ('thermodynamic temperature', 'Kelvin'),
+    ('mass', 'Kilogram'), ('length', 'Metre'), ('time', 'Second'), ('amount of substance', 'Mole'),
+    ('luminous intensity', 'Candela')
+]
+
+# (name, role phrased to follow "responsible for"); some names are plural
+ORGANELLES = [
+    ('Nucleus', 'holding the cell\'s genetic material and controlling its activities'),
+    ('Mitochondria', 'releasing energy from glucose through aerobic respiration'),
+    ('Ribosome', 'assembling proteins from amino acids'),
+    ('Chloroplast', 'carrying out photosynthesis in plant cells'),
+    ('Cell membrane', 'controlling which substances enter and leave the cell'),
+    ('Cell wall', 'giving plant cells structural support'),
+    ('Vacuole', 'storing water and dissolved substances, keeping plant cells firm'),
+    ('Golgi apparatus', 'modifying, sorting and packaging proteins for transport'),
+    ('Lysosome', 'breaking down waste material using digestive enzymes')
+]
+
+ORGANS = [
+    ('Heart', 'pumping blood around the body'), ('Lungs', 'exchanging oxygen and carbon dioxide with the blood'),
+    ('Kidneys', 'filtering waste from the blood to make urine'), ('Liver', 'producing bile and removing toxins from the blood'),
+    ('Small intestine', 'absorbing most nutrients from digested food'), ('Stomach', 'starting protein digestion with acid and enzymes'),
+    ('Brain', 'processing information from the senses and coordinating the body'),
+    ('Pancreas', 'releasing insulin to control blood sugar')
+]
+
+PLANETS = ['Mercury', 'Venus', 'Earth', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune']
+ORDINALS = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth']
+
+SYNONYMS = [
+    ('happy', 'joyful'), ('big', 'large'), ('fast', 'quick'), ('begin', 'start'), ('smart', 'intelligent'),
+    ('brave', 'courageous'), ('ancient', 'old'), ('shout', 'yell'), ('rich', 'wealthy'), ('quiet', 'silent'),
+    ('end', 'finish'), ('choose', 'select'), ('help', 'assist'), ('buy', 'purchase'), ('easy', 'simple'),
+    ('calm', 'peaceful'), ('tiny', 'minute'), ('angry', 'furious'), ('hard', 'difficult'), ('sad', 'unhappy')
+]
+
+ANTONYMS = [
+    ('hot', 'cold'), ('ancient', 'modern'), ('generous', 'selfish'), ('increase', 'decrease'), ('victory', 'defeat'),
+    ('brave', 'cowardly'), ('expand', 'contract'), ('permanent', 'temporary'), ('rare', 'common'), ('accept', 'reject'),
+    ('include', 'exclude'), ('visible', 'invisible'), ('maximum', 'minimum'), ('arrive', 'depart'), ('ascend', 'descend')
+]
+
+
+class Builder:
+    """Collects questions, shuffling options and skipping duplicates"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.rows = []
+        self.seen = set()
+
+    def add(self, topic, tags, difficulty, question, answer, distractors, explanation):
+        """Add one question; answer and three distinct distractors become shuffled options"""
+        options = [str(answer)] + [str(option) for option in distractors]
+        if len(set(options)) != 4 or question in self.seen:
+            return
+        self.seen.add(question)
+        self.rng.shuffle(options)
+        self.rows.append((topic, difficulty, list(tags), question, options, options.index(str(answer)), explanation))
+
+    def pick(self, values, exclude, count=3):
+        """Distinct random values other than exclude"""
+        pool = sorted({value for value in values if value != exclude}, key=str)
+        return self.rng.sample(pool, count)
+
+    def near(self, answer, spread, count=3, minimum=None):
+        """Distinct plausible numeric distractors around an integer answer"""
+        values = set()
+        while len(values) < count:
+            value = answer + self.rng.choice([-1, 1]) * self.rng.randint(1, spread)
+            if value != answer and (minimum is None or value >= minimum):
+                values.add(value)
+        return sorted(values)
+
+
+def add_arithmetic(b):
+    """Whole-number arithmetic at three levels"""
+    rng = b.rng
+    for _ in range(220):
+        x, y = rng.randint(2, 60), rng.randint(2, 60)
+        b.add('mathematics', ['arithmetic'], 'easy', f"What is {x} + {y}?", x + y, b.near(x + y, 10, minimum=0),
+              f"{x} + {y} = {x + y}")
+    for _ in range(160):
+        x, y = rng.randint(20, 99), rng.randint(1, 19)
+        b.add('mathematics', ['arithmetic'], 'easy', f"What is {x} − {y}?", x - y, b.near(x - y, 10, minimum=0),
+              f"{x} − {y} = {x - y}")
+    for x in range(2, 13):
+        for y in range(2, 13):
+            b.add('mathematics', ['arithmetic', 'multiplication'], 'easy', f"What is {x} × {y}?", x * y,
+                  b.near(x * y, max(x, y), minimum=1), f"{x} multiplied by {y} equals {x * y}")
+            b.add('mathematics', ['arithmetic', 'division'], 'easy', f"What is {x * y} ÷ {x}?", y,
+                  b.near(y, 4, minimum=1), f"{x * y} divided by {x} equals {y}")
+    for _ in range(180):
+        x, y = rng.randint(12, 99), rng.randint(3, 9)
+        b.add('mathematics', ['arithmetic', 'multiplication'], 'medium', f"What is {x} × {y}?", x * y,
+              b.near(x * y, 3 * y, minimum=1), f"{x} × {y} = {x * y}")
+    for _ in range(160):
+        x, y, z = rng.randint(2, 20), rng.randint(2, 9), rng.randint(2, 9)
+        answer = x + y * z
+        b.add('mathematics', ['arithmetic', 'order of operations'], 'medium', f"What is {x} + {y} × {z}?", answer,
+              [(x + y) * z] + b.near(answer, 6, count=2, minimum=0) if (x + y) * z != answer else b.near(answer, 6, minimum=0),
+              f"Multiplication comes first: {y} × {z} = {y * z}, then {x} + {y * z} = {answer}")
+    for n in range(2, 26):
+        b.add('mathematics', ['arithmetic', 'powers'], 'medium', f"What is {n} squared?", n * n,
+              [n * 2, (n + 1) ** 2, (n - 1) ** 2] if n > 2 else [4 + 1, 9, 1],
+              f"{n} × {n} = {n * n}")
+        b.add('mathematics', ['arithmetic', 'powers'], 'medium', f"What is the square root of {n * n}?", n,
+              b.near(n, 4, minimum=1), f"{n} × {n} = {n * n}")
+
+
+def add_percentages_and_fractions(b):
+    """Percentages of whole numbers and fraction sums"""
+    rng = b.rng
+    for _ in range(180):
+        percent = rng.choice([10, 20, 25, 50, 75, 5, 15, 30, 40, 60])
+        base = rng.choice([20, 40, 60, 80, 100, 120, 160, 200, 240, 300, 400, 500])
+        answer = Fraction(percent * base, 100)
+        if answer.denominator != 1:
+            continue
+        answer = int(answer)
+        difficulty = 'easy' if percent in (10, 50) else 'medium'
+        b.add('mathematics', ['percentages'], difficulty, f"What is {percent}% of {base}?", answer,
+              b.near(answer, max(5, answer // 3), minimum=1), f"{percent}% of {base} = {percent}/100 × {base} = {answer}")
+    for _ in range(160):
+        d = rng.choice([3, 4, 5, 6, 8, 10, 12])
+        p, q = rng.randint(1, d - 1), rng.randint(1, d - 1)
+        total = Fraction(p, d) + Fraction(q, d)
+        wrong = [Fraction(p + q, d + d), Fraction(abs(p - q) or 1, d), total + Fraction(1, d)]
+        b.add('mathematics', ['fractions'], 'medium', f"What is {p}/{d} + {q}/{d} in simplest form?", fraction_text(total),
+              [fraction_text(value) for value in wrong], f"{p}/{d} + {q}/{d} = {p + q}/{d} = {fraction_text(total)}")
+    for _ in range(120):
+        d1, d2 = rng.sample([2, 3, 4, 5, 6, 8], 2)
+        p, q = rng.randint(1, d1 - 1), rng.randint(1, d2 - 1)
+        total = Fraction(p, d1) + Fraction(q, d2)
+        wrong = [Fraction(p + q, d1 + d2), total + Fraction(1, d1 * d2), total - Fraction(1, d1 * d2)]
+        b.add('mathematics', ['fractions'], 'hard', f"What is {p}/{d1} + {q}/{d2} in simplest form?", fraction_text(total),
+              [fraction_text(value) for value in wrong],
+              f"Over a common denominator of {d1 * d2 // gcd(d1, d2)}: {p}/{d1} + {q}/{d2} = {fraction_text(total)}")
+
+
+def add_algebra(b):
+    """Linear and factorable quadratic equations"""
+    rng = b.rng
+    for _ in range(220):
+        a, x = rng.randint(2, 9), rng.randint(-10, 12)
+        c = rng.randint(-15, 20)
+        result = a * x + c
+        sign = '+' if c >= 0 else '−'
+        difficulty = 'medium' if x > 0 and c >= 0 else 'hard'
+        b.add('mathematics', ['algebra', 'equations'], difficulty, f"Solve for x: {a}x {sign} {abs(c)} = {result}", x,
+              b.near(x, 5), f"{a}x = {result} {'−' if c >= 0 else '+'} {abs(c)} = {a * x}, so x = {x}")
+    for _ in range(120):
+        p, q = sorted(rng.sample(range(-9, 10), 2))
+        if p == 0 or q == 0:
+            continue
+        s, t = -(p + q), p * q
+        equation = 'x²' + (f" {'+' if s >= 0 else '−'} {abs(s)}x" if s else '') + f" {'+' if t >= 0 else '−'} {abs(t)} = 0"
+        answer = f"x = {p} or x = {q}"
+        wrong = [f"x = {-p} or x = {-q}", f"x = {p} or x = {-q}", f"x = {-p} or x = {q}"]
+        b.add('mathematics', ['algebra', 'quadratics'], 'hard', f"Solve {equation}", answer, wrong,
+              f"The quadratic factors as (x {'−' if p >= 0 else '+'} {abs(p)})(x {'−' if q >= 0 else '+'} {abs(q)}) = 0")
+
+
+def add_geometry_and_statistics(b):
+    """Areas, the Pythagorean theorem and averages"""
+    rng = b.rng
+    for _ in range(120):
+        w, h = rng.randint(2, 20), rng.randint(2, 20)
+        b.add('mathematics', ['geometry'], 'easy', f"What is the area of a rectangle {w} cm wide and {h} cm tall (in cm²)?",
+              w * h, [2 * (w + h), w + h, w * h + w], f"Area = width × height = {w} × {h} = {w * h} cm²")
+        b.add('mathematics', ['geometry'], 'easy', f"What is the perimeter of a rectangle {w} cm by {h} cm (in cm)?",
+              2 * (w + h), [w * h, w + h, 2 * w + h], f"Perimeter = 2 × ({w} + {h}) = {2 * (w + h)} cm")
+    for k in range(1, 11):
+        for a, c, hyp in ((3, 4, 5), (5, 12, 13), (8, 15, 17), (7, 24, 25)):
+            b.add('mathematics', ['geometry', 'pythagoras'], 'hard',
+                  f"A right triangle has legs of {a * k} and {c * k}. How long is the hypotenuse?", hyp * k,
+                  [a * k + c * k, hyp * k + k, hyp * k - k], f"√({a * k}² + {c * k}²) = {hyp * k}")
+    for r in range(1, 16):
+        b.add('mathematics', ['geometry', 'circles'], 'medium', f"What is the area of a circle with radius {r}?",
+              f"{r * r}π", [f"{2 * r}π", f"{r}π", f"{r * r * 2}π"], f"Area = πr² = π × {r}² = {r * r}π")
+    for _ in range(140):
+        values = [rng.randint(1, 30) for _ in range(4)]
+        values.append(rng.randint(1, 30))
+        total = sum(values)
+        if total % 5:
+            values[-1] += 5 - total % 5
+        mean = sum(values) // 5
+        listed = ', '.join(str(value) for value in values)
+        b.add('mathematics', ['statistics'], 'medium', f"What is the mean of {listed}?", mean, b.near(mean, 4, minimum=0),
+              f"({' + '.join(str(value) for value in values)}) ÷ 5 = {mean}")
+        ordered = sorted(values)
+        b.add('mathematics', ['statistics'], 'medium', f"What is the median of {listed}?", ordered[2],
+              b.pick(range(0, 40), ordered[2]), f"In order {', '.join(str(v) for v in ordered)}; the middle value is {ordered[2]}")
+
+
+def add_calculus(b):
+    """Power-rule derivatives"""
+    rng = b.rng
+    for _ in range(160):
+        a, n = rng.randint(1, 9), rng.randint(2, 7)
+        answer = term(a * n, n - 1)
+        wrong = [term(a, n - 1), term(a * n, n), term(a * (n - 1), n - 1)]
+        b.add('mathematics', ['calculus', 'derivatives'], 'hard', f"What is the derivative of {term(a, n)}?", answer, wrong,
+              f"By the power rule d/dx(ax^n) = n·a·x^(n−1), so the derivative is {answer}")
+
+
+def add_science(b):
+    """Chemistry, physics, biology and astronomy facts and formulas"""
+    rng = b.rng
+    symbols = [symbol for _, symbol, _ in ELEMENTS]
+    names = [name for name, _, _ in ELEMENTS]
+    for name, symbol, number in ELEMENTS:
+        difficulty = 'easy' if name in EASY_ELEMENTS else ('hard' if symbol in HARD_SYMBOLS else 'medium')
+        b.add('science', ['chemistry', 'elements'], difficulty, f"What is the chemical symbol for {name}?", symbol,
+              b.pick(symbols, symbol), f"{name} has the symbol {symbol}")
+        b.add('science', ['chemistry', 'elements'], 'hard' if difficulty != 'easy' else 'medium',
+              f"Which element has the symbol {symbol}?", name, b.pick(names, name), f"{symbol} is the symbol for {name}")
+        b.add('science', ['chemistry', 'elements'], 'medium' if number <= 20 else 'hard',
+              f"What is the atomic number of {name}?", number, b.near(number, 5, minimum=1),
+              f"{name} has {number} protons, so its atomic number is {number}")
+    for ph in range(0, 15):
+        answer = 'Acidic' if ph < 7 else ('Neutral' if ph == 7 else 'Alkaline')
+        b.add('science', ['chemistry', 'acids and bases'], 'easy', f"A solution has a pH of {ph}. What is it?", answer,
+              [option for option in ('Acidic', 'Neutral', 'Alkaline', 'Saturated') if option != answer],
+              "Below 7 is acidic, 7 is neutral and above 7 is alkaline")
+
+    units = [unit for _, unit in SI_UNITS]
+    for quantity, unit in SI_UNITS:
+        b.add('science', ['physics', 'units'], 'medium', f"What is the SI unit of {quantity}?", unit,
+              b.pick(units, unit), f"{quantity.capitalize()} is measured in {unit.lower()}s")
+    for _ in range(120):
+        t = rng.randint(2, 12)
+        v = rng.randint(2, 30)
+        b.add('science', ['physics', 'motion'], 'easy',
+              f"A cyclist travels {v * t} m in {t} s. What is their average speed in m/s?", v,
+              b.near(v, 5, minimum=1), f"Speed = distance ÷ time = {v * t} ÷ {t} = {v} m/s")
+    for _ in range(120):
+        m, a = rng.randint(2, 50), rng.randint(2, 12)
+        b.add('science', ['physics', 'forces'], 'medium',
+              f"What net force in newtons accelerates a {m} kg mass at {a} m/s²?", m * a,
+              [m + a, m * a + a, abs(m * a - m)], f"F = m × a = {m} × {a} = {m * a} N")
+    for _ in range(120):
+        i, r = rng.randint(1, 12), rng.randint(2, 50)
+        b.add('science', ['physics', 'electricity'], 'medium',
+              f"A current of {i} A flows through a {r} Ω resistor. What is the voltage across it in volts?", i * r,
+              [r, i + r, i * r + r] if r != i * r else [i + r, 2 * i * r, i * r + 1], f"V = I × R = {i} × {r} = {i * r} V")
+    for _ in range(100):
+        m, v = rng.choice([2, 4, 6, 8, 10, 20]), rng.randint(2, 15)
+        energy = m * v * v // 2
+        b.add('science', ['physics', 'energy'], 'hard',
+              f"What is the kinetic energy in joules of a {m} kg object moving at {v} m/s?", energy,
+              [m * v, m * v * v, m * v // 2], f"KE = ½mv² = ½ × {m} × {v}² = {energy} J")
+    for _ in range(80):
+        m = rng.randint(2, 80)
+        b.add('science', ['physics', 'forces'], 'medium',
+              f"Taking g = 10 N/kg, what is the weight in newtons of a {m} kg object?", m * 10,
+              [m, m + 10, m * 100], f"W = m × g = {m} × 10 = {m * 10} N")
+
+    organelles = [name for name, _ in ORGANELLES]
+    for name, role in ORGANELLES:
+        b.add('science', ['biology', 'cells'], 'medium', f"Which part of a cell is responsible for {role}?", name,
+              b.pick(organelles, name), f"{name}: responsible for {role}")
+    organs = [name for name, _ in ORGANS]
+    for name, role in ORGANS:
+        b.add('science', ['biology', 'human body'], 'easy', f"Which organ is responsible for {role}?", name,
+              b.pick(organs, name), f"{name}: responsible for {role}")
+    for position, planet in enumerate(PLANETS):
+        b.add('science', ['astronomy'], 'easy' if position in (0, 2) else 'medium',
+              f"Which is the {ORDINALS[position]} planet from the Sun?", planet, b.pick(PLANETS, planet),
+              f"In order from the Sun: {', '.join(PLANETS)}")
+
+
+def add_history(b):
+    """Dates of major events"""
+    for event, year, difficulty in EVENTS:
+        b.add('history', ['dates', 'modern' if year >= 1900 else 'early modern' if year >= 1450 else 'medieval'],
+              difficulty, f"In which year {event}?", year, b.near(year, 12), f"This happened in {year}")
+
+
+def country_name(country):
+    """A country's name as it reads mid-sentence ("the Netherlands")"""
+    return f"the {country}" if country in COUNTRIES_WITH_ARTICLE else country
+
+
+def add_geography(b):
+    """Capitals and continents"""
+    capitals = [capital for _, capital, _, _ in COUNTRIES]
+    continents = sorted({continent for _, _, continent, _ in COUNTRIES} | {'Antarctica'})
+    for country, capital, continent, difficulty in COUNTRIES:
+        name = country_name(country)
+        b.add('geography', ['capitals'], difficulty, f"What is the capital of {name}?", capital,
+              b.pick(capitals, capital), f"The capital of {name} is {capital}")
+        b.add('geography', ['capitals'], 'hard' if difficulty != 'easy' else 'medium',
+              f"{capital} is the capital of which country?", country,
+              b.pick([name for name, _, _, _ in COUNTRIES], country), f"{capital} is the capital of {name}")
+        b.add('geography', ['continents'], 'easy' if difficulty == 'easy' else 'medium',
+              f"On which continent is {name}?", continent, b.pick(continents, continent),
+              f"{name[0].upper()}{name[1:]} is in {continent}")
+
+
+def add_computer_science(b):
+    """Number bases and logic gates"""
+    rng = b.rng
+    for n in rng.sample(range(2, 256), 150):
+        answer = format(n, 'b')
+        wrong = {format(n ^ (1 << bit), 'b') for bit in rng.sample(range(max(answer.__len__(), 2)), 2)}
+        wrong |= {format(n + 1, 'b'), format(max(n - 1, 1), 'b')}
+        wrong.discard(answer)
+        b.add('computer science', ['number systems', 'binary'], 'medium', f"What is {n} in binary?", answer,
+              sorted(wrong)[:3], f"{n} = {' + '.join(str(1 << i) for i in range(answer.__len__()) if n >> i & 1)}")
+    for n in rng.sample(range(2, 256), 120):
+        binary = format(n, 'b')
+        b.add('computer science', ['number systems', 'binary'], 'medium', f"What is the binary number {binary} in decimal?", n,
+              b.near(n, 8, minimum=0), f"{binary} = {' + '.join(str(1 << i) for i in range(len(binary)) if n >> i & 1)} = {n}")
+    for n in rng.sample(range(16, 256), 100):
+        hexadecimal = format(n, 'X')
+        b.add('computer science', ['number systems', 'hexadecimal'], 'hard',
+              f"What is the hexadecimal number {hexadecimal} in decimal?", n, b.near(n, 16, minimum=0),
+              f"{hexadecimal} = {n // 16} × 16 + {n % 16} = {n}")
+    gates = {'AND': lambda x, y: x & y, 'OR': lambda x, y: x | y, 'XOR': lambda x, y: x ^ y,
+             'NAND': lambda x, y: 1 - (x & y), 'NOR': lambda x, y: 1 - (x | y)}
+    for gate, function in gates.items():
+        for x in (0, 1):
+            for y in (0, 1):
+                answer = function(x, y)
+                b.add('computer science', ['logic'], 'easy' if gate in ('AND', 'OR') else 'medium',
+                      f"What is the output of {x} {gate} {y}?", str(answer),
+                      [str(1 - answer), 'Undefined', str(x + y) if x + y not in (0, 1) else '2'],
+                      f"{gate} gives {answer} for inputs {x} and {y}")
+
+
+def add_english(b):
+    """Synonyms and antonyms"""
+    synonyms = [synonym for _, synonym in SYNONYMS]
+    for word, synonym in SYNONYMS:
+        b.add('english', ['vocabulary', 'synonyms'], 'easy', f"Which word means the same as \"{word}\"?", synonym,
+              b.pick(synonyms, synonym), f"\"{synonym}\" is a synonym of \"{word}\"")
+    antonyms = [antonym for _, antonym in ANTONYMS]
+    for word, antonym in ANTONYMS:
+        b.add('english', ['vocabulary', 'antonyms'], 'medium', f"Which word is the opposite of \"{word}\"?", antonym,
+              b.pick(antonyms, antonym), f"\"{antonym}\" is an antonym of \"{word}\"")
+
+
+def gcd(a, b):
+    """Greatest common divisor"""
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def fraction_text(value):
+    """A Fraction as "p/q", or a whole number"""
+    value = Fraction(value)
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+def term(coefficient, power):
+    """A monomial like 6x³"""
+    superscripts = str.maketrans('0123456789', '⁰¹²³⁴⁵⁶⁷⁸⁹')
+    prefix = '' if coefficient == 1 else str(coefficient)
+    if power == 0:
+        return str(coefficient)
+    if power == 1:
+        return f"{prefix}x"
+    return f"{prefix}x{str(power).translate(superscripts)}"
+
+
+def add_extra(b, path):
+    """Questions from a reviewed JSON export"""
+    with open(path, encoding='utf-8') as f:
+        questions = json.load(f)
+    for question in questions:
+        options = question['options']
+        answer = options[question['correct_answer']]
+        b.add(question['topic'].lower(), [tag.lower() for tag in question.get('tags', [])],
+              question.get('difficulty', 'medium').lower(), question['question'], answer,
+              [option for option in options if option != answer], question.get('explanation', ''))
+
+
+def write_bank(rows, path):
+    """Write rows in the compact indexed format"""
+    topics = sorted({row[0] for row in rows})
+    tags = sorted({tag for row in rows for tag in row[2]})
+    topic_index = {topic: i for i, topic in enumerate(topics)}
+    tag_index = {tag: i for i, tag in enumerate(tags)}
+    difficulty_index = {difficulty: i for i, difficulty in enumerate(DIFFICULTIES)}
+    data = {
+        "version": 1,
+        "topics": topics,
+        "difficulties": DIFFICULTIES,
+        "tags": tags,
+        "aliases": ALIASES,
+        "items": [
+            [topic_index[topic], difficulty_index[difficulty], [tag_index[tag] for tag in item_tags],
+             question, options, correct, explanation]
+            for topic, difficulty, item_tags, question, options, correct, explanation in rows
+        ]
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as f:
+        # mtime=0 keeps the output byte-identical between builds
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(payload)
+    return len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--extra', action='append', default=[], help='JSON file of additional questions')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    b = Builder(args.seed)
+    for question, answer, distractors, explanation, topic, tags, difficulty in CURATED:
+        b.add(topic, tags, difficulty, question, answer, distractors, explanation)
+    add_arithmetic(b)
+    add_percentages_and_fractions(b)
+    add_algebra(b)
+    add_geometry_and_statistics(b)
+    add_calculus(b)
+    add_science(b)
+    add_history(b)
+    add_geography(b)
+    add_computer_science(b)
+    add_english(b)
+    for path in args.extra:
+        add_extra(b, path)
+
+    raw_size = write_bank(b.rows, args.output)
+    counts = {}
+    for topic, difficulty, *_ in b.rows:
+        counts.setdefault(topic, {}).setdefault(difficulty, 0)
+        counts[topic][difficulty] += 1
+    print(f"{len(b.rows)} questions, {raw_size // 1024} KB raw, "
+          f"{os.path.getsize(args.output) // 1024} KB compressed -> {os.path.relpath(args.output, ROOT)}")
+    for topic in sorted(counts):
+        print(f"  {topic:<18} " + '  '.join(f"{d} {counts[topic].get(d, 0)}" for d in DIFFICULTIES))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+Recompute every user's quiz score prediction
+
+Retrains the performance model on the full quiz history in the ability
+store and rewrites the precomputed prediction table that the
+performance-prediction service reads. Meant to run on a schedule (cron or
+a CI job) so requests never wait for training; the service also refreshes
+in the background when the table is older than
+PERFORMANCE_PREDICTION_MAX_AGE.
+
+Run from the repository root:
+    python scripts/refresh_predictions.py [--path /tmp/edusense-ability.sqlite3]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from _lib.adaptive_difficulty import DEFAULT_PATH
+from _lib.performance_model import PerformancePredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--path', default=os.environ.get('ABILITY_STORE_PATH') or DEFAULT_PATH)
+    args = parser.parse_args()
+
+    report = PerformancePredictor(args.path).refresh()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()